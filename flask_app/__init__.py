@@ -20,16 +20,20 @@ from flask_app.controllers.catalogo_controller import catalogo_bp
 from flask_app.controllers.operador_controller import operador_bp
 from flask_app.controllers.admin_controller import admin_bp
 from flask_app.controllers.inbound_controller import inbound_bp
+from flask_app.controllers.dashboard_controller import dashboard_bp
+from flask_app.controllers.reporte_controller import reporte_bp
 
 # Importar utilidades
 from flask_app.utils.error_handler import registrar_error
 from flask_app.utils.logger import configurar_logging, log_request
+from flask_app.utils.json_provider import configurar_json
 
 app = Flask(__name__)
 
 # Configuración
 app.secret_key = os.getenv('SECRET_KEY', 'clave_muy_secreta_cambiar_en_produccion')
 app.config['JSON_AS_ASCII'] = False  # Para soportar caracteres especiales
+configurar_json(app)  # orjson si está disponible (ver JSON_PROVIDER)
 app.config['MAX_CONTENT_LENGTH'] = int(os.getenv('MAX_CONTENT_LENGTH', 16777216))  # 16MB
 # Session configuration: duración por defecto y renovación en cada petición
 app.permanent_session_lifetime = timedelta(days=int(os.getenv('SESSION_LIFETIME_DAYS', 7)))
@@ -64,6 +68,8 @@ app.register_blueprint(catalogo_bp)
 app.register_blueprint(operador_bp)
 app.register_blueprint(admin_bp)
 app.register_blueprint(inbound_bp)
+app.register_blueprint(dashboard_bp)
+app.register_blueprint(reporte_bp)
 
 # Health check global
 @app.route('/health', methods=['GET'])
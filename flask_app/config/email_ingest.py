@@ -3,38 +3,48 @@ Configuración de ejemplo para el ingestor de email (IMAP).
 
 Rellena `IMAP` con los datos reales de la cuenta de prueba en cPanel.
 `ADDRESS_MAPPING` mapea direcciones de correo (recipients) a `id_depto` en la DB.
+Cada valor se puede sobrescribir por entorno (IMAP_*, SMTP_*), p. ej. para apuntar
+a los servidores locales de scripts/correo_local.py.
 """
+import os
+
+
+def _bool(nombre, defecto):
+    valor = os.getenv(nombre)
+    if valor is None or valor.strip() == '':
+        return defecto
+    return valor.strip().lower() in ('1', 'true', 'yes', 'on')
 
 
 IMAP = {
-    'HOST': 'imap.gmail.com',
-    'PORT': 993,
-    'USER': 'soporteticketrecrear@gmail.com',
-    'PASSWORD': 'wlfp ecri riqs oeaa',
-    'USE_SSL': True,
-    'FOLDER': 'INBOX',
+    'HOST': os.getenv('IMAP_HOST') or 'imap.gmail.com',
+    'PORT': int(os.getenv('IMAP_PORT') or 993),
+    'USER': os.getenv('IMAP_USER') or 'soporteticketrecrear@gmail.com',
+    'PASSWORD': os.getenv('IMAP_PASSWORD') or 'wlfp ecri riqs oeaa',
+    'USE_SSL': _bool('IMAP_USE_SSL', True),
+    'FOLDER': os.getenv('IMAP_FOLDER') or 'INBOX',
     # Search criteria for IMAP (default: UNSEEN). Use ALL to process even read emails.
-    'SEARCH': 'UNSEEN'
+    'SEARCH': os.getenv('IMAP_SEARCH') or 'UNSEEN'
 }
 
 # Mapeo simple: email -> id_depto (ajusta el id si tu depto tiene otro id)
 ADDRESS_MAPPING = {
-    'soporteticketrecrear@gmail.com': 1,
+    IMAP['USER'].lower(): int(os.getenv('IMAP_ID_DEPTO') or 1),
 }
 
 # Opciones SMTP para enviar respuestas automáticas (usa la misma cuenta por defecto)
 SMTP = {
-    'HOST': 'smtp.gmail.com',
-    'PORT': 587,
-    'USER': IMAP['USER'],
-    'PASSWORD': IMAP['PASSWORD'],
-    'USE_TLS': True,
+    'HOST': os.getenv('SMTP_HOST') or 'smtp.gmail.com',
+    'PORT': int(os.getenv('SMTP_PORT') or 587),
+    'USER': os.getenv('SMTP_USER') or IMAP['USER'],
+    'PASSWORD': os.getenv('SMTP_PASSWORD') or IMAP['PASSWORD'],
+    'USE_TLS': _bool('SMTP_USE_TLS', True),
     'FROM_NAME': 'Soporte',
-    'FROM_ADDRESS': IMAP['USER']
+    'FROM_ADDRESS': os.getenv('SMTP_USER') or IMAP['USER']
 }
 
 # Habilitar/deshabilitar envío de respuesta automática
-SEND_AUTOREPLY = True
+SEND_AUTOREPLY = _bool('SEND_AUTOREPLY', True)
 
 # Intervalo de polling en segundos (si se usa polling)
 POLL_INTERVAL = 60
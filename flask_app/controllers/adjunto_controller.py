@@ -1,15 +1,53 @@
-from flask import Blueprint, request, jsonify, send_file
+from flask import Blueprint, Response, request, jsonify, redirect, url_for
 from werkzeug.utils import secure_filename
 from flask_app.models.adjunto_model import AdjuntoModel
 from flask_app.models.mensaje_model import MensajeModel
 from flask_app.models.ticket_model import TicketModel
-from flask_app.utils.jwt_utils import token_requerido
-from flask_app.utils.error_handler import manejar_errores, validar_campos_requeridos, ValidationError, NotFoundError
+from flask_app.models.adjunto_subida_model import AdjuntoSubidaModel, SubidaConflicto, SUBIDA_MAX_BYTES
+from flask_app.utils.jwt_utils import (
+    token_requerido, rol_requerido, generar_firma_descarga, verificar_firma_descarga, ENLACE_DESCARGA_EXPIRES,
+)
+from flask_app.utils.error_handler import manejar_errores, validar_campos_requeridos, AppError, ValidationError, NotFoundError, AuthorizationError, AuthenticationError
+from flask_app.utils.descargas import enviar_archivo, etag_archivo
+from flask_app.utils.zip_streaming import fragmentos_zip, nombres_unicos
+from flask_app.services import almacenamiento, optimizacion_imagenes, vistas_previas
+from datetime import datetime
 import os
+import re
 
 adjunto_bp = Blueprint('adjunto', __name__, url_prefix='/api')
 
 
+def _id_operador(operador_actual):
+    return (
+        operador_actual.get('operador_id')
+        or operador_actual.get('id_operador')
+        or operador_actual.get('id')
+    )
+
+
+def _registrar_historial_adjunto(operador_actual, id_ticket, filename):
+    """Agrega 'Adjunto agregado' al historial del ticket (sin bloquear la subida)."""
+    try:
+        id_operador = _id_operador(operador_actual)
+        if id_operador:
+            from flask_app.config.conexion_login import execute_query
+            execute_query(
+                """
+                INSERT INTO historial_acciones_ticket
+                    (id_ticket, id_operador, accion, valor_nuevo, fecha)
+                VALUES
+                    (%s, %s, 'Adjunto agregado', %s, NOW())
+                """,
+                (int(id_ticket), int(id_operador), filename),
+                commit=True,
+            )
+    except Exception:
+        # No bloquear subida por fallas en historial
+        import logging
+        logging.exception('No se pudo registrar historial: Adjunto agregado')
+
+
 @adjunto_bp.route('/adjuntos/upload', methods=['POST'])
 @manejar_errores
 @token_requerido
@@ -35,6 +73,28 @@ def subir_adjunto_legacy(operador_actual):
     return subir_adjunto(operador_actual, mensaje_id_int)
 
 
+def _enriquecer_adjunto(a):
+    """Agrega ext, size_bytes y optimizada (no bloquear por fallas de FS)."""
+    if not isinstance(a, dict):
+        return
+    nom = a.get('nom_adj')
+    if nom:
+        a['ext'] = os.path.splitext(nom)[1].lstrip('.').lower() or None
+    # La descarga por defecto sirve la variante optimizada (ver descargar_adjunto)
+    a['optimizada'] = bool(a.get('ruta_optimizada'))
+    if a.get('tamano') is not None:
+        a['size_bytes'] = a['tamano']
+        return
+    try:
+        # Filas anteriores a los metadatos: solo archivos en disco local
+        # (en S3 sería un HEAD por adjunto)
+        ruta = almacenamiento.ruta_local(a['ruta']) if a.get('ruta') else None
+        if ruta and os.path.exists(ruta):
+            a['size_bytes'] = os.path.getsize(ruta)
+    except Exception:
+        pass
+
+
 @adjunto_bp.route('/tickets/<int:ticket_id>/adjuntos', methods=['GET'])
 @manejar_errores
 def listar_adjuntos_ticket(ticket_id):
@@ -54,18 +114,7 @@ def listar_adjuntos_ticket(ticket_id):
 
     # Enriquecer con metadatos (no bloquear por fallas de FS)
     for a in (adjuntos or []):
-        try:
-            nom = a.get('nom_adj') if isinstance(a, dict) else None
-            if isinstance(a, dict) and nom:
-                a['ext'] = os.path.splitext(nom)[1].lstrip('.').lower() or None
-        except Exception:
-            pass
-        try:
-            ruta = a.get('ruta') if isinstance(a, dict) else None
-            if isinstance(a, dict) and ruta and os.path.exists(ruta):
-                a['size_bytes'] = os.path.getsize(ruta)
-        except Exception:
-            pass
+        _enriquecer_adjunto(a)
     
     return jsonify({
         'success': True,
@@ -74,6 +123,110 @@ def listar_adjuntos_ticket(ticket_id):
     }), 200
 
 
+def _abrir_para_zip(ref):
+    datos = almacenamiento.info(ref) if ref else None
+    if datos is None:
+        raise FileNotFoundError(ref)
+    return almacenamiento.abrir(ref), datos.tamano, datos.modificado
+
+
+def _operador_de_firma(firma, recurso):
+    """Operador de un enlace firmado (ver generar_firma_descarga) o 401."""
+    operador = verificar_firma_descarga(firma, recurso)
+    if 'error' in operador:
+        raise AuthenticationError(operador['error'])
+    return operador
+
+
+@adjunto_bp.route('/tickets/<int:ticket_id>/adjuntos.zip', methods=['GET'])
+@token_requerido
+@manejar_errores
+def descargar_adjuntos_zip(operador_actual, ticket_id):
+    """
+    Descarga todos los adjuntos de un ticket en un ZIP.
+    
+    GET /api/tickets/{ticket_id}/adjuntos.zip
+    Headers:
+        - Authorization: Bearer {token}
+    
+    El ZIP se arma mientras se envía (memoria constante, sin archivo
+    temporal); ver utils/zip_streaming.py. Solo operadores que pueden ver
+    el ticket. Para descargarlo con un enlace normal del navegador (sin
+    header) ver enlace_adjuntos_zip.
+    
+    Response: application/zip
+    """
+    return _enviar_zip(operador_actual, ticket_id)
+
+
+@adjunto_bp.route('/tickets/<int:ticket_id>/adjuntos.zip/enlace', methods=['POST'])
+@token_requerido
+@manejar_errores
+def enlace_adjuntos_zip(operador_actual, ticket_id):
+    """
+    Genera un enlace firmado y de corta duración para el ZIP del ticket.
+    
+    POST /api/tickets/{ticket_id}/adjuntos.zip/enlace
+    Headers:
+        - Authorization: Bearer {token}
+    
+    Como en enlace_descarga_adjunto: el navegador guarda el ZIP a medida que
+    llega en lugar de acumularlo entero en la pestaña.
+    
+    Response:
+    {
+        "success": true,
+        "url": "/api/tickets/10/adjuntos.zip/<firma>",
+        "expira_en": 600
+    }
+    """
+    if not TicketModel.operador_puede_ver_ticket(ticket_id, operador_actual):
+        raise AuthorizationError('No tiene permisos para ver los adjuntos de este ticket')
+    firma = generar_firma_descarga(operador_actual, f'zip:{ticket_id}')
+    return jsonify({
+        'success': True,
+        'url': url_for('adjunto.descargar_adjuntos_zip_firmado', ticket_id=ticket_id, firma=firma),
+        'expira_en': ENLACE_DESCARGA_EXPIRES
+    }), 200
+
+
+@adjunto_bp.route('/tickets/<int:ticket_id>/adjuntos.zip/<firma>', methods=['GET'])
+@manejar_errores
+def descargar_adjuntos_zip_firmado(ticket_id, firma):
+    """
+    Descarga el ZIP de adjuntos con un enlace firmado (ver enlace_adjuntos_zip).
+    
+    GET /api/tickets/{ticket_id}/adjuntos.zip/{firma}
+    """
+    return _enviar_zip(_operador_de_firma(firma, f'zip:{ticket_id}'), ticket_id)
+
+
+def _enviar_zip(operador_actual, ticket_id):
+    if not TicketModel.operador_puede_ver_ticket(ticket_id, operador_actual):
+        raise AuthorizationError('No tiene permisos para ver los adjuntos de este ticket')
+
+    adjuntos = AdjuntoModel.listar_por_ticket(ticket_id) or []
+    if not adjuntos:
+        raise NotFoundError(f"El ticket {ticket_id} no tiene adjuntos")
+
+    # Orden cronológico dentro del ZIP
+    adjuntos = sorted(adjuntos, key=lambda a: (a.get('mensaje_fecha') or datetime.min, a['id_adj']))
+    nombres = nombres_unicos(a['nom_adj'] for a in adjuntos)
+    entradas = [(nombre, a.get('ruta'), a.get('mensaje_fecha')) for nombre, a in zip(nombres, adjuntos)]
+
+    return Response(
+        fragmentos_zip(entradas, abrir=_abrir_para_zip),
+        mimetype='application/zip',
+        headers={
+            'Content-Disposition': f'attachment; filename="ticket_{ticket_id}_adjuntos.zip"',
+            # Evitar que un proxy (nginx) acumule la respuesta completa
+            'X-Accel-Buffering': 'no',
+            'Cache-Control': 'no-store',
+        },
+        direct_passthrough=True,
+    )
+
+
 @adjunto_bp.route('/mensajes/<int:mensaje_id>/adjuntos', methods=['GET'])
 @manejar_errores
 def listar_adjuntos_mensaje(mensaje_id):
@@ -98,18 +251,7 @@ def listar_adjuntos_mensaje(mensaje_id):
 
     # Enriquecer con metadatos (no bloquear por fallas de FS)
     for a in (adjuntos or []):
-        try:
-            nom = a.get('nom_adj') if isinstance(a, dict) else None
-            if isinstance(a, dict) and nom:
-                a['ext'] = os.path.splitext(nom)[1].lstrip('.').lower() or None
-        except Exception:
-            pass
-        try:
-            ruta = a.get('ruta') if isinstance(a, dict) else None
-            if isinstance(a, dict) and ruta and os.path.exists(ruta):
-                a['size_bytes'] = os.path.getsize(ruta)
-        except Exception:
-            pass
+        _enriquecer_adjunto(a)
     
     return jsonify({
         'success': True,
@@ -137,7 +279,10 @@ def subir_adjunto(operador_actual, mensaje_id):
         "adjunto": {
             "id_adj": 1,
             "nom_adj": "documento.pdf",
-            "ruta": "/uploads/ticket_1/20251229_103045_abc123.pdf"
+            "ruta": "3f/a2/3fa2c9...e1.pdf",
+            "tamano": 48213,
+            "mime": "application/pdf",
+            "sha256": "9b1c..."
         }
     }
     """
@@ -166,52 +311,24 @@ def subir_adjunto(operador_actual, mensaje_id):
     if not es_valido:
         raise ValidationError(mensaje_error)
     
-    # Generar nombre único
     filename = secure_filename(file.filename)
-    unique_filename = AdjuntoModel.generar_nombre_unico(filename)
-    
-    # Obtener directorio del ticket
     id_ticket = mensaje['id_ticket']
-    ticket_dir = AdjuntoModel.obtener_ruta_por_ticket(id_ticket)
-    
-    # Ruta completa del archivo
-    file_path = os.path.join(ticket_dir, unique_filename)
     
-    # Guardar archivo
-    file.save(file_path)
+    # Guardar archivo en el almacenamiento configurado (clave única);
+    # tamaño, tipo y hash se calculan durante la copia
+    archivo = AdjuntoModel.guardar_archivo(filename, file.stream, file.mimetype)
     
     # Registrar en base de datos
     adjunto_data = {
         'nom_adj': filename,  # Nombre original
-        'ruta': file_path,
-        'id_msg': mensaje_id
+        'id_msg': mensaje_id,
+        **archivo
     }
     
     resultado = AdjuntoModel.crear_adjunto(adjunto_data)
 
     # Registrar en historial del ticket
-    try:
-        id_operador = (
-            operador_actual.get('operador_id')
-            or operador_actual.get('id_operador')
-            or operador_actual.get('id')
-        )
-        if id_operador:
-            from flask_app.config.conexion_login import execute_query
-            execute_query(
-                """
-                INSERT INTO historial_acciones_ticket
-                    (id_ticket, id_operador, accion, valor_nuevo, fecha)
-                VALUES
-                    (%s, %s, 'Adjunto agregado', %s, NOW())
-                """,
-                (int(id_ticket), int(id_operador), filename),
-                commit=True,
-            )
-    except Exception:
-        # No bloquear subida por fallas en historial
-        import logging
-        logging.exception('No se pudo registrar historial: Adjunto agregado')
+    _registrar_historial_adjunto(operador_actual, id_ticket, filename)
     
     return jsonify({
         'success': True,
@@ -219,11 +336,222 @@ def subir_adjunto(operador_actual, mensaje_id):
         'adjunto': {
             'id_adj': resultado['id_adj'],
             'nom_adj': filename,
-            'ruta': file_path
+            **archivo
+        }
+    }), 201
+
+
+# ============================================
+# SUBIDAS POR TROZOS (REANUDABLES)
+# ============================================
+
+def _subida_propia(operador_actual, id_subida):
+    subida = AdjuntoSubidaModel.buscar(id_subida)
+    if not subida:
+        raise NotFoundError('Subida no encontrada o vencida')
+    if str(subida['id_operador']) != str(_id_operador(operador_actual)):
+        raise AuthorizationError('La subida pertenece a otro operador')
+    return subida
+
+
+def _offset_trozo():
+    """Offset del trozo: ?offset=N o Content-Range: bytes inicio-fin/total."""
+    offset = request.args.get('offset')
+    if offset is None:
+        rango = request.headers.get('Content-Range', '')
+        m = re.match(r'^bytes (\d+)-\d+/(\d+|\*)$', rango.strip())
+        if not m:
+            raise ValidationError('Indique offset (query) o Content-Range')
+        offset = m.group(1)
+    try:
+        offset = int(offset)
+    except ValueError:
+        raise ValidationError('offset inválido')
+    if offset < 0:
+        raise ValidationError('offset inválido')
+    return offset
+
+
+@adjunto_bp.route('/mensajes/<int:mensaje_id>/adjuntos/subidas', methods=['POST'])
+@manejar_errores
+@token_requerido
+def iniciar_subida(operador_actual, mensaje_id):
+    """
+    Inicia una subida por trozos.
+    
+    POST /api/mensajes/{mensaje_id}/adjuntos/subidas
+    Body: {"nombre": "video.mp4", "tamano": 73400320}
+    
+    Response (201):
+    {
+        "success": true,
+        "subida": {"id_subida": "...", "recibido": 0, "tamano": 73400320, ...},
+        "chunk_max": 8388608,
+        "chunk_min": 0
+    }
+    
+    Luego: PUT /api/adjuntos/subidas/{id}?offset=N (cuerpo binario) hasta
+    completar el tamaño y POST /api/adjuntos/subidas/{id}/completar.
+    Con almacenamiento S3 chunk_min es 5 MB: cada trozo salvo el último
+    debe tener al menos ese tamaño (mínimo de una parte multipart).
+    """
+    mensaje = MensajeModel.buscar_por_id(mensaje_id)
+    if not mensaje:
+        raise NotFoundError(f"Mensaje con ID {mensaje_id} no encontrado")
+
+    id_ticket = mensaje.get('id_ticket')
+    if not TicketModel.operador_puede_escribir_ticket(id_ticket, operador_actual):
+        raise ValidationError('No tiene permisos para adjuntar archivos en este ticket')
+
+    data = request.get_json(silent=True) or {}
+    validar_campos_requeridos(data, ['nombre', 'tamano'])
+
+    nombre = secure_filename(str(data['nombre']))
+    es_valido, mensaje_error = AdjuntoModel.validar_archivo(nombre)
+    if not es_valido:
+        raise ValidationError(mensaje_error)
+
+    try:
+        tamano = int(data['tamano'])
+    except (TypeError, ValueError):
+        raise ValidationError('tamano inválido')
+    if tamano <= 0:
+        raise ValidationError('tamano inválido')
+    if tamano > SUBIDA_MAX_BYTES:
+        raise ValidationError(f'El archivo supera el máximo de {SUBIDA_MAX_BYTES // (1024 * 1024)} MB')
+
+    subida = AdjuntoSubidaModel.iniciar(mensaje_id, _id_operador(operador_actual), nombre, tamano)
+
+    return jsonify({
+        'success': True,
+        'subida': subida,
+        'chunk_max': AdjuntoSubidaModel.chunk_max(subida),
+        'chunk_min': AdjuntoSubidaModel.chunk_min(subida)
+    }), 201
+
+
+@adjunto_bp.route('/adjuntos/subidas/<id_subida>', methods=['GET'])
+@manejar_errores
+@token_requerido
+def estado_subida(operador_actual, id_subida):
+    """
+    Estado de una subida, para reanudarla desde `recibido`.
+    
+    GET /api/adjuntos/subidas/{id_subida}
+    """
+    subida = _subida_propia(operador_actual, id_subida)
+    return jsonify({
+        'success': True,
+        'subida': {
+            'id_subida': subida['id_subida'],
+            'id_msg': subida['id_msg'],
+            'nom_adj': subida['nom_adj'],
+            'tamano': int(subida['tamano']),
+            'recibido': int(subida['recibido'])
+        }
+    }), 200
+
+
+@adjunto_bp.route('/adjuntos/subidas/<id_subida>', methods=['PUT'])
+@manejar_errores
+@token_requerido
+def subir_trozo(operador_actual, id_subida):
+    """
+    Recibe un trozo de la subida.
+    
+    PUT /api/adjuntos/subidas/{id_subida}?offset=N
+    Content-Type: application/octet-stream
+    Body: bytes del trozo (entre chunk_min y chunk_max, salvo el último)
+    
+    El offset debe ser igual a lo recibido hasta ahora. Si no lo es
+    (trozo repetido o perdido) responde 409 con `recibido` para reanudar.
+    
+    Response: {"success": true, "recibido": N, "completo": false}
+    """
+    subida = _subida_propia(operador_actual, id_subida)
+    offset = _offset_trozo()
+
+    largo = request.content_length
+    if largo is None:
+        raise ValidationError('Falta Content-Length')
+    chunk_max = AdjuntoSubidaModel.chunk_max(subida)
+    if largo > chunk_max:
+        raise ValidationError(f'El trozo supera el máximo de {chunk_max} bytes')
+    if offset + largo > int(subida['tamano']):
+        raise ValidationError('El trozo excede el tamaño declarado del archivo')
+    chunk_min = AdjuntoSubidaModel.chunk_min(subida)
+    if largo < chunk_min and offset + largo < int(subida['tamano']):
+        raise ValidationError(f'Cada trozo salvo el último debe tener al menos {chunk_min} bytes')
+
+    try:
+        recibido = AdjuntoSubidaModel.escribir_trozo(subida, offset, request.stream, largo)
+    except SubidaConflicto as e:
+        raise AppError('El offset no coincide con lo recibido', status_code=409, payload={'recibido': e.recibido})
+
+    return jsonify({
+        'success': True,
+        'recibido': recibido,
+        'completo': recibido == int(subida['tamano'])
+    }), 200
+
+
+@adjunto_bp.route('/adjuntos/subidas/<id_subida>/completar', methods=['POST'])
+@manejar_errores
+@token_requerido
+def completar_subida(operador_actual, id_subida):
+    """
+    Cierra la subida y registra el adjunto.
+    
+    POST /api/adjuntos/subidas/{id_subida}/completar
+    Body (opcional): {"sha256": "..."} - se verifica contra lo recibido
+    
+    Response (201): igual a POST /api/mensajes/{id}/adjuntos, más sha256.
+    """
+    subida = _subida_propia(operador_actual, id_subida)
+    if int(subida['recibido']) != int(subida['tamano']):
+        raise AppError('La subida está incompleta', status_code=409, payload={'recibido': int(subida['recibido'])})
+
+    data = request.get_json(silent=True) or {}
+    esperado = str(data.get('sha256') or '').strip().lower()
+
+    try:
+        resultado = AdjuntoSubidaModel.completar(subida, sha256_esperado=esperado or None)
+    except SubidaConflicto as e:
+        raise AppError('La subida ya fue completada o está incompleta', status_code=409, payload={'recibido': e.recibido})
+
+    _registrar_historial_adjunto(operador_actual, subida['id_ticket'], subida['nom_adj'])
+
+    return jsonify({
+        'success': True,
+        'mensaje': 'Archivo subido exitosamente',
+        'adjunto': {
+            'id_adj': resultado['id_adj'],
+            'nom_adj': subida['nom_adj'],
+            'ruta': subida['ruta'],
+            'tamano': int(subida['tamano']),
+            'mime': resultado['mime'],
+            'sha256': resultado['sha256']
         }
     }), 201
 
 
+@adjunto_bp.route('/adjuntos/subidas/<id_subida>', methods=['DELETE'])
+@manejar_errores
+@token_requerido
+def cancelar_subida(operador_actual, id_subida):
+    """
+    Cancela una subida y elimina lo recibido.
+    
+    DELETE /api/adjuntos/subidas/{id_subida}
+    """
+    subida = _subida_propia(operador_actual, id_subida)
+    AdjuntoSubidaModel.cancelar(subida)
+    return jsonify({
+        'success': True,
+        'mensaje': 'Subida cancelada'
+    }), 200
+
+
 @adjunto_bp.route('/adjuntos/<int:adjunto_id>', methods=['GET'])
 @manejar_errores
 def obtener_adjunto(adjunto_id):
@@ -249,30 +577,189 @@ def obtener_adjunto(adjunto_id):
     }), 200
 
 
+def _adjunto_visible(operador_actual, adjunto_id):
+    adjunto = AdjuntoModel.buscar_por_id(adjunto_id)
+    
+    if not adjunto:
+        raise NotFoundError(f"Adjunto con ID {adjunto_id} no encontrado")
+
+    if not TicketModel.operador_puede_ver_ticket(adjunto['id_ticket'], operador_actual):
+        raise AuthorizationError('No tiene permisos para ver los adjuntos de este ticket')
+    return adjunto
+
+
 @adjunto_bp.route('/adjuntos/<int:adjunto_id>/download', methods=['GET'])
+@token_requerido
 @manejar_errores
-def descargar_adjunto(adjunto_id):
+def descargar_adjunto(operador_actual, adjunto_id):
     """
     Descarga un archivo adjunto.
     
     GET /api/adjuntos/{adjunto_id}/download
+    Headers:
+        - Authorization: Bearer {token}
+    Query params:
+        - inline: bool (default: false) - Content-Disposition inline (vista previa)
+        - original: bool (default: false) - Archivo tal como se subió, aunque
+          exista una variante optimizada (ver services/optimizacion_imagenes.py)
+    
+    Sin `original`, las imágenes con variante optimizada se sirven reducidas
+    y sin metadatos. Soporta Range (206), If-None-Match / If-Modified-Since (304) y, según
+    ADJUNTOS_ENTREGA, delega el envío al proxy (ver utils/descargas.py).
+    Solo operadores que pueden ver el ticket. Para descargar con un enlace
+    normal del navegador (sin header) ver enlace_descarga_adjunto.
     
     Response: Archivo binario
     """
-    adjunto = AdjuntoModel.buscar_por_id(adjunto_id)
+    return _enviar_adjunto(operador_actual, adjunto_id)
+
+
+@adjunto_bp.route('/adjuntos/<int:adjunto_id>/enlace', methods=['POST'])
+@token_requerido
+@manejar_errores
+def enlace_descarga_adjunto(operador_actual, adjunto_id):
+    """
+    Genera un enlace de descarga firmado y de corta duración.
     
-    if not adjunto:
-        raise NotFoundError(f"Adjunto con ID {adjunto_id} no encontrado")
+    POST /api/adjuntos/{adjunto_id}/enlace
+    Headers:
+        - Authorization: Bearer {token}
+    Query params:
+        - inline, original: se copian al enlace (ver descargar_adjunto)
     
-    # Verificar que el archivo existe
-    if not os.path.exists(adjunto['ruta']):
+    El enlace no necesita header Authorization, así que el frontend lo usa en
+    un <a href download> y la descarga la hace el navegador (Range y
+    reanudación, X-Accel, redirect a S3 sin CORS). Vence a los
+    ENLACE_DESCARGA_EXPIRES segundos y al usarse se repite el chequeo de acceso.
+    
+    Response:
+    {
+        "success": true,
+        "url": "/api/adjuntos/15/download/<firma>",
+        "expira_en": 600
+    }
+    """
+    _adjunto_visible(operador_actual, adjunto_id)
+    extra = {k: request.args[k] for k in ('inline', 'original') if k in request.args}
+    firma = generar_firma_descarga(operador_actual, f'adjunto:{adjunto_id}')
+    return jsonify({
+        'success': True,
+        'url': url_for('adjunto.descargar_adjunto_firmado', adjunto_id=adjunto_id, firma=firma, **extra),
+        'expira_en': ENLACE_DESCARGA_EXPIRES
+    }), 200
+
+
+@adjunto_bp.route('/adjuntos/<int:adjunto_id>/download/<firma>', methods=['GET'])
+@manejar_errores
+def descargar_adjunto_firmado(adjunto_id, firma):
+    """
+    Descarga un adjunto con un enlace firmado (ver enlace_descarga_adjunto).
+    
+    GET /api/adjuntos/{adjunto_id}/download/{firma}
+    
+    Mismos parámetros y respuesta que descargar_adjunto.
+    """
+    return _enviar_adjunto(_operador_de_firma(firma, f'adjunto:{adjunto_id}'), adjunto_id)
+
+
+def _enviar_adjunto(operador_actual, adjunto_id):
+    adjunto = _adjunto_visible(operador_actual, adjunto_id)
+    
+    inline = request.args.get('inline', 'false').lower() == 'true'
+    original = request.args.get('original', 'false').lower() in ('1', 'true')
+    variante = adjunto.get('ruta_optimizada') if not original else None
+    if variante:
+        clave = variante
+        nombre = optimizacion_imagenes.nombre_descarga(adjunto['nom_adj'], variante)
+        # Distinto del ETag del original: misma URL, contenido distinto según ?original
+        etag = f"{adjunto['sha256'][:24]}-web" if adjunto.get('sha256') else None
+        mimetype = None
+    else:
+        clave = adjunto.get('ruta')
+        nombre = adjunto['nom_adj']
+        etag = adjunto.get('sha256')
+        mimetype = adjunto.get('mime')
+
+    ruta = almacenamiento.ruta_local(clave) if clave else None
+    if ruta is None and clave:
+        # Backend remoto: URL firmada de corta duración (el bucket atiende Range)
+        url = almacenamiento.obtener_almacenamiento().url_descarga(clave, nombre, inline=inline)
+        response = redirect(url, code=302)
+        response.headers['Cache-Control'] = 'no-store'
+        if variante:
+            optimizacion_imagenes.registrar_descarga(adjunto)
+        return response
+    
+    # Verificar que el archivo existe (el stat se reutiliza para ETag/Last-Modified)
+    try:
+        st = os.stat(ruta)
+    except (OSError, TypeError):
         raise NotFoundError(f"Archivo físico no encontrado: {adjunto['nom_adj']}")
     
-    # Enviar archivo
-    return send_file(
-        adjunto['ruta'],
-        as_attachment=True,
-        download_name=adjunto['nom_adj']
+    response = enviar_archivo(
+        ruta,
+        nombre,
+        st,
+        etag_archivo(f'{adjunto_id}-web' if variante else adjunto_id, st, etag),
+        raiz=AdjuntoModel.obtener_ruta_almacenamiento(),
+        as_attachment=not inline,
+        mimetype=mimetype,
+    )
+    if variante and response.status_code == 200:
+        optimizacion_imagenes.registrar_descarga(adjunto)
+    return response
+
+
+@adjunto_bp.route('/adjuntos/<int:adjunto_id>/thumb', methods=['GET'])
+@manejar_errores
+@token_requerido
+def miniatura_adjunto(operador_actual, adjunto_id):
+    """
+    Miniatura o vista previa reducida (JPEG) de un adjunto de imagen o PDF.
+    
+    GET /api/adjuntos/{adjunto_id}/thumb
+    Headers:
+        - Authorization: Bearer {token}
+    Query params:
+        - tamano: miniatura (default, 320 px) | previa (1600 px)
+    
+    Solo operadores que pueden ver el ticket. Como en la descarga, la caché
+    es privada y se revalida (304) en cada uso para repetir ese chequeo.
+    
+    Response:
+        200 image/jpeg
+        202 si se está generando (reintentar tras Retry-After)
+        404 si el tipo de archivo no admite vista previa
+    """
+    tipo = request.args.get('tamano', 'miniatura')
+    if tipo not in vistas_previas.TIPOS:
+        raise ValidationError(f"tamano inválido. Use: {', '.join(vistas_previas.TIPOS)}")
+
+    adjunto = AdjuntoModel.buscar_por_id(adjunto_id)
+    if not adjunto:
+        raise NotFoundError(f"Adjunto con ID {adjunto_id} no encontrado")
+
+    if not TicketModel.operador_puede_ver_ticket(adjunto['id_ticket'], operador_actual):
+        raise AuthorizationError('No tiene permisos para ver los adjuntos de este ticket')
+
+    estado, ruta = vistas_previas.obtener(adjunto_id, adjunto.get('ruta'), adjunto['nom_adj'], tipo)
+    if estado == 'pendiente':
+        response = jsonify({'success': True, 'estado': 'pendiente'})
+        response.status_code = 202
+        response.headers['Retry-After'] = '2'
+        return response
+    if estado != 'lista':
+        raise NotFoundError('El adjunto no tiene vista previa')
+
+    st = os.stat(ruta)
+    nombre = os.path.splitext(adjunto['nom_adj'])[0] + f'_{tipo}.jpg'
+    return enviar_archivo(
+        ruta,
+        nombre,
+        st,
+        f'{adjunto_id}-{tipo}-{st.st_mtime_ns:x}',
+        raiz=AdjuntoModel.obtener_ruta_almacenamiento(),
+        as_attachment=False,
     )
 
 
@@ -315,6 +802,37 @@ def eliminar_adjunto(operador_actual, adjunto_id):
     }), 200
 
 
+@adjunto_bp.route('/adjuntos/optimizacion/metricas', methods=['GET'])
+@token_requerido
+@rol_requerido('Admin')
+@manejar_errores
+def metricas_optimizacion(operador_actual):
+    """
+    Métricas de la optimización de imágenes adjuntas. Solo Admin.
+    
+    GET /api/adjuntos/optimizacion/metricas
+    
+    Response:
+    {
+        "success": true,
+        "metricas": {
+            "activa": true,
+            "total": {"procesados": 120, "con_variante": 95, "bytes_originales": ...,
+                      "bytes_variantes": ..., "bytes_ahorrados": ...},
+            "proceso": {"encoladas": 12, "optimizadas": 9, "sin_ahorro": 2, "errores": 1,
+                        "descargas_variante": 40, "bytes_ahorrados_descarga": ..., "pendientes": 0, ...}
+        }
+    }
+    
+    `total` sale de la BD; `proceso` son contadores de este proceso desde
+    que arrancó (con varios workers de gunicorn, cada uno tiene los suyos).
+    """
+    return jsonify({
+        'success': True,
+        'metricas': optimizacion_imagenes.metricas()
+    }), 200
+
+
 @adjunto_bp.route('/tickets/<int:ticket_id>/adjuntos/estadisticas', methods=['GET'])
 @manejar_errores
 def estadisticas_adjuntos(ticket_id):
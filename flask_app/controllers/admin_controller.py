@@ -3,10 +3,11 @@ from flask import Blueprint, jsonify, request
 from flask_app.models.operador_model import OperadorModel
 from flask_app.models.departamento_model import MiembroDptoModel
 from flask_app.models.permiso_model import PermisoModel, RolPermisoModel, RolGlobalAdminModel
-from flask_app.models.auditoria_model import AuditoriaModel
+from flask_app.models.auditoria_model import AuditoriaModel, PROYECCION_EXPORTACION_AUDITORIA
 from flask_app.utils.error_handler import manejar_errores
 from flask_app.utils.jwt_utils import token_requerido, rol_requerido
 from flask_app.utils.error_handler import validar_campos_requeridos, ValidationError
+from flask_app.utils.exportacion import respuesta_exportacion, validar_formato
 
 admin_bp = Blueprint('admin', __name__, url_prefix='/api/admin')
 
@@ -172,24 +173,53 @@ def actualizar_rol(operador_actual, rol_id):
 @rol_requerido('Admin')
 @manejar_errores
 def listar_auditoria(operador_actual):
-    """Lista auditoría (filtrable). Solo Admin."""
+    """Lista auditoría (filtrable, paginada por cursor). Solo Admin."""
     depto_id = request.args.get('depto_id', type=int)
     operador_id = request.args.get('operador_id', type=int)
     accion = request.args.get('accion')
     fecha = request.args.get('fecha')
+    fecha_desde = request.args.get('fecha_desde')
+    fecha_hasta = request.args.get('fecha_hasta')
     limit = request.args.get('limit', default=50, type=int)
-    offset = request.args.get('offset', default=0, type=int)
+    cursor = request.args.get('cursor') or None
+    con_total = request.args.get('con_total', '0') in ('1', 'true')
 
-    data = AuditoriaModel.listar(
+    resultado = AuditoriaModel.listar(
         depto_id=depto_id,
         operador_id=operador_id,
         accion=accion,
         fecha=fecha,
+        fecha_desde=fecha_desde,
+        fecha_hasta=fecha_hasta,
         limit=min(max(limit, 1), 200),
-        offset=max(offset, 0)
+        cursor=cursor,
+        con_total=con_total
     )
 
-    return jsonify({'success': True, 'data': data}), 200
+    return jsonify({'success': True, **resultado}), 200
+
+
+@admin_bp.route('/auditoria/export', methods=['GET'])
+@token_requerido
+@rol_requerido('Admin')
+@manejar_errores
+def exportar_auditoria(operador_actual):
+    """
+    Exporta en streaming el historial de auditoría (mismos filtros que el listado). Solo Admin.
+
+    Query params: formato (csv | ndjson), gzip=1, depto_id, operador_id, accion,
+    fecha, fecha_desde, fecha_hasta.
+    """
+    formato = validar_formato(request.args.get('formato'))
+    fuente = AuditoriaModel.exportar(
+        depto_id=request.args.get('depto_id', type=int),
+        operador_id=request.args.get('operador_id', type=int),
+        accion=request.args.get('accion'),
+        fecha=request.args.get('fecha'),
+        fecha_desde=request.args.get('fecha_desde'),
+        fecha_hasta=request.args.get('fecha_hasta'),
+    )
+    return respuesta_exportacion(fuente, PROYECCION_EXPORTACION_AUDITORIA, formato, 'auditoria')
 
 
 @admin_bp.route('/auditoria/acciones', methods=['GET'])
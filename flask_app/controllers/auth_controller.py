@@ -1,6 +1,6 @@
 from flask import Blueprint, request, jsonify
 from flask_app.models.operador_model import OperadorModel, RolGlobalModel
-from flask_app.utils.jwt_utils import generar_token, token_requerido, rol_requerido
+from flask_app.utils.jwt_utils import generar_token, token_requerido, permiso_requerido
 from flask_app.utils.error_handler import manejar_errores, validar_campos_requeridos, ValidationError, AuthenticationError, AuthorizationError
 from flask_app.config.conexion_login import get_db_connection
 import bcrypt
@@ -245,7 +245,7 @@ def obtener_perfil(operador_actual):
 
 @auth_bp.route('/registro', methods=['POST'])
 @token_requerido
-@rol_requerido('Admin')
+@permiso_requerido('operador.create')
 @manejar_errores
 def registrar_operador(operador_actual):
     """
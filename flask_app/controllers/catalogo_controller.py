@@ -1,19 +1,28 @@
 """
 Controller para endpoints de catálogos del sistema
 Estados, Prioridades, Clubes, SLAs, Roles, Canales
+
+Las respuestas salen del caché de catálogos del proceso e incluyen ETag y
+Cache-Control, por lo que el navegador puede reutilizarlas sin consultar.
 """
-from flask import Blueprint, jsonify
-from flask_app.models.estado_model import EstadoModel
-from flask_app.models.prioridad_model import PrioridadModel
-from flask_app.models.club_model import ClubModel
-from flask_app.models.sla_model import SLAModel
-from flask_app.models.operador_model import RolGlobalModel
+from flask import Blueprint
+from flask_app.models.catalogo_model import CatalogoModel
 from flask_app.utils.jwt_utils import token_requerido
 from flask_app.utils.error_handler import manejar_errores
+from flask_app.utils.cache import respuesta_cacheable
 
 catalogo_bp = Blueprint('catalogos', __name__, url_prefix='/api/catalogos')
 
 
+def _responder_catalogo(nombre):
+    datos, etag = CatalogoModel.obtener(nombre)
+    return respuesta_cacheable({
+        'success': True,
+        'data': datos,
+        'total': len(datos) if datos else 0
+    }, etag)
+
+
 @catalogo_bp.route('/estados', methods=['GET'])
 @token_requerido
 @manejar_errores
@@ -32,13 +41,7 @@ def listar_estados(operador_actual):
         ]
     }
     """
-    estados = EstadoModel.listar()
-    
-    return jsonify({
-        'success': True,
-        'data': estados,
-        'total': len(estados) if estados else 0
-    }), 200
+    return _responder_catalogo('estados')
 
 
 @catalogo_bp.route('/prioridades', methods=['GET'])
@@ -59,13 +62,7 @@ def listar_prioridades(operador_actual):
         ]
     }
     """
-    prioridades = PrioridadModel.listar()
-    
-    return jsonify({
-        'success': True,
-        'data': prioridades,
-        'total': len(prioridades) if prioridades else 0
-    }), 200
+    return _responder_catalogo('prioridades')
 
 
 @catalogo_bp.route('/clubes', methods=['GET'])
@@ -86,13 +83,7 @@ def listar_clubes(operador_actual):
         ]
     }
     """
-    clubes = ClubModel.listar()
-    
-    return jsonify({
-        'success': True,
-        'data': clubes,
-        'total': len(clubes) if clubes else 0
-    }), 200
+    return _responder_catalogo('clubes')
 
 
 @catalogo_bp.route('/slas', methods=['GET'])
@@ -118,13 +109,7 @@ def listar_slas(operador_actual):
         ]
     }
     """
-    slas = SLAModel.listar()
-    
-    return jsonify({
-        'success': True,
-        'data': slas,
-        'total': len(slas) if slas else 0
-    }), 200
+    return _responder_catalogo('slas')
 
 
 @catalogo_bp.route('/roles', methods=['GET'])
@@ -145,13 +130,7 @@ def listar_roles(operador_actual):
         ]
     }
     """
-    roles = RolGlobalModel.listar()
-    
-    return jsonify({
-        'success': True,
-        'data': roles,
-        'total': len(roles) if roles else 0
-    }), 200
+    return _responder_catalogo('roles')
 
 
 @catalogo_bp.route('/canales', methods=['GET'])
@@ -172,19 +151,4 @@ def listar_canales(operador_actual):
         ]
     }
     """
-    from flask_app.config.conexion_login import get_local_db_connection
-    
-    conn = get_local_db_connection()
-    cursor = conn.cursor()
-    
-    cursor.execute("SELECT id_canal as id, nombre FROM canal ORDER BY id_canal")
-    canales = cursor.fetchall()
-    
-    cursor.close()
-    conn.close()
-    
-    return jsonify({
-        'success': True,
-        'data': canales,
-        'total': len(canales) if canales else 0
-    }), 200
+    return _responder_catalogo('canales')
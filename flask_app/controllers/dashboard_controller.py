@@ -0,0 +1,220 @@
+"""
+Controller del arranque del dashboard.
+
+GET /api/dashboard/bootstrap devuelve en una sola respuesta todo lo que la
+pantalla principal pedía con ~15 requests al cargar: perfil, permisos,
+catálogos, KPIs, primera página de tickets, notificaciones, filtros y
+respuestas rápidas.
+
+El scope de visibilidad del operador se calcula una sola vez y se reutiliza
+en las consultas de tickets y KPIs. Las secciones independientes se ejecutan
+en paralelo en un pool de hilos; cada una usa su propia conexión, así que la
+latencia total es la de la consulta más lenta y no la suma de todas.
+"""
+import logging
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from flask import Blueprint, jsonify, request
+
+from flask_app.models.ticket_model import TicketModel
+from flask_app.models.operador_model import OperadorModel
+from flask_app.models.notificacion_model import NotificacionModel
+from flask_app.models.respuesta_rapida_model import RespuestaRapidaModel
+from flask_app.models.catalogo_model import CatalogoModel
+from flask_app.models.permiso_model import MatrizPermisos
+from flask_app.utils.jwt_utils import token_requerido
+from flask_app.utils.error_handler import manejar_errores, ValidationError
+
+dashboard_bp = Blueprint('dashboard', __name__, url_prefix='/api/dashboard')
+
+# Pool compartido por todos los requests de bootstrap del proceso
+_executor = ThreadPoolExecutor(
+    max_workers=int(os.getenv('DASHBOARD_BOOTSTRAP_WORKERS', 8)),
+    thread_name_prefix='dashboard-bootstrap',
+)
+
+# Catálogos que el dashboard carga al inicio
+CATALOGOS_BOOTSTRAP = ('estados', 'prioridades', 'clubes', 'slas', 'canales')
+
+# Tiempo máximo de espera por sección (segundos)
+TIMEOUT_SECCION = float(os.getenv('DASHBOARD_BOOTSTRAP_TIMEOUT', 10))
+
+
+def _seccion_operador(operador_actual, **_):
+    perfil = OperadorModel.obtener_perfil_completo(operador_actual['operador_id'])
+    if not perfil:
+        raise RuntimeError('No se pudo obtener el perfil del operador')
+    return perfil
+
+
+def _seccion_estadisticas(operador_actual, visibilidad, **_):
+    result = TicketModel.get_estadisticas(operador_actual=operador_actual, visibilidad=visibilidad)
+    if not result['success']:
+        raise RuntimeError(result.get('error', 'Error al obtener estadísticas'))
+    return result['estadisticas']
+
+
+def _seccion_tickets(operador_actual, visibilidad, limit, order, **_):
+    result = TicketModel.get_all(limit=limit, offset=0, operador_actual=operador_actual,
+                                 order=order, visibilidad=visibilidad)
+    if not result['success']:
+        raise RuntimeError(result.get('error', 'Error al obtener tickets'))
+    return {
+        'tickets': result['tickets'],
+        'total': result['total'],
+        'limit': limit,
+        'offset': 0,
+    }
+
+
+def _seccion_notificaciones(operador_actual, limit_notificaciones, **_):
+    id_operador = operador_actual['operador_id']
+    result = NotificacionModel.listar_por_operador(
+        id_operador=id_operador,
+        solo_no_leidas=False,
+        limit=limit_notificaciones,
+        offset=0,
+    )
+    return {
+        'notificaciones': result['notificaciones'],
+        'total': result['total'],
+        'unread_count': NotificacionModel.contar_no_leidas(id_operador),
+        'limit': limit_notificaciones,
+        'offset': 0,
+    }
+
+
+def _seccion_emisores(operador_actual, **_):
+    result = TicketModel.get_emisores_por_contexto(operador_actual)
+    if not result['success']:
+        raise RuntimeError(result.get('error', 'Error al obtener emisores'))
+    return result['emisores']
+
+
+def _seccion_receptores(operador_actual, **_):
+    result = TicketModel.get_receptores_por_contexto(operador_actual)
+    if not result['success']:
+        raise RuntimeError(result.get('error', 'Error al obtener receptores'))
+    return result['receptores']
+
+
+def _seccion_respuestas_rapidas(operador_actual, **_):
+    return RespuestaRapidaModel.obtener_por_operador(operador_actual['operador_id'])
+
+
+def _seccion_departamentos(**_):
+    datos, _etag = CatalogoModel.obtener('departamentos')
+    return datos
+
+
+# nombre de sección -> función; todas reciben los mismos kwargs
+SECCIONES = {
+    'operador': _seccion_operador,
+    'estadisticas': _seccion_estadisticas,
+    'tickets': _seccion_tickets,
+    'notificaciones': _seccion_notificaciones,
+    'emisores': _seccion_emisores,
+    'receptores': _seccion_receptores,
+    'respuestas_rapidas': _seccion_respuestas_rapidas,
+    'departamentos': _seccion_departamentos,
+}
+
+
+def _ejecutar_secciones(nombres, contexto):
+    """
+    Ejecuta las secciones en paralelo.
+
+    Retorna: (datos, errores) donde errores es {seccion: mensaje}. Un fallo en
+    una sección no invalida el resto del payload.
+    """
+    futuros = {nombre: _executor.submit(SECCIONES[nombre], **contexto) for nombre in nombres}
+
+    datos = {}
+    errores = {}
+    for nombre, futuro in futuros.items():
+        try:
+            datos[nombre] = futuro.result(timeout=TIMEOUT_SECCION)
+        except Exception as e:
+            logging.error(f'Bootstrap dashboard: error en sección {nombre}: {e}')
+            datos[nombre] = None
+            errores[nombre] = str(e) or type(e).__name__
+    return datos, errores
+
+
+@dashboard_bp.route('/bootstrap', methods=['GET'])
+@token_requerido
+@manejar_errores
+def bootstrap(operador_actual):
+    """
+    Datos iniciales del dashboard en un solo request.
+
+    GET /api/dashboard/bootstrap?limit=50&order=desc&limit_notificaciones=20
+
+    Response:
+    {
+        "success": true,
+        "operador": {...},
+        "permisos": ["ticket.ver", ...],
+        "catalogos": {"estados": [...], "prioridades": [...], ...},
+        "estadisticas": {...},
+        "tickets": {"tickets": [...], "total": 120, "limit": 50, "offset": 0},
+        "notificaciones": {"notificaciones": [...], "total": 8, "unread_count": 3, ...},
+        "emisores": [...],
+        "receptores": [...],
+        "departamentos": [...],
+        "respuestas_rapidas": [...],
+        "errores": {},
+        "duracion_ms": 42
+    }
+    """
+    inicio = time.perf_counter()
+
+    try:
+        limit = min(max(int(request.args.get('limit', 50)), 1), 200)
+    except (TypeError, ValueError):
+        raise ValidationError('limit debe ser un número')
+    try:
+        limit_notificaciones = min(max(int(request.args.get('limit_notificaciones', 20)), 1), 100)
+    except (TypeError, ValueError):
+        raise ValidationError('limit_notificaciones debe ser un número')
+    order = request.args.get('order', 'desc')
+
+    # Scope de visibilidad: una sola vez para tickets y KPIs
+    visibilidad = TicketModel.obtener_visibilidad(operador_actual)
+
+    contexto = {
+        'operador_actual': operador_actual,
+        'visibilidad': visibilidad,
+        'limit': limit,
+        'order': order,
+        'limit_notificaciones': limit_notificaciones,
+    }
+    datos, errores = _ejecutar_secciones(SECCIONES.keys(), contexto)
+
+    # Catálogos y permisos salen de memoria: no vale la pena mandarlos al pool
+    catalogos = {}
+    for nombre in CATALOGOS_BOOTSTRAP:
+        try:
+            catalogos[nombre], _etag = CatalogoModel.obtener(nombre)
+        except Exception as e:
+            logging.error(f'Bootstrap dashboard: error en catálogo {nombre}: {e}')
+            catalogos[nombre] = None
+            errores[f'catalogos.{nombre}'] = str(e)
+
+    try:
+        permisos = MatrizPermisos.codigos_de_rol(operador_actual.get('rol'))
+    except Exception as e:
+        logging.error(f'Bootstrap dashboard: error en permisos: {e}')
+        permisos = None
+        errores['permisos'] = str(e)
+
+    return jsonify({
+        'success': True,
+        **datos,
+        'permisos': permisos,
+        'catalogos': catalogos,
+        'errores': errores,
+        'duracion_ms': round((time.perf_counter() - inicio) * 1000),
+    }), 200
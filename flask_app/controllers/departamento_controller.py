@@ -1,7 +1,9 @@
 from flask import Blueprint, request, jsonify
 from flask_app.models.departamento_model import DepartamentoModel, MiembroDptoModel
+from flask_app.models.catalogo_model import CatalogoModel
 from flask_app.utils.jwt_utils import token_requerido, rol_requerido
 from flask_app.utils.error_handler import manejar_errores, validar_campos_requeridos, ValidationError, NotFoundError
+from flask_app.utils.cache import respuesta_cacheable
 
 departamento_bp = Blueprint('departamento', __name__, url_prefix='/api/departamentos')
 
@@ -25,13 +27,15 @@ def listar_departamentos():
     """
     incluir_no_externos = request.args.get('incluir_no_externos', 'true').lower() == 'true'
     
-    departamentos = DepartamentoModel.listar(incluir_no_externos)
+    departamentos, etag = CatalogoModel.obtener(
+        'departamentos' if incluir_no_externos else 'departamentos_externos'
+    )
     
-    return jsonify({
+    return respuesta_cacheable({
         'success': True,
         'departamentos': departamentos,
         'total': len(departamentos)
-    }), 200
+    }, etag)
 
 
 @departamento_bp.route('/<int:depto_id>', methods=['GET'])
@@ -112,12 +112,9 @@ def inbound_email():
                     if not file:
                         continue
                     filename = file.filename or 'adjunto'
-                    ticket_dir = AdjuntoModel.obtener_ruta_por_ticket(id_ticket)
-                    unique_name = AdjuntoModel.generar_nombre_unico(filename)
-                    path = f"{ticket_dir}/{unique_name}"
                     try:
-                        file.save(path)
-                        AdjuntoModel.crear_adjunto({'nom_adj': filename, 'ruta': path, 'id_msg': id_msg})
+                        archivo = AdjuntoModel.guardar_archivo(filename, file.stream, file.mimetype)
+                        AdjuntoModel.crear_adjunto({'nom_adj': filename, 'id_msg': id_msg, **archivo})
                     except Exception:
                         logging.exception('Error saving webhook attachment')
         except Exception:
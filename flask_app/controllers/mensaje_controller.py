@@ -4,9 +4,29 @@ from flask_app.models.ticket_model import TicketModel
 from flask_app.models.notificacion_model import NotificacionModel
 from flask_app.utils.jwt_utils import token_requerido
 from flask_app.utils.error_handler import manejar_errores, validar_campos_requeridos, ValidationError, NotFoundError
+from flask_app.utils.serializacion import Proyeccion, fecha_texto
 
 mensaje_bp = Blueprint('mensaje', __name__, url_prefix='/api')
 
+# Forma de cada mensaje en GET /api/tickets/<id>/mensajes
+PROYECCION_MENSAJE = Proyeccion({
+    'id_msg': 'id_msg',
+    'id_ticket': 'id_ticket',
+    'tipo_mensaje': 'tipo_mensaje',
+    'asunto': 'asunto',
+    'contenido': 'contenido',
+    'remitente_id': 'remitente_id',
+    'remitente_tipo': 'remitente_tipo',
+    'remitente_nombre': 'remitente_nombre',
+    'remitente_email': 'remitente_email',
+    'estado_mensaje': 'estado_mensaje',
+    'canal_nombre': 'canal_nombre',
+    'id_canal': 'id_canal',
+    'total_adjuntos': 'total_adjuntos',
+    'fecha_envio': fecha_texto('fecha_envio'),
+    'fecha_edicion': fecha_texto('fecha_edicion'),
+})
+
 
 @mensaje_bp.route('/tickets/<int:ticket_id>/mensajes', methods=['GET'])
 @token_requerido
@@ -34,33 +54,14 @@ def listar_mensajes(operador_actual, ticket_id):
         
         print(f"✅ [API] Se encontraron {len(mensajes_raw) if mensajes_raw else 0} mensajes para ticket #{ticket_id}")
         
-        # Convertir a lista de diccionarios simples
-        mensajes = []
-        if mensajes_raw:
-            for msg in mensajes_raw:
-                # Verificar que el mensaje pertenece al ticket correcto
-                if msg.get('id_ticket') != ticket_id:
-                    print(f"⚠️ [API] ERROR: Mensaje {msg.get('id_msg')} pertenece al ticket #{msg.get('id_ticket')}, no al #{ticket_id}")
-                    continue
-                
-                msg_dict = {
-                    'id_msg': msg.get('id_msg'),
-                    'id_ticket': msg.get('id_ticket'),
-                    'tipo_mensaje': msg.get('tipo_mensaje'),
-                    'asunto': msg.get('asunto'),
-                    'contenido': msg.get('contenido'),
-                    'remitente_id': msg.get('remitente_id'),
-                    'remitente_tipo': msg.get('remitente_tipo'),
-                    'remitente_nombre': msg.get('remitente_nombre'),
-                    'remitente_email': msg.get('remitente_email'),
-                    'estado_mensaje': msg.get('estado_mensaje'),
-                    'canal_nombre': msg.get('canal_nombre'),
-                    'id_canal': msg.get('id_canal'),
-                    'total_adjuntos': msg.get('total_adjuntos'),
-                    'fecha_envio': str(msg.get('fecha_envio')) if msg.get('fecha_envio') else None,
-                    'fecha_edicion': str(msg.get('fecha_edicion')) if msg.get('fecha_edicion') else None
-                }
-                mensajes.append(msg_dict)
+        # Verificar que cada mensaje pertenece al ticket correcto
+        filas = []
+        for msg in mensajes_raw or []:
+            if msg.get('id_ticket') != ticket_id:
+                print(f"⚠️ [API] ERROR: Mensaje {msg.get('id_msg')} pertenece al ticket #{msg.get('id_ticket')}, no al #{ticket_id}")
+                continue
+            filas.append(msg)
+        mensajes = PROYECCION_MENSAJE(filas)
         
         return jsonify({
             'success': True,
@@ -0,0 +1,165 @@
+"""
+Controller de reportes.
+
+Las métricas se leen de los rollups diarios (ticket_stats_diario), por lo que
+el costo depende del rango de días y no del volumen de tickets/historial.
+Admin ve todos los departamentos; Supervisor solo los que supervisa.
+"""
+from flask import Blueprint, jsonify, request
+
+from flask_app.models.desempeno_model import DesempenoModel
+from flask_app.models.reporte_model import ReporteModel
+from flask_app.models.ticket_model import TicketModel
+from flask_app.utils.jwt_utils import token_requerido, rol_requerido
+from flask_app.utils.cache import respuesta_cacheable
+from flask_app.utils.error_handler import manejar_errores, AuthorizationError, ValidationError
+
+reporte_bp = Blueprint('reportes', __name__, url_prefix='/api/reportes')
+
+
+def _deptos_permitidos(operador_actual):
+    """None = sin restricción (Admin); lista de deptos para Supervisor."""
+    if operador_actual.get('rol') == 'Admin':
+        return None
+    return ReporteModel.deptos_supervisados(operador_actual['operador_id'])
+
+
+@reporte_bp.route('/tickets', methods=['GET'])
+@token_requerido
+@rol_requerido('Admin', 'Supervisor')
+@manejar_errores
+def reporte_tickets(operador_actual):
+    """
+    Métricas de tickets por rango de fechas.
+
+    GET /api/reportes/tickets?desde=2025-01-01&hasta=2025-03-31&agrupar=semana&depto=1,2
+
+    Query params:
+        - desde, hasta: YYYY-MM-DD (inclusive). Requeridos.
+        - agrupar: dia | semana | mes | depto | club | prioridad | canal (default: dia)
+        - depto, club, prioridad, canal: id o lista "1,2"
+
+    Response:
+    {
+        "success": true,
+        "agrupar": "semana",
+        "filas": [
+            {"clave": "2025-01-06", "etiqueta": "2025-01-06", "creados": 40, "resueltos": 35,
+             "cerrados": 30, "reabiertos": 1, "primeras_respuestas": 38,
+             "t_primera_respuesta_prom_min": 42.5, "t_resolucion_prom_min": 610.0, ...}
+        ],
+        "totales": {...},
+        "actualizado_en": "2025-04-01 10:00:00"
+    }
+    """
+    desde = request.args.get('desde')
+    hasta = request.args.get('hasta')
+    agrupar = request.args.get('agrupar', 'dia')
+    if not desde or not hasta:
+        raise ValidationError('Parámetros desde y hasta son requeridos (YYYY-MM-DD)')
+
+    filtros = {
+        nombre: TicketModel.parsear_ids_filtro(nombre, request.args.get(nombre))
+        for nombre in ReporteModel.FILTROS_DIMENSION
+    }
+
+    deptos_permitidos = _deptos_permitidos(operador_actual)
+    if deptos_permitidos is not None:
+        if not deptos_permitidos:
+            raise AuthorizationError('No supervisa ningún departamento')
+        if filtros['depto']:
+            filtros['depto'] = [d for d in filtros['depto'] if d in deptos_permitidos]
+            if not filtros['depto']:
+                raise AuthorizationError('No tiene acceso a los departamentos solicitados')
+
+    resultado = ReporteModel.consultar_tickets(
+        desde, hasta, agrupar=agrupar, filtros=filtros, deptos_permitidos=deptos_permitidos
+    )
+
+    marcas = ReporteModel.obtener_marcas()
+    actualizado_en = min((m['actualizado_en'] for m in marcas if m.get('actualizado_en')), default=None)
+
+    return jsonify({
+        'success': True,
+        'agrupar': agrupar,
+        'desde': desde,
+        'hasta': hasta,
+        'filas': resultado['filas'],
+        'totales': resultado['totales'],
+        'actualizado_en': actualizado_en,
+    }), 200
+
+
+@reporte_bp.route('/desempeno', methods=['GET'])
+@token_requerido
+@rol_requerido('Admin', 'Supervisor')
+@manejar_errores
+def reporte_desempeno(operador_actual):
+    """
+    Desempeño por operador o departamento de los tickets creados en el rango.
+
+    GET /api/reportes/desempeno?desde=2025-01-01&hasta=2025-03-31&agrupar=operador&depto=1,2
+
+    Query params:
+        - desde, hasta: YYYY-MM-DD (inclusive). Requeridos.
+        - agrupar: operador | depto (default: operador)
+        - depto: id o lista "1,2"
+
+    Response:
+    {
+        "success": true,
+        "agrupar": "operador",
+        "filas": [
+            {"clave": 7, "etiqueta": "Ana", "tickets": 120, "resueltos": 110, "reabiertos": 4,
+             "tasa_reapertura": 0.0364, "backlog": 10,
+             "t_primera_respuesta_min": {"p50": 12.0, "p90": 95.5, "p99": 410.0, "n": 118},
+             "t_resolucion_min": {"p50": 300.0, "p90": 2880.0, "p99": 9000.0, "n": 110}}
+        ],
+        "totales": {...}
+    }
+    """
+    desde = request.args.get('desde')
+    hasta = request.args.get('hasta')
+    agrupar = request.args.get('agrupar', 'operador')
+    if not desde or not hasta:
+        raise ValidationError('Parámetros desde y hasta son requeridos (YYYY-MM-DD)')
+    if agrupar not in DesempenoModel.AGRUPACIONES:
+        raise ValidationError(f"agrupar inválido. Opciones: {', '.join(DesempenoModel.AGRUPACIONES)}")
+
+    deptos = TicketModel.parsear_ids_filtro('depto', request.args.get('depto'))
+    deptos_permitidos = _deptos_permitidos(operador_actual)
+    if deptos_permitidos is not None:
+        if not deptos_permitidos:
+            raise AuthorizationError('No supervisa ningún departamento')
+        if deptos and not [d for d in deptos if d in deptos_permitidos]:
+            raise AuthorizationError('No tiene acceso a los departamentos solicitados')
+
+    resultado, etag = DesempenoModel.consultar(
+        desde, hasta, deptos=deptos, deptos_permitidos=deptos_permitidos
+    )
+    return respuesta_cacheable({
+        'success': True,
+        'agrupar': agrupar,
+        'desde': desde,
+        'hasta': hasta,
+        'filas': resultado[agrupar],
+        'totales': resultado['totales'],
+    }, f'{etag}-{agrupar}', max_age=60)
+
+
+@reporte_bp.route('/rollups/actualizar', methods=['POST'])
+@token_requerido
+@rol_requerido('Admin')
+@manejar_errores
+def actualizar_rollups(operador_actual):
+    """
+    Fuerza una pasada del job incremental de rollups.
+
+    POST /api/reportes/rollups/actualizar
+    """
+    resumen = ReporteModel.actualizar_rollups()
+    return jsonify({
+        'success': True,
+        'procesados': resumen,
+        'marcas': ReporteModel.obtener_marcas(),
+    }), 200
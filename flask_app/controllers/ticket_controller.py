@@ -1,12 +1,12 @@
 from flask import request, jsonify, Blueprint
-from flask_app.models.ticket_model import TicketModel
+from flask_app.models.ticket_model import TicketModel, PROYECCION_TICKET_EXPORTACION
 from flask_app.models.estado_model import EstadoModel
 from flask_app.models.prioridad_model import PrioridadModel
 from flask_app.models.club_model import ClubModel
 from flask_app.models.sla_model import SLAModel
-from flask_app.utils.jwt_utils import token_requerido
+from flask_app.utils.jwt_utils import token_requerido, permiso_requerido
 from flask_app.utils.error_handler import manejar_errores, validar_campos_requeridos, NotFoundError, ValidationError
-from datetime import datetime, timedelta
+from flask_app.utils.exportacion import respuesta_exportacion, validar_formato
 import logging
 
 ticket_bp = Blueprint('tickets', __name__, url_prefix='/api/tickets')
@@ -43,14 +43,25 @@ def listar_tickets(operador_actual):
     Query params:
         - limit: Limite de resultados (default: 50)
         - offset: Offset para paginacion (default: 0)
-        - order: Orden por fecha de creación (fecha_ini). Valores: asc|desc (default: desc)
+        - order: Dirección del orden. Valores: asc|desc (default: desc)
+        - orden_por: fecha_ini | prioridad | ultima_actividad (default: fecha_ini)
+        - estado, prioridad, depto, canal, club, etiqueta, emisor: id o lista "1,2"
+        - owner: id o lista de operadores Owner, o "sin_asignar"
+        - fecha_desde, fecha_hasta: YYYY-MM-DD (ambas inclusive, sobre fecha_ini)
     """
     limit = int(request.args.get('limit', 50))
     offset = int(request.args.get('offset', 0))
     order = request.args.get('order', 'desc')
+    orden_por = request.args.get('orden_por', 'fecha_ini')
+    filtros = {
+        nombre: request.args.get(nombre)
+        for nombre in TicketModel.FILTROS_LISTA
+        if request.args.get(nombre)
+    }
     
     # Pasar el operador_actual para filtrado
-    result = TicketModel.get_all(limit=limit, offset=offset, operador_actual=operador_actual, order=order)
+    result = TicketModel.get_all(limit=limit, offset=offset, operador_actual=operador_actual, order=order,
+                                 filtros=filtros, orden_por=orden_por)
     
     if result.get('success'):
         return jsonify({
@@ -67,6 +78,36 @@ def listar_tickets(operador_actual):
         }), 500
 
 
+@ticket_bp.route('/export', methods=['GET'])
+@token_requerido
+@manejar_errores
+def exportar_tickets(operador_actual):
+    """
+    Exporta en streaming los tickets visibles para el operador.
+
+    GET /api/tickets/export?formato=csv&estado=2&gzip=1
+
+    Query params:
+        - formato: csv | ndjson (default: csv)
+        - gzip: 1 para descargar comprimido (.gz)
+        - order, orden_por y filtros: los mismos de GET /api/tickets
+    """
+    formato = validar_formato(request.args.get('formato'))
+    filtros = {
+        nombre: request.args.get(nombre)
+        for nombre in TicketModel.FILTROS_LISTA
+        if request.args.get(nombre)
+    }
+    fuente = TicketModel.exportar(
+        operador_actual=operador_actual,
+        filtros=filtros,
+        orden_por=request.args.get('orden_por', 'fecha_ini'),
+        order=request.args.get('order', 'desc'),
+    )
+    logging.info(f"Exportación de tickets ({formato}) por operador {operador_actual.get('operador_id')}")
+    return respuesta_exportacion(fuente, PROYECCION_TICKET_EXPORTACION, formato, 'tickets')
+
+
 @ticket_bp.route('/estadisticas', methods=['GET'])
 @token_requerido
 @manejar_errores
@@ -86,6 +127,60 @@ def obtener_estadisticas(operador_actual):
     }), 500
 
 
+@ticket_bp.route('/search', methods=['GET'])
+@token_requerido
+@manejar_errores
+def buscar_tickets(operador_actual):
+    """
+    Busca tickets visibles para el operador.
+
+    GET /api/tickets/search?q=reserva piscina&limit=20
+
+    Query params:
+        - q: Texto a buscar en título, descripción, mensajes y nombre/email
+             del usuario. "#123" busca además por número de ticket.
+        - limit: Máximo de resultados (default: 20, máx: 50)
+
+    Response:
+    {
+        "success": true,
+        "q": "reserva piscina",
+        "resultados": [
+            {"id_ticket": 15, "titulo": "...", "titulo_resaltado": "...",
+             "snippet": "...la <mark>reserva</mark> de la <mark>piscina</mark>...",
+             "coincidencia": "mensaje", "score": 12.5, ...}
+        ],
+        "total": 1
+    }
+    """
+    q = (request.args.get('q') or '').strip()
+    if len(q) < 2:
+        raise ValidationError('La búsqueda debe tener al menos 2 caracteres')
+    if len(q) > 200:
+        raise ValidationError('La búsqueda no puede superar los 200 caracteres')
+
+    try:
+        limit = min(max(int(request.args.get('limit', 20)), 1), 50)
+    except (TypeError, ValueError):
+        raise ValidationError('limit debe ser un número')
+
+    result = TicketModel.buscar(q, operador_actual=operador_actual, limit=limit)
+
+    if result.get('success'):
+        return jsonify({
+            'success': True,
+            'q': q,
+            'terminos': result['terminos'],
+            'resultados': result['resultados'],
+            'total': len(result['resultados'])
+        }), 200
+
+    return jsonify({
+        'success': False,
+        'error': result.get('error', 'Error al buscar tickets')
+    }), 500
+
+
 @ticket_bp.route('/<int:ticket_id>', methods=['GET'])
 @manejar_errores
 def obtener_ticket(ticket_id):
@@ -240,73 +335,21 @@ def cambiar_estado(operador_actual, ticket_id):
     if not id_operador_actual:
         raise ValidationError('Operador no identificado')
 
-    rol_id = operador_actual.get('rol_id') or operador_actual.get('id_rol_global')
-    rol_nombre = operador_actual.get('rol') or operador_actual.get('rol_nombre')
-    is_admin = (rol_id == 1) or (isinstance(rol_nombre, str) and rol_nombre.lower() == 'admin')
-
-    id_emisor = ticket.get('id_operador_emisor')
-    # En get_by_id, el Owner viene en la key 'id_operador'
-    id_owner = ticket.get('id_operador')
-
-    es_emisor = id_emisor is not None and str(id_emisor) == str(id_operador_actual)
-    es_owner = id_owner is not None and str(id_owner) == str(id_operador_actual)
-
-    # ==============================
-    # REGLAS DE NEGOCIO: ESTADOS
-    # ==============================
-    # Admin: sin restricciones adicionales
-    if not is_admin:
-        nuevo_estado_int = int(nuevo_estado_id)
-        estado_actual_int = int(estado_actual_id)
-
-        # Resuelto (3): solo receptor/Owner
-        if nuevo_estado_int == 3 and not es_owner:
-            raise ValidationError('Solo el receptor (Owner) del ticket puede marcarlo como Resuelto')
-
-        # Cerrado (4): solo emisor
-        if nuevo_estado_int == 4 and not es_emisor:
-            raise ValidationError('Solo el emisor del ticket puede cerrarlo')
-
-        # Si el ticket está cerrado, solo el emisor puede reabrirlo
-        if estado_actual_int == 4 and nuevo_estado_int != 4 and not es_emisor:
-            raise ValidationError('Solo el emisor del ticket puede reabrir un ticket cerrado')
-
-        # Receptor/Owner (si NO es emisor): solo puede cambiar a Resuelto
-        if es_owner and not es_emisor and nuevo_estado_int != 3:
-            raise ValidationError('El receptor solo puede marcar el ticket como Resuelto')
-
-        # Emisor (si NO es owner): solo puede Cerrar, o Reabrir si está cerrado
-        if es_emisor and not es_owner:
-            if estado_actual_int != 4 and nuevo_estado_int != 4:
-                raise ValidationError('El emisor solo puede cerrar el ticket (o reabrirlo si está cerrado)')
-            if estado_actual_int == 4 and nuevo_estado_int == 3:
-                raise ValidationError('Solo el receptor (Owner) del ticket puede marcarlo como Resuelto')
-    
-    # REGLA: Estado "Nuevo" debe permanecer al menos 1 hora
-    if estado_actual_id == 1 and nuevo_estado_id != 1:  # Intentando salir de "Nuevo"
-        fecha_creacion = ticket['fecha_ini']
-        if isinstance(fecha_creacion, str):
-            fecha_creacion = datetime.strptime(fecha_creacion, '%Y-%m-%d %H:%M:%S')
-        
-        tiempo_transcurrido = datetime.now() - fecha_creacion
-        
-        # Si no ha pasado 1 hora, solo permitir cambio si hay respuesta (se maneja en mensaje_controller)
-        # Excepción: el emisor (o admin) puede cerrar cuando desee.
-        if tiempo_transcurrido < timedelta(hours=1):
-            if int(nuevo_estado_id) == 4 and (is_admin or es_emisor):
-                pass
-            else:
-                # Verificar si tiene mensajes (respuestas)
-                from flask_app.models.mensaje_model import MensajeModel
-                mensajes = MensajeModel.listar_por_ticket(ticket_id, incluir_privados=False)
-
-                # Si no tiene mensajes y quiere cambiar estado, rechazar
-                if not mensajes or len(mensajes) == 0:
-                    minutos_restantes = int((timedelta(hours=1) - tiempo_transcurrido).total_seconds() / 60)
-                    raise ValidationError(
-                        f'El ticket debe permanecer en estado "Nuevo" al menos 1 hora. '
-                        f'Tiempo restante: {minutos_restantes} minutos'
-                    )
+    # La regla de 1 hora en "Nuevo" solo consulta mensajes si hace falta
+    def _tiene_respuestas():
+        from flask_app.models.mensaje_model import MensajeModel
+        mensajes = MensajeModel.listar_por_ticket(ticket_id, incluir_privados=False)
+        return bool(mensajes)
+
+    TicketModel.validar_cambio_estado(
+        estado_actual_id,
+        nuevo_estado_id,
+        ticket['fecha_ini'],
+        ticket.get('id_operador_emisor'),
+        ticket.get('id_operador'),  # En get_by_id, el Owner viene en la key 'id_operador'
+        operador_actual,
+        _tiene_respuestas
+    )
     
     # REGLA 3: Validar que el nuevo estado existe
     estado = EstadoModel.buscar_por_id(nuevo_estado_id)
@@ -389,6 +432,68 @@ def cambiar_prioridad(operador_actual, ticket_id):
             'error': 'Error al cambiar la prioridad del ticket'
         }), 500
 
+@ticket_bp.route('/bulk', methods=['POST'])
+@token_requerido
+@manejar_errores
+def operacion_masiva(operador_actual):
+    """
+    Aplica una operación a varios tickets en una sola llamada.
+    
+    POST /api/tickets/bulk
+    Headers:
+        Authorization: Bearer <token>
+    Body:
+    {
+        "ids": [101, 102, 103],
+        "operacion": "estado" | "prioridad" | "asignar" | "agregar_etiquetas" | "quitar_etiquetas",
+        "valor": 4            (id_estado / id_prioridad / id_operador)
+                 | [1, 2]     (id_etiqueta para operaciones de etiquetas)
+    }
+    
+    Se aplican las mismas reglas que en los endpoints individuales. Los tickets
+    que no pasan la validación se informan en "resultados" sin afectar al resto.
+    """
+    data = request.get_json() or {}
+    validar_campos_requeridos(data, ['ids', 'operacion', 'valor'])
+
+    operacion = data['operacion']
+    if operacion not in TicketModel.OPERACIONES_MASIVAS:
+        raise ValidationError(
+            f'Operación inválida. Valores permitidos: {", ".join(TicketModel.OPERACIONES_MASIVAS)}'
+        )
+
+    ids = data['ids']
+    if not isinstance(ids, list) or not ids:
+        raise ValidationError('ids debe ser una lista no vacía')
+    try:
+        ids = list(dict.fromkeys(int(i) for i in ids))
+    except (TypeError, ValueError):
+        raise ValidationError('ids contiene valores inválidos')
+    if len(ids) > TicketModel.MAX_TICKETS_MASIVO:
+        raise ValidationError(f'Máximo {TicketModel.MAX_TICKETS_MASIVO} tickets por operación')
+
+    valor = data['valor']
+    try:
+        if operacion in ('agregar_etiquetas', 'quitar_etiquetas'):
+            if not isinstance(valor, list):
+                raise ValidationError('valor debe ser una lista de etiquetas')
+            valor = [int(v) for v in valor]
+        else:
+            valor = int(valor)
+    except (TypeError, ValueError):
+        raise ValidationError('valor inválido')
+
+    result = TicketModel.operacion_masiva(ids, operacion, valor, operador_actual)
+
+    if not result.get('success'):
+        return jsonify({
+            'success': False,
+            'error': result.get('error', 'Error al aplicar la operación')
+        }), 400
+
+    return jsonify(result), 200
+
+
 @ticket_bp.route('/actualizar-estados-automaticos', methods=['POST'])
 @token_requerido
 @manejar_errores
@@ -512,6 +617,7 @@ def tomar_ticket(operador_actual, id_ticket):
 
 @ticket_bp.route('/<int:id_ticket>/asignar', methods=['POST'])
 @token_requerido
+@permiso_requerido('ticket.assign')
 @manejar_errores
 def asignar_ticket_endpoint(operador_actual, id_ticket):
     """
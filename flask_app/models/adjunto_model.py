@@ -1,5 +1,7 @@
 from flask_app.config.conexion_login import execute_query, get_local_db_connection
+from flask_app.services import almacenamiento
 from datetime import datetime
+import logging
 import os
 
 
@@ -17,26 +19,61 @@ class AdjuntoModel:
         Args:
             data: dict con {
                 'nom_adj': str - Nombre del archivo,
-                'ruta': str - Ruta donde se guardó el archivo,
-                'id_msg': int - ID del mensaje al que pertenece
+                'ruta': str - Clave de almacenamiento (ver guardar_archivo),
+                'id_msg': int - ID del mensaje al que pertenece,
+                'tamano': int (opcional) - Bytes,
+                'mime': str (opcional) - Tipo MIME,
+                'sha256': str (opcional) - Hash hex del contenido
             }
         
         Returns:
             dict: {'id_adj': int}
         """
         query = """
-            INSERT INTO adjunto (nom_adj, ruta, id_msg)
-            VALUES (%s, %s, %s)
+            INSERT INTO adjunto (nom_adj, ruta, id_msg, tamano, mime, sha256)
+            VALUES (%s, %s, %s, %s, %s, %s)
         """
         
         params = (
             data['nom_adj'],
             data['ruta'],
-            data['id_msg']
+            data['id_msg'],
+            data.get('tamano'),
+            data.get('mime'),
+            data.get('sha256')
         )
         
         id_adj = execute_query(query, params, commit=True)
+        AdjuntoModel.despues_de_crear(id_adj, data)
         return {'id_adj': id_adj}
+
+    @staticmethod
+    def despues_de_crear(id_adj, data):
+        """
+        Procesamiento en segundo plano de un adjunto recién registrado
+        (vistas previas, extracción de texto para la búsqueda y variante
+        optimizada de las imágenes). Nunca
+        falla: el adjunto ya quedó guardado.
+
+        Args:
+            id_adj: int
+            data: dict con al menos 'nom_adj' y 'ruta' (y 'tamano' si se conoce)
+        """
+        try:
+            from flask_app.services import vistas_previas
+            vistas_previas.encolar(id_adj, data.get('ruta'), data.get('nom_adj'))
+        except Exception:
+            logging.exception(f'No se pudo encolar la vista previa del adjunto {id_adj}')
+        try:
+            from flask_app.services import extraccion_texto
+            extraccion_texto.encolar(id_adj, data.get('ruta'), data.get('nom_adj'), data.get('tamano'))
+        except Exception:
+            logging.exception(f'No se pudo encolar la extracción de texto del adjunto {id_adj}')
+        try:
+            from flask_app.services import optimizacion_imagenes
+            optimizacion_imagenes.encolar(id_adj, data.get('ruta'), data.get('nom_adj'), data.get('tamano'))
+        except Exception:
+            logging.exception(f'No se pudo encolar la optimización de la imagen del adjunto {id_adj}')
     
     @staticmethod
     def buscar_por_id(id_adj):
@@ -140,12 +177,17 @@ class AdjuntoModel:
             query = "DELETE FROM adjunto WHERE id_adj = %s"
             execute_query(query, (id_adj,), commit=True)
             
-            # Eliminar archivo físico si existe
-            if adjunto.get('ruta') and os.path.exists(adjunto['ruta']):
+            # Eliminar archivos físicos (original y variante optimizada) si existen
+            for ruta in (adjunto.get('ruta'), adjunto.get('ruta_optimizada')):
+                if not ruta:
+                    continue
                 try:
-                    os.remove(adjunto['ruta'])
+                    almacenamiento.eliminar(ruta)
                 except Exception as e:
                     print(f"Error al eliminar archivo físico: {e}")
+
+            from flask_app.services import vistas_previas
+            vistas_previas.eliminar(id_adj)
         
         return True
     
@@ -165,7 +207,9 @@ class AdjuntoModel:
                 COUNT(a.id_adj) as total_adjuntos,
                 COUNT(DISTINCT a.id_msg) as mensajes_con_adjuntos,
                 SUM(CASE WHEN a.deleted_at IS NULL THEN 1 ELSE 0 END) as adjuntos_activos,
-                SUM(CASE WHEN a.deleted_at IS NOT NULL THEN 1 ELSE 0 END) as adjuntos_eliminados
+                SUM(CASE WHEN a.deleted_at IS NOT NULL THEN 1 ELSE 0 END) as adjuntos_eliminados,
+                COALESCE(SUM(CASE WHEN a.deleted_at IS NULL THEN a.tamano END), 0) as bytes_activos,
+                SUM(CASE WHEN a.deleted_at IS NULL AND a.tamano IS NULL THEN 1 ELSE 0 END) as adjuntos_sin_tamano
             FROM adjunto a
             INNER JOIN mensaje m ON a.id_msg = m.id_msg
             WHERE m.id_ticket = %s
@@ -208,65 +252,184 @@ class AdjuntoModel:
         
         return True, "OK"
     
-    @staticmethod
-    def generar_nombre_unico(filename):
-        """
-        Genera un nombre único para el archivo.
-        
-        Args:
-            filename: str - Nombre original del archivo
-        
-        Returns:
-            str: Nombre único
-        """
-        import uuid
-        
-        # Separar nombre y extensión
-        if '.' in filename:
-            name, ext = filename.rsplit('.', 1)
-            # Generar nombre único: timestamp_uuid.ext
-            unique_name = f"{datetime.now().strftime('%Y%m%d_%H%M%S')}_{uuid.uuid4().hex[:8]}.{ext}"
-        else:
-            unique_name = f"{datetime.now().strftime('%Y%m%d_%H%M%S')}_{uuid.uuid4().hex[:8]}"
-        
-        return unique_name
-    
     @staticmethod
     def obtener_ruta_almacenamiento():
         """
-        Obtiene la ruta base para almacenar archivos.
+        Obtiene la carpeta local de adjuntos (backend local, cachés de
+        vistas previas y archivos con ruta absoluta legada).
         
         Returns:
             str: Ruta absoluta del directorio de uploads
         """
-        # Ruta base del proyecto
-        base_dir = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
-        
-        # Directorio de uploads
-        upload_dir = os.path.join(base_dir, 'uploads')
+        upload_dir = almacenamiento.raiz_local()
         
         # Crear directorio si no existe
         if not os.path.exists(upload_dir):
             os.makedirs(upload_dir)
         
         return upload_dir
-    
+
     @staticmethod
-    def obtener_ruta_por_ticket(id_ticket):
+    def guardar_archivo(nombre, origen, mime=None):
         """
-        Obtiene la ruta para archivos de un ticket específico.
+        Guarda el contenido de un adjunto en el almacenamiento configurado.
         
         Args:
-            id_ticket: int
+            nombre: str - Nombre original (define la extensión de la clave)
+            origen: archivo binario abierto (se lee en bloques)
+            mime: str - Tipo declarado por el cliente, si lo hay
         
         Returns:
-            str: Ruta del directorio para el ticket
+            dict: {'ruta', 'tamano', 'mime', 'sha256'}, listo para crear_adjunto
         """
-        upload_dir = AdjuntoModel.obtener_ruta_almacenamiento()
-        ticket_dir = os.path.join(upload_dir, f"ticket_{id_ticket}")
+        guardado = almacenamiento.guardar(nombre, origen, mime)
+        return {
+            'ruta': guardado.clave,
+            'tamano': guardado.tamano,
+            'mime': guardado.mime,
+            'sha256': guardado.sha256,
+        }
+
+    # ------------------------------------------------------------------
+    # Recolección de archivos (ver services/limpieza_adjuntos.py)
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def listar_para_purgar(gracia_dias, lote=100):
+        """
+        Adjuntos eliminados (soft delete) hace más de `gracia_dias` cuyo
+        archivo todavía no se borró.
         
-        # Crear directorio si no existe
-        if not os.path.exists(ticket_dir):
-            os.makedirs(ticket_dir)
+        Returns:
+            list de dict {'id_adj', 'ruta', 'ruta_optimizada'}
+        """
+        query = """
+            SELECT id_adj, ruta, ruta_optimizada
+            FROM adjunto
+            WHERE deleted_at < DATE_SUB(NOW(), INTERVAL %s DAY)
+              AND ruta IS NOT NULL
+            ORDER BY deleted_at
+            LIMIT %s
+        """
+        return execute_query(query, (gracia_dias, lote), fetch_all=True) or []
+
+    @staticmethod
+    def marcar_purgado(id_adj, ruta):
+        """
+        Desvincula los archivos de un adjunto eliminado (ruta y
+        ruta_optimizada = NULL). La fila
+        se conserva para el historial. Se hace antes de borrar el archivo:
+        si el borrado falla, el archivo queda huérfano y lo detecta el GC.
+        
+        Returns:
+            bool: False si el adjunto cambió (restaurado o ya purgado)
+        """
+        conn = get_local_db_connection()
+        try:
+            with conn.cursor() as cursor:
+                filas = cursor.execute(
+                    """
+                    UPDATE adjunto SET ruta = NULL, ruta_optimizada = NULL
+                    WHERE id_adj = %s AND ruta = %s AND deleted_at IS NOT NULL
+                    """,
+                    (id_adj, ruta),
+                )
+            conn.commit()
+            return bool(filas)
+        finally:
+            conn.close()
+
+    @staticmethod
+    def claves_referenciadas(claves):
+        """
+        Subconjunto de `claves` que usa algún adjunto (eliminado o no) o una
+        subida por trozos en curso.
         
-        return ticket_dir
+        Returns:
+            set de str
+        """
+        if not claves:
+            return set()
+        marcadores = ', '.join(['%s'] * len(claves))
+        query = f"""
+            SELECT ruta FROM adjunto WHERE ruta IN ({marcadores})
+            UNION
+            SELECT ruta_optimizada FROM adjunto WHERE ruta_optimizada IN ({marcadores})
+            UNION
+            SELECT ruta FROM adjunto_subida WHERE ruta IN ({marcadores})
+        """
+        filas = execute_query(query, tuple(claves) * 3, fetch_all=True) or []
+        return {f['ruta'] for f in filas}
+
+    # ------------------------------------------------------------------
+    # Variante optimizada de imágenes (ver services/optimizacion_imagenes.py)
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def registrar_optimizada(id_adj, ruta_optimizada, tamano_optimizado):
+        """
+        Registra el resultado de la optimización. `ruta_optimizada` None
+        significa que la variante no ahorraba lo suficiente y se sirve el
+        original; igual se marca tamano_optimizado para no reprocesarla.
+        
+        Returns:
+            bool: False si el adjunto fue eliminado o ya estaba procesado
+                  (el llamador debe borrar la variante huérfana)
+        """
+        conn = get_local_db_connection()
+        try:
+            with conn.cursor() as cursor:
+                filas = cursor.execute(
+                    """
+                    UPDATE adjunto SET ruta_optimizada = %s, tamano_optimizado = %s
+                    WHERE id_adj = %s AND deleted_at IS NULL AND tamano_optimizado IS NULL
+                    """,
+                    (ruta_optimizada, tamano_optimizado, id_adj),
+                )
+            conn.commit()
+            return bool(filas)
+        finally:
+            conn.close()
+
+    @staticmethod
+    def listar_sin_optimizar(ultimo_id=0, lote=200):
+        """Adjuntos vigentes que todavía no pasaron por la optimización (backfill)."""
+        return execute_query(
+            """
+            SELECT id_adj, nom_adj, ruta, tamano
+            FROM adjunto
+            WHERE id_adj > %s
+              AND deleted_at IS NULL
+              AND ruta IS NOT NULL
+              AND tamano_optimizado IS NULL
+            ORDER BY id_adj
+            LIMIT %s
+            """,
+            (ultimo_id, lote),
+            fetch_all=True,
+        ) or []
+
+    @staticmethod
+    def resumen_optimizacion():
+        """
+        Totales de los adjuntos vigentes con variante optimizada.
+        
+        Returns:
+            dict {'procesados', 'con_variante', 'bytes_originales', 'bytes_variantes', 'bytes_ahorrados'}
+        """
+        fila = execute_query(
+            """
+            SELECT
+                COUNT(*) as procesados,
+                COUNT(ruta_optimizada) as con_variante,
+                COALESCE(SUM(CASE WHEN ruta_optimizada IS NOT NULL THEN tamano END), 0) as bytes_originales,
+                COALESCE(SUM(CASE WHEN ruta_optimizada IS NOT NULL THEN tamano_optimizado END), 0) as bytes_variantes
+            FROM adjunto
+            WHERE deleted_at IS NULL AND tamano_optimizado IS NOT NULL
+            """,
+            fetch_one=True,
+        ) or {}
+        resumen = {clave: int(fila.get(clave) or 0)
+                   for clave in ('procesados', 'con_variante', 'bytes_originales', 'bytes_variantes')}
+        resumen['bytes_ahorrados'] = resumen['bytes_originales'] - resumen['bytes_variantes']
+        return resumen
@@ -0,0 +1,368 @@
+from flask_app.config.conexion_login import execute_query, get_local_db_connection
+from flask_app.models.adjunto_model import AdjuntoModel
+from flask_app.services import almacenamiento
+import hashlib
+import logging
+import os
+import threading
+import uuid
+
+# Tamaño máximo de un trozo (PUT) y del archivo completo
+CHUNK_MAX_BYTES = int(os.getenv('ADJUNTOS_CHUNK_MAX_MB', 8)) * 1024 * 1024
+SUBIDA_MAX_BYTES = int(os.getenv('ADJUNTOS_SUBIDA_MAX_MB', 200)) * 1024 * 1024
+# Subidas sin actividad por más de estas horas se descartan (archivo + fila)
+SUBIDA_EXPIRA_HORAS = int(os.getenv('ADJUNTOS_SUBIDA_EXPIRA_HORAS', 24))
+
+_BLOQUE = 64 * 1024
+
+# Estado SHA-256 incremental por subida en este proceso: id_subida -> (offset, hash).
+# Si un trozo llega a otro proceso (o tras reiniciar) el estado se descarta y el
+# hash se recalcula desde el archivo (disco u objeto remoto) al completar.
+_hashes = {}
+_lock_hashes = threading.Lock()
+
+
+class SubidaConflicto(Exception):
+    """El offset del trozo no coincide con lo ya recibido."""
+
+    def __init__(self, recibido):
+        super().__init__(f'Offset esperado: {recibido}')
+        self.recibido = recibido
+
+
+class AdjuntoSubidaModel:
+    """
+    Subidas de adjuntos por trozos y reanudables.
+
+    Protocolo: iniciar (reserva la clave final) -> escribir_trozo (PUT en el
+    offset recibido hasta ahora, tantas veces como haga falta) -> completar
+    (verifica tamaño y SHA-256 y registra el adjunto). La fila de
+    adjunto_subida guarda la clave (columna ruta) y cuántos bytes están
+    confirmados, así que cualquier nodo puede recibir cualquier trozo:
+
+    - almacenamiento local: los trozos se escriben directo en el archivo
+      definitivo de la clave, sin copia intermedia (con varios nodos,
+      ADJUNTOS_DIR debe ser un volumen compartido, igual que para los
+      adjuntos ya subidos);
+    - S3: cada trozo es una parte de una subida multipart (id_multipart en
+      adjunto_subida, ETag de cada parte en adjunto_subida_parte) y
+      completar la cierra con CompleteMultipartUpload. Nada pasa por el
+      disco del nodo. S3 exige que cada parte salvo la última tenga al
+      menos PARTE_MIN_BYTES.
+    """
+
+    @staticmethod
+    def es_multipart(subida):
+        return bool(subida.get('id_multipart'))
+
+    @staticmethod
+    def chunk_max(subida):
+        """Tamaño máximo de trozo para la subida (nunca menor que una parte de S3)."""
+        if AdjuntoSubidaModel.es_multipart(subida):
+            return max(CHUNK_MAX_BYTES, almacenamiento.PARTE_MIN_BYTES)
+        return CHUNK_MAX_BYTES
+
+    @staticmethod
+    def chunk_min(subida):
+        """Tamaño mínimo de todo trozo salvo el último (0: sin mínimo)."""
+        return almacenamiento.PARTE_MIN_BYTES if AdjuntoSubidaModel.es_multipart(subida) else 0
+
+    @staticmethod
+    def ruta_trozos(subida):
+        """Archivo local donde se escriben los trozos (None si la subida es multipart)."""
+        return almacenamiento.ruta_local(subida['ruta'])
+
+    @staticmethod
+    def iniciar(id_msg, id_operador, nombre, tamano):
+        """
+        Crea la sesión de subida: el archivo vacío donde se escribirán los
+        trozos o, con un backend remoto, la subida multipart.
+
+        Returns:
+            dict con la sesión
+        """
+        subida = {
+            'id_subida': uuid.uuid4().hex,
+            'id_msg': id_msg,
+            'nom_adj': nombre,
+            'ruta': almacenamiento.nueva_clave(nombre),
+            'id_multipart': None,
+            'tamano': tamano,
+            'recibido': 0,
+        }
+        ruta = AdjuntoSubidaModel.ruta_trozos(subida)
+        if ruta is None:
+            subida['id_multipart'] = almacenamiento.obtener_almacenamiento().iniciar_multipart(subida['ruta'])
+        else:
+            os.makedirs(os.path.dirname(ruta), exist_ok=True)
+            with open(ruta, 'wb'):
+                pass
+        try:
+            execute_query(
+                """
+                INSERT INTO adjunto_subida
+                    (id_subida, id_msg, id_operador, nom_adj, ruta, id_multipart, tamano, recibido,
+                     creado_en, actualizado_en)
+                VALUES (%s, %s, %s, %s, %s, %s, %s, 0, NOW(), NOW())
+                """,
+                (subida['id_subida'], id_msg, id_operador, nombre, subida['ruta'], subida['id_multipart'], tamano),
+                commit=True,
+            )
+        except Exception:
+            AdjuntoSubidaModel._descartar_datos(subida)
+            raise
+
+        with _lock_hashes:
+            _hashes[subida['id_subida']] = (0, hashlib.sha256())
+
+        return subida
+
+    @staticmethod
+    def buscar(id_subida):
+        """Sesión de subida (con id_ticket del mensaje) o None."""
+        return execute_query(
+            """
+            SELECT s.*, m.id_ticket
+            FROM adjunto_subida s
+            INNER JOIN mensaje m ON m.id_msg = s.id_msg
+            WHERE s.id_subida = %s
+            """,
+            (id_subida,),
+            fetch_one=True,
+        )
+
+    @staticmethod
+    def escribir_trozo(subida, offset, stream, largo):
+        """
+        Escribe `largo` bytes de `stream` en `offset` y confirma el avance.
+
+        El offset debe ser exactamente lo recibido hasta ahora; si no, se
+        lanza SubidaConflicto con el valor vigente para que el cliente
+        reanude desde ahí. En una subida multipart el trozo se sube como la
+        parte siguiente (partes + 1) y su ETag se confirma junto con el avance.
+
+        Returns:
+            int: bytes recibidos tras el trozo
+        """
+        id_subida = subida['id_subida']
+        recibido = int(subida['recibido'])
+        if offset != recibido:
+            raise SubidaConflicto(recibido)
+
+        with _lock_hashes:
+            estado = _hashes.pop(id_subida, None)
+        sha = estado[1] if estado and estado[0] == offset else None
+
+        if AdjuntoSubidaModel.es_multipart(subida):
+            datos = bytearray()
+            while len(datos) < largo:
+                bloque = stream.read(min(_BLOQUE, largo - len(datos)))
+                if not bloque:
+                    break
+                datos += bloque
+            if sha is not None:
+                sha.update(datos)
+            escritos = len(datos)
+            # Un reintento tras un fallo reutiliza el número: S3 reemplaza la parte
+            numero = int(subida.get('partes') or 0) + 1
+            etag = almacenamiento.obtener_almacenamiento().subir_parte(
+                subida['ruta'], subida['id_multipart'], numero, bytes(datos)
+            )
+        else:
+            numero = etag = None
+            escritos = 0
+            with open(AdjuntoSubidaModel.ruta_trozos(subida), 'r+b') as f:
+                f.seek(offset)
+                while escritos < largo:
+                    bloque = stream.read(min(_BLOQUE, largo - escritos))
+                    if not bloque:
+                        break
+                    f.write(bloque)
+                    if sha is not None:
+                        sha.update(bloque)
+                    escritos += len(bloque)
+                # Descarta restos de un intento anterior que no llegó a confirmarse
+                f.truncate(offset + escritos)
+
+        nuevo = offset + escritos
+        conn = get_local_db_connection()
+        try:
+            with conn.cursor() as cursor:
+                if numero is None:
+                    filas = cursor.execute(
+                        """
+                        UPDATE adjunto_subida
+                        SET recibido = %s, actualizado_en = NOW()
+                        WHERE id_subida = %s AND recibido = %s
+                        """,
+                        (nuevo, id_subida, offset),
+                    )
+                else:
+                    filas = cursor.execute(
+                        """
+                        UPDATE adjunto_subida
+                        SET recibido = %s, partes = %s, actualizado_en = NOW()
+                        WHERE id_subida = %s AND recibido = %s
+                        """,
+                        (nuevo, numero, id_subida, offset),
+                    )
+                    if filas:
+                        cursor.execute(
+                            """
+                            INSERT INTO adjunto_subida_parte (id_subida, numero, etag, tamano)
+                            VALUES (%s, %s, %s, %s)
+                            """,
+                            (id_subida, numero, etag, escritos),
+                        )
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            conn.close()
+
+        if not filas:
+            # Otro request confirmó antes este mismo tramo
+            actual = AdjuntoSubidaModel.buscar(id_subida)
+            raise SubidaConflicto(int(actual['recibido']) if actual else 0)
+
+        if sha is not None:
+            with _lock_hashes:
+                _hashes[id_subida] = (nuevo, sha)
+        return nuevo
+
+    @staticmethod
+    def completar(subida, sha256_esperado=None):
+        """
+        Registra el adjunto y cierra la sesión. Usa el hash incremental si
+        este proceso recibió todos los trozos; si no, lo recalcula leyendo
+        el archivo (del disco o, si es multipart, del objeto ya unido).
+
+        Args:
+            subida: dict de buscar()
+            sha256_esperado: hex del cliente; si no coincide se descarta la subida
+
+        Returns:
+            dict: {'id_adj': int, 'sha256': str, 'mime': str}
+        """
+        id_subida = subida['id_subida']
+        with _lock_hashes:
+            estado = _hashes.pop(id_subida, None)
+
+        remoto = AdjuntoSubidaModel.es_multipart(subida)
+        if remoto:
+            if int(subida['recibido']) != int(subida['tamano']):
+                raise SubidaConflicto(int(subida['recibido']))
+            partes = execute_query(
+                "SELECT numero, etag FROM adjunto_subida_parte WHERE id_subida = %s ORDER BY numero",
+                (id_subida,),
+                fetch_all=True,
+            ) or []
+            # Si dos nodos confirmaron el mismo número con contenido distinto,
+            # el ETag guardado ya no coincide y S3 rechaza la unión
+            almacenamiento.obtener_almacenamiento().completar_multipart(
+                subida['ruta'], subida['id_multipart'], [(p['numero'], p['etag']) for p in partes]
+            )
+
+        if estado and estado[0] == int(subida['recibido']):
+            sha256 = estado[1].hexdigest()
+            with almacenamiento.abrir(subida['ruta']) as f:
+                cabecera = f.read(16)
+        else:
+            with almacenamiento.abrir(subida['ruta']) as f:
+                lector = almacenamiento.LectorMedido(f)
+                for _ in iter(lambda: lector.read(1024 * 1024), b''):
+                    pass
+            sha256, cabecera = lector.sha256, lector.cabecera
+
+        if sha256_esperado and sha256_esperado != sha256:
+            AdjuntoSubidaModel.cancelar(subida)
+            raise ValueError('El SHA-256 del archivo recibido no coincide; la subida se descartó')
+
+        mime = almacenamiento.detectar_mime(subida['nom_adj'], cabecera)
+
+        # Alta del adjunto y baja de la sesión en la misma transacción: el GC
+        # nunca ve una sesión vencida cuyo archivo ya pertenece a un adjunto
+        conn = get_local_db_connection()
+        try:
+            with conn.cursor() as cursor:
+                cursor.execute(
+                    "DELETE FROM adjunto_subida WHERE id_subida = %s AND recibido = tamano",
+                    (id_subida,),
+                )
+                if not cursor.rowcount:
+                    raise SubidaConflicto(int(subida['recibido']))
+                cursor.execute(
+                    """
+                    INSERT INTO adjunto (nom_adj, ruta, id_msg, tamano, mime, sha256)
+                    VALUES (%s, %s, %s, %s, %s, %s)
+                    """,
+                    (subida['nom_adj'], subida['ruta'], subida['id_msg'], int(subida['tamano']), mime, sha256),
+                )
+                id_adj = cursor.lastrowid
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            if remoto:
+                almacenamiento.eliminar(subida['ruta'])
+            raise
+        finally:
+            conn.close()
+        AdjuntoModel.despues_de_crear(id_adj, subida)
+        return {'id_adj': id_adj, 'sha256': sha256, 'mime': mime}
+
+    @staticmethod
+    def cancelar(subida):
+        """Elimina la sesión y el archivo parcial (o aborta la subida multipart)."""
+        with _lock_hashes:
+            _hashes.pop(subida['id_subida'], None)
+        execute_query("DELETE FROM adjunto_subida WHERE id_subida = %s", (subida['id_subida'],), commit=True)
+        AdjuntoSubidaModel._descartar_datos(subida)
+
+    @staticmethod
+    def limpiar_vencidas(horas=SUBIDA_EXPIRA_HORAS, lote=200):
+        """
+        Descarta las subidas sin actividad hace más de `horas`.
+
+        Returns:
+            int: sesiones eliminadas
+        """
+        vencidas = execute_query(
+            """
+            SELECT id_subida, ruta, id_multipart
+            FROM adjunto_subida
+            WHERE actualizado_en < DATE_SUB(NOW(), INTERVAL %s HOUR)
+            ORDER BY actualizado_en
+            LIMIT %s
+            """,
+            (horas, lote),
+            fetch_all=True,
+        ) or []
+        for subida in vencidas:
+            try:
+                AdjuntoSubidaModel.cancelar(subida)
+            except Exception:
+                logging.exception(f"No se pudo descartar la subida {subida['id_subida']}")
+        return len(vencidas)
+
+    @staticmethod
+    def _descartar_datos(subida):
+        """Borra lo recibido de una subida: el archivo parcial, o la subida multipart y el objeto."""
+        if not AdjuntoSubidaModel.es_multipart(subida):
+            AdjuntoSubidaModel._borrar_archivo(AdjuntoSubidaModel.ruta_trozos(subida))
+            return
+        try:
+            backend = almacenamiento.obtener_almacenamiento()
+            backend.abortar_multipart(subida['ruta'], subida['id_multipart'])
+            # Si ya se había unido (p. ej. SHA-256 distinto al completar)
+            backend.eliminar(subida['ruta'])
+        except Exception:
+            logging.exception(f"No se pudo abortar la subida multipart {subida['id_subida']}")
+
+    @staticmethod
+    def _borrar_archivo(ruta):
+        try:
+            if ruta and os.path.exists(ruta):
+                os.remove(ruta)
+        except OSError:
+            logging.exception(f'No se pudo eliminar el archivo parcial {ruta}')
@@ -0,0 +1,60 @@
+from flask_app.config.conexion_login import execute_query
+
+
+class AdjuntoTextoModel:
+    """
+    Texto extraído de los adjuntos (ver services/extraccion_texto.py).
+
+    Una fila por adjunto procesado, incluso si no se obtuvo texto (estado
+    'vacio', 'tiempo' o 'error'), para no reintentarlo en cada backfill.
+    id_ticket se copia del mensaje para que la búsqueda no necesite joins.
+    """
+
+    @staticmethod
+    def guardar(id_adj, texto, estado):
+        """Inserta o reemplaza el texto del adjunto."""
+        execute_query(
+            """
+            INSERT INTO adjunto_texto (id_adj, id_ticket, texto, estado, caracteres, extraido_en)
+            SELECT a.id_adj, m.id_ticket, %s, %s, %s, NOW()
+            FROM adjunto a
+            INNER JOIN mensaje m ON m.id_msg = a.id_msg
+            WHERE a.id_adj = %s
+            ON DUPLICATE KEY UPDATE texto = VALUES(texto), estado = VALUES(estado),
+                                    caracteres = VALUES(caracteres), extraido_en = NOW()
+            """,
+            (texto or '', estado, len(texto or ''), id_adj),
+            commit=True,
+        )
+
+    @staticmethod
+    def obtener(id_adj):
+        """dict {id_adj, id_ticket, texto, estado, caracteres, extraido_en} o None."""
+        return execute_query(
+            "SELECT * FROM adjunto_texto WHERE id_adj = %s",
+            (id_adj,),
+            fetch_one=True,
+        )
+
+    @staticmethod
+    def eliminar(id_adj):
+        execute_query("DELETE FROM adjunto_texto WHERE id_adj = %s", (id_adj,), commit=True)
+
+    @staticmethod
+    def listar_sin_texto(ultimo_id=0, lote=200):
+        """Adjuntos vigentes que todavía no pasaron por la extracción (backfill)."""
+        return execute_query(
+            """
+            SELECT a.id_adj, a.nom_adj, a.ruta, a.tamano
+            FROM adjunto a
+            LEFT JOIN adjunto_texto t ON t.id_adj = a.id_adj
+            WHERE a.id_adj > %s
+              AND a.deleted_at IS NULL
+              AND a.ruta IS NOT NULL
+              AND t.id_adj IS NULL
+            ORDER BY a.id_adj
+            LIMIT %s
+            """,
+            (ultimo_id, lote),
+            fetch_all=True,
+        ) or []
@@ -10,8 +10,82 @@ esquema existente para permitir registros sin `id_ticket`.
 
 from __future__ import annotations
 
+import base64
+from datetime import datetime, timedelta
+
 from flask_app.config.conexion_login import execute_query
-from datetime import datetime
+from flask_app.utils.error_handler import ValidationError
+from flask_app.utils.exportacion import CursorSinBuffer
+from flask_app.utils.serializacion import Proyeccion, fecha_texto
+
+# Hasta este número de filas el total se cuenta exacto; por encima se estima
+TOPE_TOTAL_EXACTO = 10000
+
+
+def normalizar_accion(accion):
+    """Misma normalización que la columna generada historial_acciones_ticket.accion_norm."""
+    return str(accion).strip(' ').lower()
+
+
+def codificar_cursor(fecha, id_historial):
+    """Cursor opaco de paginación (keyset) a partir de la última fila de la página."""
+    crudo = f"{fecha:%Y-%m-%dT%H:%M:%S}|{int(id_historial)}"
+    return base64.urlsafe_b64encode(crudo.encode('ascii')).decode('ascii').rstrip('=')
+
+
+def decodificar_cursor(cursor):
+    """Inverso de codificar_cursor. Retorna (fecha, id_historial)."""
+    try:
+        relleno = '=' * (-len(cursor) % 4)
+        fecha_txt, id_txt = base64.urlsafe_b64decode(cursor + relleno).decode('ascii').split('|')
+        return datetime.strptime(fecha_txt, '%Y-%m-%dT%H:%M:%S'), int(id_txt)
+    except (ValueError, UnicodeDecodeError):
+        raise ValidationError('cursor inválido')
+
+
+def _detalle_cambio(r):
+    va = r.get('valor_anterior')
+    vn = r.get('valor_nuevo')
+    if va is None and vn is None:
+        return None
+    return f"{va or ''} -> {vn or ''}".strip()
+
+
+# Formato que consume el frontend de auditoría
+PROYECCION_AUDITORIA = Proyeccion({
+    'id': 'id',
+    'fecha': fecha_texto('fecha'),
+    'id_operador': 'id_operador',
+    'id_usuarioext': 'id_usuarioext',
+    'operador_nombre': lambda r: r.get('operador_nombre') or 'Operador',
+    'id_depto': 'id_depto',
+    'depto_nombre': 'depto_nombre',
+    'accion': 'accion',
+    'id_ticket': 'id_ticket',
+    'valor_anterior': 'valor_anterior',
+    'valor_nuevo': 'valor_nuevo',
+    'metodo': lambda r: None,
+    'endpoint': lambda r: f"Ticket #{r.get('id_ticket')}" if r.get('id_ticket') else None,
+    'status_code': lambda r: None,
+    'ip': lambda r: None,
+    'detalle': _detalle_cambio,
+})
+
+
+# Columnas de GET /api/admin/auditoria/export (CSV / NDJSON)
+PROYECCION_EXPORTACION_AUDITORIA = Proyeccion({
+    'id': 'id',
+    'fecha': fecha_texto('fecha'),
+    'id_ticket': 'id_ticket',
+    'accion': 'accion',
+    'valor_anterior': 'valor_anterior',
+    'valor_nuevo': 'valor_nuevo',
+    'id_operador': 'id_operador',
+    'operador': 'operador_nombre',
+    'id_usuarioext': 'id_usuarioext',
+    'id_depto': 'id_depto',
+    'departamento': 'depto_nombre',
+})
 
 
 class AuditoriaModel:
@@ -39,15 +113,26 @@ class AuditoriaModel:
         return row.get('id_depto')
 
     @staticmethod
-    def listar(depto_id=None, operador_id=None, accion=None, fecha=None, limit=50, offset=0):
-        """Lista historial de acciones filtrando por depto/operador/accion/fecha (YYYY-MM-DD).
+    def _parsear_fecha(nombre, valor):
+        try:
+            return datetime.strptime(str(valor).strip()[:10], '%Y-%m-%d')
+        except ValueError:
+            raise ValidationError(f'{nombre} inválida (formato YYYY-MM-DD)')
+
+    @staticmethod
+    def construir_filtros(depto_id=None, operador_id=None, accion=None, fecha=None,
+                          fecha_desde=None, fecha_hasta=None):
+        """
+        WHERE (sobre `h` = historial y `t` = ticket) y parámetros de los filtros.
 
-        Depende de que `ticket.id_depto` exista (ver script `agregar_campo_depto_ticket.py`).
+        Todos los predicados son sargables: rangos sobre h.fecha en lugar de
+        DATE(h.fecha) y la columna generada h.accion_norm en lugar de
+        LOWER(TRIM(h.accion)).
         """
         where = []
         params = []
 
-        accion_norm = str(accion).strip().lower() if accion is not None else None
+        accion_norm = normalizar_accion(accion) if accion and accion != 'all' else None
 
         if depto_id:
             # Por defecto filtramos por depto destino del ticket.
@@ -55,14 +140,14 @@ class AuditoriaModel:
             # desde el depto del operador creador (depto origen).
             if accion_norm == 'ticket creado':
                 where.append(
-                    "(" 
+                    "("
                     "t.id_depto = %s OR "
-                    "EXISTS (" 
+                    "EXISTS ("
                     "  SELECT 1 FROM miembro_dpto md "
                     "  WHERE md.id_operador = h.id_operador "
                     "    AND md.fecha_desasignacion IS NULL "
-                    "    AND md.id_depto = %s" 
-                    ")" 
+                    "    AND md.id_depto = %s"
+                    ")"
                     ")"
                 )
                 params.append(int(depto_id))
@@ -75,104 +160,167 @@ class AuditoriaModel:
             where.append('h.id_operador = %s')
             params.append(int(operador_id))
 
-        if accion and accion != 'all':
-            # Algunas tablas pueden tener collation case-sensitive; normalizar para evitar
-            # que 'Ticket Creado' != 'Ticket creado' rompa el filtrado.
-            where.append('LOWER(TRIM(h.accion)) = LOWER(TRIM(%s))')
-            params.append(str(accion))
+        if accion_norm:
+            where.append('h.accion_norm = %s')
+            params.append(accion_norm)
 
+        # `fecha` (un día) se mantiene por compatibilidad; equivale a desde = hasta
         if fecha:
-            # fecha: 'YYYY-MM-DD'
-            where.append('DATE(h.fecha) = %s')
-            params.append(str(fecha))
+            fecha_desde = fecha_hasta = fecha
+        if fecha_desde:
+            where.append('h.fecha >= %s')
+            params.append(AuditoriaModel._parsear_fecha('fecha_desde', fecha_desde))
+        if fecha_hasta:
+            where.append('h.fecha < %s')
+            params.append(AuditoriaModel._parsear_fecha('fecha_hasta', fecha_hasta) + timedelta(days=1))
+
+        return where, params
+
+    @staticmethod
+    def listar(depto_id=None, operador_id=None, accion=None, fecha=None, fecha_desde=None,
+               fecha_hasta=None, limit=50, cursor=None, con_total=False):
+        """Lista historial de acciones filtrando por depto/operador/accion/fechas (YYYY-MM-DD).
+
+        Paginación por keyset sobre (fecha, id_historial_ticket): `cursor` es el
+        `siguiente_cursor` de la página anterior. Las uniones con departamento y
+        operador se resuelven solo para las filas de la página.
+
+        Returns:
+            dict con data, siguiente_cursor y, si con_total, total y total_aproximado
+        """
+        where, params = AuditoriaModel.construir_filtros(
+            depto_id, operador_id, accion, fecha, fecha_desde, fecha_hasta
+        )
+        filtros_where = list(where)
+        filtros_params = list(params)
+
+        if cursor:
+            fecha_cursor, id_cursor = decodificar_cursor(cursor)
+            where.append('(h.fecha < %s OR (h.fecha = %s AND h.id_historial_ticket < %s))')
+            params.extend([fecha_cursor, fecha_cursor, id_cursor])
 
         where_sql = ('WHERE ' + ' AND '.join(where)) if where else ''
+        limit = int(limit)
 
         query = f"""
-            SELECT h.id_historial_ticket as id,
-                   h.fecha,
-                   h.id_operador,
-                   h.id_usuarioext,
+            SELECT p.id,
+                   p.fecha,
+                   p.id_operador,
+                   p.id_usuarioext,
                    o.nombre as operador_nombre,
-                   t.id_depto,
+                   p.id_depto,
                    d.descripcion as depto_nombre,
-                   h.accion,
-                   h.id_ticket,
-                   h.valor_anterior,
-                   h.valor_nuevo
+                   p.accion,
+                   p.id_ticket,
+                   p.valor_anterior,
+                   p.valor_nuevo
+            FROM (
+                SELECT h.id_historial_ticket as id, h.fecha, h.id_operador, h.id_usuarioext,
+                       t.id_depto, h.accion, h.id_ticket, h.valor_anterior, h.valor_nuevo
+                FROM historial_acciones_ticket h
+                INNER JOIN ticket t ON h.id_ticket = t.id_ticket
+                {where_sql}
+                ORDER BY h.fecha DESC, h.id_historial_ticket DESC
+                LIMIT %s
+            ) p
+            LEFT JOIN departamento d ON p.id_depto = d.id_depto
+            LEFT JOIN operador o ON p.id_operador = o.id_operador
+            ORDER BY p.fecha DESC, p.id DESC
+        """
+
+        # Una fila extra indica si hay página siguiente
+        rows = execute_query(query, tuple(params) + (limit + 1,), fetch_all=True) or []
+        siguiente = None
+        if len(rows) > limit:
+            rows = rows[:limit]
+            siguiente = codificar_cursor(rows[-1]['fecha'], rows[-1]['id'])
+
+        resultado = {
+            # Normalizar salida al formato que consume el frontend de auditoría
+            'data': PROYECCION_AUDITORIA(rows),
+            'siguiente_cursor': siguiente,
+        }
+        if con_total:
+            resultado['total'], resultado['total_aproximado'] = AuditoriaModel._contar(
+                filtros_where, filtros_params
+            )
+        return resultado
+
+    @staticmethod
+    def exportar(depto_id=None, operador_id=None, accion=None, fecha=None, fecha_desde=None,
+                 fecha_hasta=None):
+        """
+        Filas del historial para exportar, con los mismos filtros que listar.
+
+        Returns:
+            CursorSinBuffer (las filas se leen del servidor a medida que se envían)
+        """
+        where, params = AuditoriaModel.construir_filtros(
+            depto_id, operador_id, accion, fecha, fecha_desde, fecha_hasta
+        )
+        where_sql = ('WHERE ' + ' AND '.join(where)) if where else ''
+        query = f"""
+            SELECT h.id_historial_ticket as id, h.fecha, h.id_ticket, h.accion,
+                   h.valor_anterior, h.valor_nuevo, h.id_operador,
+                   o.nombre as operador_nombre, h.id_usuarioext,
+                   t.id_depto, d.descripcion as depto_nombre
             FROM historial_acciones_ticket h
             INNER JOIN ticket t ON h.id_ticket = t.id_ticket
             LEFT JOIN departamento d ON t.id_depto = d.id_depto
             LEFT JOIN operador o ON h.id_operador = o.id_operador
             {where_sql}
-            ORDER BY h.fecha DESC
-            LIMIT %s OFFSET %s
+            ORDER BY h.fecha DESC, h.id_historial_ticket DESC
         """
+        return CursorSinBuffer(query, tuple(params))
 
-        params.extend([int(limit), int(offset)])
-        rows = execute_query(query, tuple(params), fetch_all=True) or []
-
-        # Normalizar salida al formato que consume el frontend de auditoría
-        out = []
-        for r in rows:
-            fecha_raw = r.get('fecha')
-            if isinstance(fecha_raw, datetime):
-                fecha_out = fecha_raw.strftime('%Y-%m-%d %H:%M:%S')
-            elif fecha_raw is None:
-                fecha_out = None
-            else:
-                fecha_out = str(fecha_raw)
-
-            # detalle: cambios
-            detalle = None
-            va = r.get('valor_anterior')
-            vn = r.get('valor_nuevo')
-            if va is not None or vn is not None:
-                detalle = f"{va or ''} -> {vn or ''}".strip()
-
-            out.append({
-                'id': r.get('id'),
-                'fecha': fecha_out,
-                'id_operador': r.get('id_operador'),
-                'id_usuarioext': r.get('id_usuarioext'),
-                'operador_nombre': r.get('operador_nombre') or 'Operador',
-                'id_depto': r.get('id_depto'),
-                'depto_nombre': r.get('depto_nombre'),
-                'accion': r.get('accion'),
-                'id_ticket': r.get('id_ticket'),
-                'valor_anterior': r.get('valor_anterior'),
-                'valor_nuevo': r.get('valor_nuevo'),
-                'metodo': None,
-                'endpoint': f"Ticket #{r.get('id_ticket')}" if r.get('id_ticket') else None,
-                'status_code': None,
-                'ip': None,
-                'detalle': detalle
-            })
-
-        return out
+    @staticmethod
+    def _contar(where, params):
+        """
+        Total de filas de los filtros: exacto hasta TOPE_TOTAL_EXACTO y, por
+        encima, la estimación del optimizador (EXPLAIN).
+
+        Returns:
+            Tupla (total, aproximado)
+        """
+        from_sql = f"""
+            FROM historial_acciones_ticket h
+            INNER JOIN ticket t ON h.id_ticket = t.id_ticket
+            {('WHERE ' + ' AND '.join(where)) if where else ''}
+        """
+        row = execute_query(
+            f"SELECT COUNT(*) AS n FROM (SELECT 1 {from_sql} LIMIT {TOPE_TOTAL_EXACTO + 1}) x",
+            tuple(params), fetch_one=True
+        ) or {}
+        total = int(row.get('n') or 0)
+        if total <= TOPE_TOTAL_EXACTO:
+            return total, False
+
+        estimado = 1.0
+        for fila in execute_query(f"EXPLAIN SELECT 1 {from_sql}", tuple(params), fetch_all=True) or []:
+            estimado *= float(fila.get('rows') or 1) * float(fila.get('filtered') or 100) / 100
+        return max(int(estimado), TOPE_TOTAL_EXACTO + 1), True
 
     @staticmethod
     def listar_acciones_distintas(depto_id=None, operador_id=None):
         """Lista acciones distintas disponibles según filtros.
 
+        Se lee del catálogo `auditoria_accion` (acciones por depto y operador),
+        que mantiene el job de rollups; no recorre el historial.
+
         - Si hay depto_id: devuelve acciones visibles para ese depto.
           Incluye el caso especial de "Ticket creado" por depto del operador creador.
         - Si hay operador_id sin depto_id: devuelve acciones del operador en todos los deptos.
         """
-        where = [
-            "h.accion IS NOT NULL",
-            "TRIM(h.accion) <> ''",
-        ]
+        where = []
         params = []
 
         if depto_id:
             where.append(
                 "("
-                " t.id_depto = %s "
-                " OR (LOWER(TRIM(h.accion)) = 'ticket creado' AND EXISTS ("
-                "     SELECT 1 FROM miembro_dpto md"
-                "     WHERE md.id_operador = h.id_operador"
-                "       AND md.fecha_desasignacion IS NULL"
+                " a.id_depto = %s "
+                " OR (a.accion_norm = 'ticket creado' AND a.id_operador IN ("
+                "     SELECT md.id_operador FROM miembro_dpto md"
+                "     WHERE md.fecha_desasignacion IS NULL"
                 "       AND md.id_depto = %s"
                 " ))"
                 ")"
@@ -181,18 +329,17 @@ class AuditoriaModel:
             params.append(int(depto_id))
 
         if operador_id:
-            where.append('h.id_operador = %s')
+            where.append('a.id_operador = %s')
             params.append(int(operador_id))
 
-        where_sql = 'WHERE ' + ' AND '.join(where)
+        where_sql = ('WHERE ' + ' AND '.join(where)) if where else ''
 
         query = f"""
-            SELECT MIN(h.accion) AS accion
-            FROM historial_acciones_ticket h
-            INNER JOIN ticket t ON h.id_ticket = t.id_ticket
+            SELECT MIN(a.accion) AS accion
+            FROM auditoria_accion a
             {where_sql}
-            GROUP BY LOWER(TRIM(h.accion))
-            ORDER BY MIN(h.accion)
+            GROUP BY a.accion_norm
+            ORDER BY MIN(a.accion)
         """
 
         rows = execute_query(query.strip(), tuple(params), fetch_all=True) or []
@@ -0,0 +1,113 @@
+"""
+Calendarios laborales por departamento para el cálculo de plazos de SLA.
+
+Las filas (tramos, feriados y asignación a departamentos) se guardan en el
+caché de catálogos; los objetos Calendario, con su tabla acumulada, se
+reconstruyen solo cuando cambia el ETag de esos datos.
+"""
+import logging
+import threading
+from datetime import timedelta
+
+from flask_app.config.conexion_login import execute_query
+from flask_app.utils.cache import cache_catalogos, invalidar_catalogo
+from flask_app.utils.calendario import Calendario, CALENDARIO_CONTINUO
+
+
+def _minutos(valor):
+    """TIME de MySQL (timedelta en PyMySQL) a minutos desde medianoche."""
+    if isinstance(valor, timedelta):
+        return int(valor.total_seconds() // 60)
+    horas, minutos = str(valor).split(':')[:2]
+    return int(horas) * 60 + int(minutos)
+
+
+def _cargar_filas():
+    try:
+        return {
+            'tramos': execute_query("""
+                SELECT ct.id_calendario, ct.dia_semana, ct.hora_inicio, ct.hora_fin
+                FROM calendario_tramo ct
+                INNER JOIN calendario c ON c.id_calendario = ct.id_calendario
+                WHERE c.activo = 1
+            """, fetch_all=True) or [],
+            'feriados': execute_query(
+                "SELECT id_calendario, fecha FROM calendario_feriado", fetch_all=True
+            ) or [],
+            'deptos': execute_query(
+                "SELECT id_depto, id_calendario FROM departamento WHERE id_calendario IS NOT NULL",
+                fetch_all=True
+            ) or [],
+        }
+    except Exception:
+        # Sin la migración de calendarios todo se calcula 24/7
+        logging.warning('No se pudieron cargar los calendarios laborales; se usa 24/7', exc_info=True)
+        return {'tramos': [], 'feriados': [], 'deptos': []}
+
+
+class CalendarioModel:
+    """Resolución de calendario laboral por departamento."""
+
+    _lock = threading.Lock()
+    _etag = None
+    _calendarios = {}   # id_calendario -> Calendario
+    _por_depto = {}     # id_depto -> id_calendario
+
+    @staticmethod
+    def _vigentes():
+        filas, etag = cache_catalogos.obtener('calendarios', _cargar_filas)
+        if etag == CalendarioModel._etag:
+            return CalendarioModel._calendarios, CalendarioModel._por_depto
+
+        with CalendarioModel._lock:
+            if etag != CalendarioModel._etag:
+                tramos = {}
+                for fila in filas['tramos']:
+                    dias = tramos.setdefault(fila['id_calendario'], {})
+                    dias.setdefault(int(fila['dia_semana']), []).append(
+                        (_minutos(fila['hora_inicio']), _minutos(fila['hora_fin']))
+                    )
+                feriados = {}
+                for fila in filas['feriados']:
+                    feriados.setdefault(fila['id_calendario'], []).append(fila['fecha'])
+
+                calendarios = {}
+                for id_calendario, dias in tramos.items():
+                    try:
+                        calendarios[id_calendario] = Calendario(
+                            dias, feriados.get(id_calendario, ()), nombre=str(id_calendario)
+                        )
+                    except ValueError:
+                        logging.warning(f'Calendario {id_calendario} sin tramos válidos; se usa 24/7')
+
+                CalendarioModel._calendarios = calendarios
+                CalendarioModel._por_depto = {f['id_depto']: f['id_calendario'] for f in filas['deptos']}
+                CalendarioModel._etag = etag
+        return CalendarioModel._calendarios, CalendarioModel._por_depto
+
+    @staticmethod
+    def de_depto(id_depto):
+        """
+        Calendario laboral del departamento.
+
+        Returns:
+            Calendario (24/7 si el departamento no tiene uno asignado)
+        """
+        calendarios, por_depto = CalendarioModel._vigentes()
+        return calendarios.get(por_depto.get(id_depto), CALENDARIO_CONTINUO)
+
+    @staticmethod
+    def en_uso():
+        """Calendarios que pueden aplicar a un ticket: los asignados a algún departamento y el 24/7."""
+        calendarios, por_depto = CalendarioModel._vigentes()
+        return [CALENDARIO_CONTINUO] + [calendarios[i] for i in set(por_depto.values()) if i in calendarios]
+
+    @staticmethod
+    def asignar_a_depto(id_depto, id_calendario):
+        """Asigna (o quita, con None) el calendario de un departamento."""
+        resultado = execute_query(
+            "UPDATE departamento SET id_calendario = %s WHERE id_depto = %s",
+            (id_calendario, id_depto), commit=True
+        )
+        invalidar_catalogo('calendarios')
+        return resultado
@@ -0,0 +1,54 @@
+"""
+Acceso cacheado a los catálogos del sistema (estados, prioridades, clubes,
+SLAs, roles, canales y departamentos).
+
+Los datos se mantienen en el caché local del proceso (flask_app.utils.cache)
+y cada modelo invalida su entrada desde sus métodos de escritura.
+"""
+from flask_app.config.conexion_login import execute_query
+from flask_app.models.estado_model import EstadoModel
+from flask_app.models.prioridad_model import PrioridadModel
+from flask_app.models.club_model import ClubModel
+from flask_app.models.sla_model import SLAModel
+from flask_app.models.operador_model import RolGlobalModel
+from flask_app.models.departamento_model import DepartamentoModel
+from flask_app.utils.cache import cache_catalogos
+
+
+def _listar_canales():
+    return execute_query("SELECT id_canal as id, nombre FROM canal ORDER BY id_canal", fetch_all=True)
+
+
+class CatalogoModel:
+    """Catálogos servidos desde memoria con su ETag."""
+
+    # nombre -> cargador desde BD
+    CARGADORES = {
+        'estados': EstadoModel.listar,
+        'prioridades': PrioridadModel.listar,
+        'clubes': ClubModel.listar,
+        'slas': SLAModel.listar,
+        'roles': RolGlobalModel.listar,
+        'canales': _listar_canales,
+        'departamentos': lambda: DepartamentoModel.listar(True),
+        'departamentos_externos': lambda: DepartamentoModel.listar(False),
+    }
+
+    @staticmethod
+    def obtener(nombre):
+        """
+        Retorna el catálogo solicitado.
+        
+        Args:
+            nombre: Clave del catálogo (ver CARGADORES)
+        
+        Returns:
+            Tupla (datos, etag)
+        """
+        return cache_catalogos.obtener(nombre, CatalogoModel.CARGADORES[nombre])
+
+    @staticmethod
+    def precargar():
+        """Carga todos los catálogos en memoria. Se invoca al arrancar el servidor."""
+        for nombre in CatalogoModel.CARGADORES:
+            CatalogoModel.obtener(nombre)
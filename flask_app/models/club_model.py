@@ -1,4 +1,5 @@
 from flask_app.config.conexion_login import execute_query
+from flask_app.utils.cache import invalidar_catalogo
 
 
 class ClubModel:
@@ -55,7 +56,9 @@ class ClubModel:
             INSERT INTO club (nom_club)
             VALUES (%s)
         """
-        return execute_query(query, (nom_club,), commit=True)
+        resultado = execute_query(query, (nom_club,), commit=True)
+        invalidar_catalogo('clubes')
+        return resultado
     
     @staticmethod
     def actualizar(club_id, nom_club):
@@ -74,7 +77,9 @@ class ClubModel:
             SET nom_club = %s
             WHERE id_club = %s
         """
-        return execute_query(query, (nom_club, club_id), commit=True)
+        resultado = execute_query(query, (nom_club, club_id), commit=True)
+        invalidar_catalogo('clubes')
+        return resultado
     
     @staticmethod
     def eliminar(club_id):
@@ -91,4 +96,6 @@ class ClubModel:
             DELETE FROM club
             WHERE id_club = %s
         """
-        return execute_query(query, (club_id,), commit=True)
+        resultado = execute_query(query, (club_id,), commit=True)
+        invalidar_catalogo('clubes')
+        return resultado
@@ -2,6 +2,8 @@
 Modelo para gestión de departamentos y miembros
 """
 from flask_app.config.conexion_login import execute_query, get_local_db_connection
+from flask_app.services.asignacion import motor_asignacion
+from flask_app.utils.cache import invalidar_catalogo
 
 
 class DepartamentoModel:
@@ -21,6 +23,7 @@ class DepartamentoModel:
             data.get('recibe_externo', 0)
         )
         id_depto = execute_query(query, params, commit=True)
+        invalidar_catalogo('departamentos', 'departamentos_externos')
         return {'id_depto': id_depto}
     
     @staticmethod
@@ -83,6 +86,7 @@ class DepartamentoModel:
             depto_id
         )
         execute_query(query, params, commit=True)
+        invalidar_catalogo('departamentos', 'departamentos_externos')
         return True
 
     @staticmethod
@@ -104,6 +108,7 @@ class DepartamentoModel:
         # Limpieza de miembros históricos y del propio departamento
         execute_query("DELETE FROM miembro_dpto WHERE id_depto = %s", (depto_id,), commit=True)
         execute_query("DELETE FROM departamento WHERE id_depto = %s", (depto_id,), commit=True)
+        invalidar_catalogo('departamentos', 'departamentos_externos')
         return True, 'Departamento eliminado exitosamente'
 
 
@@ -143,6 +148,7 @@ class MiembroDptoModel:
         """
         params = (data.get('id_operador'), data.get('id_depto'), data.get('rol'))
         execute_query(query, params, commit=True)
+        motor_asignacion.miembro_agregado(int(data.get('id_operador')), int(data.get('id_depto')), data.get('rol'))
         return True
 
     @staticmethod
@@ -154,6 +160,7 @@ class MiembroDptoModel:
             WHERE id_operador = %s AND id_depto = %s AND fecha_desasignacion IS NULL
         """
         execute_query(query, (id_operador, id_depto), commit=True)
+        motor_asignacion.miembro_quitado(int(id_operador), int(id_depto))
         return True
 
     @staticmethod
@@ -165,5 +172,6 @@ class MiembroDptoModel:
             WHERE id_operador = %s AND id_depto = %s AND fecha_desasignacion IS NULL
         """
         execute_query(query, (rol, id_operador, id_depto), commit=True)
+        motor_asignacion.miembro_agregado(int(id_operador), int(id_depto), rol)
         return True
 
@@ -0,0 +1,440 @@
+"""
+Reportes de desempeño por operador y departamento.
+
+Para los tickets creados en un rango de fechas calcula tiempo a la primera
+respuesta, tiempo de resolución (percentiles p50/p90/p99), tasa de reapertura
+y backlog al cierre del rango.
+
+En lugar de recorrer el historial ticket por ticket, se extraen en bloque dos
+flujos de columnas numéricas con un cursor sin buffer (SSCursor):
+
+- tickets: (id_ticket, id_depto, id_operador owner, segundos desde `desde`)
+- eventos: (id_ticket, tipo, segundos desde `desde`) de historial_acciones_ticket
+
+y se cargan en arreglos de NumPy, donde los primeros eventos por ticket, los
+group-by y los percentiles se resuelven de forma vectorizada (ordenamientos,
+tablas de búsqueda y bincount). Si NumPy no está instalado se usa una versión en
+Python puro con el mismo resultado (más lenta).
+
+Los resultados se guardan en un caché local por (rango, alcance).
+"""
+import logging
+import os
+from datetime import datetime, timedelta
+from operator import itemgetter
+
+import pymysql.cursors
+
+from flask_app.config.conexion_login import execute_query, get_local_db_connection
+from flask_app.models.reporte_model import ReporteModel
+from flask_app.utils.cache import CacheLocal
+from flask_app.utils.error_handler import ValidationError
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - dependencia opcional
+    np = None
+
+
+PERCENTILES = (50, 90, 99)
+
+EVENTO_PRIMERA_RESPUESTA = 1
+EVENTO_RESOLUCION = 2
+EVENTO_REAPERTURA = 3
+
+TAMANO_LOTE = 10000
+
+# Tiempos en segundos relativos al inicio del rango: no dependen de la zona
+# horaria de la sesión (a diferencia de UNIX_TIMESTAMP).
+_SQL_TICKETS = """
+    SELECT t.id_ticket,
+           COALESCE(t.id_depto, 0),
+           COALESCE(own.id_operador, 0),
+           TIMESTAMPDIFF(SECOND, %s, t.fecha_ini)
+    FROM ticket t
+    LEFT JOIN ticket_operador own
+           ON own.id_ticket = t.id_ticket
+          AND own.rol = 'Owner'
+          AND own.fecha_desasignacion IS NULL
+    WHERE t.fecha_ini >= %s AND t.fecha_ini < %s
+      AND t.deleted_at IS NULL
+      {filtro_depto}
+    ORDER BY t.id_ticket
+"""
+
+# Resolución: pasa a Resuelto o Cerrado. Reapertura: sale de Resuelto/Cerrado.
+_SQL_EVENTOS = """
+    SELECT h.id_ticket,
+           CASE
+               WHEN h.accion = 'Mensaje publico' THEN 1
+               WHEN h.accion = 'Ticket cerrado' OR h.valor_nuevo IN ('Resuelto', 'Cerrado') THEN 2
+               ELSE 3
+           END,
+           TIMESTAMPDIFF(SECOND, %s, h.fecha)
+    FROM historial_acciones_ticket h
+    INNER JOIN ticket t ON t.id_ticket = h.id_ticket
+    WHERE t.fecha_ini >= %s AND t.fecha_ini < %s
+      AND t.deleted_at IS NULL
+      {filtro_depto}
+      AND h.fecha >= %s
+      AND (
+            (h.accion = 'Mensaje publico' AND h.id_operador IS NOT NULL)
+         OR h.accion = 'Ticket cerrado'
+         OR (h.accion = 'Cambio de estado'
+             AND (h.valor_nuevo IN ('Resuelto', 'Cerrado') OR h.valor_anterior IN ('Resuelto', 'Cerrado')))
+      )
+"""
+
+cache_desempeno = CacheLocal(
+    ttl_segundos=int(os.getenv('DESEMPENO_CACHE_TTL', 300)),
+    max_entradas=int(os.getenv('DESEMPENO_CACHE_MAX', 64)),
+)
+
+
+class DesempenoModel:
+    """Métricas de desempeño (percentiles) por operador y departamento."""
+
+    AGRUPACIONES = ('operador', 'depto')
+    MAX_DIAS_RANGO = 366 * 2
+
+    @staticmethod
+    def consultar(desde, hasta, deptos=None, deptos_permitidos=None):
+        """
+        Desempeño de los tickets creados entre `desde` y `hasta` (inclusive).
+
+        Args:
+            desde, hasta: 'YYYY-MM-DD'
+            deptos: lista de deptos a incluir (None/[] = todos los visibles)
+            deptos_permitidos: deptos visibles para el operador (None = todos)
+
+        Retorna: ({'operador': [...], 'depto': [...], 'totales': {...}}, etag).
+        Los tiempos van en minutos.
+        """
+        fecha_desde = ReporteModel._parsear_fecha('desde', desde)
+        fecha_hasta = ReporteModel._parsear_fecha('hasta', hasta)
+        if fecha_hasta < fecha_desde:
+            raise ValidationError('hasta debe ser mayor o igual a desde')
+        if (fecha_hasta - fecha_desde).days > DesempenoModel.MAX_DIAS_RANGO:
+            raise ValidationError('El rango máximo es de 2 años')
+
+        alcance = deptos or deptos_permitidos
+        if deptos and deptos_permitidos is not None:
+            alcance = [d for d in deptos if d in deptos_permitidos]
+        alcance = sorted(set(alcance)) if alcance is not None else None
+
+        clave = f"{fecha_desde}|{fecha_hasta}|{','.join(map(str, alcance)) if alcance is not None else '*'}"
+        return cache_desempeno.obtener(
+            clave, lambda: DesempenoModel._calcular(fecha_desde, fecha_hasta, alcance)
+        )
+
+    @staticmethod
+    def _calcular(fecha_desde, fecha_hasta, deptos):
+        vacio = {'operador': [], 'depto': [], 'totales': _fila_vacia()}
+        if deptos is not None and not deptos:
+            return vacio
+
+        inicio = datetime.combine(fecha_desde, datetime.min.time())
+        fin = datetime.combine(fecha_hasta + timedelta(days=1), datetime.min.time())
+        fin_rel = (fin - inicio).total_seconds()
+
+        filtro_depto = ''
+        params_depto = []
+        if deptos:
+            filtro_depto = f"AND t.id_depto IN ({','.join(['%s'] * len(deptos))})"
+            params_depto = list(deptos)
+
+        conn = get_local_db_connection()
+        try:
+            tickets = _extraer(conn, _SQL_TICKETS.format(filtro_depto=filtro_depto),
+                               [inicio, inicio, fin] + params_depto, 4)
+            eventos = _extraer(conn, _SQL_EVENTOS.format(filtro_depto=filtro_depto),
+                               [inicio, inicio, fin] + params_depto + [inicio], 3)
+        finally:
+            conn.close()
+
+        if len(tickets) == 0:
+            return vacio
+
+        if np is not None:
+            resultado = calcular_desempeno_numpy(tickets, eventos, fin_rel)
+        else:
+            resultado = calcular_desempeno_python(tickets, eventos, fin_rel)
+
+        DesempenoModel._etiquetar(resultado)
+        logging.info(
+            f'Desempeño {fecha_desde}..{fecha_hasta}: {len(tickets)} tickets, {len(eventos)} eventos '
+            f"({'numpy' if np is not None else 'python'})"
+        )
+        return resultado
+
+    @staticmethod
+    def _etiquetar(resultado):
+        """Agrega nombres de operador/departamento a las filas."""
+        for agrupar, tabla, columna_id, columna_nombre, sin_valor in (
+            ('operador', 'operador', 'id_operador', 'nombre', 'Sin asignar'),
+            ('depto', 'departamento', 'id_depto', 'descripcion', 'Sin departamento'),
+        ):
+            filas = resultado[agrupar]
+            ids = [f['clave'] for f in filas if f['clave']]
+            nombres = {}
+            if ids:
+                rows = execute_query(
+                    f"SELECT {columna_id} AS id, {columna_nombre} AS nombre FROM {tabla} "
+                    f"WHERE {columna_id} IN ({','.join(['%s'] * len(ids))})",
+                    tuple(ids),
+                    fetch_all=True,
+                ) or []
+                nombres = {r['id']: r['nombre'] for r in rows}
+            for fila in filas:
+                fila['etiqueta'] = nombres.get(fila['clave']) or (sin_valor if not fila['clave'] else str(fila['clave']))
+
+
+def _extraer(conn, query, params, columnas):
+    """Lee el resultado de a lotes con un cursor sin buffer (arreglo n x columnas o lista de tuplas)."""
+    cursor = conn.cursor(pymysql.cursors.SSCursor)
+    try:
+        cursor.execute(query, tuple(params))
+        if np is None:
+            filas = []
+            while True:
+                lote = cursor.fetchmany(TAMANO_LOTE)
+                if not lote:
+                    return filas
+                filas.extend(lote)
+        bloques = []
+        while True:
+            lote = cursor.fetchmany(TAMANO_LOTE)
+            if not lote:
+                break
+            bloques.append(np.array(lote, dtype=np.float64))
+        if not bloques:
+            return np.empty((0, columnas), dtype=np.float64)
+        return np.concatenate(bloques)
+    finally:
+        cursor.close()
+
+
+def _fila_vacia():
+    return {
+        'tickets': 0, 'resueltos': 0, 'reabiertos': 0, 'tasa_reapertura': None, 'backlog': 0,
+        't_primera_respuesta_min': _percentiles_vacios(),
+        't_resolucion_min': _percentiles_vacios(),
+    }
+
+
+def _percentiles_vacios():
+    resultado = {f'p{p}': None for p in PERCENTILES}
+    resultado['n'] = 0
+    return resultado
+
+
+def _armar_fila(clave, tickets, resueltos, reabiertos, backlog, pct_primera, n_primera, pct_resolucion, n_resolucion):
+    def percentiles(valores, n):
+        resultado = {f'p{p}': (round(float(v), 1) if v == v else None) for p, v in zip(PERCENTILES, valores)}
+        resultado['n'] = int(n)
+        return resultado
+
+    resueltos = int(resueltos)
+    reabiertos = int(reabiertos)
+    return {
+        'clave': int(clave),
+        'tickets': int(tickets),
+        'resueltos': resueltos,
+        'reabiertos': reabiertos,
+        'tasa_reapertura': round(reabiertos / resueltos, 4) if resueltos else None,
+        'backlog': int(backlog),
+        't_primera_respuesta_min': percentiles(pct_primera, n_primera),
+        't_resolucion_min': percentiles(pct_resolucion, n_resolucion),
+    }
+
+
+# ----------------------------------------------------------------------
+# Cálculo vectorizado (NumPy)
+# ----------------------------------------------------------------------
+
+def calcular_desempeno_numpy(tickets, eventos, fin):
+    """
+    Args:
+        tickets: arreglo (n, 4) [id_ticket, id_depto, id_operador, inicio_seg]
+        eventos: arreglo (m, 3) [id_ticket, tipo, momento_seg]
+        fin: segundos del cierre del rango (para el backlog)
+    """
+    tickets = np.asarray(tickets, dtype=np.float64).reshape(-1, 4)
+    eventos = np.asarray(eventos, dtype=np.float64).reshape(-1, 3)
+
+    # Un ticket con más de un owner activo cuenta una sola vez
+    ids, unicos = np.unique(tickets[:, 0].astype(np.int64), return_index=True)
+    tickets = tickets[unicos]
+    n = len(ids)
+    inicio = tickets[:, 3]
+
+    primera = np.full(n, np.nan)
+    resolucion = np.full(n, np.nan)
+    reabierto = np.zeros(n, dtype=bool)
+
+    if len(eventos):
+        pos = _posiciones(ids, eventos[:, 0].astype(np.int64))
+        validos = pos >= 0
+        pos, eventos = pos[validos], eventos[validos]
+
+        # Orden por (ticket, momento): el primer evento de cada tipo por ticket es el
+        # más antiguo. Ambos son enteros, así que se ordena una sola clave int64.
+        momento_int = eventos[:, 2].astype(np.int64)
+        desplazado = momento_int - momento_int.min()
+        orden = np.argsort(pos * (int(desplazado.max()) + 1) + desplazado)
+        pos, tipo, momento = pos[orden], eventos[orden, 1], eventos[orden, 2]
+
+        for codigo, destino in ((EVENTO_PRIMERA_RESPUESTA, primera), (EVENTO_RESOLUCION, resolucion)):
+            mascara = tipo == codigo
+            ticket_idx, primeros = np.unique(pos[mascara], return_index=True)
+            destino[ticket_idx] = momento[mascara][primeros]
+
+        # Reabierto: sale de Resuelto/Cerrado después de la primera resolución
+        # (las comparaciones con NaN son falsas: sin resolución no hay reapertura)
+        mascara = (tipo == EVENTO_REAPERTURA) & (momento >= resolucion[pos])
+        reabierto[pos[mascara]] = True
+
+    t_primera = np.maximum(primera - inicio, 0) / 60.0
+    t_resolucion = np.maximum(resolucion - inicio, 0) / 60.0
+    resuelto = ~np.isnan(resolucion)
+    pendiente = ~(resolucion < fin)
+
+    metricas = (resuelto, reabierto, pendiente, t_primera, t_resolucion)
+    return {
+        'operador': _agrupar_numpy(tickets[:, 2], *metricas),
+        'depto': _agrupar_numpy(tickets[:, 1], *metricas),
+        'totales': _agrupar_numpy(np.zeros(n), *metricas)[0],
+    }
+
+
+def _posiciones(ids, buscados):
+    """
+    Índice en `ids` (ordenado, int) de cada id buscado; -1 si no está.
+
+    Si los ids son razonablemente densos se usa una tabla de búsqueda directa
+    (O(1) por evento); si no, búsqueda binaria.
+    """
+    minimo, maximo = int(ids[0]), int(ids[-1])
+    if maximo - minimo <= 4 * len(ids) + 1024:
+        tabla = np.full(maximo - minimo + 1, -1, dtype=np.int64)
+        tabla[ids - minimo] = np.arange(len(ids))
+        dentro = (buscados >= minimo) & (buscados <= maximo)
+        pos = np.full(len(buscados), -1, dtype=np.int64)
+        pos[dentro] = tabla[buscados[dentro] - minimo]
+        return pos
+    pos = np.minimum(np.searchsorted(ids, buscados), len(ids) - 1)
+    return np.where(ids[pos] == buscados, pos, -1)
+
+
+def _agrupar_numpy(claves, resuelto, reabierto, pendiente, t_primera, t_resolucion):
+    grupos, inv = np.unique(claves, return_inverse=True)
+    g = len(grupos)
+    tickets = np.bincount(inv, minlength=g)
+    resueltos = np.bincount(inv, weights=resuelto, minlength=g)
+    reabiertos = np.bincount(inv, weights=reabierto, minlength=g)
+    backlog = np.bincount(inv, weights=pendiente, minlength=g)
+    pct_primera, n_primera = _percentiles_por_grupo(inv, t_primera, g)
+    pct_resolucion, n_resolucion = _percentiles_por_grupo(inv, t_resolucion, g)
+    return [
+        _armar_fila(grupos[i], tickets[i], resueltos[i], reabiertos[i], backlog[i],
+                    pct_primera[i], n_primera[i], pct_resolucion[i], n_resolucion[i])
+        for i in range(g)
+    ]
+
+
+def _percentiles_por_grupo(inv, valores, g):
+    """
+    Percentiles (interpolación lineal, como numpy.percentile) de `valores`
+    por grupo, ignorando NaN, sin iterar por grupo: se ordena por (grupo,
+    valor) y se indexa el rango de cada grupo.
+    """
+    validos = ~np.isnan(valores)
+    inv, valores = inv[validos], valores[validos]
+    ordenados = valores[np.lexsort((valores, inv))]
+
+    conteo = np.bincount(inv, minlength=g)
+    comienzo = np.concatenate(([0], np.cumsum(conteo)[:-1]))
+    resultado = np.full((g, len(PERCENTILES)), np.nan)
+    con_datos = conteo > 0
+    n = conteo[con_datos]
+    base = comienzo[con_datos]
+    for j, p in enumerate(PERCENTILES):
+        rango = (n - 1) * (p / 100.0)
+        bajo = np.floor(rango).astype(np.int64)
+        alto = np.minimum(bajo + 1, n - 1)
+        fraccion = rango - bajo
+        a = ordenados[base + bajo]
+        b = ordenados[base + alto]
+        resultado[con_datos, j] = a + (b - a) * fraccion
+    return resultado, conteo
+
+
+# ----------------------------------------------------------------------
+# Alternativa sin NumPy (mismo resultado, recorrido fila a fila)
+# ----------------------------------------------------------------------
+
+def calcular_desempeno_python(tickets, eventos, fin):
+    """Misma entrada y salida que calcular_desempeno_numpy, con listas de tuplas."""
+    por_ticket = {}
+    for id_ticket, id_depto, id_operador, inicio in sorted(tickets, key=itemgetter(0)):
+        # [depto, operador, inicio, primera, resolucion, reabierto]
+        por_ticket.setdefault(id_ticket, [id_depto, id_operador, inicio, None, None, False])
+
+    eventos = sorted(eventos, key=itemgetter(2))
+    for id_ticket, tipo, momento in eventos:
+        datos = por_ticket.get(id_ticket)
+        if datos is None:
+            continue
+        if tipo == EVENTO_PRIMERA_RESPUESTA and datos[3] is None:
+            datos[3] = momento
+        elif tipo == EVENTO_RESOLUCION and datos[4] is None:
+            datos[4] = momento
+    for id_ticket, tipo, momento in eventos:
+        datos = por_ticket.get(id_ticket)
+        if datos is not None and tipo == EVENTO_REAPERTURA and datos[4] is not None and momento >= datos[4]:
+            datos[5] = True
+
+    filas = []
+    for id_depto, id_operador, inicio, primera, resolucion, reabierto in por_ticket.values():
+        filas.append((
+            id_depto, id_operador,
+            resolucion is not None, reabierto, resolucion is None or resolucion >= fin,
+            max(primera - inicio, 0) / 60.0 if primera is not None else None,
+            max(resolucion - inicio, 0) / 60.0 if resolucion is not None else None,
+        ))
+
+    return {
+        'operador': _agrupar_python(filas, 1),
+        'depto': _agrupar_python(filas, 0),
+        'totales': _agrupar_python([(0, 0) + f[2:] for f in filas], 0)[0],
+    }
+
+
+def _agrupar_python(filas, columna):
+    grupos = {}
+    for fila in filas:
+        grupos.setdefault(fila[columna], []).append(fila)
+
+    resultado = []
+    for clave in sorted(grupos):
+        miembros = grupos[clave]
+        primeras = sorted(f[5] for f in miembros if f[5] is not None)
+        resoluciones = sorted(f[6] for f in miembros if f[6] is not None)
+        resultado.append(_armar_fila(
+            clave, len(miembros),
+            sum(1 for f in miembros if f[2]),
+            sum(1 for f in miembros if f[3]),
+            sum(1 for f in miembros if f[4]),
+            [_percentil(primeras, p) for p in PERCENTILES], len(primeras),
+            [_percentil(resoluciones, p) for p in PERCENTILES], len(resoluciones),
+        ))
+    return resultado
+
+
+def _percentil(ordenados, p):
+    if not ordenados:
+        return float('nan')
+    rango = (len(ordenados) - 1) * (p / 100.0)
+    bajo = int(rango)
+    alto = min(bajo + 1, len(ordenados) - 1)
+    return ordenados[bajo] + (ordenados[alto] - ordenados[bajo]) * (rango - bajo)
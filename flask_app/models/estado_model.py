@@ -1,4 +1,5 @@
 from flask_app.config.conexion_login import execute_query
+from flask_app.utils.cache import invalidar_catalogo
 
 
 class EstadoModel:
@@ -55,7 +56,9 @@ class EstadoModel:
             INSERT INTO estado (descripcion)
             VALUES (%s)
         """
-        return execute_query(query, (descripcion,), commit=True)
+        resultado = execute_query(query, (descripcion,), commit=True)
+        invalidar_catalogo('estados')
+        return resultado
     
     @staticmethod
     def actualizar(estado_id, descripcion):
@@ -74,4 +77,6 @@ class EstadoModel:
             SET descripcion = %s
             WHERE id_estado = %s
         """
-        return execute_query(query, (descripcion, estado_id), commit=True)
+        resultado = execute_query(query, (descripcion, estado_id), commit=True)
+        invalidar_catalogo('estados')
+        return resultado
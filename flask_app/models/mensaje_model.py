@@ -1,4 +1,8 @@
 from flask_app.config.conexion_login import execute_query, get_local_db_connection
+from flask_app.models.sla_model import SLAModel
+from flask_app.services import similitud
+from flask_app.services.asignacion import asignar_automaticamente, motor_asignacion
+from flask_app.services.sla_scheduler import programador_sla
 from datetime import datetime
 
 
@@ -39,9 +43,18 @@ class MensajeModel:
             cursor.execute(query, params)
             id_msg = cursor.lastrowid
 
+            cursor.execute(
+                "UPDATE ticket SET fecha_ultima_actividad = NOW() WHERE id_ticket = %s",
+                (data.get('id_ticket'),),
+            )
+
             remitente_tipo = data.get('remitente_tipo')
             tipo_mensaje = data.get('tipo_mensaje', 'Publico')
 
+            # La primera respuesta pública de un operador cumple el SLA de primera respuesta
+            if remitente_tipo == 'Operador' and tipo_mensaje.lower() == 'publico':
+                SLAModel.registrar_primera_respuesta(cursor, data.get('id_ticket'))
+
             if remitente_tipo == 'Operador':
                 cursor.execute(
                     """
@@ -270,6 +283,30 @@ class MensajeModel:
                 except Exception:
                     logging.exception('Error buscando In-Reply-To')
 
+            # Sin In-Reply-To utilizable: buscar un ticket abierto casi idéntico (MinHash/LSH).
+            # Si es del mismo usuario se adjunta el mensaje; si no, el ticket nuevo
+            # queda marcado como posible duplicado.
+            firma = None
+            duplicado_de = None
+            por_similitud = False
+            if not ticket_id and similitud.ACTIVA:
+                try:
+                    firma = similitud.firmar(email_data.get('subject'), email_data.get('body'))
+                    similares = similitud.buscar_similares(firma)
+                    propio = next(
+                        (s for s in similares
+                         if s.id_usuarioext == usuario_id and s.similitud >= similitud.UMBRAL_ADJUNTAR),
+                        None,
+                    )
+                    if propio:
+                        ticket_id = propio.id_ticket
+                        por_similitud = True
+                        logging.info(f'Correo sin In-Reply-To asociado al ticket #{ticket_id} por similitud ({propio.similitud:.2f})')
+                    elif similares:
+                        duplicado_de = similares[0]
+                except Exception:
+                    logging.exception('Error buscando tickets similares')
+
             # Si es reply a un ticket, validar reglas de negocio
             if ticket_id:
                 # Si el ticket está cerrado, ignorar mensajes
@@ -300,12 +337,26 @@ class MensajeModel:
                 body_text = (email_data.get('body') or '').strip()
                 if body_text.upper() == 'CERRAR':
                     try:
-                        cursor.execute("UPDATE ticket SET id_estado = 4, fecha_resolucion = NOW() WHERE id_ticket = %s", (ticket_id,))
+                        cursor.execute(
+                            """
+                            SELECT t.id_estado,
+                                   (SELECT to1.id_operador FROM ticket_operador to1
+                                    WHERE to1.id_ticket = t.id_ticket AND to1.rol = 'Owner'
+                                      AND to1.fecha_desasignacion IS NULL
+                                    LIMIT 1) AS id_operador_owner
+                            FROM ticket t WHERE t.id_ticket = %s
+                            """,
+                            (ticket_id,),
+                        )
+                        previo = cursor.fetchone()
+                        cursor.execute("UPDATE ticket SET id_estado = 4, fecha_resolucion = NOW(), fecha_ultima_actividad = NOW() WHERE id_ticket = %s", (ticket_id,))
                         cursor.execute(
                             "INSERT INTO historial_acciones_ticket (id_ticket, id_usuarioext, accion, valor_nuevo, fecha) VALUES (%s,%s,'Ticket cerrado',%s,NOW())",
                             (ticket_id, usuario_id, 'CERRAR'),
                         )
                         conn.commit()
+                        if previo:
+                            motor_asignacion.cambio_estado(previo['id_operador_owner'], previo['id_estado'], 4)
                         _store_message_id(ticket_id)
                         return {'success': True, 'skipped': True, 'reason': 'ticket_closed_by_user', 'id_ticket': ticket_id, 'created_ticket': False}
                     except Exception:
@@ -331,6 +382,10 @@ class MensajeModel:
                     ),
                 )
                 id_msg = cursor.lastrowid
+                cursor.execute(
+                    "UPDATE ticket SET fecha_ultima_actividad = NOW() WHERE id_ticket = %s",
+                    (ticket_id,),
+                )
                 try:
                     cursor.execute(
                         "INSERT INTO historial_acciones_ticket (id_ticket, id_usuarioext, accion, valor_nuevo, fecha) VALUES (%s,%s,'Mensaje publico',%s,NOW())",
@@ -340,7 +395,7 @@ class MensajeModel:
                     logging.exception('No se pudo registrar historial (append)')
                 conn.commit()
                 _store_message_id(ticket_id, id_msg)
-                return {'id_msg': id_msg, 'id_ticket': ticket_id, 'created_ticket': False}
+                return {'id_msg': id_msg, 'id_ticket': ticket_id, 'created_ticket': False, 'por_similitud': por_similitud}
             else:
                 # Regla: un usuario solo puede tener 1 ticket abierto
                 try:
@@ -415,10 +470,32 @@ class MensajeModel:
                     )
                 except Exception:
                     logging.exception('No se pudo registrar historial (mensaje inicial)')
-                conn.commit()
+                SLAModel.fijar_vencimientos(cursor, ticket_id)
+                try:
+                    similitud.indexar(cursor, ticket_id, firma)
+                    if duplicado_de:
+                        similitud.marcar_duplicado(cursor, ticket_id, duplicado_de)
+                except Exception:
+                    logging.exception('No se pudo indexar la firma de similitud del ticket')
+                # Owner automático según la carga del depto (si está activo)
+                id_autoasignado = asignar_automaticamente(
+                    cursor, ticket_id, id_depto_val, (email_data.get('subject') or '')[:200]
+                )
+                try:
+                    conn.commit()
+                except Exception:
+                    if id_autoasignado:
+                        motor_asignacion.cancelar_reserva(id_autoasignado)
+                    raise
+                programador_sla.programar_ticket(ticket_id)
                 _store_message_id(ticket_id, id_msg)
 
-            return {'id_msg': id_msg, 'id_ticket': ticket_id, 'created_ticket': True}
+            return {
+                'id_msg': id_msg,
+                'id_ticket': ticket_id,
+                'created_ticket': True,
+                'posible_duplicado_de': duplicado_de.id_ticket if duplicado_de else None,
+            }
         finally:
             try:
                 cursor.close()
@@ -475,6 +475,16 @@ class OperadorModel:
 class RolGlobalModel:
     """Modelo para roles globales"""
     
+    @staticmethod
+    def listar():
+        """Lista todos los roles (activos e inactivos)"""
+        query = """
+            SELECT id_rol as id, nombre, activo
+            FROM rol_global
+            ORDER BY nombre
+        """
+        return execute_query(query, fetch_all=True)
+    
     @staticmethod
     def listar_activos():
         """Lista todos los roles activos"""
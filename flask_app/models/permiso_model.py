@@ -2,12 +2,171 @@
 
 from __future__ import annotations
 
-from typing import Iterable
+import os
+import threading
+import time
+from types import MappingProxyType
+from typing import Iterable, NamedTuple
 
 from flask_app.config.conexion_login import execute_query, get_local_db_connection
+from flask_app.utils.cache import invalidar_catalogo
 from flask_app.utils.error_handler import ValidationError
 
 
+# Segundos tras los cuales la matriz se recarga aunque no haya habido escrituras
+# en este proceso: es el retraso máximo con que un worker ve los cambios de
+# roles/permisos hechos en otro (no hay invalidación entre procesos).
+PERMISOS_MATRIZ_TTL = int(os.getenv('PERMISOS_MATRIZ_TTL', 300))
+
+
+class _SnapshotPermisos(NamedTuple):
+    """Foto inmutable de la matriz rol -> bitset de permisos."""
+    bits_por_rol_id: MappingProxyType      # id_rol -> int (bit i = id_permiso i)
+    rol_id_por_nombre: MappingProxyType    # nombre -> id_rol
+    roles_activos: frozenset               # ids de roles activos
+    bit_por_codigo: MappingProxyType       # codigo -> int con un único bit
+    mascara_activos: int                   # bits de permisos activos
+    cargado_en: float
+
+
+class MatrizPermisos:
+    """
+    Matriz de permisos compilada en memoria.
+
+    Cada rol se representa como un entero cuyo bit ``id_permiso`` está encendido
+    si el rol tiene asignado ese permiso. La consulta de un permiso es un AND de
+    bits sin acceso a la base de datos. La matriz se reconstruye completa y se
+    reemplaza con una única asignación, por lo que los lectores nunca ven un
+    estado intermedio.
+
+    Las escrituras de este proceso (reemplazar_permisos, crear, actualizar)
+    recargan la matriz al instante. Los demás workers no se enteran: siguen
+    con su copia hasta que vence PERMISOS_MATRIZ_TTL. Un permiso quitado
+    puede seguir otorgándose en otro worker durante ese lapso; si eso no es
+    aceptable, bajar el TTL.
+    """
+
+    _lock = threading.Lock()
+    _snapshot: _SnapshotPermisos | None = None
+
+    @staticmethod
+    def _construir() -> _SnapshotPermisos:
+        roles = execute_query(
+            "SELECT id_rol, nombre, activo FROM rol_global",
+            fetch_all=True
+        ) or []
+        permisos = execute_query(
+            "SELECT id_permiso, codigo, activo FROM permiso",
+            fetch_all=True
+        ) or []
+        asignaciones = execute_query(
+            "SELECT id_rol, id_permiso FROM rol_permiso",
+            fetch_all=True
+        ) or []
+
+        bits_por_rol: dict[int, int] = {}
+        rol_por_nombre: dict[str, int] = {}
+        activos = set()
+        for r in roles:
+            rol_id = int(r['id_rol'])
+            bits_por_rol[rol_id] = 0
+            rol_por_nombre[r['nombre']] = rol_id
+            if int(r.get('activo') or 0) == 1:
+                activos.add(rol_id)
+
+        bit_por_codigo: dict[str, int] = {}
+        mascara_activos = 0
+        for p in permisos:
+            bit = 1 << int(p['id_permiso'])
+            bit_por_codigo[p['codigo']] = bit
+            if int(p.get('activo') or 0) == 1:
+                mascara_activos |= bit
+
+        for a in asignaciones:
+            rol_id = int(a['id_rol'])
+            if rol_id in bits_por_rol:
+                bits_por_rol[rol_id] |= 1 << int(a['id_permiso'])
+
+        return _SnapshotPermisos(
+            bits_por_rol_id=MappingProxyType(bits_por_rol),
+            rol_id_por_nombre=MappingProxyType(rol_por_nombre),
+            roles_activos=frozenset(activos),
+            bit_por_codigo=MappingProxyType(bit_por_codigo),
+            mascara_activos=mascara_activos,
+            cargado_en=time.monotonic(),
+        )
+
+    @classmethod
+    def recargar(cls) -> _SnapshotPermisos:
+        """Reconstruye la matriz desde la BD y la publica de forma atómica."""
+        with cls._lock:
+            snapshot = cls._construir()
+            cls._snapshot = snapshot
+            return snapshot
+
+    @staticmethod
+    def _vigente(snapshot) -> bool:
+        return snapshot is not None and time.monotonic() - snapshot.cargado_en <= PERMISOS_MATRIZ_TTL
+
+    @classmethod
+    def obtener(cls) -> _SnapshotPermisos:
+        snapshot = cls._snapshot
+        if cls._vigente(snapshot):
+            return snapshot
+        with cls._lock:
+            # Al vencer el TTL varios requests llegan a la vez: solo el primero recarga
+            snapshot = cls._snapshot
+            if not cls._vigente(snapshot):
+                snapshot = cls._construir()
+                cls._snapshot = snapshot
+            return snapshot
+
+    @classmethod
+    def _bits_de_rol(cls, snapshot: _SnapshotPermisos, rol) -> int:
+        if isinstance(rol, int):
+            rol_id = rol
+        else:
+            rol_id = snapshot.rol_id_por_nombre.get(rol)
+        if rol_id is None or rol_id not in snapshot.roles_activos:
+            return 0
+        return snapshot.bits_por_rol_id.get(rol_id, 0) & snapshot.mascara_activos
+
+    @classmethod
+    def tiene_permisos(cls, rol, *codigos: str) -> bool:
+        """
+        Indica si el rol (nombre o id) tiene todos los permisos indicados.
+        Códigos desconocidos se consideran no otorgados.
+        """
+        snapshot = cls.obtener()
+        requeridos = 0
+        for codigo in codigos:
+            bit = snapshot.bit_por_codigo.get(codigo)
+            if bit is None:
+                return False
+            requeridos |= bit
+        return (cls._bits_de_rol(snapshot, rol) & requeridos) == requeridos
+
+    @classmethod
+    def codigos_de_rol(cls, rol) -> list[str]:
+        """Códigos de permisos activos del rol (nombre o id)."""
+        snapshot = cls.obtener()
+        bits = cls._bits_de_rol(snapshot, rol)
+        return sorted(c for c, bit in snapshot.bit_por_codigo.items() if bits & bit)
+
+    @classmethod
+    def permiso_ids_de_rol(cls, rol_id: int) -> list[int]:
+        """Ids de permisos asignados al rol, incluidos los permisos inactivos."""
+        bits = cls.obtener().bits_por_rol_id.get(int(rol_id), 0)
+        ids = []
+        i = 0
+        while bits:
+            if bits & 1:
+                ids.append(i)
+            bits >>= 1
+            i += 1
+        return ids
+
+
 class PermisoModel:
     @staticmethod
     def listar_activos():
@@ -64,13 +223,7 @@ class RolPermisoModel:
 
     @staticmethod
     def obtener_permiso_ids_por_rol(rol_id: int):
-        query = """
-            SELECT id_permiso
-            FROM rol_permiso
-            WHERE id_rol = %s
-        """
-        rows = execute_query(query, (rol_id,), fetch_all=True) or []
-        return [r['id_permiso'] for r in rows if r.get('id_permiso') is not None]
+        return MatrizPermisos.permiso_ids_de_rol(rol_id)
 
     @staticmethod
     def reemplazar_permisos(rol_id: int, permiso_ids: Iterable[int]):
@@ -106,7 +259,6 @@ class RolPermisoModel:
                 )
 
             conn.commit()
-            return True
         except Exception as e:
             if conn:
                 conn.rollback()
@@ -117,6 +269,9 @@ class RolPermisoModel:
             if conn:
                 conn.close()
 
+        MatrizPermisos.recargar()
+        return True
+
 
 class RolGlobalAdminModel:
     """Operaciones administrativas sobre rol_global (crear)."""
@@ -149,7 +304,7 @@ class RolGlobalAdminModel:
                 (nombre, activo)
             )
             conn.commit()
-            return int(cursor.lastrowid)
+            nuevo_id = int(cursor.lastrowid)
         except Exception as e:
             if conn:
                 conn.rollback()
@@ -160,6 +315,10 @@ class RolGlobalAdminModel:
             if conn:
                 conn.close()
 
+        MatrizPermisos.recargar()
+        invalidar_catalogo('roles')
+        return nuevo_id
+
     @staticmethod
     def actualizar(rol_id: int, nombre: str | None = None, activo: int | None = None) -> bool:
         try:
@@ -227,7 +386,6 @@ class RolGlobalAdminModel:
                 tuple(params)
             )
             conn.commit()
-            return True
         except Exception as e:
             if conn:
                 conn.rollback()
@@ -237,3 +395,7 @@ class RolGlobalAdminModel:
                 cursor.close()
             if conn:
                 conn.close()
+
+        MatrizPermisos.recargar()
+        invalidar_catalogo('roles')
+        return True
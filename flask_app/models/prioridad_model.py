@@ -1,4 +1,5 @@
 from flask_app.config.conexion_login import execute_query
+from flask_app.utils.cache import invalidar_catalogo
 
 
 class PrioridadModel:
@@ -56,7 +57,9 @@ class PrioridadModel:
             INSERT INTO prioridad (jerarquia, descripcion)
             VALUES (%s, %s)
         """
-        return execute_query(query, (jerarquia, descripcion), commit=True)
+        resultado = execute_query(query, (jerarquia, descripcion), commit=True)
+        invalidar_catalogo('prioridades')
+        return resultado
     
     @staticmethod
     def actualizar(prioridad_id, jerarquia=None, descripcion=None):
@@ -93,4 +96,6 @@ class PrioridadModel:
             WHERE id_prioridad = %s
         """
         
-        return execute_query(query, tuple(params), commit=True)
+        resultado = execute_query(query, tuple(params), commit=True)
+        invalidar_catalogo('prioridades')
+        return resultado
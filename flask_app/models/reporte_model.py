@@ -0,0 +1,369 @@
+"""
+Modelo de reportes sobre tablas de rollup diario.
+
+`ticket_stats_diario` acumula contadores por (fecha, depto, club, prioridad,
+canal). La mantiene `ReporteModel.actualizar_rollups`, un job incremental que
+procesa `ticket` e `historial_acciones_ticket` desde la última marca
+(`rollup_marca`) con un INSERT ... SELECT ... ON DUPLICATE KEY UPDATE por
+lote, de modo que los reportes leen unas pocas filas por día en lugar de
+escanear el historial completo. El mismo job mantiene el catálogo de
+acciones de auditoría (`auditoria_accion`).
+
+Ver migracion_rollup_ticket_stats_diario.sql y migracion_auditoria_keyset.sql.
+"""
+import logging
+from datetime import datetime, timedelta
+
+from flask_app.config.conexion_login import execute_query, get_local_db_connection
+from flask_app.utils.error_handler import ValidationError
+
+
+# Eventos de creación: un ticket cuenta el día de su fecha_ini
+_SQL_ROLLUP_TICKET = """
+    INSERT INTO ticket_stats_diario
+        (fecha, id_depto, id_club, id_prioridad, id_canal, creados)
+    SELECT DATE(t.fecha_ini), COALESCE(t.id_depto, 0), t.id_club, t.id_prioridad,
+           COALESCE(t.id_canal, 0), COUNT(*)
+    FROM ticket t
+    WHERE t.id_ticket > %s AND t.id_ticket <= %s
+      AND t.deleted_at IS NULL
+    GROUP BY 1, 2, 3, 4, 5
+    ON DUPLICATE KEY UPDATE creados = creados + VALUES(creados)
+"""
+
+# Eventos del historial: cambios de estado, cierre por correo y mensajes.
+# `primera` marca el primer mensaje público de un operador en el ticket.
+_SQL_ROLLUP_HISTORIAL = """
+    INSERT INTO ticket_stats_diario
+        (fecha, id_depto, id_club, id_prioridad, id_canal,
+         resueltos, cerrados, reabiertos, primeras_respuestas, t_primera_respuesta_sum,
+         t_resolucion_sum, mensajes_operador, mensajes_usuario)
+    SELECT DATE(ev.fecha), COALESCE(t.id_depto, 0), t.id_club, t.id_prioridad, COALESCE(t.id_canal, 0),
+           SUM(ev.resuelto),
+           SUM(ev.cerrado),
+           SUM(ev.reabierto),
+           SUM(ev.primera),
+           SUM(IF(ev.primera, GREATEST(TIMESTAMPDIFF(SECOND, t.fecha_ini, ev.fecha), 0), 0)),
+           SUM(IF(ev.resuelto, GREATEST(TIMESTAMPDIFF(SECOND, t.fecha_ini, ev.fecha), 0), 0)),
+           SUM(ev.mensaje AND ev.id_operador IS NOT NULL),
+           SUM(ev.mensaje AND ev.id_operador IS NULL)
+    FROM (
+        SELECT h.id_ticket, h.fecha, h.id_operador,
+               (h.accion = 'Cambio de estado' AND h.valor_nuevo = 'Resuelto') AS resuelto,
+               ((h.accion = 'Cambio de estado' AND h.valor_nuevo = 'Cerrado')
+                 OR h.accion = 'Ticket cerrado') AS cerrado,
+               (h.accion = 'Cambio de estado'
+                 AND h.valor_anterior IN ('Resuelto', 'Cerrado')
+                 AND h.valor_nuevo NOT IN ('Resuelto', 'Cerrado')) AS reabierto,
+               (h.accion LIKE 'Mensaje %%') AS mensaje,
+               (h.accion = 'Mensaje publico' AND h.id_operador IS NOT NULL AND NOT EXISTS (
+                    SELECT 1 FROM historial_acciones_ticket h2
+                    WHERE h2.id_ticket = h.id_ticket
+                      AND h2.accion = 'Mensaje publico'
+                      AND h2.id_historial_ticket < h.id_historial_ticket
+                      AND h2.id_operador IS NOT NULL
+               )) AS primera
+        FROM historial_acciones_ticket h
+        WHERE h.id_historial_ticket > %s AND h.id_historial_ticket <= %s
+          AND (h.accion IN ('Cambio de estado', 'Ticket cerrado') OR h.accion LIKE 'Mensaje %%')
+    ) ev
+    INNER JOIN ticket t ON t.id_ticket = ev.id_ticket
+    WHERE t.deleted_at IS NULL
+    GROUP BY 1, 2, 3, 4, 5
+    ON DUPLICATE KEY UPDATE
+        resueltos = resueltos + VALUES(resueltos),
+        cerrados = cerrados + VALUES(cerrados),
+        reabiertos = reabiertos + VALUES(reabiertos),
+        primeras_respuestas = primeras_respuestas + VALUES(primeras_respuestas),
+        t_primera_respuesta_sum = t_primera_respuesta_sum + VALUES(t_primera_respuesta_sum),
+        t_resolucion_sum = t_resolucion_sum + VALUES(t_resolucion_sum),
+        mensajes_operador = mensajes_operador + VALUES(mensajes_operador),
+        mensajes_usuario = mensajes_usuario + VALUES(mensajes_usuario)
+"""
+
+
+# Catálogo de acciones de auditoría por (depto, operador); lo consulta
+# AuditoriaModel.listar_acciones_distintas en lugar de agrupar el historial.
+_SQL_CATALOGO_ACCIONES = """
+    INSERT INTO auditoria_accion (id_depto, id_operador, accion_norm, accion, ultima_fecha)
+    SELECT COALESCE(t.id_depto, 0), COALESCE(h.id_operador, 0), h.accion_norm, MIN(h.accion), MAX(h.fecha)
+    FROM historial_acciones_ticket h
+    INNER JOIN ticket t ON t.id_ticket = h.id_ticket
+    WHERE h.id_historial_ticket > %s AND h.id_historial_ticket <= %s
+      AND h.accion_norm <> ''
+    GROUP BY 1, 2, 3
+    ON DUPLICATE KEY UPDATE ultima_fecha = GREATEST(ultima_fecha, VALUES(ultima_fecha))
+"""
+
+
+class ReporteModel:
+    """Mantenimiento y consulta de los rollups de reportes."""
+
+    # nombre de marca -> (tabla, columna id, SQL del lote)
+    FUENTES_ROLLUP = {
+        'ticket': ('ticket', 'id_ticket', _SQL_ROLLUP_TICKET),
+        'historial': ('historial_acciones_ticket', 'id_historial_ticket', _SQL_ROLLUP_HISTORIAL),
+        'auditoria_acciones': ('historial_acciones_ticket', 'id_historial_ticket', _SQL_CATALOGO_ACCIONES),
+    }
+
+    METRICAS = (
+        'creados', 'resueltos', 'cerrados', 'reabiertos', 'primeras_respuestas',
+        't_primera_respuesta_sum', 't_resolucion_sum', 'mensajes_operador', 'mensajes_usuario',
+    )
+
+    # agrupar -> (expresión de clave, expresión de etiqueta, JOIN para la etiqueta)
+    AGRUPACIONES = {
+        'dia': ('s.fecha', 's.fecha', ''),
+        'semana': ('DATE_SUB(s.fecha, INTERVAL WEEKDAY(s.fecha) DAY)',
+                   'DATE_SUB(s.fecha, INTERVAL WEEKDAY(s.fecha) DAY)', ''),
+        'mes': ("DATE_FORMAT(s.fecha, '%%Y-%%m-01')", "DATE_FORMAT(s.fecha, '%%Y-%%m')", ''),
+        'depto': ('s.id_depto', "COALESCE(d.descripcion, 'Sin departamento')",
+                  'LEFT JOIN departamento d ON d.id_depto = s.id_depto'),
+        'club': ('s.id_club', 'cl.nom_club', 'LEFT JOIN club cl ON cl.id_club = s.id_club'),
+        'prioridad': ('s.id_prioridad', 'p.descripcion', 'LEFT JOIN prioridad p ON p.id_prioridad = s.id_prioridad'),
+        'canal': ('s.id_canal', "COALESCE(c.nombre, 'Sin canal')", 'LEFT JOIN canal c ON c.id_canal = s.id_canal'),
+    }
+
+    FILTROS_DIMENSION = {
+        'depto': 's.id_depto',
+        'club': 's.id_club',
+        'prioridad': 's.id_prioridad',
+        'canal': 's.id_canal',
+    }
+
+    MAX_DIAS_RANGO = 366 * 5
+
+    # ------------------------------------------------------------------
+    # Mantenimiento incremental
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def actualizar_rollups(tamano_lote=5000, max_lotes=200):
+        """
+        Agrega a ticket_stats_diario los eventos nuevos de cada fuente.
+
+        Cada lote se aplica en su propia transacción junto con el avance de la
+        marca, con la fila de rollup_marca bloqueada (FOR UPDATE): si hay varios
+        procesos corriendo el job, cada id se agrega exactamente una vez.
+
+        Solo se procesa hasta el máximo id observado en la corrida anterior
+        (`visto_id`), para no saltarse ids reservados por transacciones que aún
+        no confirmaban cuando se leyó el máximo.
+
+        Retorna: {fuente: filas_de_id_procesadas}
+        """
+        resumen = {}
+        for nombre, (tabla, columna_id, sql) in ReporteModel.FUENTES_ROLLUP.items():
+            try:
+                resumen[nombre] = ReporteModel._procesar_fuente(nombre, tabla, columna_id, sql,
+                                                                tamano_lote, max_lotes)
+            except Exception:
+                logging.exception(f'Error actualizando rollup {nombre}')
+                resumen[nombre] = None
+        return resumen
+
+    @staticmethod
+    def _procesar_fuente(nombre, tabla, columna_id, sql, tamano_lote, max_lotes):
+        conn = None
+        cursor = None
+        procesados = 0
+        try:
+            conn = get_local_db_connection()
+            cursor = conn.cursor()
+            cursor.execute("INSERT IGNORE INTO rollup_marca (nombre) VALUES (%s)", (nombre,))
+            conn.commit()
+
+            for _ in range(max_lotes):
+                cursor.execute(
+                    "SELECT ultimo_id, visto_id FROM rollup_marca WHERE nombre = %s FOR UPDATE",
+                    (nombre,),
+                )
+                marca = cursor.fetchone()
+                ultimo_id = int(marca['ultimo_id'])
+                visto_id = int(marca['visto_id'])
+
+                cursor.execute(f"SELECT COALESCE(MAX({columna_id}), 0) AS max_id FROM {tabla}")
+                max_id = int(cursor.fetchone()['max_id'])
+
+                hasta = min(visto_id, ultimo_id + tamano_lote)
+                if hasta > ultimo_id:
+                    cursor.execute(sql, (ultimo_id, hasta))
+                    procesados += hasta - ultimo_id
+                    ultimo_id = hasta
+
+                alcanzado = ultimo_id >= visto_id
+                cursor.execute(
+                    """
+                    UPDATE rollup_marca
+                    SET ultimo_id = %s, visto_id = %s, actualizado_en = NOW()
+                    WHERE nombre = %s
+                    """,
+                    (ultimo_id, max_id if alcanzado else visto_id, nombre),
+                )
+                conn.commit()
+
+                if alcanzado:
+                    break
+            return procesados
+        except Exception:
+            if conn is not None:
+                conn.rollback()
+            raise
+        finally:
+            if cursor is not None:
+                cursor.close()
+            if conn is not None:
+                conn.close()
+
+    @staticmethod
+    def reconstruir_rollups(tamano_lote=20000):
+        """
+        Vacía los rollups y los recalcula desde el inicio del historial.
+
+        Ejecutar con el job detenido (START_ROLLUP_JOB=0) para no duplicar lotes.
+        """
+        conn = None
+        cursor = None
+        try:
+            conn = get_local_db_connection()
+            cursor = conn.cursor()
+            cursor.execute("DELETE FROM ticket_stats_diario")
+            cursor.execute("DELETE FROM auditoria_accion")
+            for nombre, (tabla, columna_id, _sql) in ReporteModel.FUENTES_ROLLUP.items():
+                cursor.execute(f"SELECT COALESCE(MAX({columna_id}), 0) AS max_id FROM {tabla}")
+                max_id = int(cursor.fetchone()['max_id'])
+                # Sin escrituras concurrentes relevantes: todo lo existente ya está confirmado
+                cursor.execute(
+                    """
+                    INSERT INTO rollup_marca (nombre, ultimo_id, visto_id, actualizado_en)
+                    VALUES (%s, 0, %s, NOW())
+                    ON DUPLICATE KEY UPDATE ultimo_id = 0, visto_id = VALUES(visto_id), actualizado_en = NOW()
+                    """,
+                    (nombre, max_id),
+                )
+            conn.commit()
+        except Exception:
+            if conn is not None:
+                conn.rollback()
+            raise
+        finally:
+            if cursor is not None:
+                cursor.close()
+            if conn is not None:
+                conn.close()
+
+        return ReporteModel.actualizar_rollups(tamano_lote=tamano_lote, max_lotes=10 ** 6)
+
+    @staticmethod
+    def obtener_marcas():
+        """Estado del job: últimas marcas procesadas por fuente."""
+        return execute_query(
+            "SELECT nombre, ultimo_id, visto_id, actualizado_en FROM rollup_marca ORDER BY nombre",
+            fetch_all=True,
+        ) or []
+
+    # ------------------------------------------------------------------
+    # Consultas
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def deptos_supervisados(id_operador):
+        """Departamentos donde el operador es Supervisor/Jefe activo."""
+        rows = execute_query(
+            """
+            SELECT DISTINCT md.id_depto
+            FROM miembro_dpto md
+            WHERE md.id_operador = %s
+              AND md.rol IN ('Supervisor', 'Jefe')
+              AND md.fecha_desasignacion IS NULL
+            """,
+            (id_operador,),
+            fetch_all=True,
+        ) or []
+        return [r['id_depto'] for r in rows if r.get('id_depto') is not None]
+
+    @staticmethod
+    def _parsear_fecha(nombre, valor):
+        try:
+            return datetime.strptime(str(valor).strip()[:10], '%Y-%m-%d').date()
+        except ValueError:
+            raise ValidationError(f'{nombre} inválida (formato YYYY-MM-DD)')
+
+    @staticmethod
+    def consultar_tickets(desde, hasta, agrupar='dia', filtros=None, deptos_permitidos=None):
+        """
+        Métricas de tickets por rango de fechas y agrupación, desde el rollup.
+
+        Args:
+            desde, hasta: 'YYYY-MM-DD' (ambas inclusive)
+            agrupar: dia | semana | mes | depto | club | prioridad | canal
+            filtros: {'depto': [ids], 'club': [...], 'prioridad': [...], 'canal': [...]}
+            deptos_permitidos: lista de deptos visibles (None = todos)
+
+        Retorna: {'filas': [...], 'totales': {...}}. Los tiempos promedio van en minutos.
+        """
+        if agrupar not in ReporteModel.AGRUPACIONES:
+            raise ValidationError(f"agrupar inválido. Opciones: {', '.join(ReporteModel.AGRUPACIONES)}")
+
+        fecha_desde = ReporteModel._parsear_fecha('desde', desde)
+        fecha_hasta = ReporteModel._parsear_fecha('hasta', hasta)
+        if fecha_hasta < fecha_desde:
+            raise ValidationError('hasta debe ser mayor o igual a desde')
+        if (fecha_hasta - fecha_desde).days > ReporteModel.MAX_DIAS_RANGO:
+            raise ValidationError('El rango máximo es de 5 años')
+
+        where = ['s.fecha >= %s', 's.fecha < %s']
+        params = [fecha_desde, fecha_hasta + timedelta(days=1)]
+
+        for nombre, columna in ReporteModel.FILTROS_DIMENSION.items():
+            ids = (filtros or {}).get(nombre) or []
+            if ids:
+                where.append(f"{columna} IN ({','.join(['%s'] * len(ids))})")
+                params.extend(ids)
+
+        if deptos_permitidos is not None:
+            if not deptos_permitidos:
+                return {'filas': [], 'totales': ReporteModel._calcular_derivadas({})}
+            where.append(f"s.id_depto IN ({','.join(['%s'] * len(deptos_permitidos))})")
+            params.extend(deptos_permitidos)
+
+        clave, etiqueta, join = ReporteModel.AGRUPACIONES[agrupar]
+        sumas = ', '.join(f'SUM(s.{m}) AS {m}' for m in ReporteModel.METRICAS)
+
+        query = f"""
+            SELECT {clave} AS clave, {etiqueta} AS etiqueta, {sumas}
+            FROM ticket_stats_diario s
+            {join}
+            WHERE {' AND '.join(where)}
+            GROUP BY clave, etiqueta
+            ORDER BY clave
+        """
+        rows = execute_query(query, tuple(params), fetch_all=True) or []
+
+        totales = {m: 0 for m in ReporteModel.METRICAS}
+        filas = []
+        for row in rows:
+            for m in ReporteModel.METRICAS:
+                row[m] = int(row[m] or 0)
+                totales[m] += row[m]
+            filas.append(ReporteModel._calcular_derivadas(row))
+
+        return {'filas': filas, 'totales': ReporteModel._calcular_derivadas(totales)}
+
+    @staticmethod
+    def _calcular_derivadas(fila):
+        """Agrega promedios (minutos) y quita las sumas crudas de segundos."""
+        fila = dict(fila)
+        for m in ReporteModel.METRICAS:
+            fila.setdefault(m, 0)
+        primeras = fila['primeras_respuestas']
+        resueltos = fila['resueltos']
+        fila['t_primera_respuesta_prom_min'] = (
+            round(fila.pop('t_primera_respuesta_sum') / primeras / 60, 1) if primeras else None
+        )
+        fila['t_resolucion_prom_min'] = (
+            round(fila.pop('t_resolucion_sum') / resueltos / 60, 1) if resueltos else None
+        )
+        fila.pop('t_primera_respuesta_sum', None)
+        fila.pop('t_resolucion_sum', None)
+        return fila
@@ -1,4 +1,6 @@
 from flask_app.config.conexion_login import execute_query
+from flask_app.utils.cache import invalidar_catalogo
+from flask_app.models.calendario_model import CalendarioModel
 
 
 class SLAModel:
@@ -78,7 +80,9 @@ class SLAModel:
             data.get('activo', 1)
         )
         
-        return execute_query(query, params, commit=True)
+        resultado = execute_query(query, params, commit=True)
+        invalidar_catalogo('slas')
+        return resultado
     
     @staticmethod
     def actualizar(sla_id, data):
@@ -118,7 +122,9 @@ class SLAModel:
             WHERE id_sla = %s
         """
         
-        return execute_query(query, tuple(params), commit=True)
+        resultado = execute_query(query, tuple(params), commit=True)
+        invalidar_catalogo('slas')
+        return resultado
     
     @staticmethod
     def activar_desactivar(sla_id, activo):
@@ -137,4 +143,134 @@ class SLAModel:
             SET activo = %s
             WHERE id_sla = %s
         """
-        return execute_query(query, (activo, sla_id), commit=True)
+        resultado = execute_query(query, (activo, sla_id), commit=True)
+        invalidar_catalogo('slas')
+        return resultado
+
+    # ------------------------------------------------------------------
+    # Vencimientos por ticket (usados dentro de la transacción del llamador)
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def calcular_vencimientos(calendario, inicio, minutos_primera_respuesta, minutos_resolucion):
+        """
+        Vencimientos de un ticket contando minutos hábiles del calendario.
+
+        Returns:
+            Tupla (vence_primera_respuesta, vence_resolucion)
+        """
+        return (
+            calendario.sumar_minutos(inicio, minutos_primera_respuesta or 0),
+            calendario.sumar_minutos(inicio, minutos_resolucion or 0),
+        )
+
+    @staticmethod
+    def fijar_vencimientos(cursor, id_ticket):
+        """
+        Calcula los vencimientos de primera respuesta y resolución de un ticket
+        nuevo a partir de su fecha de inicio, su SLA y el calendario laboral de
+        su departamento.
+
+        Args:
+            cursor: Cursor de la transacción en curso
+            id_ticket: ID del ticket
+        """
+        cursor.execute("""
+            SELECT t.fecha_ini, t.id_depto, s.tiempo_primera_respuesta_min, s.tiempo_resolucion_min
+            FROM ticket t
+            INNER JOIN sla s ON s.id_sla = t.id_sla
+            WHERE t.id_ticket = %s
+        """, (id_ticket,))
+        row = cursor.fetchone()
+        if not row:
+            return
+        vence_primera, vence_resolucion = SLAModel.calcular_vencimientos(
+            CalendarioModel.de_depto(row['id_depto']), row['fecha_ini'],
+            row['tiempo_primera_respuesta_min'], row['tiempo_resolucion_min']
+        )
+        cursor.execute("""
+            UPDATE ticket
+            SET vence_primera_respuesta = %s, vence_resolucion = %s
+            WHERE id_ticket = %s
+        """, (vence_primera, vence_resolucion, id_ticket))
+
+    @staticmethod
+    def reiniciar_resolucion(cursor, ids_ticket):
+        """
+        Al reabrir tickets (salen de Resuelto/Cerrado) el plazo de resolución
+        vuelve a correr completo desde ahora.
+
+        Args:
+            cursor: Cursor de la transacción en curso
+            ids_ticket: IDs de los tickets reabiertos
+        """
+        ids_ticket = list(ids_ticket)
+        if not ids_ticket:
+            return
+        ph = ','.join(['%s'] * len(ids_ticket))
+        cursor.execute(f"""
+            SELECT t.id_ticket, t.id_depto, s.tiempo_resolucion_min, NOW() AS ahora
+            FROM ticket t
+            INNER JOIN sla s ON s.id_sla = t.id_sla
+            WHERE t.id_ticket IN ({ph})
+        """, ids_ticket)
+        cambios = [
+            (CalendarioModel.de_depto(r['id_depto']).sumar_minutos(r['ahora'], r['tiempo_resolucion_min'] or 0),
+             r['id_ticket'])
+            for r in cursor.fetchall() or []
+        ]
+        if cambios:
+            cursor.executemany("UPDATE ticket SET vence_resolucion = %s WHERE id_ticket = %s", cambios)
+
+    @staticmethod
+    def evaluar(calendario, ticket, ahora):
+        """
+        Estado del SLA de un ticket en minutos hábiles.
+
+        Args:
+            calendario: Calendario laboral del departamento del ticket
+            ticket: dict con fecha_ini, fecha_primera_respuesta, fecha_resolucion,
+                vence_primera_respuesta, vence_resolucion y los minutos del SLA
+            ahora: instante de referencia
+
+        Returns:
+            Diccionario por plazo con objetivo, consumido, restante y vencido
+        """
+        plazos = {
+            'primera_respuesta': (ticket.get('tiempo_primera_respuesta_min'),
+                                  ticket.get('fecha_primera_respuesta'),
+                                  ticket.get('vence_primera_respuesta')),
+            'resolucion': (ticket.get('tiempo_resolucion_min'),
+                           ticket.get('fecha_resolucion'),
+                           ticket.get('vence_resolucion')),
+        }
+        resultado = {}
+        for plazo, (objetivo, cumplido_en, vence) in plazos.items():
+            if objetivo is None or vence is None:
+                continue
+            referencia = cumplido_en or ahora
+            restante = calendario.minutos_habiles(referencia, vence)
+            resultado[plazo] = {
+                'objetivo_min': objetivo,
+                'vence': vence,
+                'consumido_min': round(max(objetivo - restante, 0), 1),
+                'restante_min': round(restante, 1),
+                'cumplido': cumplido_en is not None,
+                'vencido': restante < 0,
+            }
+        return resultado
+
+    @staticmethod
+    def registrar_primera_respuesta(cursor, id_ticket):
+        """
+        Marca la primera respuesta pública de un operador (solo la primera vez).
+
+        Returns:
+            True si esta fue la primera respuesta del ticket
+        """
+        cursor.execute("""
+            UPDATE ticket
+            SET fecha_primera_respuesta = NOW()
+            WHERE id_ticket = %s AND fecha_primera_respuesta IS NULL
+        """, (id_ticket,))
+        return cursor.rowcount > 0
@@ -1,11 +1,106 @@
 from flask_app.config.conexion_login import get_local_db_connection
-from datetime import datetime
+from flask_app.utils.error_handler import ValidationError
+from flask_app.utils.serializacion import Proyeccion, fecha_texto
+from flask_app.utils.busqueda import preparar_consulta, resaltar
+from flask_app.utils.exportacion import CursorSinBuffer
+from flask_app.models.sla_model import SLAModel
+from flask_app.models.calendario_model import CalendarioModel
+from flask_app.services import similitud
+from flask_app.services.asignacion import asignar_automaticamente, motor_asignacion
+from flask_app.services.sla_scheduler import programador_sla
+from datetime import datetime, timedelta
 import logging
+import threading
 import traceback
 
 
+# Forma de cada ticket en GET /api/tickets (las fechas se serializan en el proveedor JSON)
+PROYECCION_TICKET_LISTA = Proyeccion({
+    'id_ticket': 'id_ticket',
+    'titulo': 'titulo',
+    'tipo_ticket': 'tipo_ticket',
+    'descripcion': 'descripcion',
+    'fecha_ini': fecha_texto('fecha_ini'),
+    'ultima_actividad': fecha_texto('fecha_ultima_actividad'),
+    'id_estado': 'id_estado',
+    'id_prioridad': 'id_prioridad',
+    'id_usuarioext': 'id_usuarioext',
+    'id_operador': 'id_operador',
+    'id_operador_remitente': 'id_operador_remitente',
+    'id_operador_emisor': 'id_operador_emisor',
+    # Departamento destino del ticket (para filtros)
+    'id_depto': 'id_depto_ticket',
+    # Departamento del Owner actual (informativo)
+    'id_depto_owner': 'id_depto_owner',
+    'estado': 'estado_desc',
+    'prioridad': 'prioridad_desc',
+    'usuario': Proyeccion({
+        'nombre': 'usuario_nombre',
+        'email': 'usuario_email',
+    }),
+    'operador_nombre': 'operador_nombre',
+    'operador_aceptado': lambda row: (row.get('operador_tiene_mensajes') or 0) > 0,
+    'remitente_nombre': 'remitente_nombre',
+    'emisor_nombre': 'emisor_nombre',
+    'id_canal': 'id_canal',
+    'canal': 'canal_nombre',
+    'club': 'club_nombre',
+})
+
+
+# Forma de cada resultado en GET /api/tickets/search
+PROYECCION_TICKET_BUSQUEDA = Proyeccion({
+    'id_ticket': 'id_ticket',
+    'titulo': 'titulo',
+    'fecha_ini': fecha_texto('fecha_ini'),
+    'id_estado': 'id_estado',
+    'id_prioridad': 'id_prioridad',
+    'estado': 'estado_desc',
+    'prioridad': 'prioridad_desc',
+    'usuario': Proyeccion({
+        'nombre': 'usuario_nombre',
+        'email': 'usuario_email',
+    }),
+    'club': 'club_nombre',
+    'score': lambda row: round(float(row['score'] or 0), 4),
+})
+
+
+# Columnas de GET /api/tickets/export (CSV / NDJSON)
+PROYECCION_TICKET_EXPORTACION = Proyeccion({
+    'id_ticket': 'id_ticket',
+    'titulo': 'titulo',
+    'tipo_ticket': 'tipo_ticket',
+    'estado': 'estado_desc',
+    'prioridad': 'prioridad_desc',
+    'departamento': 'depto_nombre',
+    'canal': 'canal_nombre',
+    'club': 'club_nombre',
+    'usuario_nombre': 'usuario_nombre',
+    'usuario_email': 'usuario_email',
+    'owner': 'operador_nombre',
+    'emisor': 'emisor_nombre',
+    'fecha_ini': fecha_texto('fecha_ini'),
+    'fecha_primera_respuesta': fecha_texto('fecha_primera_respuesta'),
+    'fecha_resolucion': fecha_texto('fecha_resolucion'),
+    'ultima_actividad': fecha_texto('fecha_ultima_actividad'),
+    'vence_primera_respuesta': fecha_texto('vence_primera_respuesta'),
+    'vence_resolucion': fecha_texto('vence_resolucion'),
+})
+
 class TicketModel:
 
+    OPERACIONES_MASIVAS = ('estado', 'prioridad', 'asignar', 'agregar_etiquetas', 'quitar_etiquetas')
+    MAX_TICKETS_MASIVO = 500
+
+    CUERPO_EMAIL_RESUELTO = (
+        "Hola,\n\n"
+        "Tu ticket ha sido marcado como Resuelto.\n"
+        "Si estás conforme, responde este correo con la palabra CERRAR para cerrar el ticket.\n\n"
+        "Gracias por contactarnos.\n\n"
+        "Atentamente,\nSoporte"
+    )
+
     @staticmethod
     def _build_visibility_where(cursor, operador_actual):
         """Construye el WHERE de visibilidad de tickets según rol/permisos.
@@ -109,15 +204,42 @@ class TicketModel:
         return where_clause, params
 
     @staticmethod
-    def get_estadisticas(operador_actual=None):
-        """Obtiene estadísticas para KPIs (con scope por permisos)."""
+    def obtener_visibilidad(operador_actual):
+        """Calcula una vez el WHERE de visibilidad para reutilizarlo en varias consultas.
+
+        Retorna: (where_clause, params) como _build_visibility_where.
+        """
         conn = None
         cursor = None
         try:
             conn = get_local_db_connection()
             cursor = conn.cursor()
+            return TicketModel._build_visibility_where(cursor, operador_actual)
+        finally:
+            if cursor is not None:
+                cursor.close()
+            if conn is not None:
+                conn.close()
 
-            where_clause, params = TicketModel._build_visibility_where(cursor, operador_actual)
+    @staticmethod
+    def _resolver_visibilidad(cursor, operador_actual, visibilidad):
+        if visibilidad is not None:
+            return visibilidad[0], list(visibilidad[1])
+        return TicketModel._build_visibility_where(cursor, operador_actual)
+
+    @staticmethod
+    def get_estadisticas(operador_actual=None, visibilidad=None):
+        """Obtiene estadísticas para KPIs (con scope por permisos).
+
+        visibilidad: (where_clause, params) precalculado con obtener_visibilidad (opcional).
+        """
+        conn = None
+        cursor = None
+        try:
+            conn = get_local_db_connection()
+            cursor = conn.cursor()
+
+            where_clause, params = TicketModel._resolver_visibilidad(cursor, operador_actual, visibilidad)
 
             # Total visible
             cursor.execute(f"SELECT COUNT(*) as total FROM ticket t {where_clause}", params)
@@ -148,21 +270,21 @@ class TicketModel:
 
             # Por periodo
             cursor.execute(
-                f"SELECT COUNT(*) as total FROM ticket t {where_clause} AND DATE(t.fecha_ini) = CURDATE()",
+                f"SELECT COUNT(*) as total FROM ticket t {where_clause} AND t.fecha_ini >= CURDATE()",
                 params
             )
             row_hoy = cursor.fetchone()
             hoy = row_hoy['total'] if isinstance(row_hoy, dict) else row_hoy[0]
 
             cursor.execute(
-                f"SELECT COUNT(*) as total FROM ticket t {where_clause} AND DATE(t.fecha_ini) >= DATE_SUB(CURDATE(), INTERVAL 7 DAY)",
+                f"SELECT COUNT(*) as total FROM ticket t {where_clause} AND t.fecha_ini >= DATE_SUB(CURDATE(), INTERVAL 7 DAY)",
                 params
             )
             row_semana = cursor.fetchone()
             semana = row_semana['total'] if isinstance(row_semana, dict) else row_semana[0]
 
             cursor.execute(
-                f"SELECT COUNT(*) as total FROM ticket t {where_clause} AND DATE(t.fecha_ini) >= DATE_SUB(CURDATE(), INTERVAL 30 DAY)",
+                f"SELECT COUNT(*) as total FROM ticket t {where_clause} AND t.fecha_ini >= DATE_SUB(CURDATE(), INTERVAL 30 DAY)",
                 params
             )
             row_mes = cursor.fetchone()
@@ -270,6 +392,7 @@ class TicketModel:
         """
         conn = None
         cursor = None
+        id_autoasignado = None
         try:
             conn = get_local_db_connection()
             cursor = conn.cursor()
@@ -407,9 +530,13 @@ class TicketModel:
             except Exception:
                 logging.exception('No se pudo registrar historial: Ticket recibido')
             
-            # 3. Asignar ticket a operador SOLO si se especifica explícitamente
-            # Por defecto, tickets quedan SIN ASIGNAR (Sistema de Escalación)
+            # 3. Asignar ticket a operador si se especifica explícitamente.
+            # Si no, con la asignación automática activa se elige al miembro del
+            # depto con menos carga; si está apagada queda SIN ASIGNAR (Sistema de Escalación)
             id_operador_asignado = data.get('id_operador_asignado')
+            if not id_operador_asignado and id_depto and int(data.get('id_estado', 1)) not in (3, 4):
+                id_autoasignado = asignar_automaticamente(cursor, id_ticket, id_depto, data.get('titulo'))
+
             if id_operador_asignado:
                 cursor.execute("""
                     INSERT INTO ticket_operador 
@@ -422,15 +549,30 @@ class TicketModel:
                     datetime.now().strftime('%Y-%m-%d %H:%M:%S')
                 ))
                 logging.info(f'Ticket {id_ticket}: asignado a operador {id_operador_asignado} como Owner')
-            else:
+            elif not id_autoasignado:
                 logging.info(f'Ticket {id_ticket}: creado SIN ASIGNAR (pendiente de tomar)')
             
             # 4. El emisor ya está registrado en id_operador_emisor
             # No necesitamos agregarlo como Colaborador en ticket_operador
             # El emisor SIEMPRE verá sus tickets gracias a la columna id_operador_emisor
 
+            # Vencimientos de primera respuesta / resolución según el SLA
+            SLAModel.fijar_vencimientos(cursor, id_ticket)
+
+            # Firma MinHash para asociar correos nuevos del mismo tema
+            if similitud.ACTIVA:
+                try:
+                    similitud.indexar(cursor, id_ticket,
+                                      similitud.firmar(data.get('titulo'), data.get('descripcion')))
+                except Exception:
+                    logging.exception('No se pudo indexar la firma de similitud del ticket')
+
             # Guardar ticket + historial + asignaciones
             conn.commit()
+            programador_sla.programar_ticket(id_ticket)
+            if id_operador_asignado:
+                motor_asignacion.asignado(int(id_operador_asignado),
+                                          abierto=int(data.get('id_estado', 1)) not in (3, 4))
 
             logging.info(f'Ticket creado id_ticket={id_ticket} por operador {id_operador_emisor} para depto {id_depto}')
 
@@ -438,12 +580,15 @@ class TicketModel:
                 'success': True,
                 'id_ticket': id_ticket,
                 'id_msg_inicial': id_msg_inicial,
+                'id_operador_asignado': id_autoasignado or id_operador_asignado,
                 'message': 'Ticket creado exitosamente'
             }
             
         except Exception as e:
             if conn:
                 conn.rollback()
+            if id_autoasignado:
+                motor_asignacion.cancelar_reserva(id_autoasignado)
             return {'success': False, 'error': str(e)}
         finally:
             if cursor is not None:
@@ -484,14 +629,144 @@ class TicketModel:
         ))
         return cursor.lastrowid
     
+    # Filtros de GET /api/tickets que comparan una columna de ticket contra ids
+    FILTROS_LISTA_COLUMNAS = {
+        'estado': 't.id_estado',
+        'prioridad': 't.id_prioridad',
+        'depto': 't.id_depto',
+        'canal': 't.id_canal',
+        'club': 't.id_club',
+        'emisor': 't.id_operador_emisor',
+    }
+    FILTROS_LISTA = tuple(FILTROS_LISTA_COLUMNAS) + ('etiqueta', 'owner', 'fecha_desde', 'fecha_hasta')
+    MAX_VALORES_FILTRO = 50
+
+    # orden_por -> ORDER BY (con {dir} = ASC|DESC). id_ticket desempata para paginar estable.
+    ORDENES_LISTA = {
+        'fecha_ini': 't.fecha_ini {dir}, t.id_ticket {dir}',
+        # jerarquia 1 = Urgente: 'desc' muestra primero lo más urgente
+        'prioridad': 'pr.jerarquia {dir_inv}, t.fecha_ini DESC, t.id_ticket DESC',
+        'ultima_actividad': 't.fecha_ultima_actividad {dir}, t.id_ticket {dir}',
+    }
+
+    @staticmethod
+    def parsear_ids_filtro(nombre, valor):
+        """Acepta int, lista o '1,2,3'. Retorna lista de ints (vacía si no hay valor)."""
+        if valor is None or valor == '':
+            return []
+        if isinstance(valor, (list, tuple, set)):
+            crudos = valor
+        else:
+            crudos = str(valor).split(',')
+        ids = []
+        for crudo in crudos:
+            crudo = str(crudo).strip()
+            if not crudo:
+                continue
+            try:
+                ids.append(int(crudo))
+            except ValueError:
+                raise ValidationError(f'Filtro {nombre} inválido: {crudo!r}')
+        if len(ids) > TicketModel.MAX_VALORES_FILTRO:
+            raise ValidationError(f'Filtro {nombre}: máximo {TicketModel.MAX_VALORES_FILTRO} valores')
+        return ids
+
+    @staticmethod
+    def _parsear_fecha_filtro(nombre, valor):
+        try:
+            return datetime.strptime(str(valor).strip()[:10], '%Y-%m-%d')
+        except ValueError:
+            raise ValidationError(f'Filtro {nombre} inválido (formato YYYY-MM-DD)')
+
+    @staticmethod
+    def construir_filtros_lista(filtros):
+        """
+        Traduce los filtros del listado a predicados SQL sobre el alias `t`.
+
+        Todos son sargables: igualdad/IN sobre columnas indexadas, rangos
+        semiabiertos sobre fecha_ini (sin DATE(...)) y EXISTS sobre las PK de
+        ticket_etiqueta / ticket_operador.
+
+        Retorna: (sql, params) donde sql empieza con ' AND ...' o es ''.
+        Lanza ValidationError si algún valor es inválido.
+        """
+        if not filtros:
+            return '', []
+
+        condiciones = []
+        params = []
+
+        for nombre, columna in TicketModel.FILTROS_LISTA_COLUMNAS.items():
+            ids = TicketModel.parsear_ids_filtro(nombre, filtros.get(nombre))
+            if len(ids) == 1:
+                condiciones.append(f'{columna} = %s')
+                params.append(ids[0])
+            elif ids:
+                condiciones.append(f"{columna} IN ({','.join(['%s'] * len(ids))})")
+                params.extend(ids)
+
+        etiquetas = TicketModel.parsear_ids_filtro('etiqueta', filtros.get('etiqueta'))
+        if etiquetas:
+            condiciones.append(f"""EXISTS (
+                SELECT 1 FROM ticket_etiqueta te_f
+                WHERE te_f.id_ticket = t.id_ticket
+                  AND te_f.id_etiqueta IN ({','.join(['%s'] * len(etiquetas))})
+            )""")
+            params.extend(etiquetas)
+
+        owner = filtros.get('owner')
+        if str(owner or '').strip().lower() == 'sin_asignar':
+            condiciones.append("""NOT EXISTS (
+                SELECT 1 FROM ticket_operador to_f
+                WHERE to_f.id_ticket = t.id_ticket
+                  AND to_f.rol = 'Owner'
+                  AND to_f.fecha_desasignacion IS NULL
+            )""")
+        else:
+            owners = TicketModel.parsear_ids_filtro('owner', owner)
+            if owners:
+                condiciones.append(f"""EXISTS (
+                    SELECT 1 FROM ticket_operador to_f
+                    WHERE to_f.id_ticket = t.id_ticket
+                      AND to_f.rol = 'Owner'
+                      AND to_f.fecha_desasignacion IS NULL
+                      AND to_f.id_operador IN ({','.join(['%s'] * len(owners))})
+                )""")
+                params.extend(owners)
+
+        fecha_desde = filtros.get('fecha_desde')
+        if fecha_desde:
+            condiciones.append('t.fecha_ini >= %s')
+            params.append(TicketModel._parsear_fecha_filtro('fecha_desde', fecha_desde))
+
+        fecha_hasta = filtros.get('fecha_hasta')
+        if fecha_hasta:
+            # Hasta inclusive: < día siguiente, para no envolver la columna en DATE()
+            condiciones.append('t.fecha_ini < %s')
+            params.append(TicketModel._parsear_fecha_filtro('fecha_hasta', fecha_hasta) + timedelta(days=1))
+
+        if not condiciones:
+            return '', []
+        return ' AND ' + ' AND '.join(condiciones), params
+
     @staticmethod
-    def get_all(limit=50, offset=0, operador_actual=None, order='desc'):
+    def get_all(limit=50, offset=0, operador_actual=None, order='desc', visibilidad=None,
+                filtros=None, orden_por='fecha_ini'):
         """
         Obtiene lista de tickets según permisos del operador.
         - Operador: Solo sus tickets asignados
         - Supervisor: Sus tickets + de subordinados
         - Admin: Todos
+
+        visibilidad: (where_clause, params) precalculado con obtener_visibilidad (opcional).
+        filtros: dict con claves de FILTROS_LISTA (ver construir_filtros_lista).
+        orden_por: 'fecha_ini' | 'prioridad' | 'ultima_actividad'.
         """
+        # Fuera del try: un filtro inválido es un 400, no un error interno
+        filtros_sql, filtros_params = TicketModel.construir_filtros_lista(filtros)
+        if orden_por not in TicketModel.ORDENES_LISTA:
+            raise ValidationError(f"orden_por inválido. Opciones: {', '.join(TicketModel.ORDENES_LISTA)}")
+
         conn = None
         cursor = None
         try:
@@ -499,7 +774,9 @@ class TicketModel:
             cursor = conn.cursor()
 
             # Determinar filtro según rol del operador
-            where_clause, params = TicketModel._build_visibility_where(cursor, operador_actual)
+            where_clause, params = TicketModel._resolver_visibilidad(cursor, operador_actual, visibilidad)
+            where_clause += filtros_sql
+            params = params + filtros_params
             
             # Contar total con filtro
             count_query = f"SELECT COUNT(*) as total FROM ticket t {where_clause}"
@@ -511,12 +788,17 @@ class TicketModel:
             if order_norm not in ('asc', 'desc'):
                 order_norm = 'desc'
             order_sql = 'ASC' if order_norm == 'asc' else 'DESC'
+            order_by = TicketModel.ORDENES_LISTA[orden_por].format(
+                dir=order_sql,
+                dir_inv='DESC' if order_sql == 'ASC' else 'ASC',
+            )
 
             # Obtener tickets con sus detalles
             query = f"""
                 SELECT 
                     t.id_ticket, t.titulo, t.tipo_ticket, t.descripcion,
                     t.fecha_ini, t.fecha_primera_respuesta, t.fecha_resolucion,
+                    t.fecha_ultima_actividad,
                     t.id_estado, t.id_prioridad, t.id_usuarioext, t.id_club, t.id_sla,
                     t.id_operador_emisor, t.id_depto as id_depto_ticket,
                         t.id_canal as id_canal,
@@ -567,45 +849,13 @@ class TicketModel:
                 LEFT JOIN operador op_emisor ON t.id_operador_emisor = op_emisor.id_operador
                 LEFT JOIN canal c ON t.id_canal = c.id_canal
                 {where_clause}
-                ORDER BY t.fecha_ini {order_sql}
+                ORDER BY {order_by}
                 LIMIT %s OFFSET %s
             """
             cursor.execute(query, params + [limit, offset])
             rows = cursor.fetchall()
             
-            tickets = []
-            for row in rows:
-                ticket = {
-                    'id_ticket': row['id_ticket'],
-                    'titulo': row['titulo'],
-                    'tipo_ticket': row['tipo_ticket'],
-                    'descripcion': row['descripcion'],
-                    'fecha_ini': str(row['fecha_ini']),
-                    'id_estado': row['id_estado'],
-                    'id_prioridad': row['id_prioridad'],
-                    'id_usuarioext': row['id_usuarioext'],
-                    'id_operador': row['id_operador'],
-                    'id_operador_remitente': row['id_operador_remitente'],
-                    'id_operador_emisor': row['id_operador_emisor'],
-                    # Departamento destino del ticket (para filtros)
-                    'id_depto': row.get('id_depto_ticket'),
-                    # Departamento del Owner actual (informativo)
-                    'id_depto_owner': row.get('id_depto_owner'),
-                    'estado': row['estado_desc'],
-                    'prioridad': row['prioridad_desc'],
-                    'usuario': {
-                        'nombre': row['usuario_nombre'],
-                        'email': row['usuario_email']
-                    },
-                    'operador_nombre': row['operador_nombre'],
-                    'operador_aceptado': row.get('operador_tiene_mensajes', 0) > 0,
-                    'remitente_nombre': row['remitente_nombre'],
-                    'emisor_nombre': row['emisor_nombre'],
-                    'id_canal': row.get('id_canal'),
-                    'canal': row.get('canal_nombre'),
-                    'club': row['club_nombre']
-                }
-                tickets.append(ticket)
+            tickets = PROYECCION_TICKET_LISTA(rows)
             
             return {
                 'success': True,
@@ -632,6 +882,258 @@ class TicketModel:
                 except Exception:
                     pass
     
+    @staticmethod
+    def exportar(operador_actual=None, filtros=None, orden_por='fecha_ini', order='desc'):
+        """
+        Tickets para exportar con el mismo scope de visibilidad, filtros y orden
+        que get_all, sin paginar. Usa joins en lugar de las subconsultas por fila
+        del listado (salvo el owner actual).
+
+        Returns:
+            CursorSinBuffer (las filas se leen del servidor a medida que se envían)
+        """
+        filtros_sql, filtros_params = TicketModel.construir_filtros_lista(filtros)
+        if orden_por not in TicketModel.ORDENES_LISTA:
+            raise ValidationError(f"orden_por inválido. Opciones: {', '.join(TicketModel.ORDENES_LISTA)}")
+        order_sql = 'ASC' if str(order or 'desc').strip().lower() == 'asc' else 'DESC'
+        order_by = TicketModel.ORDENES_LISTA[orden_por].format(
+            dir=order_sql,
+            dir_inv='DESC' if order_sql == 'ASC' else 'ASC',
+        )
+
+        where_clause, params = TicketModel.obtener_visibilidad(operador_actual)
+        query = f"""
+            SELECT
+                t.id_ticket, t.titulo, t.tipo_ticket,
+                t.fecha_ini, t.fecha_primera_respuesta, t.fecha_resolucion,
+                t.fecha_ultima_actividad, t.vence_primera_respuesta, t.vence_resolucion,
+                es.descripcion as estado_desc,
+                pr.descripcion as prioridad_desc,
+                d.descripcion as depto_nombre,
+                c.nombre as canal_nombre,
+                cl.nom_club as club_nombre,
+                ue.nombre as usuario_nombre,
+                ue.email as usuario_email,
+                op_emisor.nombre as emisor_nombre,
+                (SELECT op.nombre FROM ticket_operador to2
+                 INNER JOIN operador op ON to2.id_operador = op.id_operador
+                 WHERE to2.id_ticket = t.id_ticket AND to2.rol = 'Owner'
+                 AND to2.fecha_desasignacion IS NULL
+                 LIMIT 1) as operador_nombre
+            FROM ticket t
+            LEFT JOIN estado es ON t.id_estado = es.id_estado
+            LEFT JOIN prioridad pr ON t.id_prioridad = pr.id_prioridad
+            LEFT JOIN departamento d ON t.id_depto = d.id_depto
+            LEFT JOIN canal c ON t.id_canal = c.id_canal
+            LEFT JOIN club cl ON t.id_club = cl.id_club
+            LEFT JOIN usuario_ext ue ON t.id_usuarioext = ue.id_usuario
+            LEFT JOIN operador op_emisor ON t.id_operador_emisor = op_emisor.id_operador
+            {where_clause}{filtros_sql}
+            ORDER BY {order_by}
+        """
+        return CursorSinBuffer(query, list(params) + filtros_params)
+
+    # Máximo de candidatos visibles que aporta cada fuente
+    CANDIDATOS_BUSQUEDA_POR_FUENTE = 200
+
+    @staticmethod
+    def buscar(q, operador_actual=None, limit=20):
+        """
+        Búsqueda de tickets por texto (título, descripción, mensajes, texto
+        de los adjuntos y nombre/email del usuario), número de ticket ("#123")
+        o prefijo de email.
+
+        Usa los índices FULLTEXT de migracion_indices_busqueda_fulltext.sql y
+        migracion_adjunto_texto.sql.
+        Cada fuente une `ticket t` y aplica el scope de visibilidad del operador
+        antes de su LIMIT, y aporta como máximo CANDIDATOS_BUSQUEDA_POR_FUENTE
+        tickets visibles (los de mayor relevancia). Así un operador cuyos
+        tickets quedan fuera del top global de una fuente igual los encuentra.
+
+        Retorna: {'success', 'resultados', 'terminos'}; cada resultado incluye
+        `snippet` y `titulo_resaltado` (HTML escapado con <mark>).
+        """
+        consulta = preparar_consulta(q)
+        if not consulta.expresion and consulta.id_ticket is None and not consulta.email_prefijo:
+            return {'success': True, 'resultados': [], 'terminos': []}
+
+        tope = TicketModel.CANDIDATOS_BUSQUEDA_POR_FUENTE
+        conn = None
+        cursor = None
+        try:
+            conn = get_local_db_connection()
+            cursor = conn.cursor()
+
+            where_clause, params = TicketModel._build_visibility_where(cursor, operador_actual)
+            # "WHERE ..." -> predicado para combinar con el de cada fuente
+            visible = where_clause.strip()[len('WHERE'):]
+            ramas = []
+            params_ramas = []
+
+            if consulta.expresion:
+                ramas.append(f"""
+                    (SELECT t.id_ticket,
+                            MATCH(t.titulo, t.descripcion) AGAINST (%s IN BOOLEAN MODE) * 2 AS score,
+                            0 AS en_mensaje, 0 AS en_adjunto
+                     FROM ticket t
+                     WHERE MATCH(t.titulo, t.descripcion) AGAINST (%s IN BOOLEAN MODE)
+                       AND ({visible})
+                     ORDER BY score DESC LIMIT %s)
+                """)
+                params_ramas += [consulta.expresion, consulta.expresion, *params, tope]
+
+                ramas.append(f"""
+                    (SELECT mf.id_ticket,
+                            MATCH(mf.contenido) AGAINST (%s IN BOOLEAN MODE) AS score,
+                            1 AS en_mensaje, 0 AS en_adjunto
+                     FROM mensaje mf
+                     INNER JOIN ticket t ON t.id_ticket = mf.id_ticket
+                     WHERE MATCH(mf.contenido) AGAINST (%s IN BOOLEAN MODE)
+                       AND mf.deleted_at IS NULL
+                       AND ({visible})
+                     ORDER BY score DESC LIMIT %s)
+                """)
+                params_ramas += [consulta.expresion, consulta.expresion, *params, tope]
+
+                ramas.append(f"""
+                    (SELECT t.id_ticket,
+                            MATCH(uf.nombre, uf.email) AGAINST (%s IN BOOLEAN MODE) * 1.5 AS score,
+                            0 AS en_mensaje, 0 AS en_adjunto
+                     FROM usuario_ext uf
+                     INNER JOIN ticket t ON t.id_usuarioext = uf.id_usuario
+                     WHERE MATCH(uf.nombre, uf.email) AGAINST (%s IN BOOLEAN MODE)
+                       AND ({visible})
+                     ORDER BY score DESC LIMIT %s)
+                """)
+                params_ramas += [consulta.expresion, consulta.expresion, *params, tope]
+
+                # Texto extraído de adjuntos (PDF, DOCX...); pesa menos que el mensaje.
+                # Como en la rama de mensajes, no cuentan los de mensajes eliminados
+                ramas.append(f"""
+                    (SELECT xf.id_ticket,
+                            MATCH(xf.texto) AGAINST (%s IN BOOLEAN MODE) * 0.8 AS score,
+                            0 AS en_mensaje, 1 AS en_adjunto
+                     FROM adjunto_texto xf
+                     INNER JOIN adjunto xa ON xa.id_adj = xf.id_adj AND xa.deleted_at IS NULL
+                     INNER JOIN mensaje xm ON xm.id_msg = xa.id_msg AND xm.deleted_at IS NULL
+                     INNER JOIN ticket t ON t.id_ticket = xf.id_ticket
+                     WHERE MATCH(xf.texto) AGAINST (%s IN BOOLEAN MODE)
+                       AND ({visible})
+                     ORDER BY score DESC LIMIT %s)
+                """)
+                params_ramas += [consulta.expresion, consulta.expresion, *params, tope]
+
+            if consulta.id_ticket is not None:
+                ramas.append(f"""
+                    (SELECT t.id_ticket, 1000 AS score, 0 AS en_mensaje, 0 AS en_adjunto
+                     FROM ticket t
+                     WHERE t.id_ticket = %s AND ({visible}))
+                """)
+                params_ramas += [consulta.id_ticket, *params]
+
+            if consulta.email_prefijo:
+                # Prefijo sobre el índice único de email (rango, no escaneo)
+                patron = consulta.email_prefijo.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_') + '%'
+                ramas.append(f"""
+                    (SELECT t.id_ticket, 50 AS score, 0 AS en_mensaje, 0 AS en_adjunto
+                     FROM usuario_ext ue2
+                     INNER JOIN ticket t ON t.id_usuarioext = ue2.id_usuario
+                     WHERE ue2.email LIKE %s
+                       AND ({visible})
+                     ORDER BY t.fecha_ini DESC LIMIT %s)
+                """)
+                params_ramas += [patron, *params, tope]
+
+            query = f"""
+                SELECT
+                    t.id_ticket, t.titulo, t.descripcion, t.fecha_ini,
+                    t.id_estado, t.id_prioridad,
+                    es.descripcion as estado_desc,
+                    pr.descripcion as prioridad_desc,
+                    ue.nombre as usuario_nombre,
+                    ue.email as usuario_email,
+                    cl.nom_club as club_nombre,
+                    cand.score, cand.en_mensaje, cand.en_adjunto
+                FROM (
+                    SELECT r.id_ticket, SUM(r.score) AS score, MAX(r.en_mensaje) AS en_mensaje,
+                           MAX(r.en_adjunto) AS en_adjunto
+                    FROM ({' UNION ALL '.join(ramas)}) r
+                    GROUP BY r.id_ticket
+                ) cand
+                INNER JOIN ticket t ON t.id_ticket = cand.id_ticket
+                LEFT JOIN estado es ON t.id_estado = es.id_estado
+                LEFT JOIN prioridad pr ON t.id_prioridad = pr.id_prioridad
+                LEFT JOIN usuario_ext ue ON t.id_usuarioext = ue.id_usuario
+                LEFT JOIN club cl ON t.id_club = cl.id_club
+                ORDER BY cand.score DESC, t.fecha_ini DESC
+                LIMIT %s
+            """
+            cursor.execute(query, params_ramas + [limit])
+            rows = cursor.fetchall() or []
+
+            # Fragmento del mensaje más reciente que coincide, solo para los tickets devueltos
+            mensajes = {}
+            ids_con_mensaje = [r['id_ticket'] for r in rows if r.get('en_mensaje')]
+            if ids_con_mensaje and consulta.expresion:
+                placeholders = ','.join(['%s'] * len(ids_con_mensaje))
+                cursor.execute(f"""
+                    SELECT m.id_ticket, m.contenido
+                    FROM mensaje m
+                    WHERE m.id_ticket IN ({placeholders})
+                      AND m.deleted_at IS NULL
+                      AND MATCH(m.contenido) AGAINST (%s IN BOOLEAN MODE)
+                    ORDER BY m.fecha_envio DESC
+                """, ids_con_mensaje + [consulta.expresion])
+                for m in cursor.fetchall() or []:
+                    mensajes.setdefault(m['id_ticket'], m['contenido'])
+
+            # Igual para adjuntos, solo si no hubo coincidencia en un mensaje
+            adjuntos = {}
+            ids_con_adjunto = [r['id_ticket'] for r in rows if r.get('en_adjunto') and r['id_ticket'] not in mensajes]
+            if ids_con_adjunto and consulta.expresion:
+                placeholders = ','.join(['%s'] * len(ids_con_adjunto))
+                cursor.execute(f"""
+                    SELECT x.id_ticket, x.texto, a.id_adj, a.nom_adj
+                    FROM adjunto_texto x
+                    INNER JOIN adjunto a ON a.id_adj = x.id_adj AND a.deleted_at IS NULL
+                    INNER JOIN mensaje m ON m.id_msg = a.id_msg AND m.deleted_at IS NULL
+                    WHERE x.id_ticket IN ({placeholders})
+                      AND MATCH(x.texto) AGAINST (%s IN BOOLEAN MODE)
+                    ORDER BY x.id_adj DESC
+                """, ids_con_adjunto + [consulta.expresion])
+                for x in cursor.fetchall() or []:
+                    adjuntos.setdefault(x['id_ticket'], x)
+
+            terminos = consulta.terminos
+            resultados = []
+            for row in rows:
+                resultado = PROYECCION_TICKET_BUSQUEDA.fila(row)
+                titulo_resaltado = resaltar(row['titulo'], terminos, ancho=200)
+                if row['id_ticket'] in mensajes:
+                    resultado['coincidencia'] = 'mensaje'
+                    resultado['snippet'] = resaltar(mensajes[row['id_ticket']], terminos)
+                elif row['id_ticket'] in adjuntos:
+                    adjunto = adjuntos[row['id_ticket']]
+                    resultado['coincidencia'] = 'adjunto'
+                    resultado['snippet'] = resaltar(adjunto['texto'], terminos)
+                    resultado['adjunto'] = {'id_adj': adjunto['id_adj'], 'nom_adj': adjunto['nom_adj']}
+                else:
+                    resultado['coincidencia'] = 'ticket'
+                    resultado['snippet'] = resaltar(row['descripcion'], terminos)
+                resultado['titulo_resaltado'] = titulo_resaltado
+                resultados.append(resultado)
+
+            return {'success': True, 'resultados': resultados, 'terminos': list(terminos)}
+
+        except Exception as e:
+            logging.exception('Error en TicketModel.buscar')
+            return {'success': False, 'error': str(e)}
+        finally:
+            if cursor is not None:
+                cursor.close()
+            if conn is not None:
+                conn.close()
+
     @staticmethod
     def get_by_id(id_ticket):
         """Obtiene un ticket especifico con detalles completos."""
@@ -650,6 +1152,8 @@ class TicketModel:
                     t.id_estado, t.id_prioridad, t.id_usuarioext, t.id_club, t.id_sla,
                     t.id_operador_emisor,
                     t.id_depto as id_depto_ticket,
+                    t.vence_primera_respuesta, t.vence_resolucion,
+                    sl.tiempo_primera_respuesta_min, sl.tiempo_resolucion_min,
                     t.id_canal as id_canal,
                     c.nombre as canal_nombre,
                     es.descripcion as estado_desc,
@@ -739,8 +1243,13 @@ class TicketModel:
                 },
                 'club': row['club_nombre'] if isinstance(row, dict) else row[20],
                 'sla': row['sla_nombre'] if isinstance(row, dict) else row[21],
+                # Plazos del SLA en minutos hábiles del calendario del departamento
+                'sla_estado': SLAModel.evaluar(
+                    CalendarioModel.de_depto(row.get('id_depto_ticket')), row, datetime.now()
+                ),
                 'id_canal': row.get('id_canal') if isinstance(row, dict) else row[25],
                 'canal': row.get('canal_nombre') if isinstance(row, dict) else row[26],
+                'posibles_duplicados': similitud.relacionados(id_ticket),
                 'mensajes': mensajes
             }
             
@@ -782,7 +1291,13 @@ class TicketModel:
             
             # Obtener el estado anterior
             cursor.execute("""
-                SELECT t.id_estado, t.fecha_resolucion, e.descripcion as estado_anterior
+                SELECT t.id_estado, t.fecha_resolucion, e.descripcion as estado_anterior,
+                       (SELECT to1.id_operador
+                        FROM ticket_operador to1
+                        WHERE to1.id_ticket = t.id_ticket
+                          AND to1.rol = 'Owner'
+                          AND to1.fecha_desasignacion IS NULL
+                        LIMIT 1) as id_operador_owner
                 FROM ticket t
                 LEFT JOIN estado e ON t.id_estado = e.id_estado
                 WHERE t.id_ticket = %s
@@ -844,20 +1359,25 @@ class TicketModel:
                 cursor.execute("""
                     UPDATE ticket
                     SET id_estado = %s,
-                        fecha_resolucion = NOW()
+                        fecha_resolucion = NOW(),
+                        fecha_ultima_actividad = NOW()
                     WHERE id_ticket = %s
                 """, (nuevo_estado_id, ticket_id))
             elif estado_anterior_int in (3, 4):
                 cursor.execute("""
                     UPDATE ticket
                     SET id_estado = %s,
-                        fecha_resolucion = NULL
+                        fecha_resolucion = NULL,
+                        fecha_ultima_actividad = NOW()
                     WHERE id_ticket = %s
                 """, (nuevo_estado_id, ticket_id))
+                # Reapertura: el plazo de resolución del SLA vuelve a correr
+                SLAModel.reiniciar_resolucion(cursor, [ticket_id])
             else:
                 cursor.execute("""
                     UPDATE ticket
-                    SET id_estado = %s
+                    SET id_estado = %s,
+                        fecha_ultima_actividad = NOW()
                     WHERE id_ticket = %s
                 """, (nuevo_estado_id, ticket_id))
             
@@ -869,6 +1389,11 @@ class TicketModel:
             """, (ticket_id, operador_id, estado_anterior_nombre, nuevo_estado_nombre))
             
             conn.commit()
+            if estado_anterior_int in (3, 4) and nuevo_estado_int not in (3, 4):
+                programador_sla.programar_ticket(ticket_id)
+            if nuevo_estado_int is not None and estado_anterior_int is not None:
+                motor_asignacion.cambio_estado(ticket_actual.get('id_operador_owner'),
+                                               estado_anterior_int, nuevo_estado_int)
             
             logging.info(f"Estado del ticket #{ticket_id} cambiado a {nuevo_estado_id} por operador {operador_id}")
             # Si el nuevo estado es Resuelto (3), notificar por email al usuario externo
@@ -886,14 +1411,7 @@ class TicketModel:
                         try:
                             from flask_app.services.email_outbound import send_email
                             subj = f"Ticket #{ticket_id}: ({titulo})"
-                            body = (
-                                "Hola,\n\n"
-                                "Tu ticket ha sido marcado como Resuelto.\n"
-                                "Si estás conforme, responde este correo con la palabra CERRAR para cerrar el ticket.\n\n"
-                                "Gracias por contactarnos.\n\n"
-                                "Atentamente,\nSoporte"
-                            )
-                            send_email(usuario_email, subj, body, id_ticket=ticket_id)
+                            send_email(usuario_email, subj, TicketModel.CUERPO_EMAIL_RESUELTO, id_ticket=ticket_id)
                         except Exception:
                             logging.exception('No se pudo enviar notificacion de resolucion al usuario')
             except Exception:
@@ -964,7 +1482,8 @@ class TicketModel:
             # Actualizar prioridad del ticket
             cursor.execute("""
                 UPDATE ticket 
-                SET id_prioridad = %s
+                SET id_prioridad = %s,
+                    fecha_ultima_actividad = NOW()
                 WHERE id_ticket = %s
             """, (nueva_prioridad_id, ticket_id))
             
@@ -992,6 +1511,399 @@ class TicketModel:
             if conn:
                 conn.close()
     
+    @staticmethod
+    def validar_cambio_estado(estado_actual_id, nuevo_estado_id, fecha_ini, id_emisor, id_owner,
+                              operador_actual, tiene_respuestas):
+        """
+        Valida las reglas de negocio para cambiar el estado de un ticket.
+        Lanza ValidationError si el cambio no está permitido.
+        
+        Args:
+            estado_actual_id: Estado actual del ticket
+            nuevo_estado_id: Estado solicitado
+            fecha_ini: Fecha de creación del ticket (datetime o 'YYYY-MM-DD HH:MM:SS')
+            id_emisor: Operador emisor del ticket (o None)
+            id_owner: Operador Owner actual del ticket (o None)
+            operador_actual: Payload del token del operador que realiza el cambio
+            tiene_respuestas: bool o función sin argumentos que indica si el ticket
+                tiene mensajes públicos (solo se evalúa cuando hace falta)
+        
+        Reglas:
+        - Solo el Receptor/Owner puede marcar como "Resuelto" (3)
+        - Solo el Emisor puede "Cerrar" (4) cuando desee
+        - Si está "Cerrado" (4), solo el Emisor puede reabrirlo
+        - Estado "Nuevo" (1) debe permanecer al menos 1 hora (excepto cierre por emisor/admin)
+        """
+        id_operador_actual = (
+            operador_actual.get('operador_id')
+            or operador_actual.get('id_operador')
+            or operador_actual.get('id')
+        )
+        rol_id = operador_actual.get('rol_id') or operador_actual.get('id_rol_global')
+        rol_nombre = operador_actual.get('rol') or operador_actual.get('rol_nombre')
+        is_admin = (rol_id == 1) or (isinstance(rol_nombre, str) and rol_nombre.lower() == 'admin')
+
+        es_emisor = id_emisor is not None and str(id_emisor) == str(id_operador_actual)
+        es_owner = id_owner is not None and str(id_owner) == str(id_operador_actual)
+
+        nuevo_estado_int = int(nuevo_estado_id)
+        estado_actual_int = int(estado_actual_id)
+
+        # Admin: sin restricciones adicionales
+        if not is_admin:
+            # Resuelto (3): solo receptor/Owner
+            if nuevo_estado_int == 3 and not es_owner:
+                raise ValidationError('Solo el receptor (Owner) del ticket puede marcarlo como Resuelto')
+
+            # Cerrado (4): solo emisor
+            if nuevo_estado_int == 4 and not es_emisor:
+                raise ValidationError('Solo el emisor del ticket puede cerrarlo')
+
+            # Si el ticket está cerrado, solo el emisor puede reabrirlo
+            if estado_actual_int == 4 and nuevo_estado_int != 4 and not es_emisor:
+                raise ValidationError('Solo el emisor del ticket puede reabrir un ticket cerrado')
+
+            # Receptor/Owner (si NO es emisor): solo puede cambiar a Resuelto
+            if es_owner and not es_emisor and nuevo_estado_int != 3:
+                raise ValidationError('El receptor solo puede marcar el ticket como Resuelto')
+
+            # Emisor (si NO es owner): solo puede Cerrar, o Reabrir si está cerrado
+            if es_emisor and not es_owner:
+                if estado_actual_int != 4 and nuevo_estado_int != 4:
+                    raise ValidationError('El emisor solo puede cerrar el ticket (o reabrirlo si está cerrado)')
+                if estado_actual_int == 4 and nuevo_estado_int == 3:
+                    raise ValidationError('Solo el receptor (Owner) del ticket puede marcarlo como Resuelto')
+
+        # REGLA: Estado "Nuevo" debe permanecer al menos 1 hora
+        if estado_actual_int == 1 and nuevo_estado_int != 1:
+            fecha_creacion = fecha_ini
+            if isinstance(fecha_creacion, str):
+                fecha_creacion = datetime.strptime(fecha_creacion, '%Y-%m-%d %H:%M:%S')
+
+            tiempo_transcurrido = datetime.now() - fecha_creacion
+
+            # Excepción: el emisor (o admin) puede cerrar cuando desee.
+            if tiempo_transcurrido < timedelta(hours=1):
+                if nuevo_estado_int == 4 and (is_admin or es_emisor):
+                    return
+                respuestas = tiene_respuestas() if callable(tiene_respuestas) else tiene_respuestas
+                if not respuestas:
+                    minutos_restantes = int((timedelta(hours=1) - tiempo_transcurrido).total_seconds() / 60)
+                    raise ValidationError(
+                        f'El ticket debe permanecer en estado "Nuevo" al menos 1 hora. '
+                        f'Tiempo restante: {minutos_restantes} minutos'
+                    )
+
+    @staticmethod
+    def operacion_masiva(ids_ticket, operacion, valor, operador_actual):
+        """
+        Aplica una misma operación sobre varios tickets.
+        
+        El control de acceso de todos los tickets se resuelve con una sola consulta
+        (misma visibilidad que el listado), los cambios se aplican en una única
+        transacción y el historial se inserta en lote.
+        
+        Args:
+            ids_ticket: Lista de IDs de ticket (sin duplicados)
+            operacion: 'estado' | 'prioridad' | 'asignar' | 'agregar_etiquetas' | 'quitar_etiquetas'
+            valor: id_estado, id_prioridad, id_operador destino o lista de id_etiqueta
+            operador_actual: Payload del token del operador
+        
+        Returns:
+            dict: {'success': bool, 'resultados': [{'id_ticket', 'success', 'error'?}],
+                   'aplicados': int, 'fallidos': int}
+        """
+        conn = None
+        cursor = None
+        try:
+            import pymysql.cursors
+            conn = get_local_db_connection()
+            cursor = conn.cursor(pymysql.cursors.DictCursor)
+
+            id_operador = operador_actual.get('operador_id')
+
+            # 1. ACL de todos los tickets en una sola consulta
+            where_clause, params = TicketModel._build_visibility_where(cursor, operador_actual)
+            placeholders = ','.join(['%s'] * len(ids_ticket))
+            cursor.execute(f"""
+                SELECT t.id_ticket, t.titulo, t.id_estado, e.descripcion as estado,
+                       t.id_prioridad, p.descripcion as prioridad,
+                       t.id_operador_emisor, t.fecha_ini,
+                       (SELECT to1.id_operador
+                        FROM ticket_operador to1
+                        WHERE to1.id_ticket = t.id_ticket
+                          AND to1.rol = 'Owner'
+                          AND to1.fecha_desasignacion IS NULL
+                        LIMIT 1) as id_operador_owner,
+                       EXISTS (SELECT 1 FROM mensaje m
+                               WHERE m.id_ticket = t.id_ticket
+                                 AND m.deleted_at IS NULL
+                                 AND m.tipo_mensaje = 'Publico') as tiene_respuestas
+                FROM ticket t
+                LEFT JOIN estado e ON t.id_estado = e.id_estado
+                LEFT JOIN prioridad p ON t.id_prioridad = p.id_prioridad
+                {where_clause}
+                AND t.id_ticket IN ({placeholders})
+            """, params + list(ids_ticket))
+            visibles = {row['id_ticket']: row for row in cursor.fetchall() or []}
+
+            resultados = {}
+            for id_ticket in ids_ticket:
+                if id_ticket not in visibles:
+                    resultados[id_ticket] = {'id_ticket': id_ticket, 'success': False,
+                                             'error': 'Ticket no encontrado o sin acceso'}
+
+            aplicables = []
+            historial = []
+            notificaciones = []
+            resueltos = []
+            reabiertos = []
+
+            # 2. Validaciones por ticket y preparación de cambios
+            if operacion == 'estado':
+                nuevo_estado_id = int(valor)
+                cursor.execute("SELECT descripcion FROM estado WHERE id_estado = %s", (nuevo_estado_id,))
+                estado = cursor.fetchone()
+                if not estado:
+                    return {'success': False, 'error': f'Estado con ID {nuevo_estado_id} no encontrado'}
+
+                for id_ticket, info in visibles.items():
+                    if int(info['id_estado']) == nuevo_estado_id:
+                        resultados[id_ticket] = {'id_ticket': id_ticket, 'success': True, 'sin_cambios': True}
+                        continue
+                    try:
+                        TicketModel.validar_cambio_estado(
+                            info['id_estado'], nuevo_estado_id, info['fecha_ini'],
+                            info['id_operador_emisor'], info['id_operador_owner'],
+                            operador_actual, bool(info['tiene_respuestas'])
+                        )
+                    except ValidationError as e:
+                        resultados[id_ticket] = {'id_ticket': id_ticket, 'success': False, 'error': e.message}
+                        continue
+                    aplicables.append(id_ticket)
+                    historial.append((id_ticket, id_operador, 'Cambio de estado', info['estado'], estado['descripcion']))
+
+                if aplicables:
+                    ph = ','.join(['%s'] * len(aplicables))
+                    # Misma regla de fecha_resolucion que cambiar_estado; la columna se
+                    # asigna antes que id_estado para evaluar el estado anterior.
+                    if nuevo_estado_id in (3, 4):
+                        cursor.execute(f"""
+                            UPDATE ticket
+                            SET fecha_resolucion = NOW(), id_estado = %s, fecha_ultima_actividad = NOW()
+                            WHERE id_ticket IN ({ph})
+                        """, [nuevo_estado_id] + aplicables)
+                    else:
+                        cursor.execute(f"""
+                            UPDATE ticket
+                            SET fecha_resolucion = CASE WHEN id_estado IN (3, 4) THEN NULL ELSE fecha_resolucion END,
+                                id_estado = %s,
+                                fecha_ultima_actividad = NOW()
+                            WHERE id_ticket IN ({ph})
+                        """, [nuevo_estado_id] + aplicables)
+                        reabiertos = [i for i in aplicables if int(visibles[i]['id_estado']) in (3, 4)]
+                        SLAModel.reiniciar_resolucion(cursor, reabiertos)
+                    if nuevo_estado_id == 3:
+                        resueltos = list(aplicables)
+
+            elif operacion == 'prioridad':
+                nueva_prioridad_id = int(valor)
+                cursor.execute("SELECT descripcion FROM prioridad WHERE id_prioridad = %s", (nueva_prioridad_id,))
+                prioridad = cursor.fetchone()
+                if not prioridad:
+                    return {'success': False, 'error': f'Prioridad con ID {nueva_prioridad_id} no encontrada'}
+
+                for id_ticket, info in visibles.items():
+                    if int(info['id_estado']) == 4:
+                        resultados[id_ticket] = {'id_ticket': id_ticket, 'success': False,
+                                                 'error': 'No se puede cambiar la prioridad de un ticket cerrado'}
+                        continue
+                    if info['id_prioridad'] is not None and int(info['id_prioridad']) == nueva_prioridad_id:
+                        resultados[id_ticket] = {'id_ticket': id_ticket, 'success': True, 'sin_cambios': True}
+                        continue
+                    aplicables.append(id_ticket)
+                    historial.append((id_ticket, id_operador, 'Cambio de prioridad', info['prioridad'], prioridad['descripcion']))
+
+                if aplicables:
+                    ph = ','.join(['%s'] * len(aplicables))
+                    cursor.execute(
+                        f"UPDATE ticket SET id_prioridad = %s, fecha_ultima_actividad = NOW() WHERE id_ticket IN ({ph})",
+                        [nueva_prioridad_id] + aplicables
+                    )
+
+            elif operacion == 'asignar':
+                if (operador_actual.get('rol') or '').lower() not in ['admin', 'supervisor']:
+                    return {'success': False, 'error': 'No tiene permisos para asignar tickets'}
+
+                id_operador_nuevo = int(valor)
+                cursor.execute("""
+                    SELECT id_operador, nombre
+                    FROM operador
+                    WHERE id_operador = %s AND deleted_at IS NULL
+                """, (id_operador_nuevo,))
+                if not cursor.fetchone():
+                    return {'success': False, 'error': 'Operador destino no encontrado'}
+
+                for id_ticket, info in visibles.items():
+                    owner = info['id_operador_owner']
+                    if owner is not None and int(owner) == id_operador_nuevo:
+                        resultados[id_ticket] = {'id_ticket': id_ticket, 'success': True, 'sin_cambios': True}
+                        continue
+                    aplicables.append(id_ticket)
+                    historial.append((id_ticket, id_operador, 'asignacion',
+                                      str(owner) if owner is not None else None, str(id_operador_nuevo)))
+                    notificaciones.append((
+                        id_operador_nuevo,
+                        'Ticket asignado',
+                        f'Se te asignó el ticket #{id_ticket}: {info["titulo"]}',
+                        id_ticket,
+                    ))
+
+                if aplicables:
+                    ph = ','.join(['%s'] * len(aplicables))
+                    cursor.execute(f"""
+                        UPDATE ticket_operador
+                        SET fecha_desasignacion = NOW()
+                        WHERE id_ticket IN ({ph})
+                          AND rol = 'Owner'
+                          AND fecha_desasignacion IS NULL
+                    """, aplicables)
+                    # La PK es (id_operador, id_ticket): reactivar si el operador ya estuvo asignado
+                    cursor.executemany("""
+                        INSERT INTO ticket_operador (id_operador, id_ticket, rol, fecha_asignacion)
+                        VALUES (%s, %s, 'Owner', NOW())
+                        ON DUPLICATE KEY UPDATE rol = 'Owner', fecha_asignacion = NOW(), fecha_desasignacion = NULL
+                    """, [(id_operador_nuevo, id_ticket) for id_ticket in aplicables])
+                    cursor.execute(
+                        f"UPDATE ticket SET fecha_ultima_actividad = NOW() WHERE id_ticket IN ({ph})",
+                        aplicables
+                    )
+
+            elif operacion in ('agregar_etiquetas', 'quitar_etiquetas'):
+                etiquetas = sorted({int(e) for e in (valor or [])})
+                if not etiquetas:
+                    return {'success': False, 'error': 'Debe indicar al menos una etiqueta'}
+                ph_et = ','.join(['%s'] * len(etiquetas))
+                cursor.execute(f"SELECT id_etiqueta FROM etiqueta WHERE id_etiqueta IN ({ph_et})", etiquetas)
+                existentes = {r['id_etiqueta'] for r in cursor.fetchall() or []}
+                faltantes = [e for e in etiquetas if e not in existentes]
+                if faltantes:
+                    return {'success': False, 'error': f'Etiquetas no encontradas: {faltantes}'}
+
+                aplicables = list(visibles.keys())
+                if aplicables:
+                    if operacion == 'agregar_etiquetas':
+                        cursor.executemany(
+                            "INSERT IGNORE INTO ticket_etiqueta (id_ticket, id_etiqueta) VALUES (%s, %s)",
+                            [(id_ticket, id_etiqueta) for id_ticket in aplicables for id_etiqueta in etiquetas]
+                        )
+                    else:
+                        ph = ','.join(['%s'] * len(aplicables))
+                        cursor.execute(
+                            f"DELETE FROM ticket_etiqueta WHERE id_ticket IN ({ph}) AND id_etiqueta IN ({ph_et})",
+                            aplicables + etiquetas
+                        )
+            else:
+                return {'success': False, 'error': f'Operación no soportada: {operacion}'}
+
+            # 3. Historial y notificaciones en lote (executemany agrupa en INSERT multi-fila)
+            if historial:
+                cursor.executemany("""
+                    INSERT INTO historial_acciones_ticket
+                    (id_ticket, id_operador, accion, valor_anterior, valor_nuevo, fecha)
+                    VALUES (%s, %s, %s, %s, %s, NOW())
+                """, historial)
+            if notificaciones:
+                cursor.executemany("""
+                    INSERT INTO notificacion
+                        (id_operador, titulo, mensaje, tipo, entidad_tipo, entidad_id, leido, fecha_creacion)
+                    VALUES
+                        (%s, %s, %s, 'info', 'ticket', %s, 0, NOW())
+                """, notificaciones)
+
+            conn.commit()
+
+            for id_ticket in aplicables:
+                resultados[id_ticket] = {'id_ticket': id_ticket, 'success': True}
+
+            logging.info(
+                f'Operación masiva {operacion} aplicada a {len(aplicables)} tickets por operador {id_operador}'
+            )
+
+            if resueltos:
+                TicketModel._notificar_resolucion_async(resueltos)
+            for id_ticket in reabiertos:
+                programador_sla.programar_ticket(id_ticket)
+            for id_ticket in aplicables:
+                info = visibles[id_ticket]
+                if operacion == 'estado':
+                    motor_asignacion.cambio_estado(info['id_operador_owner'], info['id_estado'], nuevo_estado_id)
+                elif operacion == 'asignar':
+                    motor_asignacion.asignado(id_operador_nuevo, info['id_operador_owner'],
+                                              abierto=int(info['id_estado']) not in (3, 4))
+
+            lista = [resultados[id_ticket] for id_ticket in ids_ticket]
+            fallidos = sum(1 for r in lista if not r['success'])
+            return {
+                'success': True,
+                'resultados': lista,
+                'aplicados': len(aplicables),
+                'fallidos': fallidos
+            }
+
+        except Exception as e:
+            if conn:
+                conn.rollback()
+            logging.exception(f'Error en operacion_masiva operacion={operacion}')
+            return {'success': False, 'error': str(e)}
+        finally:
+            if cursor:
+                cursor.close()
+            if conn:
+                conn.close()
+
+    @staticmethod
+    def _notificar_resolucion_async(ids_ticket):
+        """Envía en segundo plano el email de 'Resuelto' a los usuarios de los tickets."""
+        def _enviar():
+            from flask_app.services.email_outbound import send_email
+            conn = None
+            cursor = None
+            try:
+                conn = get_local_db_connection()
+                cursor = conn.cursor()
+                placeholders = ','.join(['%s'] * len(ids_ticket))
+                cursor.execute(f"""
+                    SELECT t.id_ticket, t.titulo, ue.email as usuario_email
+                    FROM ticket t
+                    LEFT JOIN usuario_ext ue ON t.id_usuarioext = ue.id_usuario
+                    WHERE t.id_ticket IN ({placeholders})
+                """, list(ids_ticket))
+                filas = cursor.fetchall() or []
+            except Exception:
+                logging.exception('Error obteniendo destinatarios de notificación de resolución')
+                return
+            finally:
+                if cursor:
+                    cursor.close()
+                if conn:
+                    conn.close()
+
+            for row in filas:
+                if not row.get('usuario_email'):
+                    continue
+                try:
+                    send_email(
+                        row['usuario_email'],
+                        f"Ticket #{row['id_ticket']}: ({row['titulo']})",
+                        TicketModel.CUERPO_EMAIL_RESUELTO,
+                        id_ticket=row['id_ticket']
+                    )
+                except Exception:
+                    logging.exception('No se pudo enviar notificacion de resolucion al usuario')
+
+        threading.Thread(target=_enviar, daemon=True).start()
+
     @staticmethod
     def verificar_y_actualizar_estados_automaticos():
         """
@@ -1403,6 +2315,10 @@ class TicketModel:
                 (id_operador, id_ticket, rol, fecha_asignacion)
                 VALUES (%s, %s, 'Owner', NOW())
             """, (id_operador, id_ticket))
+            cursor.execute(
+                "UPDATE ticket SET fecha_ultima_actividad = NOW() WHERE id_ticket = %s",
+                (id_ticket,)
+            )
             
             # 5. Registrar en historial
             cursor.execute("""
@@ -1418,6 +2334,7 @@ class TicketModel:
             ))
             
             conn.commit()
+            motor_asignacion.asignado(int(id_operador), abierto=int(ticket['id_estado']) not in (3, 4))
             logging.info(f'Ticket {id_ticket} tomado por operador {id_operador}')
             
             return {
@@ -1665,7 +2582,7 @@ class TicketModel:
             
             # 2. Verificar que el ticket existe
             cursor.execute("""
-                SELECT id_ticket, titulo
+                SELECT id_ticket, titulo, id_estado
                 FROM ticket 
                 WHERE id_ticket = %s AND deleted_at IS NULL
             """, (id_ticket,))
@@ -1712,6 +2629,10 @@ class TicketModel:
                 (id_operador, id_ticket, rol, fecha_asignacion)
                 VALUES (%s, %s, 'Owner', NOW())
             """, (id_operador_nuevo, id_ticket))
+            cursor.execute(
+                "UPDATE ticket SET fecha_ultima_actividad = NOW() WHERE id_ticket = %s",
+                (id_ticket,)
+            )
             
             # 6. Registrar en historial
             cursor.execute("""
@@ -1743,6 +2664,11 @@ class TicketModel:
                 logging.exception('No se pudo crear notificación de asignación')
             
             conn.commit()
+            motor_asignacion.asignado(
+                int(id_operador_nuevo),
+                int(id_owner_anterior) if id_owner_anterior is not None else None,
+                abierto=int(ticket['id_estado']) not in (3, 4),
+            )
             logging.info(f'Ticket {id_ticket} asignado a operador {id_operador_nuevo} por {id_operador_asignador}')
             
             return {
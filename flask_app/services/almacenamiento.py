@@ -0,0 +1,431 @@
+"""
+Almacenamiento de archivos adjuntos.
+
+`adjunto.ruta` guarda una clave de almacenamiento ("3f/a2/3fa2....pdf"),
+no una ruta del sistema de archivos; el backend configurado
+(ADJUNTOS_BACKEND) la traduce:
+
+- local: árbol bajo ADJUNTOS_DIR repartido por los primeros 4 dígitos hex
+  de la clave (65536 carpetas de 2 niveles), para que ningún directorio
+  crezca sin límite.
+- s3:    bucket compatible con S3 (AWS, MinIO, Ceph...). ADJUNTOS_S3_ENDPOINT
+  permite apuntar a un servidor local tipo MinIO para pruebas. Requiere boto3.
+
+Las filas antiguas con ruta absoluta siguen funcionando (se leen del disco
+local tal cual) hasta que scripts/migrar_almacenamiento.py las convierta.
+
+`guardar` mide el archivo mientras lo copia (tamaño, SHA-256 y tipo MIME
+por firma de contenido), sin una segunda lectura.
+"""
+import hashlib
+import logging
+import mimetypes
+import os
+import shutil
+import tempfile
+import threading
+import uuid
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from typing import NamedTuple
+
+try:
+    import boto3
+    from botocore.config import Config as BotoConfig
+    from botocore.exceptions import ClientError
+except ImportError:  # pragma: no cover - dependencia opcional
+    boto3 = None
+    BotoConfig = None
+    ClientError = None
+
+BACKENDS = ('local', 's3')
+_BLOQUE = 1024 * 1024
+# Mínimo de S3 para cada parte de una subida multipart salvo la última
+PARTE_MIN_BYTES = 5 * 1024 * 1024
+
+
+def raiz_local():
+    """Carpeta local de adjuntos (ADJUNTOS_DIR o <proyecto>/uploads)."""
+    base_dir = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    return os.path.abspath(os.getenv('ADJUNTOS_DIR') or os.path.join(base_dir, 'uploads'))
+
+
+class InfoArchivo(NamedTuple):
+    tamano: int
+    modificado: datetime
+
+
+class ArchivoGuardado(NamedTuple):
+    clave: str
+    tamano: int
+    mime: str
+    sha256: str
+
+
+# Firmas de los formatos más comunes entre los adjuntos permitidos
+_FIRMAS = (
+    (b'%PDF-', 'application/pdf'),
+    (b'\x89PNG\r\n\x1a\n', 'image/png'),
+    (b'\xff\xd8\xff', 'image/jpeg'),
+    (b'GIF87a', 'image/gif'),
+    (b'GIF89a', 'image/gif'),
+    (b'BM', 'image/bmp'),
+    (b'Rar!\x1a\x07', 'application/vnd.rar'),
+    (b"7z\xbc\xaf\x27\x1c", 'application/x-7z-compressed'),
+    (b'ID3', 'audio/mpeg'),
+)
+
+
+def detectar_mime(nombre, cabecera=b'', declarado=None):
+    """
+    Tipo MIME del archivo: por firma de los primeros bytes, si no por la
+    extensión del nombre y, por último, el declarado por el cliente.
+
+    Los contenedores ZIP (docx, xlsx, pptx, zip) se resuelven por extensión.
+    """
+    for firma, mime in _FIRMAS:
+        if cabecera.startswith(firma):
+            return mime
+    if cabecera[:4] == b'RIFF' and cabecera[8:12] == b'WEBP':
+        return 'image/webp'
+    if cabecera[4:8] == b'ftyp':
+        return 'video/quicktime' if cabecera[8:10] == b'qt' else 'video/mp4'
+    por_nombre = mimetypes.guess_type(nombre or '')[0]
+    if por_nombre:
+        return por_nombre
+    if declarado and '/' in declarado and declarado != 'application/octet-stream':
+        return declarado.split(';')[0].strip().lower()[:127]
+    return 'application/octet-stream'
+
+
+class LectorMedido:
+    """Envuelve un archivo abierto y acumula tamaño, SHA-256 y la cabecera leída."""
+
+    def __init__(self, origen):
+        self._origen = origen
+        self._sha = hashlib.sha256()
+        self.tamano = 0
+        self.cabecera = b''
+
+    def read(self, n=-1):
+        datos = self._origen.read(n)
+        if datos:
+            self._sha.update(datos)
+            self.tamano += len(datos)
+            if len(self.cabecera) < 16:
+                self.cabecera = (self.cabecera + datos)[:16]
+        return datos
+
+    @property
+    def sha256(self):
+        return self._sha.hexdigest()
+
+
+def nueva_clave(nombre):
+    """Clave única con la extensión del nombre original: 'ab/cd/abcd<...>.ext'."""
+    h = uuid.uuid4().hex
+    ext = os.path.splitext(nombre or '')[1].lower()
+    if not ext[1:].isalnum() or len(ext) > 10:
+        ext = ''
+    return f'{h[0:2]}/{h[2:4]}/{h}{ext}'
+
+
+def es_ruta_legada(ref):
+    """True si la fila guarda una ruta absoluta (formato anterior a las claves)."""
+    return bool(ref) and (os.path.isabs(ref) or (len(ref) > 2 and ref[1] == ':'))
+
+
+def _validar_clave(clave):
+    if not clave or clave.startswith('/') or '\\' in clave or '..' in clave.split('/'):
+        raise ValueError(f'Clave de almacenamiento inválida: {clave!r}')
+    return clave
+
+
+class AlmacenamientoLocal:
+    """Archivos bajo `raiz`, repartidos en carpetas por prefijo de la clave."""
+
+    tipo = 'local'
+
+    def __init__(self, raiz):
+        self.raiz = os.path.abspath(raiz)
+        os.makedirs(self.raiz, exist_ok=True)
+
+    def ruta_local(self, clave):
+        return os.path.join(self.raiz, *_validar_clave(clave).split('/'))
+
+    def guardar(self, clave, origen):
+        """Copia el archivo abierto `origen` (en bloques) a la clave. Retorna bytes escritos."""
+        destino = self.ruta_local(clave)
+        os.makedirs(os.path.dirname(destino), exist_ok=True)
+        temporal = f'{destino}.{uuid.uuid4().hex[:8]}.tmp'
+        try:
+            with open(temporal, 'wb') as f:
+                shutil.copyfileobj(origen, f, _BLOQUE)
+                escritos = f.tell()
+            os.replace(temporal, destino)
+        except Exception:
+            if os.path.exists(temporal):
+                os.remove(temporal)
+            raise
+        return escritos
+
+    def abrir(self, clave):
+        """Archivo binario de lectura (FileNotFoundError si no existe)."""
+        return open(self.ruta_local(clave), 'rb')
+
+    def info(self, clave):
+        """InfoArchivo o None si no existe."""
+        try:
+            st = os.stat(self.ruta_local(clave))
+        except FileNotFoundError:
+            return None
+        return InfoArchivo(st.st_size, datetime.fromtimestamp(st.st_mtime, tz=timezone.utc))
+
+    def eliminar(self, clave):
+        try:
+            os.remove(self.ruta_local(clave))
+        except FileNotFoundError:
+            pass
+
+    def listar(self, desde=None):
+        """
+        Itera (clave, InfoArchivo) del árbol de claves en orden, empezando
+        después de la clave `desde` (para recorridos incrementales).
+        """
+        for nivel1 in sorted(os.listdir(self.raiz)):
+            dir1 = os.path.join(self.raiz, nivel1)
+            if len(nivel1) != 2 or not os.path.isdir(dir1):
+                continue  # carpetas legadas (ticket_<id>) y cachés (_previas)
+            if desde and nivel1 < desde[:2]:
+                continue
+            for nivel2 in sorted(os.listdir(dir1)):
+                dir2 = os.path.join(dir1, nivel2)
+                if not os.path.isdir(dir2) or (desde and f'{nivel1}/{nivel2}' < desde[:5]):
+                    continue
+                with os.scandir(dir2) as entradas:
+                    archivos = sorted(e.name for e in entradas if e.is_file() and not e.name.endswith('.tmp'))
+                for nombre in archivos:
+                    clave = f'{nivel1}/{nivel2}/{nombre}'
+                    if desde and clave <= desde:
+                        continue
+                    try:
+                        st = os.stat(os.path.join(dir2, nombre))
+                    except FileNotFoundError:
+                        continue
+                    yield clave, InfoArchivo(st.st_size, datetime.fromtimestamp(st.st_mtime, tz=timezone.utc))
+
+    def url_descarga(self, clave, nombre, inline=False):
+        return None
+
+
+class AlmacenamientoS3:
+    """Objetos en un bucket S3 (o compatible) bajo `prefijo`."""
+
+    tipo = 's3'
+
+    def __init__(self, bucket, prefijo='', endpoint_url=None, region=None, url_expira=300):
+        if boto3 is None:
+            raise RuntimeError('ADJUNTOS_BACKEND=s3 requiere boto3 (pip install boto3)')
+        self.bucket = bucket
+        self.prefijo = prefijo.strip('/') + '/' if prefijo.strip('/') else ''
+        self.url_expira = url_expira
+        self._cliente = boto3.client(
+            's3',
+            endpoint_url=endpoint_url or None,
+            region_name=region or None,
+            # path-style: MinIO y otros compatibles no resuelven bucket.host
+            config=BotoConfig(s3={'addressing_style': 'path'}, retries={'max_attempts': 5, 'mode': 'standard'}),
+        )
+
+    def _objeto(self, clave):
+        return self.prefijo + _validar_clave(clave)
+
+    def ruta_local(self, clave):
+        return None
+
+    def guardar(self, clave, origen):
+        # upload_fileobj hace multipart por partes de 8 MB: memoria acotada
+        self._cliente.upload_fileobj(origen, self.bucket, self._objeto(clave))
+        return self.info(clave).tamano
+
+    def abrir(self, clave):
+        try:
+            respuesta = self._cliente.get_object(Bucket=self.bucket, Key=self._objeto(clave))
+        except ClientError as e:
+            if e.response.get('Error', {}).get('Code') in ('NoSuchKey', '404'):
+                raise FileNotFoundError(clave)
+            raise
+        return respuesta['Body']
+
+    def info(self, clave):
+        try:
+            cabecera = self._cliente.head_object(Bucket=self.bucket, Key=self._objeto(clave))
+        except ClientError as e:
+            if e.response.get('Error', {}).get('Code') in ('NoSuchKey', '404', 'NotFound'):
+                return None
+            raise
+        return InfoArchivo(cabecera['ContentLength'], cabecera['LastModified'])
+
+    def eliminar(self, clave):
+        self._cliente.delete_object(Bucket=self.bucket, Key=self._objeto(clave))
+
+    def listar(self, desde=None):
+        paginador = self._cliente.get_paginator('list_objects_v2')
+        extra = {'StartAfter': self._objeto(desde)} if desde else {}
+        for pagina in paginador.paginate(Bucket=self.bucket, Prefix=self.prefijo, **extra):
+            for obj in pagina.get('Contents', ()):
+                yield obj['Key'][len(self.prefijo):], InfoArchivo(obj['Size'], obj['LastModified'])
+
+    # Subidas por trozos (models/adjunto_subida_model.py): multipart de S3.
+    # Cada parte, salvo la última, debe tener al menos PARTE_MIN_BYTES.
+
+    def iniciar_multipart(self, clave):
+        """Abre una subida multipart. Retorna su UploadId."""
+        respuesta = self._cliente.create_multipart_upload(Bucket=self.bucket, Key=self._objeto(clave))
+        return respuesta['UploadId']
+
+    def subir_parte(self, clave, id_multipart, numero, datos):
+        """Sube la parte `numero` (bytes). Retorna su ETag."""
+        respuesta = self._cliente.upload_part(
+            Bucket=self.bucket, Key=self._objeto(clave), UploadId=id_multipart, PartNumber=numero, Body=datos,
+        )
+        return respuesta['ETag']
+
+    def completar_multipart(self, clave, id_multipart, partes):
+        """Une las partes [(numero, etag), ...] en el objeto final."""
+        self._cliente.complete_multipart_upload(
+            Bucket=self.bucket,
+            Key=self._objeto(clave),
+            UploadId=id_multipart,
+            MultipartUpload={'Parts': [{'PartNumber': numero, 'ETag': etag} for numero, etag in partes]},
+        )
+
+    def abortar_multipart(self, clave, id_multipart):
+        """Descarta la subida multipart y sus partes (sin error si ya no existe)."""
+        try:
+            self._cliente.abort_multipart_upload(Bucket=self.bucket, Key=self._objeto(clave), UploadId=id_multipart)
+        except ClientError as e:
+            if e.response.get('Error', {}).get('Code') not in ('NoSuchUpload', '404'):
+                raise
+
+    def url_descarga(self, clave, nombre, inline=False):
+        """URL firmada de corta duración; S3 atiende Range y condicionales."""
+        from flask_app.utils.descargas import content_disposition
+        return self._cliente.generate_presigned_url(
+            'get_object',
+            Params={
+                'Bucket': self.bucket,
+                'Key': self._objeto(clave),
+                'ResponseContentDisposition': content_disposition(nombre, not inline),
+            },
+            ExpiresIn=self.url_expira,
+        )
+
+
+def crear_desde_entorno():
+    """Backend según ADJUNTOS_BACKEND y sus variables."""
+    backend = os.getenv('ADJUNTOS_BACKEND', 'local').strip().lower()
+    if backend == 's3':
+        return AlmacenamientoS3(
+            bucket=os.getenv('ADJUNTOS_S3_BUCKET', 'adjuntos'),
+            prefijo=os.getenv('ADJUNTOS_S3_PREFIJO', ''),
+            endpoint_url=os.getenv('ADJUNTOS_S3_ENDPOINT'),
+            region=os.getenv('ADJUNTOS_S3_REGION'),
+            url_expira=int(os.getenv('ADJUNTOS_S3_URL_EXPIRA', 300)),
+        )
+    if backend != 'local':
+        logging.warning(f'ADJUNTOS_BACKEND={backend!r} no soportado; se usa local')
+    return AlmacenamientoLocal(raiz_local())
+
+
+_almacen = None
+_lock = threading.Lock()
+
+
+def obtener_almacenamiento():
+    """Backend configurado (uno por proceso)."""
+    global _almacen
+    if _almacen is None:
+        with _lock:
+            if _almacen is None:
+                _almacen = crear_desde_entorno()
+    return _almacen
+
+
+# ----------------------------------------------------------------------
+# Referencias de adjunto: clave del backend o ruta absoluta legada
+# ----------------------------------------------------------------------
+
+def ruta_local(ref):
+    """Ruta en disco del archivo, o None si vive en un backend remoto."""
+    if es_ruta_legada(ref):
+        return ref
+    return obtener_almacenamiento().ruta_local(ref)
+
+
+@contextmanager
+def archivo_local(ref):
+    """
+    Ruta en disco del archivo durante el bloque `with`, para las bibliotecas
+    que leen con seek (Pillow, PyMuPDF, zipfile). Si vive en un backend
+    remoto se descarga por partes a un archivo temporal, que se borra al
+    salir: el objeto nunca queda completo en la memoria del worker.
+    """
+    ruta = ruta_local(ref)
+    if ruta is not None:
+        yield ruta
+        return
+    fd, temporal = tempfile.mkstemp(prefix='adjunto_', suffix=os.path.splitext(ref)[1])
+    try:
+        with os.fdopen(fd, 'wb') as destino, abrir(ref) as origen:
+            shutil.copyfileobj(origen, destino, 1024 * 1024)
+        yield temporal
+    finally:
+        try:
+            os.remove(temporal)
+        except FileNotFoundError:
+            pass
+
+
+def abrir(ref):
+    if es_ruta_legada(ref):
+        return open(ref, 'rb')
+    return obtener_almacenamiento().abrir(ref)
+
+
+def info(ref):
+    if es_ruta_legada(ref):
+        try:
+            st = os.stat(ref)
+        except (FileNotFoundError, NotADirectoryError):
+            return None
+        return InfoArchivo(st.st_size, datetime.fromtimestamp(st.st_mtime, tz=timezone.utc))
+    return obtener_almacenamiento().info(ref)
+
+
+def eliminar(ref):
+    if es_ruta_legada(ref):
+        try:
+            os.remove(ref)
+        except FileNotFoundError:
+            pass
+        return
+    obtener_almacenamiento().eliminar(ref)
+
+
+def guardar(nombre, origen, mime=None):
+    """
+    Guarda un archivo nuevo midiendo su contenido al copiarlo.
+
+    Args:
+        nombre: nombre original (extensión de la clave y tipo MIME)
+        origen: archivo binario abierto
+        mime: tipo declarado por el cliente (solo si no se reconoce el contenido)
+
+    Returns:
+        ArchivoGuardado(clave, tamano, mime, sha256)
+    """
+    clave = nueva_clave(nombre)
+    lector = LectorMedido(origen)
+    obtener_almacenamiento().guardar(clave, lector)
+    return ArchivoGuardado(clave, lector.tamano, detectar_mime(nombre, lector.cabecera, mime), lector.sha256)
@@ -0,0 +1,302 @@
+"""
+Asignación automática de tickets según la carga de cada operador.
+
+Mantiene en memoria, por proceso, la cantidad de tickets abiertos (estado
+distinto de Resuelto/Cerrado) de los que cada operador es Owner, y para cada
+departamento un heap con sus miembros elegibles ordenados por
+(carga, turno, id_operador). `turno` es el orden de la última asignación
+automática: a igual carga se elige al que hace más tiempo no recibe un
+ticket (round-robin).
+
+- El estado inicial sale de ticket_operador y miembro_dpto (resincronizar) y
+  se vuelve a cargar cada `intervalo_resync` segundos para corregir desvíos
+  (otros procesos, cambios hechos directo en la BD).
+- tomar_ticket, asignar_ticket, los cambios de estado y la creación de
+  tickets actualizan la carga al confirmar la transacción.
+- Las entradas del heap no se actualizan en el lugar: cada cambio de carga
+  agrega una entrada nueva y las viejas se descartan al salir del heap
+  (invalidación perezosa). Elegir operador cuesta O(log n) y no consulta la BD.
+
+Con varios procesos cada uno tiene su propia vista de la carga; la
+resincronización periódica las mantiene cercanas.
+"""
+import heapq
+import itertools
+import logging
+import threading
+
+from flask_app.config.conexion_login import execute_query
+
+ESTADOS_CERRADOS = (3, 4)
+
+
+class MotorAsignacion:
+    """Cargas por operador + heap de miembros elegibles por departamento."""
+
+    def __init__(self):
+        self.roles = ('Agente',)
+        self.intervalo_resync = 600
+
+        self._lock = threading.Lock()
+        self._carga = {}       # id_operador -> tickets abiertos como Owner
+        self._turno = {}       # id_operador -> orden de su última asignación automática
+        self._miembros = {}    # id_depto -> set(id_operador) elegibles
+        self._deptos_de = {}   # id_operador -> set(id_depto)
+        self._default = {}     # id_depto -> operador_default
+        self._heaps = {}       # id_depto -> [(carga, turno, id_operador), ...]
+        self._seq = itertools.count(1)
+        self._detener = threading.Event()
+        self._hilo = None
+
+    @property
+    def activo(self):
+        return self._hilo is not None and self._hilo.is_alive()
+
+    def iniciar(self, roles=('Agente',), intervalo_resync=600):
+        """
+        Carga el estado inicial y arranca la resincronización periódica.
+
+        Args:
+            roles: roles de miembro_dpto que reciben tickets automáticamente
+            intervalo_resync: segundos entre recargas desde la BD
+        """
+        if self.activo:
+            return
+        self.roles = tuple(roles) or ('Agente',)
+        self.intervalo_resync = max(int(intervalo_resync), 30)
+        try:
+            self.resincronizar()
+        except Exception:
+            logging.exception('No se pudo cargar el estado inicial de asignación')
+        self._detener.clear()
+        self._hilo = threading.Thread(target=self._bucle, name='asignacion-resync', daemon=True)
+        self._hilo.start()
+        logging.info('Asignación automática iniciada (roles=%s, resync=%ss)', ','.join(self.roles), self.intervalo_resync)
+
+    def detener(self):
+        self._detener.set()
+
+    def _bucle(self):
+        while not self._detener.wait(self.intervalo_resync):
+            try:
+                self.resincronizar()
+            except Exception:
+                logging.exception('Error resincronizando cargas de asignación')
+
+    def resincronizar(self):
+        """Recarga miembros elegibles, operador_default y cargas desde la BD."""
+        ph = ','.join(['%s'] * len(self.roles))
+        miembros = execute_query(
+            f"""
+            SELECT md.id_depto, md.id_operador
+            FROM miembro_dpto md
+            INNER JOIN operador o ON o.id_operador = md.id_operador
+            WHERE md.fecha_desasignacion IS NULL
+              AND md.rol IN ({ph})
+              AND o.deleted_at IS NULL
+            """,
+            self.roles,
+            fetch_all=True,
+        ) or []
+        cargas = execute_query(
+            """
+            SELECT tio.id_operador, COUNT(*) AS carga
+            FROM ticket_operador tio
+            INNER JOIN ticket t ON t.id_ticket = tio.id_ticket
+            WHERE tio.rol = 'Owner'
+              AND tio.fecha_desasignacion IS NULL
+              AND t.deleted_at IS NULL
+              AND t.id_estado NOT IN (3, 4)
+            GROUP BY tio.id_operador
+            """,
+            fetch_all=True,
+        ) or []
+        defaults = execute_query(
+            "SELECT id_depto, operador_default FROM departamento WHERE operador_default IS NOT NULL",
+            fetch_all=True,
+        ) or []
+
+        por_depto = {}
+        deptos_de = {}
+        for fila in miembros:
+            por_depto.setdefault(fila['id_depto'], set()).add(fila['id_operador'])
+            deptos_de.setdefault(fila['id_operador'], set()).add(fila['id_depto'])
+
+        with self._lock:
+            self._miembros = por_depto
+            self._deptos_de = deptos_de
+            self._carga = {fila['id_operador']: int(fila['carga']) for fila in cargas}
+            self._default = {fila['id_depto']: fila['operador_default'] for fila in defaults}
+            self._heaps = {id_depto: self._construir_heap(id_depto) for id_depto in por_depto}
+
+        logging.debug('Asignación: %s deptos, %s operadores con carga', len(por_depto), len(cargas))
+
+    # ------------------------------------------------------------------
+    # Heaps (llamar con el lock tomado)
+    # ------------------------------------------------------------------
+
+    def _entrada(self, id_operador):
+        return (self._carga.get(id_operador, 0), self._turno.get(id_operador, 0), id_operador)
+
+    def _construir_heap(self, id_depto):
+        heap = [self._entrada(op) for op in self._miembros.get(id_depto, ())]
+        heapq.heapify(heap)
+        return heap
+
+    def _publicar(self, id_operador):
+        """Agrega la entrada vigente del operador a los heaps de sus deptos."""
+        entrada = self._entrada(id_operador)
+        for id_depto in self._deptos_de.get(id_operador, ()):
+            heap = self._heaps.get(id_depto)
+            if heap is None:
+                continue
+            # Compactar cuando las entradas obsoletas superan a las vigentes
+            if len(heap) > 2 * len(self._miembros[id_depto]) + 32:
+                self._heaps[id_depto] = self._construir_heap(id_depto)
+            else:
+                heapq.heappush(heap, entrada)
+
+    def _vigente(self, id_depto, entrada):
+        carga, turno, id_operador = entrada
+        return (
+            id_operador in self._miembros.get(id_depto, ())
+            and self._carga.get(id_operador, 0) == carga
+            and self._turno.get(id_operador, 0) == turno
+        )
+
+    def _ajustar(self, id_operador, delta):
+        if id_operador is None or not delta:
+            return
+        self._carga[id_operador] = max(self._carga.get(id_operador, 0) + delta, 0)
+        self._publicar(id_operador)
+
+    # ------------------------------------------------------------------
+    # API
+    # ------------------------------------------------------------------
+
+    def reservar(self, id_depto):
+        """
+        Elige el miembro elegible con menos carga del departamento (round-robin
+        a igual carga) y le suma el ticket. Sin miembros elegibles usa el
+        operador_default del departamento. Retorna None si no hay a quién asignar.
+
+        Si la transacción que usa la reserva falla, llamar a cancelar_reserva().
+        """
+        if not self.activo or not id_depto:
+            return None
+        with self._lock:
+            heap = self._heaps.get(id_depto)
+            while heap:
+                entrada = heap[0]
+                if self._vigente(id_depto, entrada):
+                    id_operador = entrada[2]
+                    self._turno[id_operador] = next(self._seq)
+                    self._ajustar(id_operador, 1)
+                    return id_operador
+                heapq.heappop(heap)
+            id_operador = self._default.get(id_depto)
+            if id_operador is not None:
+                self._ajustar(id_operador, 1)
+            return id_operador
+
+    def cancelar_reserva(self, id_operador):
+        """Revierte una reserva cuya transacción no se confirmó."""
+        with self._lock:
+            self._ajustar(id_operador, -1)
+
+    def asignado(self, id_operador_nuevo, id_operador_anterior=None, abierto=True):
+        """Un ticket cambió de Owner (tomar, asignar). Llamar después del commit."""
+        if not self.activo or not abierto:
+            return
+        with self._lock:
+            if id_operador_anterior is not None and id_operador_anterior != id_operador_nuevo:
+                self._ajustar(id_operador_anterior, -1)
+            if id_operador_anterior != id_operador_nuevo:
+                self._ajustar(id_operador_nuevo, 1)
+
+    def cambio_estado(self, id_owner, estado_anterior, estado_nuevo):
+        """Un ticket con Owner se cerró o se reabrió. Llamar después del commit."""
+        if not self.activo or id_owner is None:
+            return
+        antes = int(estado_anterior) not in ESTADOS_CERRADOS
+        despues = int(estado_nuevo) not in ESTADOS_CERRADOS
+        if antes != despues:
+            with self._lock:
+                self._ajustar(id_owner, 1 if despues else -1)
+
+    def miembro_agregado(self, id_operador, id_depto, rol):
+        """Alta o cambio de rol en miembro_dpto."""
+        if not self.activo:
+            return
+        with self._lock:
+            miembros = self._miembros.setdefault(id_depto, set())
+            if rol in self.roles:
+                miembros.add(id_operador)
+                self._deptos_de.setdefault(id_operador, set()).add(id_depto)
+                self._heaps.setdefault(id_depto, [])
+                heapq.heappush(self._heaps[id_depto], self._entrada(id_operador))
+            else:
+                self._quitar(id_operador, id_depto)
+
+    def miembro_quitado(self, id_operador, id_depto):
+        """Baja de miembro_dpto: sus entradas quedan obsoletas en el heap."""
+        if not self.activo:
+            return
+        with self._lock:
+            self._quitar(id_operador, id_depto)
+
+    def _quitar(self, id_operador, id_depto):
+        self._miembros.get(id_depto, set()).discard(id_operador)
+        self._deptos_de.get(id_operador, set()).discard(id_depto)
+
+    def cargas(self, id_depto=None):
+        """Foto de la carga actual: {id_operador: tickets abiertos} (opcionalmente de un depto)."""
+        with self._lock:
+            if id_depto is None:
+                return dict(self._carga)
+            return {op: self._carga.get(op, 0) for op in self._miembros.get(id_depto, ())}
+
+
+motor_asignacion = MotorAsignacion()
+
+
+def asignar_automaticamente(cursor, id_ticket, id_depto, titulo=None):
+    """
+    Asigna Owner al ticket recién creado dentro de la transacción del llamador.
+
+    Retorna el id_operador reservado (o None). Si la transacción no llega a
+    confirmarse, el llamador debe invocar motor_asignacion.cancelar_reserva().
+    """
+    id_operador = motor_asignacion.reservar(id_depto)
+    if id_operador is None:
+        return None
+    try:
+        cursor.execute(
+            """
+            INSERT INTO ticket_operador (id_operador, id_ticket, rol, fecha_asignacion)
+            VALUES (%s, %s, 'Owner', NOW())
+            """,
+            (id_operador, id_ticket),
+        )
+        cursor.execute(
+            """
+            INSERT INTO historial_acciones_ticket
+            (id_ticket, id_operador, accion, valor_anterior, valor_nuevo, fecha)
+            VALUES (%s, NULL, 'asignacion', 'Sin asignar', %s, NOW())
+            """,
+            (id_ticket, str(id_operador)),
+        )
+        cursor.execute(
+            """
+            INSERT INTO notificacion
+                (id_operador, titulo, mensaje, tipo, entidad_tipo, entidad_id, leido, fecha_creacion)
+            VALUES
+                (%s, %s, %s, 'info', 'ticket', %s, 0, NOW())
+            """,
+            (id_operador, 'Ticket asignado', f'Se te asignó el ticket #{id_ticket}: {titulo or ""}'.strip(), id_ticket),
+        )
+    except Exception:
+        motor_asignacion.cancelar_reserva(id_operador)
+        raise
+    logging.info(f'Ticket {id_ticket}: asignado automáticamente a operador {id_operador} (depto {id_depto})')
+    return id_operador
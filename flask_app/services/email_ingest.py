@@ -1,7 +1,9 @@
 import imaplib
+import io
 import email
 import logging
 import os
+import threading
 import traceback
 import time
 import argparse
@@ -128,15 +130,13 @@ def _save_attachments(msg, ticket_id, id_msg):
             else:
                 filename = 'adjunto'
 
-            # Generar nombre único y guardar en carpeta del ticket
-            ticket_dir = AdjuntoModel.obtener_ruta_por_ticket(ticket_id)
-            unique_name = AdjuntoModel.generar_nombre_unico(filename)
-            path = os.path.join(ticket_dir, unique_name)
+            # Guardar en el almacenamiento de adjuntos (clave única)
             try:
-                with open(path, 'wb') as f:
-                    f.write(part.get_payload(decode=True) or b'')
-                AdjuntoModel.crear_adjunto({'nom_adj': filename, 'ruta': path, 'id_msg': id_msg})
-                saved.append(path)
+                archivo = AdjuntoModel.guardar_archivo(
+                    filename, io.BytesIO(part.get_payload(decode=True) or b''), part.get_content_type()
+                )
+                AdjuntoModel.crear_adjunto({'nom_adj': filename, 'id_msg': id_msg, **archivo})
+                saved.append(archivo['ruta'])
             except Exception:
                 logging.exception('Error guardando adjunto')
     return saved
@@ -308,7 +308,9 @@ def poll_once(imap_cfg=None):
         return {'success': False, 'error': traceback.format_exc()}
 
 
-def connect_and_idle_loop(imap_cfg=None, keepalive=300, min_backoff=5, max_backoff=600):
+def connect_and_idle_loop(imap_cfg=None, keepalive=300, min_backoff=5, max_backoff=600, detener=None):
+    """Polling persistente con reconexión. `detener` (threading.Event) lo corta (scripts/benchmarks)."""
+    detener = detener or threading.Event()
     cfg = imap_cfg or IMAP
     host = cfg.get('HOST')
     port = cfg.get('PORT', 993)
@@ -324,7 +326,7 @@ def connect_and_idle_loop(imap_cfg=None, keepalive=300, min_backoff=5, max_backo
         search_args = str(search_criteria).split()
 
     backoff = min_backoff
-    while True:
+    while not detener.is_set():
         conn = None
         try:
             logging.info('Conectando IMAP %s', host)
@@ -333,7 +335,7 @@ def connect_and_idle_loop(imap_cfg=None, keepalive=300, min_backoff=5, max_backo
             conn.select(folder)
 
             logging.info('Usando polling imaplib (keepalive=%ss, search=%s)', keepalive, ' '.join(search_args))
-            while True:
+            while not detener.is_set():
                 try:
                     typ, data = conn.search(None, *search_args)
                     if typ == 'OK':
@@ -348,7 +350,8 @@ def connect_and_idle_loop(imap_cfg=None, keepalive=300, min_backoff=5, max_backo
                                 conn.store(_id, '+FLAGS', '\\Seen')
                             except Exception:
                                 logging.exception('Falla procesando mensaje IMAP en polling')
-                    time.sleep(keepalive)
+                    if detener.wait(keepalive):
+                        break
                     try:
                         conn.noop()
                     except Exception:
@@ -361,7 +364,7 @@ def connect_and_idle_loop(imap_cfg=None, keepalive=300, min_backoff=5, max_backo
             logging.exception('Error en conexión IMAP')
             # Reconexión con backoff exponencial
             logging.info('Reconectando en %s segundos...', backoff)
-            time.sleep(backoff)
+            detener.wait(backoff)
             backoff = min(backoff * 2, max_backoff)
         finally:
             try:
@@ -0,0 +1,248 @@
+"""
+Extracción de texto de adjuntos para la búsqueda de tickets.
+
+Muchos casos llegan como un PDF o DOCX con un correo de una línea; el texto
+del documento se guarda en adjunto_texto (índice FULLTEXT) y TicketModel.buscar
+lo consulta junto con los mensajes.
+
+- AdjuntoModel.despues_de_crear encola el adjunto; la extracción corre en un
+  PoolProcesos y nunca en el hilo del request.
+- Cada archivo tiene LIMITE_SEGUNDOS: el worker corta por sí mismo entre
+  páginas/elementos y, como respaldo, el pool lo interrumpe con TiempoAgotado.
+  Un archivo patológico queda registrado como 'tiempo' y no traba la cola.
+- El texto se normaliza (espacios) y se recorta a MAX_CARACTERES.
+
+Formatos: pdf (PyMuPDF, opcional); docx, xlsx, pptx, odt y ods leyendo el
+XML del contenedor ZIP con la biblioteca estándar; txt y csv.
+"""
+import codecs
+import logging
+import os
+import re
+import time
+import zipfile
+from xml.etree import ElementTree
+
+try:
+    import pymupdf
+except ImportError:  # pragma: no cover - dependencia opcional
+    pymupdf = None
+
+from flask_app.services import almacenamiento
+from flask_app.utils.pool_procesos import PoolProcesos, TiempoAgotado
+
+ACTIVA = os.getenv('TEXTO_ADJUNTOS', '1').strip().lower() in ('1', 'true', 'yes', 'on')
+LIMITE_SEGUNDOS = float(os.getenv('TEXTO_LIMITE_SEGUNDOS', 20))
+MAX_CARACTERES = int(os.getenv('TEXTO_MAX_KB', 256)) * 1024
+# Archivos más grandes no se procesan
+MAX_BYTES_ARCHIVO = int(os.getenv('TEXTO_MAX_MB_ARCHIVO', 50)) * 1024 * 1024
+# Tope de XML descomprimido por parte del contenedor (bombas ZIP)
+_MAX_XML_BYTES = 64 * 1024 * 1024
+
+EXT_OFFICE = {'docx', 'xlsx', 'pptx', 'odt', 'ods'}
+EXT_TEXTO = {'txt', 'csv'}
+EXT_PDF = {'pdf'}
+
+ESTADOS = ('ok', 'vacio', 'truncado', 'tiempo', 'error')
+
+_pool = PoolProcesos(
+    'texto',
+    max_workers=int(os.getenv('TEXTO_WORKERS', 1)),
+    max_pendientes=int(os.getenv('TEXTO_MAX_PENDIENTES', 500)),
+)
+
+_W = '{http://schemas.openxmlformats.org/wordprocessingml/2006/main}'
+_A = '{http://schemas.openxmlformats.org/drawingml/2006/main}'
+_S = '{http://schemas.openxmlformats.org/spreadsheetml/2006/main}'
+_ODF_TEXTO = '{urn:oasis:names:tc:opendocument:xmlns:text:1.0}'
+
+
+def _extension(nombre):
+    return os.path.splitext(nombre or '')[1].lstrip('.').lower()
+
+
+def soportado(nombre):
+    if not ACTIVA:
+        return False
+    ext = _extension(nombre)
+    return ext in EXT_OFFICE or ext in EXT_TEXTO or (ext in EXT_PDF and pymupdf is not None)
+
+
+# ----------------------------------------------------------------------
+# Worker (corre en el pool de procesos)
+# ----------------------------------------------------------------------
+
+class _Lleno(Exception):
+    pass
+
+
+class _Acumulador:
+    """Junta fragmentos de texto hasta `maximo` caracteres o hasta el plazo."""
+
+    def __init__(self, maximo, plazo):
+        self.maximo = maximo
+        self.plazo = plazo
+        self.partes = []
+        self.largo = 0
+        self.truncado = False
+
+    def agregar(self, texto):
+        if not texto:
+            return
+        if time.monotonic() > self.plazo:
+            raise TiempoAgotado()
+        restante = self.maximo - self.largo
+        if len(texto) >= restante:
+            self.partes.append(texto[:restante])
+            self.largo = self.maximo
+            self.truncado = True
+            raise _Lleno()
+        self.partes.append(texto)
+        self.largo += len(texto)
+
+    def texto(self):
+        return normalizar(''.join(self.partes))
+
+
+def normalizar(texto):
+    """Colapsa espacios y líneas vacías repetidas."""
+    texto = texto.replace('\x00', '')
+    texto = re.sub(r'[ \t\r\f\v\u00a0]+', ' ', texto)
+    texto = re.sub(r' ?\n[ \n]*\n', '\n\n', texto)
+    return texto.strip()
+
+
+def _pdf(origen, acumulador):
+    with pymupdf.open(origen) as doc:
+        for pagina in doc:
+            acumulador.agregar(pagina.get_text('text'))
+            acumulador.agregar('\n')
+
+
+def _xml(zf, nombre, acumulador, etiquetas_texto, etiquetas_parrafo):
+    """Texto de los elementos `etiquetas_texto` de una parte XML, leída en streaming."""
+    info = zf.getinfo(nombre)
+    if info.file_size > _MAX_XML_BYTES:
+        raise ValueError(f'{nombre} descomprimido excede el máximo permitido')
+    with zf.open(info) as f:
+        for evento, elem in ElementTree.iterparse(f, events=('end',)):
+            if elem.tag in etiquetas_texto:
+                acumulador.agregar(elem.text)
+            elif elem.tag in etiquetas_parrafo:
+                if not etiquetas_texto:
+                    # ODF: el texto del párrafo puede venir repartido en spans
+                    acumulador.agregar(''.join(elem.itertext()))
+                acumulador.agregar('\n')
+                elem.clear()
+
+
+def _numero_parte(nombre):
+    encontrado = re.search(r'(\d+)\.xml$', nombre)
+    return int(encontrado.group(1)) if encontrado else 0
+
+
+def _office(origen, ext, acumulador):
+    with zipfile.ZipFile(origen) as zf:
+        nombres = zf.namelist()
+        if ext == 'docx':
+            partes = ['word/document.xml'] + sorted(
+                n for n in nombres if re.match(r'word/(header|footer|footnotes)\d*\.xml$', n)
+            )
+            for parte in partes:
+                if parte in nombres:
+                    _xml(zf, parte, acumulador, {_W + 't'}, {_W + 'p'})
+        elif ext == 'pptx':
+            diapositivas = sorted(
+                (n for n in nombres if re.match(r'ppt/slides/slide\d+\.xml$', n)), key=_numero_parte
+            )
+            for parte in diapositivas:
+                _xml(zf, parte, acumulador, {_A + 't'}, {_A + 'p'})
+        elif ext == 'xlsx':
+            # Los textos de las celdas están en sharedStrings (los números no aportan a la búsqueda)
+            if 'xl/sharedStrings.xml' in nombres:
+                _xml(zf, 'xl/sharedStrings.xml', acumulador, {_S + 't'}, {_S + 'si'})
+        elif 'content.xml' in nombres:  # odt / ods
+            _xml(zf, 'content.xml', acumulador, set(), {_ODF_TEXTO + 'p', _ODF_TEXTO + 'h'})
+
+
+def _texto_plano(origen, acumulador):
+    crudo = origen.read(acumulador.maximo * 4)
+    try:
+        # El corte por bytes puede partir un carácter al final: el decodificador
+        # incremental lo deja pendiente en vez de fallar y caer en cp1252
+        texto = codecs.getincrementaldecoder('utf-8')().decode(crudo, final=False)
+    except UnicodeDecodeError:
+        texto = crudo.decode('cp1252', errors='replace')
+    acumulador.agregar(texto)
+
+
+def extraer(ref, ext, maximo=MAX_CARACTERES, limite=LIMITE_SEGUNDOS):
+    """
+    Extrae el texto del adjunto. Corre en el pool; no toca la BD.
+
+    Returns:
+        (texto, estado): estado en ESTADOS
+    """
+    acumulador = _Acumulador(maximo, time.monotonic() + limite)
+    try:
+        with almacenamiento.archivo_local(ref) as origen:
+            if ext in EXT_PDF:
+                _pdf(origen, acumulador)
+            elif ext in EXT_OFFICE:
+                _office(origen, ext, acumulador)
+            else:
+                with open(origen, 'rb') as f:
+                    _texto_plano(f, acumulador)
+    except _Lleno:
+        pass
+    except TiempoAgotado:
+        return acumulador.texto(), 'tiempo'
+    texto = acumulador.texto()
+    if not texto:
+        return '', 'vacio'
+    return texto, 'truncado' if acumulador.truncado else 'ok'
+
+
+# ----------------------------------------------------------------------
+# API
+# ----------------------------------------------------------------------
+
+def encolar(id_adj, ref, nombre, tamano=None):
+    """
+    Encola la extracción si el tipo está soportado.
+
+    Returns:
+        Future, o None si no hay nada que extraer (o la cola está llena)
+    """
+    if not ref or not soportado(nombre):
+        return None
+    if tamano is not None and tamano > MAX_BYTES_ARCHIVO:
+        return None
+    return _pool.enviar(
+        id_adj, extraer, ref, _extension(nombre), MAX_CARACTERES, LIMITE_SEGUNDOS,
+        # Respaldo por si el worker no llega a cortar solo (margen de 5 s)
+        limite=LIMITE_SEGUNDOS + 5,
+        al_terminar=lambda f, i=id_adj: _registrar_resultado(i, f),
+    )
+
+
+def _registrar_resultado(id_adj, futuro):
+    from flask_app.models.adjunto_texto_model import AdjuntoTextoModel
+
+    if futuro.cancelled():
+        return
+    error = futuro.exception()
+    if isinstance(error, TiempoAgotado):
+        texto, estado = '', 'tiempo'
+    elif error is not None:
+        logging.warning(f'No se pudo extraer el texto del adjunto {id_adj}: {error}')
+        texto, estado = '', 'error'
+    else:
+        texto, estado = futuro.result()
+    if estado == 'tiempo':
+        logging.warning(f'Extracción de texto del adjunto {id_adj} cortada a los {LIMITE_SEGUNDOS}s')
+    try:
+        AdjuntoTextoModel.guardar(id_adj, texto, estado)
+    except Exception:
+        logging.exception(f'No se pudo guardar el texto extraído del adjunto {id_adj}')
+
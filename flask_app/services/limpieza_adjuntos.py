@@ -0,0 +1,173 @@
+"""
+Job en segundo plano de limpieza de adjuntos.
+
+En cada pasada (cada `intervalo` segundos):
+- descarta las subidas por trozos abandonadas (AdjuntoSubidaModel.limpiar_vencidas);
+- GC: borra el archivo de los adjuntos eliminados (soft delete) hace más de
+  ADJUNTOS_GC_GRACIA_DIAS (y su variante optimizada, si la tiene). La fila
+  se conserva con ruta = NULL;
+- GC: recorre de a poco el árbol de claves del almacenamiento buscando
+  archivos huérfanos (sin fila en adjunto ni en adjunto_subida) con más de
+  ADJUNTOS_GC_HUERFANOS_HORAS de antigüedad. Por defecto solo se informan;
+  con ADJUNTOS_GC_BORRAR_HUERFANOS=1 se borran. El recorrido continúa en la
+  pasada siguiente desde la última clave revisada.
+
+Las operaciones de archivo del GC se espacian a ADJUNTOS_GC_OPS_POR_SEGUNDO
+para no competir con las descargas. Los archivos con ruta absoluta legada
+no están en el árbol de claves y no se revisan como huérfanos.
+
+Es seguro tenerlo activo en varios procesos: la purga se confirma con un
+UPDATE condicional y borrar algo ya borrado no tiene efecto.
+"""
+import logging
+import os
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+
+from flask_app.models.adjunto_model import AdjuntoModel
+from flask_app.models.adjunto_subida_model import AdjuntoSubidaModel
+from flask_app.models.adjunto_texto_model import AdjuntoTextoModel
+from flask_app.services import almacenamiento
+
+GC_ACTIVO = os.getenv('ADJUNTOS_GC', '1').strip().lower() in ('1', 'true', 'yes', 'on')
+GRACIA_DIAS = int(os.getenv('ADJUNTOS_GC_GRACIA_DIAS', 30))
+HUERFANOS_HORAS = int(os.getenv('ADJUNTOS_GC_HUERFANOS_HORAS', 24))
+BORRAR_HUERFANOS = os.getenv('ADJUNTOS_GC_BORRAR_HUERFANOS', '0').strip().lower() in ('1', 'true', 'yes', 'on')
+OPS_POR_SEGUNDO = float(os.getenv('ADJUNTOS_GC_OPS_POR_SEGUNDO', 20))
+# Trabajo máximo por pasada
+PURGA_LOTE = int(os.getenv('ADJUNTOS_GC_PURGA_LOTE', 200))
+HUERFANOS_POR_PASADA = int(os.getenv('ADJUNTOS_GC_HUERFANOS_POR_PASADA', 5000))
+
+_LOTE_CONSULTA = 200
+
+# Última clave revisada en busca de huérfanos (None: empezar desde el inicio)
+_cursor_huerfanos = None
+
+
+class _Limitador:
+    """Espacia las operaciones a `por_segundo` como máximo."""
+
+    def __init__(self, por_segundo, detener):
+        self._intervalo = 1.0 / por_segundo if por_segundo > 0 else 0.0
+        self._siguiente = time.monotonic()
+        self._detener = detener
+
+    def esperar(self):
+        """Espera el turno de la próxima operación. False si se pidió detener."""
+        ahora = time.monotonic()
+        if self._siguiente > ahora:
+            if self._detener.wait(self._siguiente - ahora):
+                return False
+        self._siguiente = max(self._siguiente, ahora) + self._intervalo
+        return not self._detener.is_set()
+
+
+def purgar_eliminados(limitador, gracia_dias=GRACIA_DIAS, lote=PURGA_LOTE):
+    """
+    Borra los archivos de adjuntos eliminados hace más de `gracia_dias`.
+
+    Returns:
+        int: archivos purgados
+    """
+    from flask_app.services import vistas_previas
+
+    purgados = 0
+    for adjunto in AdjuntoModel.listar_para_purgar(gracia_dias, lote):
+        if not limitador.esperar():
+            break
+        if not AdjuntoModel.marcar_purgado(adjunto['id_adj'], adjunto['ruta']):
+            continue
+        try:
+            almacenamiento.eliminar(adjunto['ruta'])
+            if adjunto.get('ruta_optimizada'):
+                almacenamiento.eliminar(adjunto['ruta_optimizada'])
+            vistas_previas.eliminar(adjunto['id_adj'])
+            AdjuntoTextoModel.eliminar(adjunto['id_adj'])
+            purgados += 1
+        except Exception:
+            # La fila ya no lo referencia: queda como huérfano para una pasada posterior
+            logging.exception(f"GC: no se pudo borrar el archivo del adjunto {adjunto['id_adj']}")
+    return purgados
+
+
+def revisar_huerfanos(limitador, maximo=HUERFANOS_POR_PASADA, horas=HUERFANOS_HORAS, borrar=BORRAR_HUERFANOS):
+    """
+    Revisa hasta `maximo` claves del almacenamiento desde donde quedó la
+    pasada anterior.
+
+    Returns:
+        dict: {'revisados', 'huerfanos', 'borrados', 'bytes'}
+    """
+    global _cursor_huerfanos
+
+    resumen = {'revisados': 0, 'huerfanos': 0, 'borrados': 0, 'bytes': 0}
+    limite = datetime.now(timezone.utc) - timedelta(hours=horas)
+    pendientes = []
+    terminado = True
+
+    def procesar(grupo):
+        usados = AdjuntoModel.claves_referenciadas([clave for clave, _ in grupo])
+        for clave, info in grupo:
+            if clave in usados or info.modificado > limite:
+                continue
+            resumen['huerfanos'] += 1
+            resumen['bytes'] += info.tamano
+            if not borrar:
+                logging.info(f'GC: archivo huérfano {clave} ({info.tamano} bytes)')
+                continue
+            if not limitador.esperar():
+                return False
+            almacenamiento.obtener_almacenamiento().eliminar(clave)
+            resumen['borrados'] += 1
+        return True
+
+    for clave, info in almacenamiento.obtener_almacenamiento().listar(desde=_cursor_huerfanos):
+        pendientes.append((clave, info))
+        if len(pendientes) >= _LOTE_CONSULTA:
+            # Una consulta y un turno del limitador por grupo de claves listadas
+            if not limitador.esperar() or not procesar(pendientes):
+                return resumen
+            resumen['revisados'] += len(pendientes)
+            _cursor_huerfanos = pendientes[-1][0]
+            pendientes = []
+            if resumen['revisados'] >= maximo:
+                terminado = False
+                break
+
+    if pendientes and procesar(pendientes):
+        resumen['revisados'] += len(pendientes)
+        _cursor_huerfanos = pendientes[-1][0]
+    if terminado:
+        # Recorrido completo: la próxima pasada vuelve a empezar
+        _cursor_huerfanos = None
+    return resumen
+
+
+def recolectar(detener=None):
+    """Una pasada del GC (purga + huérfanos). Retorna el resumen."""
+    limitador = _Limitador(OPS_POR_SEGUNDO, detener or threading.Event())
+    resumen = {'purgados': purgar_eliminados(limitador)}
+    resumen.update(revisar_huerfanos(limitador))
+    return resumen
+
+
+def loop_limpieza(intervalo=900, detener=None):
+    """Bucle del job. `detener` (threading.Event) permite cortarlo en pruebas/scripts."""
+    detener = detener or threading.Event()
+    logging.info('Job de limpieza de adjuntos iniciado (intervalo=%ss, gc=%s)', intervalo, GC_ACTIVO)
+    while not detener.is_set():
+        try:
+            descartadas = AdjuntoSubidaModel.limpiar_vencidas()
+            if descartadas:
+                logging.info('Subidas vencidas descartadas: %s', descartadas)
+        except Exception:
+            logging.exception('Error en job de limpieza de subidas')
+        if GC_ACTIVO:
+            try:
+                resumen = recolectar(detener)
+                if resumen['purgados'] or resumen['huerfanos']:
+                    logging.info('GC de adjuntos: %s', resumen)
+            except Exception:
+                logging.exception('Error en GC de adjuntos')
+        detener.wait(intervalo)
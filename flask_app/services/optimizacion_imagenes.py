@@ -0,0 +1,206 @@
+"""
+Variante optimizada para web de las imágenes adjuntas.
+
+Las fotos de teléfono llegan por correo con 5-10 MB y los operadores las
+abren una y otra vez en el chat. Al registrar una imagen se genera, en un
+PoolProcesos acotado, una variante:
+- reducida a LADO_MAX px en el lado mayor (orientación EXIF aplicada),
+- sin metadatos (EXIF, GPS, miniaturas embebidas); se conserva el perfil ICC
+  solo si el modo de color no cambia (un perfil CMYK no sirve para la variante RGB),
+- recomprimida: JPEG progresivo, o PNG optimizado si la imagen tiene transparencia.
+
+El original no se toca. La variante se guarda en el mismo almacenamiento
+(adjunto.ruta_optimizada) solo si ahorra al menos AHORRO_MIN; si no, se
+registra igual tamano_optimizado = tamano para no volver a procesarla.
+La descarga sirve la variante por defecto y el original con ?original=1.
+
+Métricas: metricas() combina los totales guardados en la BD con los
+contadores de este proceso (trabajos y bytes ahorrados en descargas).
+"""
+import io
+import logging
+import os
+import threading
+
+try:
+    from PIL import Image, ImageOps
+except ImportError:  # pragma: no cover - dependencia opcional
+    Image = None
+    ImageOps = None
+
+from flask_app.services import almacenamiento
+from flask_app.services.vistas_previas import MAX_PIXELES
+from flask_app.utils.pool_procesos import PoolProcesos
+
+ACTIVA = os.getenv('OPTIMIZAR_IMAGENES', '0').strip().lower() in ('1', 'true', 'yes', 'on')
+LADO_MAX = int(os.getenv('OPTIMIZAR_LADO_MAX', 2560))
+CALIDAD_JPEG = int(os.getenv('OPTIMIZAR_CALIDAD', 82))
+# Imágenes más chicas no se procesan: el ahorro no compensa
+MIN_BYTES = int(os.getenv('OPTIMIZAR_MIN_KB', 300)) * 1024
+# La variante se conserva solo si pesa al menos esta fracción menos que el original
+AHORRO_MIN = float(os.getenv('OPTIMIZAR_AHORRO_MIN', 0.2))
+LIMITE_SEGUNDOS = float(os.getenv('OPTIMIZAR_LIMITE_SEGUNDOS', 60))
+
+# GIF queda afuera: puede ser animado
+EXT_OPTIMIZABLES = {'jpg', 'jpeg', 'png', 'webp', 'bmp'}
+
+_pool = PoolProcesos(
+    'optimizacion',
+    max_workers=int(os.getenv('OPTIMIZAR_WORKERS', 1)),
+    max_pendientes=int(os.getenv('OPTIMIZAR_MAX_PENDIENTES', 200)),
+)
+
+_metricas = {
+    'encoladas': 0,
+    'optimizadas': 0,
+    'sin_ahorro': 0,
+    'errores': 0,
+    'bytes_originales': 0,
+    'bytes_variantes': 0,
+    'descargas_variante': 0,
+    'bytes_ahorrados_descarga': 0,
+}
+_lock_metricas = threading.Lock()
+
+
+def _sumar(**valores):
+    with _lock_metricas:
+        for clave, valor in valores.items():
+            _metricas[clave] += valor
+
+
+def _extension(nombre):
+    return os.path.splitext(nombre or '')[1].lstrip('.').lower()
+
+
+def optimizable(nombre, tamano=None):
+    """True si vale la pena generar la variante de este archivo."""
+    if not ACTIVA or Image is None or _extension(nombre) not in EXT_OPTIMIZABLES:
+        return False
+    return tamano is None or tamano >= MIN_BYTES
+
+
+def nombre_descarga(nombre, clave_variante):
+    """Nombre de descarga de la variante: el original con la extensión del formato generado."""
+    return os.path.splitext(nombre or 'imagen')[0] + os.path.splitext(clave_variante)[1]
+
+
+# ----------------------------------------------------------------------
+# Worker (corre en el pool de procesos)
+# ----------------------------------------------------------------------
+
+def optimizar(ref, nombre, lado_max=LADO_MAX, calidad=CALIDAD_JPEG, ahorro_min=AHORRO_MIN):
+    """
+    Genera y guarda la variante. Corre en el pool; no toca la BD.
+
+    Returns:
+        dict: {'original': int, 'variante': int, 'clave': str|None}
+              (clave None: la variante no ahorraba lo suficiente y no se guardó)
+    """
+    original = almacenamiento.info(ref)
+    if original is None:
+        raise FileNotFoundError(ref)
+
+    Image.MAX_IMAGE_PIXELS = MAX_PIXELES
+    with almacenamiento.archivo_local(ref) as origen:
+        img = Image.open(origen)
+        modo_original = img.mode
+        icc = img.info.get('icc_profile')
+        # JPEG: decodificar ya reducido cuando la foto es mucho más grande que lado_max
+        img.draft('RGB', (lado_max, lado_max))
+        img = ImageOps.exif_transpose(img)
+        img.thumbnail((lado_max, lado_max), Image.LANCZOS)
+
+    salida = io.BytesIO()
+    if img.mode in ('RGBA', 'LA', 'PA') or (img.mode == 'P' and 'transparency' in img.info):
+        formato, ext, opciones = 'PNG', '.png', {'optimize': True}
+    else:
+        formato, ext = 'JPEG', '.jpg'
+        opciones = {'quality': calidad, 'optimize': True, 'progressive': True}
+        img = img.convert('RGB')
+    # El perfil describe el espacio de color del original: con otro modo ya no aplica
+    if icc and img.mode == modo_original:
+        opciones['icc_profile'] = icc
+    img.save(salida, formato, **opciones)
+
+    variante = salida.tell()
+    if variante > original.tamano * (1 - ahorro_min):
+        return {'original': original.tamano, 'variante': variante, 'clave': None}
+    salida.seek(0)
+    guardado = almacenamiento.guardar(os.path.splitext(nombre or 'imagen')[0] + ext, salida)
+    return {'original': original.tamano, 'variante': guardado.tamano, 'clave': guardado.clave}
+
+
+# ----------------------------------------------------------------------
+# API
+# ----------------------------------------------------------------------
+
+def encolar(id_adj, ref, nombre, tamano=None):
+    """
+    Encola la optimización si el archivo es una imagen candidata.
+
+    Returns:
+        Future, o None si no hay nada que hacer (o la cola está llena)
+    """
+    if not ref or not optimizable(nombre, tamano):
+        return None
+    futuro = _pool.enviar(
+        id_adj, optimizar, ref, nombre, limite=LIMITE_SEGUNDOS,
+        al_terminar=lambda f, i=id_adj: _registrar_resultado(i, f),
+    )
+    if futuro is not None:
+        _sumar(encoladas=1)
+    return futuro
+
+
+def _registrar_resultado(id_adj, futuro):
+    from flask_app.models.adjunto_model import AdjuntoModel
+
+    if futuro.cancelled():
+        return
+    error = futuro.exception()
+    if error is not None:
+        logging.warning(f'No se pudo optimizar la imagen del adjunto {id_adj}: {error}')
+        _sumar(errores=1)
+        return
+
+    resultado = futuro.result()
+    clave = resultado['clave']
+    try:
+        registrado = AdjuntoModel.registrar_optimizada(
+            id_adj, clave, resultado['variante'] if clave else resultado['original']
+        )
+    except Exception:
+        logging.exception(f'No se pudo registrar la imagen optimizada del adjunto {id_adj}')
+        registrado = False
+    if not registrado:
+        # Adjunto eliminado (o ya procesado) mientras tanto
+        if clave:
+            almacenamiento.eliminar(clave)
+        return
+
+    if clave:
+        _sumar(optimizadas=1, bytes_originales=resultado['original'], bytes_variantes=resultado['variante'])
+    else:
+        _sumar(sin_ahorro=1)
+
+
+def registrar_descarga(adjunto):
+    """Cuenta una descarga completa de la variante en lugar del original."""
+    if adjunto.get('tamano') and adjunto.get('tamano_optimizado'):
+        _sumar(descargas_variante=1,
+               bytes_ahorrados_descarga=max(int(adjunto['tamano']) - int(adjunto['tamano_optimizado']), 0))
+
+
+def metricas():
+    """Totales de la BD y contadores de este proceso."""
+    from flask_app.models.adjunto_model import AdjuntoModel
+
+    with _lock_metricas:
+        proceso = dict(_metricas)
+    proceso['pendientes'] = _pool.pendientes()
+    return {
+        'activa': ACTIVA and Image is not None,
+        'total': AdjuntoModel.resumen_optimizacion(),
+        'proceso': proceso,
+    }
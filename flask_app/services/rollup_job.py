@@ -0,0 +1,24 @@
+"""
+Job en segundo plano que mantiene al día los rollups de reportes.
+
+Corre ReporteModel.actualizar_rollups cada `intervalo` segundos. Es seguro
+tenerlo activo en varios procesos a la vez: cada lote bloquea su marca.
+"""
+import logging
+import threading
+
+from flask_app.models.reporte_model import ReporteModel
+
+
+def loop_rollups(intervalo=60, tamano_lote=5000, detener=None):
+    """Bucle del job. `detener` (threading.Event) permite cortarlo en pruebas/scripts."""
+    detener = detener or threading.Event()
+    logging.info('Job de rollups iniciado (intervalo=%ss)', intervalo)
+    while not detener.is_set():
+        try:
+            resumen = ReporteModel.actualizar_rollups(tamano_lote=tamano_lote)
+            if any(resumen.values()):
+                logging.info('Rollups actualizados: %s', resumen)
+        except Exception:
+            logging.exception('Error en job de rollups')
+        detener.wait(intervalo)
@@ -0,0 +1,218 @@
+"""
+Detección de correos casi duplicados con MinHash + LSH.
+
+Cuando un correo llega sin In-Reply-To/References utilizables, se busca un
+ticket abierto con asunto y cuerpo parecidos antes de crear uno nuevo:
+
+- El texto (asunto + cuerpo, sin citas ni firmas de respuesta) se normaliza
+  y se parte en shingles de 2 palabras (pares consecutivos).
+- La firma MinHash (NUM_PERMUTACIONES mínimos) estima la similitud de Jaccard
+  entre dos textos como la fracción de posiciones iguales.
+- La firma se divide en BANDAS de FILAS_POR_BANDA valores; cada banda se
+  guarda hasheada en ticket_lsh_banda. Dos textos con Jaccard alto coinciden
+  en al menos una banda con alta probabilidad, así que los candidatos salen
+  de búsquedas por índice (banda, hash) y no de comparar contra todos los
+  tickets. Solo a esos candidatos se les compara la firma completa.
+
+Con 16 bandas de 4 filas el umbral de la curva S queda en ~0.5 de similitud.
+Ver migracion_similitud_tickets.sql.
+"""
+import hashlib
+import logging
+import os
+import random
+import re
+import struct
+from typing import NamedTuple
+
+from flask_app.config.conexion_login import execute_query
+from flask_app.utils.busqueda import sin_acentos
+
+NUM_PERMUTACIONES = 64
+BANDAS = 16
+FILAS_POR_BANDA = NUM_PERMUTACIONES // BANDAS
+LARGO_SHINGLE = 2
+# Los correos largos se comparan por su comienzo (acota el costo de la firma)
+MAX_PALABRAS = 500
+
+# Primo de Mersenne 2^61 - 1 para el hashing universal (a*x + b) mod P
+_PRIMO = (1 << 61) - 1
+_rnd = random.Random(20240601)  # semilla fija: las firmas deben ser estables entre procesos
+_COEFICIENTES = [(_rnd.randrange(1, _PRIMO), _rnd.randrange(0, _PRIMO)) for _ in range(NUM_PERMUTACIONES)]
+
+ACTIVA = os.getenv('SIMILITUD_EMAIL', '1').strip().lower() in ('1', 'true', 'yes', 'on')
+UMBRAL_ADJUNTAR = float(os.getenv('SIMILITUD_UMBRAL_ADJUNTAR', 0.7))
+UMBRAL_DUPLICADO = float(os.getenv('SIMILITUD_UMBRAL_DUPLICADO', 0.5))
+VENTANA_DIAS = int(os.getenv('SIMILITUD_VENTANA_DIAS', 30))
+MAX_CANDIDATOS = 200
+
+_RE_PREFIJO_ASUNTO = re.compile(r'^\s*((re|rv|fw|fwd|res|aw)\s*(\[\d+\])?\s*:\s*)+', re.IGNORECASE)
+_RE_TICKET_ASUNTO = re.compile(r'ticket\s*#\d+\s*:?', re.IGNORECASE)
+_RE_PALABRA = re.compile(r'\w+', re.UNICODE)
+# Inicio del texto citado de una respuesta ("El lun, 1 ene ... escribió:", "On ... wrote:")
+_RE_INICIO_CITA = re.compile(
+    r'^\s*(el\s.+escribi[oó]:|on\s.+wrote:|-{2,}\s*(mensaje original|original message)\s*-{2,}|de:\s.+|from:\s.+)\s*$',
+    re.IGNORECASE,
+)
+
+
+class Similar(NamedTuple):
+    id_ticket: int
+    similitud: float
+    id_usuarioext: int
+
+
+def normalizar(asunto, cuerpo):
+    """Palabras del asunto y del cuerpo sin prefijos Re:/Fwd:, citas ni acentos."""
+    asunto = _RE_TICKET_ASUNTO.sub(' ', _RE_PREFIJO_ASUNTO.sub('', asunto or ''))
+    lineas = []
+    for linea in (cuerpo or '').splitlines():
+        if _RE_INICIO_CITA.match(linea):
+            break
+        if linea.lstrip().startswith('>'):
+            continue
+        lineas.append(linea)
+    texto = sin_acentos(f"{asunto}\n{' '.join(lineas)}".lower())
+    return [p for p in _RE_PALABRA.findall(texto) if len(p) > 1][:MAX_PALABRAS]
+
+
+def shingles(palabras):
+    """Conjunto de hashes de 64 bits de los shingles de LARGO_SHINGLE palabras."""
+    if len(palabras) < LARGO_SHINGLE:
+        grupos = [' '.join(palabras)] if palabras else []
+    else:
+        grupos = (' '.join(palabras[i:i + LARGO_SHINGLE]) for i in range(len(palabras) - LARGO_SHINGLE + 1))
+    return {
+        int.from_bytes(hashlib.blake2b(g.encode('utf-8'), digest_size=8).digest(), 'big') % _PRIMO
+        for g in grupos
+    }
+
+
+def firmar(asunto, cuerpo):
+    """Firma MinHash del correo (tupla de NUM_PERMUTACIONES enteros) o None si no hay texto."""
+    conjunto = shingles(normalizar(asunto, cuerpo))
+    if not conjunto:
+        return None
+    return tuple(min((a * x + b) % _PRIMO for x in conjunto) for a, b in _COEFICIENTES)
+
+
+def similitud(firma_a, firma_b):
+    """Jaccard estimado: fracción de posiciones iguales de las firmas."""
+    return sum(1 for a, b in zip(firma_a, firma_b) if a == b) / NUM_PERMUTACIONES
+
+
+def bandas(firma):
+    """[(banda, hash de la banda)] con hashes de 63 bits (caben en BIGINT)."""
+    resultado = []
+    for banda in range(BANDAS):
+        valores = firma[banda * FILAS_POR_BANDA:(banda + 1) * FILAS_POR_BANDA]
+        crudo = struct.pack(f'>{FILAS_POR_BANDA}Q', *valores)
+        resultado.append((banda, int.from_bytes(hashlib.blake2b(crudo, digest_size=8).digest(), 'big') >> 1))
+    return resultado
+
+
+def _a_bytes(firma):
+    return struct.pack(f'>{NUM_PERMUTACIONES}Q', *firma)
+
+
+def _de_bytes(crudo):
+    return struct.unpack(f'>{NUM_PERMUTACIONES}Q', bytes(crudo))
+
+
+# ----------------------------------------------------------------------
+# Persistencia
+# ----------------------------------------------------------------------
+
+def indexar(cursor, id_ticket, firma):
+    """Guarda la firma y sus bandas LSH del ticket (dentro de la transacción del llamador)."""
+    if firma is None:
+        return
+    cursor.execute(
+        """
+        INSERT INTO ticket_minhash (id_ticket, firma, actualizado_en)
+        VALUES (%s, %s, NOW())
+        ON DUPLICATE KEY UPDATE firma = VALUES(firma), actualizado_en = NOW()
+        """,
+        (id_ticket, _a_bytes(firma)),
+    )
+    cursor.execute("DELETE FROM ticket_lsh_banda WHERE id_ticket = %s", (id_ticket,))
+    cursor.executemany(
+        "INSERT INTO ticket_lsh_banda (banda, hash_banda, id_ticket) VALUES (%s, %s, %s)",
+        [(banda, valor, id_ticket) for banda, valor in bandas(firma)],
+    )
+
+
+def buscar_similares(firma, umbral=UMBRAL_DUPLICADO, limite=5):
+    """
+    Tickets abiertos (no Cerrados) de los últimos VENTANA_DIAS días con
+    similitud estimada >= umbral, de mayor a menor.
+    """
+    if firma is None:
+        return []
+    pares = bandas(firma)
+    condicion = ' OR '.join(['(b.banda = %s AND b.hash_banda = %s)'] * len(pares))
+    params = [v for par in pares for v in par]
+    candidatos = execute_query(
+        f"""
+        SELECT m.id_ticket, m.firma, t.id_usuarioext
+        FROM (
+            SELECT DISTINCT b.id_ticket
+            FROM ticket_lsh_banda b
+            WHERE {condicion}
+            ORDER BY b.id_ticket DESC
+            LIMIT {MAX_CANDIDATOS}
+        ) c
+        INNER JOIN ticket_minhash m ON m.id_ticket = c.id_ticket
+        INNER JOIN ticket t ON t.id_ticket = c.id_ticket
+        WHERE t.deleted_at IS NULL
+          AND t.id_estado <> 4
+          AND t.fecha_ini >= DATE_SUB(NOW(), INTERVAL %s DAY)
+        """,
+        tuple(params + [VENTANA_DIAS]),
+        fetch_all=True,
+    ) or []
+
+    similares = []
+    for fila in candidatos:
+        valor = similitud(firma, _de_bytes(fila['firma']))
+        if valor >= umbral:
+            similares.append(Similar(fila['id_ticket'], valor, fila['id_usuarioext']))
+    similares.sort(key=lambda s: (-s.similitud, -s.id_ticket))
+    return similares[:limite]
+
+
+def marcar_duplicado(cursor, id_ticket, similar):
+    """Registra que `id_ticket` es probable duplicado de `similar.id_ticket`."""
+    cursor.execute(
+        """
+        INSERT IGNORE INTO ticket_similar (id_ticket, id_ticket_similar, similitud, fecha)
+        VALUES (%s, %s, %s, NOW())
+        """,
+        (id_ticket, similar.id_ticket, round(similar.similitud, 3)),
+    )
+    cursor.execute(
+        """
+        INSERT INTO historial_acciones_ticket (id_ticket, accion, valor_nuevo, fecha)
+        VALUES (%s, 'Posible duplicado', %s, NOW())
+        """,
+        (id_ticket, f'#{similar.id_ticket} ({similar.similitud:.0%})'),
+    )
+    logging.info(f'Ticket {id_ticket}: posible duplicado de #{similar.id_ticket} ({similar.similitud:.2f})')
+
+
+def relacionados(id_ticket):
+    """Tickets marcados como probable duplicado de (o por) `id_ticket`."""
+    try:
+        filas = execute_query(
+            """
+            SELECT id_ticket_similar AS id_ticket, similitud FROM ticket_similar WHERE id_ticket = %s
+            UNION ALL
+            SELECT id_ticket, similitud FROM ticket_similar WHERE id_ticket_similar = %s
+            """,
+            (id_ticket, id_ticket),
+            fetch_all=True,
+        ) or []
+    except Exception:
+        logging.exception(f'No se pudieron leer los tickets similares de #{id_ticket}')
+        return []
+    return [{'id_ticket': f['id_ticket'], 'similitud': float(f['similitud'])} for f in filas]
@@ -0,0 +1,405 @@
+"""
+Programador de vencimientos de SLA.
+
+Mantiene en un heap los próximos avisos e incumplimientos y duerme hasta el
+más cercano, en vez de recorrer la tabla ticket cada cierto tiempo. La fuente
+de verdad son las columnas ticket.vence_primera_respuesta / vence_resolucion:
+
+- Cada `intervalo_resync` segundos recarga los eventos que caen dentro del
+  horizonte, por rango sobre los índices de vencimiento: incumplimientos por
+  su vencimiento y avisos por su hora de aviso, que con plazos largos llega
+  horas antes (24 h de SLA con umbral 0.8: 4,8 h antes de vencer).
+- Lo que cambia la app (ticket creado, reabierto) se agrega al heap con
+  programar_ticket(id) sin esperar a la siguiente resincronización.
+- Las entradas obsoletas (ticket respondido, resuelto o con otro vencimiento)
+  no se sacan del heap: al llegar su hora se revalida el ticket en la BD y se
+  descartan.
+- sla_evento (UNIQUE id_ticket, tipo, vence) asegura que cada evento se
+  dispare una sola vez aunque el programador corra en varios procesos.
+"""
+import heapq
+import itertools
+import logging
+import threading
+from datetime import datetime, timedelta
+from typing import NamedTuple
+
+import pymysql.cursors
+
+from flask_app.config.conexion_login import get_local_db_connection
+from flask_app.models.calendario_model import CalendarioModel
+
+
+class EventoSLA(NamedTuple):
+    cuando: datetime
+    seq: int          # desempate estable en el heap
+    id_ticket: int
+    tipo: str         # aviso_* / incumplimiento_*
+    vence: datetime
+
+
+# plazo -> (columna de vencimiento en ticket, minutos del plazo en sla)
+PLAZOS = {
+    'primera_respuesta': ('vence_primera_respuesta', 'tiempo_primera_respuesta_min'),
+    'resolucion': ('vence_resolucion', 'tiempo_resolucion_min'),
+}
+
+# Condición para que el plazo siga corriendo
+PENDIENTE_SQL = {
+    'primera_respuesta': 't.fecha_primera_respuesta IS NULL AND t.id_estado NOT IN (3, 4)',
+    'resolucion': 't.id_estado NOT IN (3, 4)',
+}
+
+# tipo -> (acción de historial, título de notificación, tipo de notificación)
+EVENTOS = {
+    'aviso_primera_respuesta': ('SLA por vencer (primera respuesta)', 'SLA por vencer', 'warning'),
+    'incumplimiento_primera_respuesta': ('SLA incumplido (primera respuesta)', 'SLA incumplido', 'error'),
+    'aviso_resolucion': ('SLA por vencer (resolución)', 'SLA por vencer', 'warning'),
+    'incumplimiento_resolucion': ('SLA incumplido (resolución)', 'SLA incumplido', 'error'),
+}
+
+
+class ProgramadorSLA:
+    """Heap de vencimientos + hilo que dispara avisos e incumplimientos a su hora."""
+
+    def __init__(self):
+        self.umbral_aviso = 0.8
+        self.horizonte = timedelta(minutes=120)
+        self.max_atraso = timedelta(minutes=1440)
+        self.intervalo_resync = 300
+        self.subir_prioridad = True
+
+        self._heap = []
+        self._programados = set()
+        self._seq = itertools.count()
+        self._cond = threading.Condition()
+        self._detener = threading.Event()
+        self._hilo = None
+
+    @property
+    def activo(self):
+        return self._hilo is not None and self._hilo.is_alive()
+
+    def iniciar(self, umbral_aviso=0.8, horizonte_min=120, max_atraso_min=1440,
+                intervalo_resync=300, subir_prioridad=True):
+        """
+        Arranca el hilo del programador (una sola vez por proceso).
+
+        Args:
+            umbral_aviso: fracción del plazo a la que se avisa (0.8 = al 80%)
+            horizonte_min: minutos hacia adelante que se cargan en memoria
+            max_atraso_min: vencimientos más antiguos que esto no se disparan
+                (evita una ráfaga de incumplimientos históricos al activar)
+            intervalo_resync: segundos entre resincronizaciones con la BD
+            subir_prioridad: al incumplir, subir un nivel la prioridad del ticket
+        """
+        if self.activo:
+            return
+        self.umbral_aviso = min(max(float(umbral_aviso), 0.0), 1.0)
+        self.horizonte = timedelta(minutes=int(horizonte_min))
+        self.max_atraso = timedelta(minutes=int(max_atraso_min))
+        self.intervalo_resync = max(int(intervalo_resync), 10)
+        self.subir_prioridad = bool(subir_prioridad)
+        self._detener.clear()
+        self._hilo = threading.Thread(target=self._bucle, name='sla-scheduler', daemon=True)
+        self._hilo.start()
+        logging.info('Programador SLA iniciado (horizonte=%s, resync=%ss)', self.horizonte, self.intervalo_resync)
+
+    def detener(self):
+        self._detener.set()
+        with self._cond:
+            self._cond.notify_all()
+
+    # ------------------------------------------------------------------
+    # Carga de vencimientos
+    # ------------------------------------------------------------------
+
+    def programar_ticket(self, id_ticket):
+        """
+        Agrega al heap los vencimientos actuales de un ticket. Se llama después
+        del commit al crear o reabrir; no hace nada si el programador no corre.
+        """
+        if not self.activo:
+            return
+        try:
+            for plazo in PLAZOS:
+                for fila in self._consultar(plazo, 't.id_ticket = %s', [id_ticket]):
+                    self._encolar(fila, plazo)
+        except Exception:
+            logging.exception(f'No se pudo programar el SLA del ticket #{id_ticket}')
+
+    def resincronizar(self):
+        """
+        Carga los eventos con hora dentro de [ahora - max_atraso, ahora + horizonte]:
+        los plazos que vencen en ese rango y los que vencen después pero cuyo
+        aviso (pendiente) cae antes de ahora + horizonte.
+        """
+        ahora = datetime.now()
+        hasta = ahora + self.horizonte
+        total = 0
+        for plazo, (columna, _) in PLAZOS.items():
+            filas = self._consultar(
+                plazo,
+                f't.{columna} >= %s AND t.{columna} <= %s',
+                [ahora - self.max_atraso, hasta],
+            )
+            limites = self._limites_aviso(plazo, hasta)
+            if limites:
+                casos = ' '.join('WHEN %s THEN %s' for _ in limites)
+                filas += self._consultar(
+                    plazo,
+                    f"""t.{columna} > %s
+                        AND t.{columna} <= CASE t.id_sla {casos} END
+                        AND NOT EXISTS (
+                            SELECT 1 FROM sla_evento v
+                            WHERE v.id_ticket = t.id_ticket AND v.tipo = %s AND v.vence = t.{columna}
+                        )""",
+                    [hasta, *itertools.chain.from_iterable(limites.items()), f'aviso_{plazo}'],
+                )
+            for fila in filas:
+                total += self._encolar(fila, plazo)
+        if total:
+            logging.info('Programador SLA: %s eventos nuevos en el heap', total)
+
+    def _limites_aviso(self, plazo, hasta):
+        """
+        id_sla -> vencimiento más lejano cuyo aviso cae antes de `hasta`.
+
+        El aviso se adelanta (1 - umbral_aviso) del plazo en minutos hábiles,
+        así que el límite es `hasta` más esos minutos; se toma el calendario
+        en uso que más se extiende para no dejar fuera ningún departamento.
+        """
+        minutos = PLAZOS[plazo][1]
+        conn = None
+        cursor = None
+        try:
+            conn = get_local_db_connection()
+            cursor = conn.cursor(pymysql.cursors.DictCursor)
+            cursor.execute(f"SELECT id_sla, {minutos} AS minutos FROM sla WHERE {minutos} > 0")
+            slas = cursor.fetchall() or []
+        finally:
+            if cursor:
+                cursor.close()
+            if conn:
+                conn.close()
+        calendarios = CalendarioModel.en_uso()
+        adelanto = 1 - self.umbral_aviso
+        return {
+            s['id_sla']: max(c.sumar_minutos(hasta, s['minutos'] * adelanto) for c in calendarios)
+            for s in slas
+        }
+
+    def _consultar(self, plazo, condicion, params):
+        columna, minutos = PLAZOS[plazo]
+        conn = None
+        cursor = None
+        try:
+            conn = get_local_db_connection()
+            cursor = conn.cursor(pymysql.cursors.DictCursor)
+            # Se excluyen los plazos ya incumplidos para no recargarlos en cada pasada
+            cursor.execute(f"""
+                SELECT t.id_ticket, t.id_depto, t.{columna} AS vence, s.{minutos} AS minutos,
+                       EXISTS (
+                           SELECT 1 FROM sla_evento a
+                           WHERE a.id_ticket = t.id_ticket
+                             AND a.tipo = %s
+                             AND a.vence = t.{columna}
+                       ) AS aviso_disparado
+                FROM ticket t
+                INNER JOIN sla s ON s.id_sla = t.id_sla
+                WHERE {condicion}
+                  AND t.{columna} IS NOT NULL
+                  AND t.deleted_at IS NULL
+                  AND {PENDIENTE_SQL[plazo]}
+                  AND NOT EXISTS (
+                      SELECT 1 FROM sla_evento e
+                      WHERE e.id_ticket = t.id_ticket
+                        AND e.tipo = %s
+                        AND e.vence = t.{columna}
+                  )
+            """, [f'aviso_{plazo}'] + list(params) + [f'incumplimiento_{plazo}'])
+            return cursor.fetchall() or []
+        finally:
+            if cursor:
+                cursor.close()
+            if conn:
+                conn.close()
+
+    def _encolar(self, fila, plazo):
+        """Agrega aviso e incumplimiento de un plazo; devuelve cuántos eventos nuevos entraron."""
+        vence = fila['vence']
+        ahora = datetime.now()
+        eventos = [(vence, f'incumplimiento_{plazo}')]
+        if vence > ahora and not fila.get('aviso_disparado'):
+            # El aviso se cuenta en minutos hábiles hacia atrás desde el vencimiento
+            calendario = CalendarioModel.de_depto(fila.get('id_depto'))
+            aviso = calendario.sumar_minutos(vence, -(fila.get('minutos') or 0) * (1 - self.umbral_aviso))
+            eventos.append((max(aviso, ahora), f'aviso_{plazo}'))
+
+        nuevos = 0
+        with self._cond:
+            tope_anterior = self._heap[0].cuando if self._heap else None
+            for cuando, tipo in eventos:
+                clave = (fila['id_ticket'], tipo, vence)
+                if clave in self._programados:
+                    continue
+                self._programados.add(clave)
+                heapq.heappush(self._heap, EventoSLA(cuando, next(self._seq), fila['id_ticket'], tipo, vence))
+                nuevos += 1
+            # Despertar al hilo si hay un evento más próximo que el que esperaba
+            if nuevos and (tope_anterior is None or self._heap[0].cuando < tope_anterior):
+                self._cond.notify()
+        return nuevos
+
+    # ------------------------------------------------------------------
+    # Bucle y disparo
+    # ------------------------------------------------------------------
+
+    def _bucle(self):
+        proxima_resync = datetime.min
+        while not self._detener.is_set():
+            if datetime.now() >= proxima_resync:
+                try:
+                    self.resincronizar()
+                except Exception:
+                    logging.exception('Error resincronizando vencimientos de SLA')
+                proxima_resync = datetime.now() + timedelta(seconds=self.intervalo_resync)
+
+            vencidos = []
+            with self._cond:
+                ahora = datetime.now()
+                while self._heap and self._heap[0].cuando <= ahora:
+                    evento = heapq.heappop(self._heap)
+                    self._programados.discard((evento.id_ticket, evento.tipo, evento.vence))
+                    vencidos.append(evento)
+                if not vencidos:
+                    espera = (proxima_resync - ahora).total_seconds()
+                    if self._heap:
+                        espera = min(espera, (self._heap[0].cuando - ahora).total_seconds())
+                    self._cond.wait(timeout=max(espera, 0.05))
+
+            for evento in vencidos:
+                try:
+                    self._disparar(evento)
+                except Exception:
+                    logging.exception(f'Error disparando {evento.tipo} del ticket #{evento.id_ticket}')
+
+    def _disparar(self, evento):
+        """
+        Revalida el ticket y registra el evento. Devuelve False si la entrada
+        estaba obsoleta o si otro proceso ya la disparó.
+        """
+        plazo = evento.tipo.split('_', 1)[1]
+        columna = PLAZOS[plazo][0]
+        accion, titulo, tipo_notif = EVENTOS[evento.tipo]
+
+        conn = None
+        cursor = None
+        try:
+            conn = get_local_db_connection()
+            cursor = conn.cursor(pymysql.cursors.DictCursor)
+            cursor.execute(f"""
+                SELECT t.id_ticket, t.titulo, t.id_prioridad, t.id_depto
+                FROM ticket t
+                WHERE t.id_ticket = %s
+                  AND t.{columna} = %s
+                  AND t.deleted_at IS NULL
+                  AND {PENDIENTE_SQL[plazo]}
+                FOR UPDATE
+            """, (evento.id_ticket, evento.vence))
+            ticket = cursor.fetchone()
+            if not ticket:
+                conn.rollback()
+                return False
+
+            cursor.execute("""
+                INSERT IGNORE INTO sla_evento (id_ticket, tipo, vence, fecha)
+                VALUES (%s, %s, %s, NOW())
+            """, (evento.id_ticket, evento.tipo, evento.vence))
+            if cursor.rowcount == 0:
+                conn.rollback()
+                return False
+
+            vence_txt = evento.vence.strftime('%Y-%m-%d %H:%M')
+            cursor.execute("""
+                INSERT INTO historial_acciones_ticket
+                (id_ticket, id_operador, accion, valor_anterior, valor_nuevo, fecha)
+                VALUES (%s, NULL, %s, NULL, %s, NOW())
+            """, (evento.id_ticket, accion, vence_txt))
+
+            if evento.tipo.startswith('incumplimiento') and self.subir_prioridad:
+                self._subir_prioridad(cursor, ticket)
+
+            if evento.tipo.startswith('aviso'):
+                mensaje = f'El ticket #{evento.id_ticket} ({ticket["titulo"]}) vence el {vence_txt}'
+            else:
+                mensaje = f'El ticket #{evento.id_ticket} ({ticket["titulo"]}) superó su SLA ({vence_txt})'
+            destinatarios = self._destinatarios(cursor, ticket)
+            if destinatarios:
+                cursor.executemany("""
+                    INSERT INTO notificacion
+                        (id_operador, titulo, mensaje, tipo, entidad_tipo, entidad_id, leido, fecha_creacion)
+                    VALUES
+                        (%s, %s, %s, %s, 'ticket', %s, 0, NOW())
+                """, [(id_op, titulo, mensaje, tipo_notif, evento.id_ticket) for id_op in destinatarios])
+
+            conn.commit()
+            logging.info(f'SLA: {evento.tipo} ticket #{evento.id_ticket} (vence {vence_txt})')
+            return True
+        except Exception:
+            if conn:
+                conn.rollback()
+            raise
+        finally:
+            if cursor:
+                cursor.close()
+            if conn:
+                conn.close()
+
+    @staticmethod
+    def _subir_prioridad(cursor, ticket):
+        """Sube la prioridad al siguiente nivel de jerarquía (1 = más urgente)."""
+        cursor.execute("""
+            SELECT p2.id_prioridad, p2.descripcion, p1.descripcion AS actual
+            FROM prioridad p1
+            INNER JOIN prioridad p2 ON p2.jerarquia < p1.jerarquia
+            WHERE p1.id_prioridad = %s
+            ORDER BY p2.jerarquia DESC
+            LIMIT 1
+        """, (ticket['id_prioridad'],))
+        siguiente = cursor.fetchone()
+        if not siguiente:
+            return
+        cursor.execute(
+            "UPDATE ticket SET id_prioridad = %s WHERE id_ticket = %s",
+            (siguiente['id_prioridad'], ticket['id_ticket'])
+        )
+        cursor.execute("""
+            INSERT INTO historial_acciones_ticket
+            (id_ticket, id_operador, accion, valor_anterior, valor_nuevo, fecha)
+            VALUES (%s, NULL, 'Cambio de prioridad', %s, %s, NOW())
+        """, (ticket['id_ticket'], siguiente['actual'], siguiente['descripcion']))
+
+    @staticmethod
+    def _destinatarios(cursor, ticket):
+        """Owner actual del ticket; si no tiene, los supervisores de su departamento."""
+        cursor.execute("""
+            SELECT id_operador
+            FROM ticket_operador
+            WHERE id_ticket = %s AND rol = 'Owner' AND fecha_desasignacion IS NULL
+        """, (ticket['id_ticket'],))
+        ids = [r['id_operador'] for r in cursor.fetchall() or []]
+        if ids or not ticket.get('id_depto'):
+            return ids
+        cursor.execute("""
+            SELECT DISTINCT id_operador
+            FROM miembro_dpto
+            WHERE id_depto = %s
+              AND rol IN ('Supervisor', 'Jefe')
+              AND fecha_desasignacion IS NULL
+        """, (ticket['id_depto'],))
+        return [r['id_operador'] for r in cursor.fetchall() or []]
+
+
+# Instancia del proceso: la arranca run.py y la usan los modelos tras cada commit
+programador_sla = ProgramadorSLA()
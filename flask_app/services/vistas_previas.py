@@ -0,0 +1,189 @@
+"""
+Miniaturas y vistas previas de adjuntos.
+
+Para imágenes (y PDFs, primera página) se generan dos JPEG en
+uploads/_previas/<shard>/:
+- miniatura: lado mayor TAM_MINIATURA px, para la tarjeta del chat
+- previa:    lado mayor TAM_PREVIA px, para el visor (en lugar del original)
+
+La generación corre en un PoolProcesos: AdjuntoModel.crear_adjunto la
+encola al registrar el adjunto, y /api/adjuntos/<id>/thumb la pide si
+todavía no existe (esperando como mucho ESPERA_SEGUNDOS). El hilo del
+request nunca decodifica la imagen.
+
+Requiere Pillow; los PDFs requieren además PyMuPDF. Sin ellos el
+endpoint responde que no hay vista previa.
+"""
+import logging
+import os
+from concurrent.futures import TimeoutError as FuturoTimeout
+
+try:
+    from PIL import Image, ImageOps
+except ImportError:  # pragma: no cover - dependencia opcional
+    Image = None
+    ImageOps = None
+
+try:
+    import pymupdf
+except ImportError:  # pragma: no cover - dependencia opcional
+    pymupdf = None
+
+from flask_app.services import almacenamiento
+from flask_app.utils.pool_procesos import PoolProcesos
+
+ACTIVA = os.getenv('PREVIAS_ADJUNTOS', '1').strip().lower() in ('1', 'true', 'yes', 'on')
+TAM_MINIATURA = int(os.getenv('PREVIAS_TAM_MINIATURA', 320))
+TAM_PREVIA = int(os.getenv('PREVIAS_TAM_PREVIA', 1600))
+CALIDAD_JPEG = int(os.getenv('PREVIAS_CALIDAD', 80))
+ESPERA_SEGUNDOS = float(os.getenv('PREVIAS_ESPERA_SEGUNDOS', 2))
+# Imágenes con más píxeles no se decodifican (bombas de descompresión)
+MAX_PIXELES = int(os.getenv('PREVIAS_MAX_MEGAPIXELES', 60)) * 1000 * 1000
+
+EXT_IMAGEN = {'jpg', 'jpeg', 'png', 'gif', 'bmp', 'webp'}
+EXT_PDF = {'pdf'}
+TIPOS = ('miniatura', 'previa')
+
+_pool = PoolProcesos(
+    'previas',
+    max_workers=int(os.getenv('PREVIAS_WORKERS', 2)),
+    max_pendientes=int(os.getenv('PREVIAS_MAX_PENDIENTES', 200)),
+)
+# Adjuntos cuya previa falló (archivo dañado, formato raro): no se reintentan
+_fallidos = set()
+_MAX_FALLIDOS = 5000
+
+
+def _extension(nombre):
+    return os.path.splitext(nombre or '')[1].lstrip('.').lower()
+
+
+def soportado(nombre):
+    """True si hay dependencias para generar la previa de este tipo de archivo."""
+    if not ACTIVA or Image is None:
+        return False
+    ext = _extension(nombre)
+    return ext in EXT_IMAGEN or (ext in EXT_PDF and pymupdf is not None)
+
+
+def _directorio():
+    from flask_app.models.adjunto_model import AdjuntoModel
+    return os.path.join(AdjuntoModel.obtener_ruta_almacenamiento(), '_previas')
+
+
+def ruta_previa(id_adj, tipo):
+    """Ruta del JPEG generado (exista o no)."""
+    return os.path.join(_directorio(), f'{int(id_adj) % 256:02x}', f'{int(id_adj)}_{tipo}.jpg')
+
+
+# ----------------------------------------------------------------------
+# Worker (corre en el pool de procesos)
+# ----------------------------------------------------------------------
+
+def _abrir_imagen(origen, ext):
+    """Imagen RGB ya decodificada (no queda leyendo `origen`)."""
+    if ext in EXT_PDF:
+        with pymupdf.open(origen) as doc:
+            pagina = doc.load_page(0)
+            escala = TAM_PREVIA / max(pagina.rect.width, pagina.rect.height, 1)
+            pix = pagina.get_pixmap(matrix=pymupdf.Matrix(escala, escala), alpha=False)
+            return Image.frombytes('RGB', (pix.width, pix.height), pix.samples)
+
+    Image.MAX_IMAGE_PIXELS = MAX_PIXELES
+    img = Image.open(origen)
+    # JPEG: decodificar ya reducido (1/2, 1/4, 1/8) evita cargar la foto completa
+    img.draft('RGB', (TAM_PREVIA, TAM_PREVIA))
+    img = ImageOps.exif_transpose(img)
+    if img.mode in ('RGBA', 'LA', 'P'):
+        img = img.convert('RGBA')
+        fondo = Image.new('RGB', img.size, (255, 255, 255))
+        fondo.paste(img, mask=img.getchannel('A'))
+        return fondo
+    return img.convert('RGB')
+
+
+def _guardar(img, destino):
+    os.makedirs(os.path.dirname(destino), exist_ok=True)
+    temporal = f'{destino}.{os.getpid()}.tmp'
+    img.save(temporal, 'JPEG', quality=CALIDAD_JPEG, optimize=True, progressive=True)
+    os.replace(temporal, destino)
+
+
+def generar(ref, ext, destino_miniatura, destino_previa):
+    """Genera previa y miniatura. Corre en el pool; no toca la BD."""
+    with almacenamiento.archivo_local(ref) as origen:
+        img = _abrir_imagen(origen, ext)
+    img.thumbnail((TAM_PREVIA, TAM_PREVIA), Image.LANCZOS)
+    _guardar(img, destino_previa)
+    img.thumbnail((TAM_MINIATURA, TAM_MINIATURA), Image.LANCZOS)
+    _guardar(img, destino_miniatura)
+    return True
+
+
+# ----------------------------------------------------------------------
+# API
+# ----------------------------------------------------------------------
+
+def encolar(id_adj, ruta, nombre):
+    """
+    Encola la generación si el tipo está soportado y aún no existe.
+
+    Returns:
+        Future, o None si no hay nada que generar (o la cola está llena)
+    """
+    if not ruta or not soportado(nombre) or id_adj in _fallidos:
+        return None
+    destino_miniatura = ruta_previa(id_adj, 'miniatura')
+    destino_previa = ruta_previa(id_adj, 'previa')
+    if os.path.exists(destino_miniatura) and os.path.exists(destino_previa):
+        return None
+    futuro = _pool.enviar(id_adj, generar, ruta, _extension(nombre), destino_miniatura, destino_previa)
+    if futuro is not None:
+        futuro.add_done_callback(lambda f, i=id_adj: _registrar_resultado(i, f))
+    return futuro
+
+
+def _registrar_resultado(id_adj, futuro):
+    if futuro.cancelled():
+        return
+    error = futuro.exception()
+    if error is not None:
+        logging.warning(f'No se pudo generar la vista previa del adjunto {id_adj}: {error}')
+        if len(_fallidos) < _MAX_FALLIDOS:
+            _fallidos.add(id_adj)
+
+
+def obtener(id_adj, ruta, nombre, tipo='miniatura', espera=ESPERA_SEGUNDOS):
+    """
+    Ruta de la previa lista para servir.
+
+    Returns:
+        (estado, ruta): ('lista', ruta), ('pendiente', None) o ('no_disponible', None)
+    """
+    destino = ruta_previa(id_adj, tipo)
+    if os.path.exists(destino):
+        return 'lista', destino
+    if not soportado(nombre) or id_adj in _fallidos or not ruta or almacenamiento.info(ruta) is None:
+        return 'no_disponible', None
+
+    futuro = encolar(id_adj, ruta, nombre)
+    if futuro is None:
+        return 'pendiente', None
+    try:
+        futuro.result(timeout=espera)
+    except FuturoTimeout:
+        return 'pendiente', None
+    except Exception:
+        return 'no_disponible', None
+    return ('lista', destino) if os.path.exists(destino) else ('no_disponible', None)
+
+
+def eliminar(id_adj):
+    """Borra las previas generadas del adjunto."""
+    for tipo in TIPOS:
+        try:
+            os.remove(ruta_previa(id_adj, tipo))
+        except FileNotFoundError:
+            pass
+        except OSError:
+            logging.exception(f'No se pudo eliminar la previa {tipo} del adjunto {id_adj}')
@@ -130,7 +130,31 @@ class AuthService {
 // WRAPPER FETCH CON AUTENTICACIÓN
 // ============================================
 
+// Respuestas precargadas (p.ej. por /dashboard/bootstrap). Cada una se consume
+// una sola vez y caduca a los pocos segundos: el siguiente GET al mismo
+// endpoint vuelve a ir al servidor.
+const _respuestasPrecargadas = new Map();
+const PRECARGA_TTL_MS = 30000;
+
+function precargarRespuestas(respuestas) {
+    const expira = Date.now() + PRECARGA_TTL_MS;
+    Object.entries(respuestas || {}).forEach(([endpoint, data]) => {
+        if (data !== null && data !== undefined) {
+            _respuestasPrecargadas.set(endpoint, { data, expira });
+        }
+    });
+}
+
 async function apiRequest(endpoint, options = {}) {
+    const metodo = (options.method || 'GET').toUpperCase();
+    if (metodo === 'GET' && _respuestasPrecargadas.has(endpoint)) {
+        const precargada = _respuestasPrecargadas.get(endpoint);
+        _respuestasPrecargadas.delete(endpoint);
+        if (precargada.expira > Date.now()) {
+            return precargada.data;
+        }
+    }
+
     const url = endpoint.startsWith('http') ? endpoint : `${AUTH_CONFIG.API_BASE_URL}${endpoint}`;
     
     const config = {
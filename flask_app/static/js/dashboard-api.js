@@ -4,10 +4,65 @@
 
 class DashboardAPI {
     
+    // ============================================
+    // ARRANQUE
+    // ============================================
+
+    /**
+     * Pide todos los datos iniciales en un solo request y los deja
+     * precargados para que los GET individuales del arranque no vayan
+     * al servidor.
+     */
+    static async bootstrap() {
+        const data = await apiRequest('/dashboard/bootstrap?limit=50&order=desc&limit_notificaciones=20');
+        if (!data || !data.success) return data;
+
+        const errores = data.errores || {};
+        const ok = (seccion) => !(seccion in errores);
+        const respuestas = {};
+
+        if (ok('operador')) {
+            respuestas['/operadores/me'] = { success: true, operador: data.operador };
+        }
+        if (ok('estadisticas')) {
+            respuestas['/tickets/estadisticas'] = { success: true, estadisticas: data.estadisticas };
+        }
+        if (ok('tickets')) {
+            const tickets = { success: true, ...data.tickets };
+            respuestas['/tickets?limit=50&offset=0'] = tickets;
+            respuestas['/tickets?limit=50&offset=0&order=desc'] = tickets;
+        }
+        if (ok('notificaciones')) {
+            respuestas['/notificaciones?limit=20&offset=0'] = { success: true, ...data.notificaciones };
+        }
+        if (ok('emisores')) {
+            respuestas['/tickets/emisores'] = { success: true, emisores: data.emisores };
+        }
+        if (ok('receptores')) {
+            respuestas['/tickets/receptores'] = { success: true, receptores: data.receptores };
+        }
+        if (ok('respuestas_rapidas')) {
+            const lista = data.respuestas_rapidas || [];
+            respuestas['/tickets/respuestas-rapidas'] = { success: true, data: lista, total: lista.length };
+        }
+        if (ok('departamentos')) {
+            const lista = data.departamentos || [];
+            respuestas['/departamentos'] = { success: true, departamentos: lista, total: lista.length };
+        }
+        Object.entries(data.catalogos || {}).forEach(([nombre, lista]) => {
+            if (lista) {
+                respuestas[`/catalogos/${nombre}`] = { success: true, data: lista, total: lista.length };
+            }
+        });
+
+        precargarRespuestas(respuestas);
+        return data;
+    }
+
     // ============================================
     // TICKETS
     // ============================================
-    
+
     static async getTickets(filtros = {}) {
         const params = new URLSearchParams(filtros);
         return await apiRequest(`/tickets?${params.toString()}`);
@@ -17,6 +72,11 @@ class DashboardAPI {
         return await apiRequest(`/tickets/${id}`);
     }
 
+    static async buscarTickets(q, limit = 20) {
+        const params = new URLSearchParams({ q, limit });
+        return await apiRequest(`/tickets/search?${params.toString()}`);
+    }
+
     static async createTicket(ticketData) {
         return await apiRequest('/tickets', {
             method: 'POST',
@@ -58,6 +118,14 @@ class DashboardAPI {
         });
     }
 
+    // operacion: 'estado' | 'prioridad' | 'asignar' | 'agregar_etiquetas' | 'quitar_etiquetas'
+    static async operacionMasiva(ids, operacion, valor) {
+        return await apiRequest('/tickets/bulk', {
+            method: 'POST',
+            body: JSON.stringify({ ids, operacion, valor })
+        });
+    }
+
     // ============================================
     // MENSAJES
     // ============================================
@@ -178,6 +246,10 @@ class DashboardAPI {
     // ============================================
 
     static async subirAdjuntoMensaje(mensajeId, file) {
+        // Archivos grandes: subida por trozos reanudable
+        if (file && file.size > DashboardAPI.UMBRAL_SUBIDA_TROZOS) {
+            return await DashboardAPI.subirAdjuntoPorTrozos(mensajeId, file);
+        }
         const token = AuthService.getToken();
         const formData = new FormData();
         formData.append('file', file);
@@ -203,6 +275,90 @@ class DashboardAPI {
         return data || { success: false, error: 'Respuesta inválida del servidor' };
     }
 
+    /**
+     * Sube un archivo en trozos (init -> PUT por offset -> completar).
+     * Reintenta cada trozo ante fallas de red y, si la página se recarga,
+     * reanuda la misma subida (id guardado en localStorage).
+     */
+    static async subirAdjuntoPorTrozos(mensajeId, file, onProgress) {
+        const base = AUTH_CONFIG.API_BASE_URL;
+        const clave = `subida:${mensajeId}:${file.name}:${file.size}:${file.lastModified}`;
+        const auth = () => ({ 'Authorization': `Bearer ${AuthService.getToken()}` });
+        const json = async (res) => { try { return await res.json(); } catch (e) { return null; } };
+
+        let idSubida = localStorage.getItem(clave);
+        let recibido = 0;
+        let chunkMax = 8 * 1024 * 1024;
+
+        if (idSubida) {
+            const res = await fetch(`${base}/adjuntos/subidas/${idSubida}`, { headers: auth() });
+            const data = await json(res);
+            if (res.ok && data && data.subida) {
+                recibido = data.subida.recibido;
+            } else {
+                idSubida = null;
+                localStorage.removeItem(clave);
+            }
+        }
+
+        if (!idSubida) {
+            const res = await fetch(`${base}/mensajes/${mensajeId}/adjuntos/subidas`, {
+                method: 'POST',
+                headers: { ...auth(), 'Content-Type': 'application/json' },
+                body: JSON.stringify({ nombre: file.name, tamano: file.size })
+            });
+            const data = await json(res);
+            if (!res.ok || !data || !data.subida) {
+                return data || { success: false, error: `Error HTTP ${res.status}` };
+            }
+            idSubida = data.subida.id_subida;
+            chunkMax = data.chunk_max || chunkMax;
+            localStorage.setItem(clave, idSubida);
+        }
+
+        let fallos = 0;
+        while (recibido < file.size) {
+            const trozo = file.slice(recibido, Math.min(recibido + chunkMax, file.size));
+            let res = null;
+            try {
+                res = await fetch(`${base}/adjuntos/subidas/${idSubida}?offset=${recibido}`, {
+                    method: 'PUT',
+                    headers: { ...auth(), 'Content-Type': 'application/octet-stream' },
+                    body: trozo
+                });
+            } catch (e) {
+                res = null;
+            }
+            const data = res ? await json(res) : null;
+            if (res && (res.ok || res.status === 409) && data && typeof data.recibido === 'number') {
+                // 409: el servidor tiene otro offset (trozo repetido o perdido); seguir desde ahí
+                recibido = data.recibido;
+                fallos = 0;
+                if (typeof onProgress === 'function') onProgress(recibido, file.size);
+                continue;
+            }
+            if (res && res.status >= 400 && res.status < 500) {
+                return data || { success: false, error: `Error HTTP ${res.status}` };
+            }
+            if (++fallos > 5) {
+                return { success: false, error: 'No se pudo completar la subida; reintente para reanudarla' };
+            }
+            await new Promise(r => setTimeout(r, Math.min(1000 * 2 ** fallos, 15000)));
+        }
+
+        const res = await fetch(`${base}/adjuntos/subidas/${idSubida}/completar`, {
+            method: 'POST',
+            headers: { ...auth(), 'Content-Type': 'application/json' },
+            body: '{}'
+        });
+        const data = await json(res);
+        if (res.ok || res.status === 404) localStorage.removeItem(clave);
+        if (!res.ok) {
+            return data || { success: false, error: `Error HTTP ${res.status}` };
+        }
+        return data || { success: false, error: 'Respuesta inválida del servidor' };
+    }
+
     // Compatibilidad: algunos módulos usaban /adjuntos/upload
     static async subirAdjuntoLegacy(mensajeId, file) {
         const token = AuthService.getToken();
@@ -325,6 +481,9 @@ class DashboardAPI {
     }
 }
 
+// Desde este tamaño los adjuntos se suben por trozos (reanudable)
+DashboardAPI.UMBRAL_SUBIDA_TROZOS = 8 * 1024 * 1024;
+
 // ============================================
 // INICIALIZACIÓN AL CARGAR DASHBOARD
 // ============================================
@@ -348,9 +507,16 @@ document.addEventListener('DOMContentLoaded', async function() {
         }
 
         // Cargar datos reales del dashboard
+        // - /api/dashboard/bootstrap precarga perfil, KPIs, tickets, catálogos,
+        //   notificaciones y filtros en un solo request
         // - KPIs vienen de /api/tickets/estadisticas
         // - Tickets recientes, catálogos
         try {
+            try {
+                await DashboardAPI.bootstrap();
+            } catch (e) {
+                console.warn('⚠️ Bootstrap no disponible, se cargan las secciones por separado:', e);
+            }
             await cargarKPIs();
             await cargarCatalogos();
             await cargarTickets();
@@ -57,8 +57,60 @@ function _escapeForOnclickSingleQuotedString(value) {
         .replace(/\r?\n/g, ' ');
 }
 
-function _buildAdjuntoDownloadUrl(idAdj) {
-    return '/api/adjuntos/' + idAdj + '/download';
+function _buildAdjuntoDownloadUrl(idAdj, original) {
+    // Sin original=1 las imágenes se sirven en su variante optimizada para web
+    return '/api/adjuntos/' + idAdj + '/download' + (original ? '?original=1' : '');
+}
+
+function _buildAdjuntoThumbUrl(idAdj, tamano) {
+    return '/api/adjuntos/' + idAdj + '/thumb' + (tamano ? ('?tamano=' + tamano) : '');
+}
+
+function _tieneVistaPrevia(name) {
+    return /\.(png|jpg|jpeg|gif|webp|bmp|pdf)$/.test(String(name || '').toLowerCase());
+}
+
+// Miniaturas: el endpoint exige el token, así que se piden con fetch y se muestran
+// como blob. 202 = se está generando: se reintenta tras Retry-After (dos veces).
+// Se guardan por URL para no volver a pedirlas en cada render del chat.
+const _miniaturasCache = new Map();
+
+function _fetchMiniaturaUrl(idAdj, tamano) {
+    const url = _buildAdjuntoThumbUrl(idAdj, tamano);
+    if (_miniaturasCache.has(url)) return _miniaturasCache.get(url);
+    const promesa = (async function() {
+        for (let intento = 0; intento < 3; intento++) {
+            const res = await fetch(url, { headers: _adjuntoAuthHeaders() });
+            if (res.status === 202) {
+                const espera = Number(res.headers.get('Retry-After') || 2);
+                await new Promise(function(r) { setTimeout(r, espera * 1000); });
+                continue;
+            }
+            if (!res.ok) return null;
+            return URL.createObjectURL(await res.blob());
+        }
+        return null;
+    })().catch(function() { return null; });
+    promesa.then(function(objectUrl) { if (!objectUrl) _miniaturasCache.delete(url); });
+    _miniaturasCache.set(url, promesa);
+    return promesa;
+}
+
+// Carga las <img data-thumb-adj> dentro de `root`; si no hay miniatura, se oculta
+function _cargarMiniaturas(root) {
+    if (!root) return;
+    root.querySelectorAll('img[data-thumb-adj]').forEach(function(img) {
+        const idAdj = img.dataset.thumbAdj;
+        img.removeAttribute('data-thumb-adj');
+        _fetchMiniaturaUrl(idAdj).then(function(objectUrl) {
+            if (objectUrl) {
+                img.src = objectUrl;
+                return;
+            }
+            const cont = img.closest('.adjunto-thumb');
+            if (cont) cont.remove();
+        });
+    });
 }
 
 function _getAbsoluteUrl(path) {
@@ -107,9 +159,16 @@ async function _copyToClipboard(text) {
     }
 }
 
-async function _fetchAdjuntoBlob(idAdj) {
-    const url = _buildAdjuntoDownloadUrl(idAdj);
-    const res = await fetch(url, { method: 'GET' });
+// Los endpoints de adjuntos exigen el token: se piden con fetch (no con <img src> / <a href>)
+function _adjuntoAuthHeaders() {
+    return (typeof AuthService !== 'undefined' && AuthService.getToken && AuthService.getToken())
+        ? AuthService.getAuthHeaders()
+        : {};
+}
+
+async function _fetchAdjuntoBlob(idAdj, original) {
+    const url = _buildAdjuntoDownloadUrl(idAdj, original);
+    const res = await fetch(url, { method: 'GET', headers: _adjuntoAuthHeaders() });
     if (!res.ok) {
         throw new Error('No se pudo obtener el adjunto');
     }
@@ -261,14 +320,40 @@ window.openAdjuntoPreview = async function(idAdj, nomAdj) {
             });
         }
 
-        // Cargar blob
         _cleanupAdjuntoPreview();
+
+        // Imágenes: mostrar la previa reducida; el original se descarga solo al guardar
+        const ext = (String(nomAdj || '').includes('.') ? String(nomAdj).split('.').pop().toUpperCase() : '') || '';
+        if (_tieneVistaPrevia(nomAdj) && !String(nomAdj).toLowerCase().endsWith('.pdf')) {
+            window._adjuntoPreview = { idAdj, nomAdj, url: null, blob: null, contentType: null };
+            if (meta) meta.textContent = ext || 'Adjunto';
+            const img = document.createElement('img');
+            img.alt = nomAdj || 'Adjunto';
+            img.className = 'img-fluid rounded-3 border';
+            img.style.maxHeight = '70vh';
+            img.style.display = 'block';
+            img.style.margin = '0 auto';
+            const previa = await _fetchMiniaturaUrl(idAdj, 'previa');
+            if (previa) {
+                img.onload = function() { body.innerHTML = ''; body.appendChild(img); };
+                img.src = previa;
+                return;
+            }
+            // Sin previa (o aún generándose): usar el original
+            const fetchedOriginal = await _fetchAdjuntoBlob(idAdj);
+            const objectUrlOriginal = URL.createObjectURL(fetchedOriginal.blob);
+            window._adjuntoPreview = { idAdj, nomAdj, url: objectUrlOriginal, blob: fetchedOriginal.blob, contentType: fetchedOriginal.contentType };
+            if (meta) meta.textContent = [ext, _formatBytes(fetchedOriginal.blob.size)].filter(Boolean).join(' · ') || 'Adjunto';
+            _renderAdjuntoPreviewInto(body, objectUrlOriginal, fetchedOriginal.contentType, nomAdj);
+            return;
+        }
+
+        // Cargar blob
         const fetched = await _fetchAdjuntoBlob(idAdj);
         const objectUrl = URL.createObjectURL(fetched.blob);
         window._adjuntoPreview = { idAdj, nomAdj, url: objectUrl, blob: fetched.blob, contentType: fetched.contentType };
 
         const sizeText = _formatBytes(fetched.blob && fetched.blob.size);
-        const ext = (String(nomAdj || '').includes('.') ? String(nomAdj).split('.').pop().toUpperCase() : '') || '';
         if (meta) meta.textContent = [ext, sizeText].filter(Boolean).join(' · ') || 'Adjunto';
 
         const mode = _renderAdjuntoPreviewInto(body, objectUrl, fetched.contentType, nomAdj);
@@ -297,12 +382,15 @@ window.guardarAdjuntoComo = async function(idAdj, nomAdj) {
             return;
         }
 
-        // Reusar blob del preview si aplica
+        // Reusar blob del preview si aplica (una imagen del preview puede ser la
+        // variante optimizada: "Guardar como" descarga siempre el original)
         let blob = null;
-        if (window._adjuntoPreview && window._adjuntoPreview.idAdj === idAdj && window._adjuntoPreview.blob) {
-            blob = window._adjuntoPreview.blob;
+        const preview = window._adjuntoPreview;
+        if (preview && preview.idAdj === idAdj && preview.blob
+            && !String(preview.contentType || '').toLowerCase().startsWith('image/')) {
+            blob = preview.blob;
         } else {
-            const fetched = await _fetchAdjuntoBlob(idAdj);
+            const fetched = await _fetchAdjuntoBlob(idAdj, true);
             blob = fetched.blob;
         }
 
@@ -974,11 +1062,13 @@ function renderizarMensajes(mensajes) {
         
         if (chatContainer) {
             chatContainer.innerHTML = mensajesHTML;
+            _cargarMiniaturas(chatContainer);
             chatContainer.scrollTop = chatContainer.scrollHeight;
             console.log('[renderizarMensajes] Chat desktop actualizado con ' + mensajes.length + ' mensajes');
         }
         if (chatContainerMobile) {
             chatContainerMobile.innerHTML = mensajesHTML;
+            _cargarMiniaturas(chatContainerMobile);
             chatContainerMobile.scrollTop = chatContainerMobile.scrollHeight;
         }
         
@@ -1014,6 +1104,7 @@ function renderizarMensajes(mensajes) {
                 nuevoElemento.style.transform = 'translateY(10px)';
                 nuevoElemento.style.transition = 'opacity 0.3s ease, transform 0.3s ease';
                 chatContainer.appendChild(nuevoElemento);
+                _cargarMiniaturas(nuevoElemento);
                 
                 // Animación fade-in
                 setTimeout(function(elemento) {
@@ -1034,6 +1125,7 @@ function renderizarMensajes(mensajes) {
                 nuevoElementoMobile.style.transform = 'translateY(10px)';
                 nuevoElementoMobile.style.transition = 'opacity 0.3s ease, transform 0.3s ease';
                 chatContainerMobile.appendChild(nuevoElementoMobile);
+                _cargarMiniaturas(nuevoElementoMobile);
                 
                 setTimeout(function(elemento) {
                     elemento.style.opacity = '1';
@@ -1082,8 +1174,15 @@ function crearMensajeHTML(msg) {
             const url = _buildAdjuntoDownloadUrl(idAdj);
             const nomSafe = _escapeForOnclickSingleQuotedString(nom);
 
+            const thumbHtml = _tieneVistaPrevia(nom)
+                ? '<div class="adjunto-thumb bg-light border-bottom text-center" role="button" onclick="window.openAdjuntoPreview(' + idAdj + ', \'' + nomSafe + '\')">' +
+                      '<img data-thumb-adj="' + idAdj + '" alt="" style="max-height: 160px; max-width: 100%; object-fit: contain;">' +
+                  '</div>'
+                : '';
+
             return (
                 '<div class="bg-white text-dark rounded-3 border overflow-hidden">' +
+                    thumbHtml +
                     '<div class="d-flex align-items-center p-2">' +
                         '<div class="bg-light rounded-2 d-flex align-items-center justify-content-center me-2" style="width: 40px; height: 40px; flex: 0 0 40px;">' +
                             '<i class="' + icon + ' text-muted"></i>' +
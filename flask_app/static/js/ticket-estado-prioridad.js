@@ -315,8 +315,10 @@ window.filtrarPorPrioridad = async function(prioridadNombre, botonElement) {
             // Resetear prioridad global
             window.activePriorityId = null;
             
-            // Aplicar todos los filtros
-            if (typeof applyAllFilters === 'function') {
+            // Aplicar todos los filtros (la prioridad se filtra en el servidor)
+            if (typeof recargarTicketsConFiltros === 'function') {
+                await recargarTicketsConFiltros();
+            } else if (typeof applyAllFilters === 'function') {
                 applyAllFilters();
             }
             
@@ -333,8 +335,10 @@ window.filtrarPorPrioridad = async function(prioridadNombre, botonElement) {
         // Setear prioridad global por ID (usa el mismo mapeo del módulo)
         window.activePriorityId = PRIORIDADES[prioridadNombre] || null;
         
-        // Aplicar todos los filtros
-        if (typeof applyAllFilters === 'function') {
+        // Aplicar todos los filtros (la prioridad se filtra en el servidor)
+        if (typeof recargarTicketsConFiltros === 'function') {
+            await recargarTicketsConFiltros();
+        } else if (typeof applyAllFilters === 'function') {
             applyAllFilters();
         }
         
@@ -289,6 +289,78 @@ document.addEventListener('DOMContentLoaded', function() {
     try { evaluateOrderCompactness(); } catch (e) {}
 });
 
+// ============================================
+// FILTROS EN SERVIDOR
+// ============================================
+
+// Filtros rápidos de estado (tokens de data-status) -> id_estado
+const ESTADOS_FILTRO_RAPIDO = {
+    'pendiente': [1, 5],    // Nuevo se muestra como Pendiente
+    'en-proceso': [2],
+    'resuelto': [3],
+    'cerrado': [4]
+};
+// "Por tomar": sin Owner y todavía abierto (o en "Sin responder")
+const ESTADOS_POR_TOMAR = [1, 2, 5, 6];
+const ESTADO_SIN_RESPONDER = 6;
+
+/**
+ * Lee los filtros del panel (departamento, receptor, emisor, prioridad y
+ * filtros rápidos de estado) y los traduce a los query params de GET /api/tickets.
+ */
+function obtenerFiltrosServidor() {
+    const params = new URLSearchParams();
+
+    const deptoSelect = document.getElementById('departmentFilter');
+    // Si el filtro de departamento está oculto por permisos (o deshabilitado), no aplica
+    if (deptoSelect && deptoSelect.value && deptoSelect.offsetParent !== null && !deptoSelect.disabled) {
+        params.set('depto', deptoSelect.value);
+    }
+
+    const receptor = document.getElementById('operatorFilter')?.value || '';
+    if (receptor === '__unassigned__') {
+        params.set('owner', 'sin_asignar');
+    } else if (receptor) {
+        params.set('owner', receptor);
+    }
+
+    const emisor = document.getElementById('senderFilter')?.value || '';
+    if (emisor) params.set('emisor', emisor);
+
+    if (window.activePriorityId) params.set('prioridad', window.activePriorityId);
+
+    // Los filtros rápidos se combinan con OR y el servidor con AND: "Por tomar"
+    // solo se traduce a owner=sin_asignar cuando es el único activo (y no hay
+    // receptor elegido); junto a otros aporta los tickets en "Sin responder".
+    const filtrosEstado = Array.isArray(window.activeStatusFilters) ? window.activeStatusFilters : [];
+    const estados = new Set();
+    filtrosEstado.forEach(f => (ESTADOS_FILTRO_RAPIDO[f] || []).forEach(id => estados.add(id)));
+    if (filtrosEstado.includes('por-tomar')) {
+        if (filtrosEstado.length === 1) {
+            ESTADOS_POR_TOMAR.forEach(id => estados.add(id));
+            if (!params.has('owner')) params.set('owner', 'sin_asignar');
+        } else {
+            estados.add(ESTADO_SIN_RESPONDER);
+        }
+    }
+    if (estados.size) params.set('estado', Array.from(estados).join(','));
+
+    return params;
+}
+
+/**
+ * Recarga la lista aplicando los filtros en el servidor y luego la búsqueda
+ * por texto (local) sobre lo recibido.
+ */
+async function recargarTicketsConFiltros() {
+    await cargarTicketsReales();
+    if (typeof applyAllFilters === 'function') {
+        applyAllFilters();
+    }
+}
+
+window.recargarTicketsConFiltros = recargarTicketsConFiltros;
+
 // ============================================
 // FUNCIÓN PRINCIPAL: Cargar Tickets Reales
 // ============================================
@@ -302,9 +374,11 @@ async function cargarTicketsReales() {
         syncTicketOrderSelects(order);
 
         let apiUrl = `/tickets?limit=50&offset=0&order=${encodeURIComponent(order)}`;
-        // Check inline date filters and add to query if provided
-            // No date filters here (kept out by design)
-            try {} catch (e) {}
+        // Filtros del panel: se resuelven en el servidor para que apliquen a todas las páginas
+        const filtrosServidor = obtenerFiltrosServidor();
+        if (filtrosServidor.toString()) {
+            apiUrl += `&${filtrosServidor.toString()}`;
+        }
         console.log('📡 Llamando a:', apiUrl);
         
         // Usar apiRequest de auth.js que incluye headers de autenticación
@@ -1580,6 +1654,17 @@ function _getAdjuntoIconClassByFilename(filename) {
     return { icon: 'bi-file-earmark', color: 'text-muted' };
 }
 
+// Las descargas de adjuntos y del ZIP usan un enlace firmado de corta duración (POST .../enlace):
+// el <a download> queda como enlace normal y la descarga la hace el navegador
+// (Range/reanudación, X-Accel, redirect a S3), sin acumular el archivo en memoria.
+async function prepararEnlaceDescarga(link) {
+    const data = await apiRequest(link.dataset.enlace, { method: 'POST' });
+    if (!data || !data.success || !data.url) throw new Error((data && data.error) || 'Sin enlace de descarga');
+    link.href = data.url;
+    // Renovar un poco antes de que venza
+    link.dataset.vence = String(Date.now() + Math.max(0, (data.expira_en || 0) - 30) * 1000);
+}
+
 async function cargarAdjuntosTicket(idTicket) {
     const section = document.getElementById('ticketAdjuntosSection');
     const grid = document.getElementById('ticketAdjuntosGrid');
@@ -1587,6 +1672,23 @@ async function cargarAdjuntosTicket(idTicket) {
 
     if (!section || !grid || !empty) return;
 
+    if (!grid.dataset.boundDescarga) {
+        grid.dataset.boundDescarga = '1';
+        grid.addEventListener('click', async (ev) => {
+            const link = ev.target.closest('a[data-enlace]');
+            // Con el enlace firmado vigente la descarga sigue su curso normal
+            if (!link || Number(link.dataset.vence || 0) > Date.now()) return;
+            ev.preventDefault();
+            try {
+                await prepararEnlaceDescarga(link);
+                link.click();
+            } catch (e) {
+                console.warn('⚠️ Error descargando adjunto:', e);
+                if (typeof showToast === 'function') showToast('❌ No se pudo descargar el adjunto', 'warning');
+            }
+        });
+    }
+
     try {
         const data = await apiRequest(`/tickets/${idTicket}/adjuntos`);
         if (!data || !data.success) {
@@ -1609,18 +1711,24 @@ async function cargarAdjuntosTicket(idTicket) {
             const nombre = a.nom_adj || 'archivo';
             const meta = _getAdjuntoIconClassByFilename(nombre);
 
-            // Descargar por endpoint del backend (sin auth)
+            // El href se reemplaza por el enlace firmado al hacer clic (ver prepararEnlaceDescarga)
             const downloadUrl = `/api/adjuntos/${id}/download`;
 
             return `
                 <div class="col-4">
-                    <a class="attachment-item text-decoration-none" href="${downloadUrl}" target="_blank" rel="noopener">
+                    <a class="attachment-item text-decoration-none" href="${downloadUrl}" download="${escapeHtml(nombre)}" data-enlace="/adjuntos/${id}/enlace">
                         <i class="bi ${meta.icon} ${meta.color}"></i>
                         <small class="d-block text-truncate">${escapeHtml(nombre)}</small>
                     </a>
                 </div>
             `;
-        }).join('');
+        }).join('') + (adjuntos.length > 1 ? `
+                <div class="col-12">
+                    <a class="small text-decoration-none" href="/api/tickets/${idTicket}/adjuntos.zip" download="ticket_${idTicket}_adjuntos.zip" data-enlace="/tickets/${idTicket}/adjuntos.zip/enlace">
+                        <i class="bi bi-file-earmark-zip"></i> Descargar todos (.zip)
+                    </a>
+                </div>
+            ` : '');
     } catch (e) {
         console.warn('⚠️ Error cargando adjuntos:', e);
         grid.innerHTML = '';
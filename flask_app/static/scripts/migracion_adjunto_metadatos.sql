@@ -0,0 +1,30 @@
+-- Migración: metadatos de adjuntos (tamaño, tipo MIME, SHA-256) y GC de archivos
+-- Fecha: 2026-10-19
+-- Base: sistema_ticket_recrear
+--
+-- Importante:
+-- - Los adjuntos nuevos guardan tamano/mime/sha256 al escribirse (subida directa,
+--   por trozos, correo entrante y webhook). Las filas anteriores quedan en NULL;
+--   se completan con: python scripts/completar_metadatos_adjuntos.py
+-- - El GC (flask_app/services/limpieza_adjuntos.py) borra el archivo de los
+--   adjuntos eliminados tras ADJUNTOS_GC_GRACIA_DIAS y deja la fila con ruta = NULL.
+-- - ix_adjunto_ruta sirve a la detección de huérfanos (ruta IN (...)); las claves
+--   caben en el prefijo de 100 caracteres.
+-- - ALTER TABLE con ALGORITHM=INPLACE no bloquea escrituras en MySQL 8.
+
+USE `sistema_ticket_recrear`;
+
+ALTER TABLE adjunto
+  ADD COLUMN tamano BIGINT UNSIGNED NULL DEFAULT NULL AFTER ruta,
+  ADD COLUMN mime VARCHAR(127) NULL DEFAULT NULL AFTER tamano,
+  ADD COLUMN sha256 CHAR(64) NULL DEFAULT NULL AFTER mime,
+  ALGORITHM=INPLACE, LOCK=NONE;
+
+ALTER TABLE adjunto
+  ADD INDEX ix_adjunto_deleted (deleted_at),
+  ADD INDEX ix_adjunto_ruta (ruta(100)),
+  ALGORITHM=INPLACE, LOCK=NONE;
+
+ALTER TABLE adjunto_subida
+  ADD INDEX ix_adjunto_subida_ruta (ruta(100)),
+  ALGORITHM=INPLACE, LOCK=NONE;
@@ -0,0 +1,23 @@
+-- Migración: variante optimizada para web de las imágenes adjuntas
+-- Fecha: 2026-10-19
+-- Base: sistema_ticket_recrear
+--
+-- Importante:
+-- - La variante la genera flask_app/services/optimizacion_imagenes.py en segundo
+--   plano; el original (ruta) no se modifica.
+-- - tamano_optimizado NOT NULL indica que la imagen ya se procesó. Si además
+--   ruta_optimizada es NULL, la variante no ahorraba lo suficiente y se sirve el original.
+-- - Las imágenes anteriores se procesan con: python scripts/optimizar_imagenes_adjuntos.py
+-- - ix_adjunto_ruta_optimizada sirve a la detección de huérfanos del GC.
+-- - ALTER TABLE con ALGORITHM=INPLACE no bloquea escrituras en MySQL 8.
+
+USE `sistema_ticket_recrear`;
+
+ALTER TABLE adjunto
+  ADD COLUMN ruta_optimizada VARCHAR(500) NULL DEFAULT NULL AFTER sha256,
+  ADD COLUMN tamano_optimizado BIGINT UNSIGNED NULL DEFAULT NULL AFTER ruta_optimizada,
+  ALGORITHM=INPLACE, LOCK=NONE;
+
+ALTER TABLE adjunto
+  ADD INDEX ix_adjunto_ruta_optimizada (ruta_optimizada(100)),
+  ALGORITHM=INPLACE, LOCK=NONE;
@@ -0,0 +1,28 @@
+-- Migración: subidas de adjuntos por trozos (reanudables)
+-- Fecha: 2026-10-19
+-- Base: sistema_ticket_recrear
+--
+-- Importante:
+-- - Una fila por subida en curso. `ruta` es la ubicación definitiva del
+--   archivo; los trozos se escriben ahí directamente y `recibido` indica
+--   cuántos bytes están confirmados (offset para reanudar).
+-- - Al completar, la fila se borra y se inserta el adjunto en la misma transacción.
+-- - Las subidas sin actividad por ADJUNTOS_SUBIDA_EXPIRA_HORAS se descartan
+--   (fila y archivo parcial) desde flask_app/services/limpieza_adjuntos.py.
+
+USE `sistema_ticket_recrear`;
+
+CREATE TABLE IF NOT EXISTS adjunto_subida (
+  id_subida CHAR(32) NOT NULL,
+  id_msg INT NOT NULL,
+  id_operador INT NOT NULL,
+  nom_adj VARCHAR(100) NOT NULL,
+  ruta VARCHAR(500) NOT NULL,
+  tamano BIGINT UNSIGNED NOT NULL,
+  recibido BIGINT UNSIGNED NOT NULL DEFAULT 0,
+  creado_en DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP,
+  actualizado_en DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP,
+  PRIMARY KEY (id_subida),
+  KEY ix_adjunto_subida_actualizado (actualizado_en),
+  CONSTRAINT fk_adjunto_subida_mensaje FOREIGN KEY (id_msg) REFERENCES mensaje (id_msg) ON DELETE CASCADE
+) ENGINE = InnoDB;
@@ -0,0 +1,30 @@
+-- Migración: subidas por trozos sobre S3 con multipart upload
+-- Fecha: 2026-10-19
+-- Base: sistema_ticket_recrear
+--
+-- Importante:
+-- - Con ADJUNTOS_BACKEND=s3 cada subida abre un multipart upload
+--   (id_multipart) y cada trozo confirmado es una parte; su ETag queda en
+--   adjunto_subida_parte. Ningún trozo pasa por el disco del nodo, así que
+--   cualquier nodo puede recibir cualquier trozo.
+-- - `partes` es el número de la última parte confirmada; el siguiente trozo
+--   se sube como partes + 1.
+-- - Con almacenamiento local id_multipart queda NULL y no hay filas de partes.
+-- - Si el mensaje se borra, la fila cae en cascada sin abortar el multipart:
+--   configurar en el bucket una regla de ciclo de vida
+--   AbortIncompleteMultipartUpload (p. ej. 2 días).
+
+USE `sistema_ticket_recrear`;
+
+ALTER TABLE adjunto_subida
+  ADD COLUMN id_multipart VARCHAR(1024) NULL AFTER ruta,
+  ADD COLUMN partes INT UNSIGNED NOT NULL DEFAULT 0 AFTER recibido;
+
+CREATE TABLE IF NOT EXISTS adjunto_subida_parte (
+  id_subida CHAR(32) NOT NULL,
+  numero INT UNSIGNED NOT NULL,
+  etag VARCHAR(100) NOT NULL,
+  tamano BIGINT UNSIGNED NOT NULL,
+  PRIMARY KEY (id_subida, numero),
+  CONSTRAINT fk_adjunto_subida_parte_subida FOREIGN KEY (id_subida) REFERENCES adjunto_subida (id_subida) ON DELETE CASCADE
+) ENGINE = InnoDB;
@@ -0,0 +1,34 @@
+-- Migración: texto extraído de adjuntos para la búsqueda (GET /api/tickets/search)
+-- Fecha: 2026-10-19
+-- Base: sistema_ticket_recrear
+--
+-- Importante:
+-- - flask_app/services/extraccion_texto.py llena la tabla en segundo plano al
+--   registrar cada adjunto (pdf, docx, xlsx, pptx, odt, ods, txt, csv). Para los
+--   adjuntos existentes: python scripts/extraer_texto_adjuntos.py
+-- - El texto se recorta a TEXTO_MAX_KB al extraerlo. La tabla usa
+--   ROW_FORMAT=COMPRESSED: InnoDB comprime las páginas y el índice FULLTEXT
+--   sigue funcionando (una columna comprimida por la aplicación no se podría indexar).
+--   Requiere innodb_file_per_table=ON (default en MySQL 8).
+-- - id_ticket se copia del mensaje para que la rama de búsqueda no necesite joins.
+-- - Con la collation utf8mb4_0900_ai_ci la búsqueda ignora acentos y mayúsculas.
+
+USE `sistema_ticket_recrear`;
+
+CREATE TABLE IF NOT EXISTS adjunto_texto (
+  id_adj INT NOT NULL,
+  id_ticket INT NOT NULL,
+  texto MEDIUMTEXT NOT NULL,
+  estado VARCHAR(10) NOT NULL,
+  caracteres INT UNSIGNED NOT NULL DEFAULT 0,
+  extraido_en DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP,
+  PRIMARY KEY (id_adj),
+  KEY ix_adjunto_texto_ticket (id_ticket),
+  FULLTEXT KEY ft_adjunto_texto (texto),
+  CONSTRAINT fk_adjunto_texto_adjunto FOREIGN KEY (id_adj) REFERENCES adjunto (id_adj) ON DELETE CASCADE
+) ENGINE = InnoDB ROW_FORMAT = COMPRESSED KEY_BLOCK_SIZE = 8;
+
+-- Verificación opcional:
+-- SELECT estado, COUNT(*), SUM(caracteres) FROM adjunto_texto GROUP BY estado;
+-- EXPLAIN SELECT id_ticket FROM adjunto_texto
+--   WHERE MATCH(texto) AGAINST ('+factura*' IN BOOLEAN MODE);   -- type = fulltext
@@ -0,0 +1,55 @@
+-- Migración: consultas de auditoría sargables y paginadas por cursor (GET /api/admin/auditoria)
+-- Fecha: 2026-10-19
+-- Base: sistema_ticket_recrear
+--
+-- Importante:
+-- - accion_norm es una columna generada VIRTUAL (LOWER(TRIM(accion))): agregarla
+--   no reescribe la tabla; el índice sí materializa sus valores.
+-- - AuditoriaModel.listar filtra por rangos de h.fecha y por h.accion_norm, y
+--   pagina por keyset sobre (fecha, id_historial_ticket).
+-- - auditoria_accion es el catálogo de acciones por (depto, operador) que usa
+--   GET /api/admin/auditoria/acciones. Lo mantiene el job de rollups (fuente
+--   'auditoria_acciones' en rollup_marca); el backfill de abajo lo deja al día
+--   hasta el máximo id actual. Requiere migracion_rollup_ticket_stats_diario.sql.
+
+USE `sistema_ticket_recrear`;
+
+ALTER TABLE historial_acciones_ticket
+  ADD COLUMN accion_norm VARCHAR(100) GENERATED ALWAYS AS (LOWER(TRIM(accion))) VIRTUAL;
+
+ALTER TABLE historial_acciones_ticket
+  ADD INDEX ix_historial_fecha_id (fecha, id_historial_ticket),
+  ADD INDEX ix_historial_accion_norm_fecha (accion_norm, fecha, id_historial_ticket),
+  ADD INDEX ix_historial_operador_fecha (id_operador, fecha, id_historial_ticket),
+  ALGORITHM=INPLACE, LOCK=NONE;
+
+CREATE TABLE IF NOT EXISTS auditoria_accion (
+  id_depto INT NOT NULL DEFAULT 0,      -- 0 = ticket sin departamento
+  id_operador INT NOT NULL DEFAULT 0,   -- 0 = acción sin operador (usuario externo / sistema)
+  accion_norm VARCHAR(100) NOT NULL,
+  accion VARCHAR(100) NOT NULL,         -- forma para mostrar
+  ultima_fecha DATETIME NOT NULL,
+  PRIMARY KEY (id_depto, id_operador, accion_norm),
+  INDEX ix_auditoria_accion_operador (id_operador, accion_norm)
+) ENGINE = InnoDB;
+
+-- Backfill del catálogo y marca del job en el máximo id procesado
+SET @max_historial = (SELECT COALESCE(MAX(id_historial_ticket), 0) FROM historial_acciones_ticket);
+
+INSERT INTO auditoria_accion (id_depto, id_operador, accion_norm, accion, ultima_fecha)
+SELECT COALESCE(t.id_depto, 0), COALESCE(h.id_operador, 0), h.accion_norm, MIN(h.accion), MAX(h.fecha)
+FROM historial_acciones_ticket h
+INNER JOIN ticket t ON t.id_ticket = h.id_ticket
+WHERE h.id_historial_ticket <= @max_historial
+  AND h.accion_norm <> ''
+GROUP BY 1, 2, 3
+ON DUPLICATE KEY UPDATE ultima_fecha = GREATEST(ultima_fecha, VALUES(ultima_fecha));
+
+INSERT INTO rollup_marca (nombre, ultimo_id, visto_id, actualizado_en)
+VALUES ('auditoria_acciones', @max_historial, @max_historial, NOW())
+ON DUPLICATE KEY UPDATE ultimo_id = VALUES(ultimo_id), visto_id = VALUES(visto_id), actualizado_en = NOW();
+
+-- Verificación opcional:
+-- EXPLAIN SELECT h.id_historial_ticket FROM historial_acciones_ticket h
+--   WHERE h.accion_norm = 'cambio de estado' AND h.fecha >= '2026-01-01'
+--   ORDER BY h.fecha DESC, h.id_historial_ticket DESC LIMIT 51;   -- key = ix_historial_accion_norm_fecha, sin filesort
@@ -0,0 +1,56 @@
+-- Migración: calendarios laborales por departamento para los plazos de SLA
+-- Fecha: 2026-10-19
+-- Base: sistema_ticket_recrear
+--
+-- Importante:
+-- - Los plazos de SLA (ticket.vence_*) se cuentan en minutos hábiles según el
+--   calendario del departamento del ticket (flask_app/utils/calendario.py).
+-- - Un departamento sin calendario (id_calendario NULL) atiende 24/7: es el
+--   comportamiento previo, así que aplicar la migración no cambia nada hasta
+--   asignar calendarios.
+-- - dia_semana: 0 = lunes ... 6 = domingo. hora_fin admite '24:00:00'.
+-- - Los calendarios se leen del caché de catálogos (CATALOGOS_CACHE_TTL); tras
+--   editar estas tablas a mano, esperar el TTL o reiniciar la app.
+
+USE `sistema_ticket_recrear`;
+
+CREATE TABLE IF NOT EXISTS calendario (
+  id_calendario INT NOT NULL AUTO_INCREMENT,
+  nombre VARCHAR(100) NOT NULL,
+  activo TINYINT NOT NULL DEFAULT 1,
+  PRIMARY KEY (id_calendario)
+) ENGINE = InnoDB;
+
+CREATE TABLE IF NOT EXISTS calendario_tramo (
+  id_calendario INT NOT NULL,
+  dia_semana TINYINT NOT NULL,
+  hora_inicio TIME NOT NULL,
+  hora_fin TIME NOT NULL,
+  PRIMARY KEY (id_calendario, dia_semana, hora_inicio),
+  CONSTRAINT fk_calendario_tramo_calendario FOREIGN KEY (id_calendario) REFERENCES calendario (id_calendario)
+) ENGINE = InnoDB;
+
+CREATE TABLE IF NOT EXISTS calendario_feriado (
+  id_calendario INT NOT NULL,
+  fecha DATE NOT NULL,
+  descripcion VARCHAR(100) NULL,
+  PRIMARY KEY (id_calendario, fecha),
+  CONSTRAINT fk_calendario_feriado_calendario FOREIGN KEY (id_calendario) REFERENCES calendario (id_calendario)
+) ENGINE = InnoDB;
+
+ALTER TABLE departamento
+  ADD COLUMN id_calendario INT NULL DEFAULT NULL,
+  ADD CONSTRAINT fk_departamento_calendario FOREIGN KEY (id_calendario) REFERENCES calendario (id_calendario);
+
+-- Calendario de ejemplo: oficina de lunes a viernes, 09:00 a 18:00 (no se asigna)
+INSERT INTO calendario (nombre) VALUES ('Oficina L-V 09:00-18:00');
+SET @id_oficina = LAST_INSERT_ID();
+INSERT INTO calendario_tramo (id_calendario, dia_semana, hora_inicio, hora_fin) VALUES
+  (@id_oficina, 0, '09:00:00', '18:00:00'),
+  (@id_oficina, 1, '09:00:00', '18:00:00'),
+  (@id_oficina, 2, '09:00:00', '18:00:00'),
+  (@id_oficina, 3, '09:00:00', '18:00:00'),
+  (@id_oficina, 4, '09:00:00', '18:00:00');
+
+-- Para asignarlo a un departamento:
+-- UPDATE departamento SET id_calendario = @id_oficina WHERE id_depto = 1;
@@ -0,0 +1,51 @@
+-- Migración: filtros y orden del listado de tickets en el servidor (GET /api/tickets)
+-- Fecha: 2026-10-19
+-- Base: sistema_ticket_recrear
+--
+-- Importante:
+-- - Agrega ticket.fecha_ultima_actividad (último mensaje, cambio de estado,
+--   de prioridad o de asignación hecho por un operador o usuario). La mantienen
+--   MensajeModel.crear_mensaje / crear_desde_email y los cambios de estado,
+--   prioridad y Owner de TicketModel (también los masivos); los tickets nuevos
+--   toman el valor por defecto (= fecha de creación).
+-- - Los índices cubren las combinaciones comunes del listado. El plan se puede
+--   verificar con: python scripts/explain_filtros_tickets.py
+-- - ALTER TABLE con ALGORITHM=INPLACE no bloquea escrituras en MySQL 8.
+
+USE `sistema_ticket_recrear`;
+
+ALTER TABLE ticket
+  ADD COLUMN fecha_ultima_actividad DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP AFTER fecha_resolucion;
+
+-- Backfill: último mensaje no eliminado, o la fecha de creación si no tiene mensajes
+UPDATE ticket t
+LEFT JOIN (
+  SELECT id_ticket, MAX(fecha_envio) AS ultima
+  FROM mensaje
+  WHERE deleted_at IS NULL
+  GROUP BY id_ticket
+) m ON m.id_ticket = t.id_ticket
+SET t.fecha_ultima_actividad = GREATEST(t.fecha_ini, COALESCE(m.ultima, t.fecha_ini));
+
+-- Listado sin filtros (admin): deleted_at IS NULL + ORDER BY fecha_ini se resuelve
+-- recorriendo el índice, sin filesort, y el LIMIT corta temprano.
+ALTER TABLE ticket
+  ADD INDEX ix_ticket_listado_fecha (deleted_at, fecha_ini, id_ticket),
+  ADD INDEX ix_ticket_listado_actividad (deleted_at, fecha_ultima_actividad, id_ticket),
+  -- Filtros por estado / departamento (los más usados), con orden por fecha
+  ADD INDEX ix_ticket_estado_fecha (id_estado, deleted_at, fecha_ini),
+  ADD INDEX ix_ticket_depto_estado_fecha (id_depto, id_estado, fecha_ini),
+  ADD INDEX ix_ticket_emisor_fecha (id_operador_emisor, fecha_ini),
+  ALGORITHM=INPLACE, LOCK=NONE;
+
+-- Owner actual: lo usan el scope de visibilidad, el filtro `owner` y las
+-- subconsultas de la lista (id_operador / operador_nombre)
+ALTER TABLE ticket_operador
+  ADD INDEX ix_ticket_operador_ticket_rol (id_ticket, rol, fecha_desasignacion, id_operador),
+  ADD INDEX ix_ticket_operador_operador_rol (id_operador, rol, fecha_desasignacion, id_ticket),
+  ALGORITHM=INPLACE, LOCK=NONE;
+
+-- Verificación opcional:
+-- EXPLAIN SELECT id_ticket FROM ticket t
+--   WHERE t.deleted_at IS NULL AND t.id_estado = 2
+--   ORDER BY t.fecha_ini DESC LIMIT 50;      -- key = ix_ticket_estado_fecha, sin "Using filesort"
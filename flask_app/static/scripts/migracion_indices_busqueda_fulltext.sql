@@ -0,0 +1,28 @@
+-- Migración: índices FULLTEXT para la búsqueda de tickets (GET /api/tickets/search)
+-- Fecha: 2026-10-19
+-- Base: sistema_ticket_recrear
+--
+-- Importante:
+-- - TicketModel.buscar usa MATCH ... AGAINST (... IN BOOLEAN MODE) sobre estas
+--   columnas; sin estos índices la consulta falla (error 1191).
+-- - InnoDB reconstruye la tabla al crear el primer FULLTEXT (agrega FTS_DOC_ID).
+--   En tablas grandes (mensaje) conviene ejecutarlo fuera de horario.
+-- - innodb_ft_min_token_size (default 3) define el largo mínimo de término;
+--   el buscador ya descarta términos más cortos.
+-- - Con la collation utf8mb4_0900_ai_ci la búsqueda ignora acentos y mayúsculas.
+
+USE `sistema_ticket_recrear`;
+
+ALTER TABLE ticket
+  ADD FULLTEXT INDEX ft_ticket_titulo_descripcion (titulo, descripcion);
+
+ALTER TABLE mensaje
+  ADD FULLTEXT INDEX ft_mensaje_contenido (contenido);
+
+ALTER TABLE usuario_ext
+  ADD FULLTEXT INDEX ft_usuario_ext_nombre_email (nombre, email);
+
+-- Verificación opcional:
+-- SHOW INDEX FROM mensaje WHERE Index_type = 'FULLTEXT';
+-- EXPLAIN SELECT id_ticket FROM mensaje
+--   WHERE MATCH(contenido) AGAINST ('+reserva*' IN BOOLEAN MODE);   -- type = fulltext
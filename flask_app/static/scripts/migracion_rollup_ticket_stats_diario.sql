@@ -0,0 +1,48 @@
+-- Migración: tablas de rollup diario para reportes (GET /api/reportes/tickets)
+-- Fecha: 2026-10-19
+-- Base: sistema_ticket_recrear
+--
+-- Importante:
+-- - ticket_stats_diario guarda contadores por día y dimensión. La mantiene el
+--   job incremental ReporteModel.actualizar_rollups (hilo en run.py o
+--   scripts/actualizar_rollups.py) a partir de ticket e historial_acciones_ticket.
+-- - rollup_marca guarda hasta qué id se procesó cada fuente (high-water mark).
+--   Para reconstruir desde cero: python scripts/actualizar_rollups.py --reconstruir
+-- - Las dimensiones se toman del estado actual del ticket (depto, club,
+--   prioridad, canal) al momento de procesar el evento.
+-- - id_depto / id_canal = 0 representan "sin departamento" / "sin canal".
+
+USE `sistema_ticket_recrear`;
+
+CREATE TABLE IF NOT EXISTS ticket_stats_diario (
+  fecha DATE NOT NULL,
+  id_depto INT NOT NULL DEFAULT 0,
+  id_club INT NOT NULL,
+  id_prioridad INT NOT NULL,
+  id_canal INT NOT NULL DEFAULT 0,
+  creados INT NOT NULL DEFAULT 0,
+  resueltos INT NOT NULL DEFAULT 0,
+  cerrados INT NOT NULL DEFAULT 0,
+  reabiertos INT NOT NULL DEFAULT 0,
+  primeras_respuestas INT NOT NULL DEFAULT 0,
+  t_primera_respuesta_sum BIGINT NOT NULL DEFAULT 0,  -- segundos
+  t_resolucion_sum BIGINT NOT NULL DEFAULT 0,         -- segundos (sobre resueltos)
+  mensajes_operador INT NOT NULL DEFAULT 0,
+  mensajes_usuario INT NOT NULL DEFAULT 0,
+  PRIMARY KEY (fecha, id_depto, id_club, id_prioridad, id_canal),
+  INDEX ix_stats_depto_fecha (id_depto, fecha)
+) ENGINE = InnoDB;
+
+CREATE TABLE IF NOT EXISTS rollup_marca (
+  nombre VARCHAR(50) NOT NULL,
+  ultimo_id BIGINT NOT NULL DEFAULT 0,   -- último id ya agregado
+  visto_id BIGINT NOT NULL DEFAULT 0,    -- máximo id observado en la corrida anterior
+  actualizado_en DATETIME NULL DEFAULT NULL,
+  PRIMARY KEY (nombre)
+) ENGINE = InnoDB;
+
+INSERT IGNORE INTO rollup_marca (nombre) VALUES ('ticket'), ('historial');
+
+-- El job filtra historial por rango de id y tipo de acción
+ALTER TABLE historial_acciones_ticket
+  ADD INDEX ix_historial_ticket_accion (id_ticket, accion, id_historial_ticket);
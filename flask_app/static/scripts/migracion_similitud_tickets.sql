@@ -0,0 +1,42 @@
+-- Migración: firmas MinHash/LSH para detectar correos casi duplicados
+-- Fecha: 2026-10-19
+-- Base: sistema_ticket_recrear
+--
+-- Importante:
+-- - ticket_minhash guarda la firma MinHash (64 x BIGINT, 512 bytes) del asunto
+--   y la descripción de cada ticket.
+-- - ticket_lsh_banda guarda las 16 bandas hasheadas de la firma; la PK
+--   (banda, hash_banda, id_ticket) permite encontrar candidatos por igualdad
+--   de banda sin recorrer los tickets (flask_app/services/similitud.py).
+-- - ticket_similar registra los tickets marcados como probable duplicado.
+-- - Para indexar los tickets abiertos existentes: python scripts/indexar_similitud.py
+
+USE `sistema_ticket_recrear`;
+
+CREATE TABLE IF NOT EXISTS ticket_minhash (
+  id_ticket INT NOT NULL,
+  firma VARBINARY(512) NOT NULL,
+  actualizado_en DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP,
+  PRIMARY KEY (id_ticket),
+  CONSTRAINT fk_ticket_minhash_ticket FOREIGN KEY (id_ticket) REFERENCES ticket (id_ticket) ON DELETE CASCADE
+) ENGINE = InnoDB;
+
+CREATE TABLE IF NOT EXISTS ticket_lsh_banda (
+  banda TINYINT UNSIGNED NOT NULL,
+  hash_banda BIGINT UNSIGNED NOT NULL,
+  id_ticket INT NOT NULL,
+  PRIMARY KEY (banda, hash_banda, id_ticket),
+  KEY ix_ticket_lsh_banda_ticket (id_ticket),
+  CONSTRAINT fk_ticket_lsh_banda_ticket FOREIGN KEY (id_ticket) REFERENCES ticket (id_ticket) ON DELETE CASCADE
+) ENGINE = InnoDB;
+
+CREATE TABLE IF NOT EXISTS ticket_similar (
+  id_ticket INT NOT NULL,
+  id_ticket_similar INT NOT NULL,
+  similitud DECIMAL(4,3) NOT NULL,
+  fecha DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP,
+  PRIMARY KEY (id_ticket, id_ticket_similar),
+  KEY ix_ticket_similar_similar (id_ticket_similar),
+  CONSTRAINT fk_ticket_similar_ticket FOREIGN KEY (id_ticket) REFERENCES ticket (id_ticket) ON DELETE CASCADE,
+  CONSTRAINT fk_ticket_similar_similar FOREIGN KEY (id_ticket_similar) REFERENCES ticket (id_ticket) ON DELETE CASCADE
+) ENGINE = InnoDB;
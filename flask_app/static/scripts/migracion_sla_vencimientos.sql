@@ -0,0 +1,58 @@
+-- Migración: vencimientos de SLA por ticket y eventos disparados
+-- Fecha: 2026-10-19
+-- Base: sistema_ticket_recrear
+--
+-- Importante:
+-- - ticket.vence_primera_respuesta / vence_resolucion se fijan al crear el
+--   ticket (SLAModel.fijar_vencimientos) y vence_resolucion se recalcula al
+--   reabrir (SLAModel.reiniciar_resolucion).
+-- - El programador de SLA (flask_app/services/sla_scheduler.py) mantiene en
+--   memoria los próximos vencimientos y se resincroniza con los índices por
+--   vencimiento, sin recorrer toda la tabla ticket.
+-- - sla_evento garantiza que cada aviso/incumplimiento se dispare una sola vez
+--   por vencimiento, aunque haya varios procesos con el programador activo.
+
+USE `sistema_ticket_recrear`;
+
+ALTER TABLE ticket
+  ADD COLUMN vence_primera_respuesta DATETIME NULL DEFAULT NULL AFTER fecha_primera_respuesta,
+  ADD COLUMN vence_resolucion DATETIME NULL DEFAULT NULL AFTER vence_primera_respuesta,
+  ADD INDEX ix_ticket_vence_primera_respuesta (vence_primera_respuesta),
+  ADD INDEX ix_ticket_vence_resolucion (vence_resolucion);
+
+-- Backfill: tickets abiertos según su SLA actual
+UPDATE ticket t
+INNER JOIN sla s ON s.id_sla = t.id_sla
+SET t.vence_primera_respuesta = DATE_ADD(t.fecha_ini, INTERVAL s.tiempo_primera_respuesta_min MINUTE),
+    t.vence_resolucion = DATE_ADD(t.fecha_ini, INTERVAL s.tiempo_resolucion_min MINUTE)
+WHERE t.id_estado NOT IN (3, 4)
+  AND t.deleted_at IS NULL;
+
+-- Tickets ya respondidos por un operador (mensaje público) antes de esta migración
+UPDATE ticket t
+INNER JOIN (
+  SELECT id_ticket, MIN(fecha_envio) AS primera
+  FROM mensaje
+  WHERE remitente_tipo = 'Operador'
+    AND tipo_mensaje = 'Publico'
+    AND deleted_at IS NULL
+  GROUP BY id_ticket
+) m ON m.id_ticket = t.id_ticket
+SET t.fecha_primera_respuesta = m.primera
+WHERE t.fecha_primera_respuesta IS NULL;
+
+CREATE TABLE IF NOT EXISTS sla_evento (
+  id_sla_evento BIGINT NOT NULL AUTO_INCREMENT,
+  id_ticket INT NOT NULL,
+  tipo ENUM('aviso_primera_respuesta', 'incumplimiento_primera_respuesta',
+            'aviso_resolucion', 'incumplimiento_resolucion') NOT NULL,
+  vence DATETIME NOT NULL,
+  fecha DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP,
+  PRIMARY KEY (id_sla_evento),
+  UNIQUE INDEX ux_sla_evento_ticket_tipo_vence (id_ticket, tipo, vence),
+  CONSTRAINT fk_sla_evento_ticket FOREIGN KEY (id_ticket) REFERENCES ticket (id_ticket)
+) ENGINE = InnoDB;
+
+-- Verificación opcional:
+-- EXPLAIN SELECT id_ticket FROM ticket
+--   WHERE vence_resolucion <= NOW() + INTERVAL 2 HOUR;   -- key = ix_ticket_vence_resolucion
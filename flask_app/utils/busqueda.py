@@ -0,0 +1,101 @@
+"""
+Utilidades de búsqueda de texto: normalización de la consulta del usuario a
+una expresión FULLTEXT en modo booleano y resaltado de fragmentos.
+"""
+import html
+import re
+import unicodedata
+from typing import NamedTuple, Optional
+
+# InnoDB ignora tokens más cortos que innodb_ft_min_token_size (3 por defecto)
+LARGO_MINIMO_TERMINO = 3
+MAX_TERMINOS = 8
+
+_RE_TERMINO = re.compile(r'\w+', re.UNICODE)
+_RE_ID_TICKET = re.compile(r'^#?(\d{1,10})$')
+_RE_EMAIL_PREFIJO = re.compile(r'^[\w.+-]+@[\w.-]*$', re.UNICODE)
+
+
+class ConsultaBusqueda(NamedTuple):
+    terminos: tuple           # términos normalizados (minúsculas)
+    expresion: str            # expresión para MATCH ... AGAINST (... IN BOOLEAN MODE)
+    id_ticket: Optional[int]  # "#123" o "123" busca además por número de ticket
+    email_prefijo: Optional[str]  # "juan@" o "juan@club.cl" busca por email
+
+
+def sin_acentos(texto):
+    """Quita acentos conservando la longitud (1 carácter de entrada -> 1 de salida)."""
+    return ''.join(unicodedata.normalize('NFD', c)[0] for c in texto)
+
+
+def preparar_consulta(q):
+    """
+    Convierte el texto del buscador en una ConsultaBusqueda.
+
+    Cada término se exige (+) y se busca por prefijo (*), así "reser pisc"
+    encuentra "reserva de piscina". Los operadores booleanos que escriba el
+    usuario se descartan para que no pueda armar expresiones inválidas.
+    """
+    q = (q or '').strip()
+
+    id_ticket = None
+    coincidencia = _RE_ID_TICKET.match(q)
+    if coincidencia:
+        id_ticket = int(coincidencia.group(1))
+
+    email_prefijo = q.lower() if _RE_EMAIL_PREFIJO.match(q) else None
+
+    terminos = []
+    for termino in _RE_TERMINO.findall(q.lower()):
+        if len(termino) < LARGO_MINIMO_TERMINO or termino in terminos:
+            continue
+        terminos.append(termino)
+        if len(terminos) >= MAX_TERMINOS:
+            break
+
+    expresion = ' '.join(f'+{t}*' for t in terminos)
+    return ConsultaBusqueda(tuple(terminos), expresion, id_ticket, email_prefijo)
+
+
+def resaltar(texto, terminos, ancho=160):
+    """
+    Fragmento de `texto` alrededor de la primera coincidencia, con HTML
+    escapado y las coincidencias envueltas en <mark>.
+
+    La comparación ignora mayúsculas y acentos; los términos se tratan como
+    prefijos de palabra, igual que en la expresión FULLTEXT.
+    """
+    if not texto:
+        return ''
+    texto = ' '.join(str(texto).split())
+    if not terminos:
+        return html.escape(texto[:ancho]) + ('…' if len(texto) > ancho else '')
+
+    patron = re.compile(
+        r'\b(?:' + '|'.join(re.escape(sin_acentos(t)) for t in terminos) + r')\w*',
+        re.IGNORECASE | re.UNICODE,
+    )
+    normalizado = sin_acentos(texto)
+    coincidencias = list(patron.finditer(normalizado))
+    if not coincidencias:
+        return html.escape(texto[:ancho]) + ('…' if len(texto) > ancho else '')
+
+    # Ventana centrada (aprox.) en la primera coincidencia
+    inicio = max(0, coincidencias[0].start() - ancho // 3)
+    fin = min(len(texto), inicio + ancho)
+    inicio = max(0, fin - ancho)
+
+    partes = ['…' if inicio > 0 else '']
+    cursor = inicio
+    for m in coincidencias:
+        if m.start() < inicio:
+            continue
+        if m.end() > fin:
+            break
+        partes.append(html.escape(texto[cursor:m.start()]))
+        partes.append('<mark>' + html.escape(texto[m.start():m.end()]) + '</mark>')
+        cursor = m.end()
+    partes.append(html.escape(texto[cursor:fin]))
+    if fin < len(texto):
+        partes.append('…')
+    return ''.join(partes)
@@ -0,0 +1,136 @@
+"""
+Caché local al proceso para datos que cambian muy poco (catálogos, reportes).
+
+Cada entrada guarda los datos, un ETag calculado sobre su contenido y el
+instante de carga. Las entradas se invalidan explícitamente desde los métodos
+de escritura de los modelos y, como respaldo para despliegues con varios
+procesos, expiran tras un TTL.
+"""
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+
+from flask import jsonify, request
+
+
+def calcular_etag(datos):
+    """ETag débil estable a partir del contenido serializado."""
+    crudo = json.dumps(datos, sort_keys=True, default=str, ensure_ascii=False)
+    return hashlib.sha1(crudo.encode('utf-8')).hexdigest()[:20]
+
+
+class CacheLocal:
+    """
+    Caché en memoria por nombre de entrada, segura para hilos.
+
+    La carga de una entrada corre fuera del lock global, con un lock por
+    nombre: los hilos que piden la misma entrada vencida esperan a una sola
+    carga y los que piden otras entradas no se bloquean mientras tanto.
+    """
+
+    def __init__(self, ttl_segundos=300, max_entradas=None):
+        self.ttl = ttl_segundos
+        # Tope de entradas para claves abiertas (p. ej. rangos de fechas); None = sin tope
+        self.max_entradas = max_entradas
+        self._lock = threading.Lock()
+        self._entradas = {}  # nombre -> (datos, etag, cargado_en)
+        self._cargas = {}    # nombre -> lock de la carga en curso
+        # Generación por nombre y global (invalidar sin nombres): una carga que
+        # empezó antes de invalidar su entrada no se guarda; las de otras
+        # entradas no se ven afectadas
+        self._generaciones = {}
+        self._generacion_global = 0
+
+    def _generacion(self, nombre):
+        return self._generacion_global, self._generaciones.get(nombre, 0)
+
+    def _vigente(self, nombre):
+        entrada = self._entradas.get(nombre)
+        if entrada is not None and time.monotonic() - entrada[2] <= self.ttl:
+            return entrada
+        return None
+
+    def obtener(self, nombre, cargador):
+        """
+        Retorna (datos, etag) de la entrada, cargándola con `cargador()` si no
+        existe o expiró.
+        """
+        entrada = self._vigente(nombre)
+        if entrada is not None:
+            return entrada[0], entrada[1]
+
+        with self._lock:
+            carga = self._cargas.setdefault(nombre, threading.Lock())
+        try:
+            with carga:
+                # Otro hilo pudo cargarla mientras esperábamos
+                entrada = self._vigente(nombre)
+                if entrada is not None:
+                    return entrada[0], entrada[1]
+
+                with self._lock:
+                    generacion = self._generacion(nombre)
+                datos = cargador()
+                if datos is None:
+                    datos = []
+                etag = calcular_etag(datos)
+                with self._lock:
+                    if generacion == self._generacion(nombre):
+                        self._entradas[nombre] = (datos, etag, time.monotonic())
+                        if self.max_entradas and len(self._entradas) > self.max_entradas:
+                            self._recortar()
+                return datos, etag
+        finally:
+            with self._lock:
+                if self._cargas.get(nombre) is carga:
+                    del self._cargas[nombre]
+
+    def _recortar(self):
+        """Quita las entradas vencidas y, si aún sobra, las más antiguas."""
+        ahora = time.monotonic()
+        for nombre in [n for n, e in self._entradas.items() if ahora - e[2] > self.ttl]:
+            del self._entradas[nombre]
+        exceso = len(self._entradas) - self.max_entradas
+        if exceso > 0:
+            for nombre in sorted(self._entradas, key=lambda n: self._entradas[n][2])[:exceso]:
+                del self._entradas[nombre]
+
+    def invalidar(self, *nombres):
+        """Elimina las entradas indicadas (todas si no se indica ninguna)."""
+        with self._lock:
+            if not nombres:
+                self._generacion_global += 1
+                self._generaciones.clear()
+                self._entradas.clear()
+                return
+            for nombre in nombres:
+                self._generaciones[nombre] = self._generaciones.get(nombre, 0) + 1
+                self._entradas.pop(nombre, None)
+
+
+cache_catalogos = CacheLocal(ttl_segundos=int(os.getenv('CATALOGOS_CACHE_TTL', 300)))
+
+CATALOGOS_MAX_AGE = int(os.getenv('CATALOGOS_MAX_AGE', 300))
+
+
+def invalidar_catalogo(*nombres):
+    """Invalida entradas del caché de catálogos. No falla nunca."""
+    try:
+        cache_catalogos.invalidar(*nombres)
+    except Exception:
+        logging.exception('No se pudo invalidar el caché de catálogos %s', nombres)
+
+
+def respuesta_cacheable(payload, etag, max_age=CATALOGOS_MAX_AGE):
+    """
+    Construye la respuesta JSON con ETag y Cache-Control. Si el cliente envía
+    un If-None-Match coincidente se responde 304 sin cuerpo.
+    """
+    response = jsonify(payload)
+    response.set_etag(etag)
+    response.headers['Cache-Control'] = f'private, max-age={int(max_age)}'
+    response.headers['Vary'] = 'Authorization'
+    return response.make_conditional(request)
@@ -0,0 +1,180 @@
+"""
+Calendario laboral para el cálculo de plazos de SLA.
+
+Un calendario son tramos semanales de atención (por día de la semana) más
+feriados. En vez de recorrer minuto a minuto o día a día, se precalcula una
+tabla con los tramos hábiles de un rango de fechas y los minutos hábiles
+acumulados al inicio de cada tramo. Con eso:
+
+- minutos_habiles(desde, hasta) es la diferencia de dos acumulados, y
+- sumar_minutos(inicio, minutos) es la búsqueda inversa del acumulado,
+
+ambas con bisect (O(log n)). La tabla se extiende sola si una consulta cae
+fuera del rango cubierto.
+"""
+import threading
+from bisect import bisect_left, bisect_right
+from datetime import date, datetime, time, timedelta
+from typing import NamedTuple
+
+MINUTOS_DIA = 24 * 60
+# Rango inicial de la tabla alrededor de hoy; se amplía bajo demanda
+DIAS_MARGEN = 400
+DIAS_EXTENSION = 365
+
+
+class Calendario:
+    """
+    Calendario laboral con tabla acumulada de minutos hábiles.
+
+    Args:
+        tramos: {dia_semana (0=lunes..6=domingo): [(inicio_min, fin_min), ...]}
+            en minutos desde medianoche (fin_min puede ser 1440). None = 24/7.
+        feriados: fechas (date) sin atención
+        nombre: etiqueta para logs
+    """
+
+    def __init__(self, tramos=None, feriados=(), nombre=''):
+        self.nombre = nombre
+        self.continuo = tramos is None and not feriados
+        self._tramos = self._normalizar(tramos)
+        self._feriados = frozenset(feriados or ())
+        if not any(self._tramos.values()):
+            raise ValueError(f'Calendario {nombre!r} sin tramos de atención')
+
+        self._lock = threading.Lock()
+        self._tabla = None
+
+    @staticmethod
+    def _normalizar(tramos):
+        """Ordena y fusiona los tramos de cada día."""
+        if tramos is None:
+            return {dia: [(0, MINUTOS_DIA)] for dia in range(7)}
+        normalizados = {}
+        for dia in range(7):
+            fusion = []
+            for inicio, fin in sorted(tramos.get(dia) or []):
+                inicio, fin = max(int(inicio), 0), min(int(fin), MINUTOS_DIA)
+                if fin <= inicio:
+                    continue
+                if fusion and inicio <= fusion[-1][1]:
+                    fusion[-1] = (fusion[-1][0], max(fusion[-1][1], fin))
+                else:
+                    fusion.append((inicio, fin))
+            normalizados[dia] = fusion
+        return normalizados
+
+    # ------------------------------------------------------------------
+    # Tabla acumulada
+    # ------------------------------------------------------------------
+
+    def _construir(self, desde, hasta):
+        """Tabla de tramos hábiles para los días [desde, hasta)."""
+        inicios, fines, acum, acum_fin = [], [], [], []
+        total = 0
+        dia = desde
+        offset = 0
+        while dia < hasta:
+            if dia not in self._feriados:
+                for inicio, fin in self._tramos[dia.weekday()]:
+                    if fines and fines[-1] == offset + inicio:
+                        # Contiguo al tramo anterior (p. ej. cruza medianoche): se fusiona
+                        fines[-1] = offset + fin
+                    else:
+                        inicios.append(offset + inicio)
+                        fines.append(offset + fin)
+                        acum.append(total)
+                        acum_fin.append(total)
+                    total += fin - inicio
+                    acum_fin[-1] = total
+            dia += timedelta(days=1)
+            offset += MINUTOS_DIA
+        return _Tabla(datetime.combine(desde, time()), desde, hasta, inicios, fines, acum, acum_fin)
+
+    def _asegurar(self, desde, hasta):
+        """Tabla que cubre al menos los días [desde, hasta); la amplía si hace falta."""
+        tabla = self._tabla
+        if tabla is not None and tabla.desde <= desde and hasta <= tabla.hasta:
+            return tabla
+        with self._lock:
+            tabla = self._tabla
+            if tabla is None:
+                hoy = date.today()
+                nuevo_desde = min(desde, hoy - timedelta(days=DIAS_MARGEN))
+                nuevo_hasta = max(hasta, hoy + timedelta(days=DIAS_MARGEN))
+            elif tabla.desde <= desde and hasta <= tabla.hasta:
+                return tabla
+            else:
+                nuevo_desde = desde - timedelta(days=DIAS_EXTENSION) if desde < tabla.desde else tabla.desde
+                nuevo_hasta = hasta + timedelta(days=DIAS_EXTENSION) if hasta > tabla.hasta else tabla.hasta
+            # La tabla se reemplaza completa: los lectores concurrentes siguen con la anterior
+            self._tabla = self._construir(nuevo_desde, nuevo_hasta)
+            return self._tabla
+
+    # ------------------------------------------------------------------
+    # API
+    # ------------------------------------------------------------------
+
+    def minutos_habiles(self, desde, hasta):
+        """Minutos hábiles entre dos instantes (negativo si hasta < desde)."""
+        if self.continuo:
+            return (hasta - desde).total_seconds() / 60.0
+        tabla = self._asegurar(min(desde, hasta).date(), max(desde, hasta).date() + timedelta(days=1))
+        return tabla.acumulado(hasta) - tabla.acumulado(desde)
+
+    def sumar_minutos(self, inicio, minutos):
+        """
+        Instante en que se cumplen `minutos` hábiles contados desde `inicio`
+        (con minutos negativos, hacia atrás).
+        """
+        if self.continuo:
+            return inicio + timedelta(minutes=minutos)
+        # Cota de días a cubrir según los minutos hábiles por semana
+        por_semana = sum(fin - ini for dia in self._tramos.values() for ini, fin in dia)
+        dias = int(abs(minutos) / por_semana * 7) + 8
+        if minutos >= 0:
+            tabla = self._asegurar(inicio.date(), inicio.date() + timedelta(days=dias))
+        else:
+            tabla = self._asegurar(inicio.date() - timedelta(days=dias), inicio.date() + timedelta(days=1))
+
+        while True:
+            objetivo = tabla.acumulado(inicio) + minutos
+            if objetivo < 0:
+                tabla = self._asegurar(tabla.desde - timedelta(days=DIAS_EXTENSION), tabla.hasta)
+                continue
+            resultado = tabla.instante(objetivo)
+            if resultado is not None:
+                return resultado
+            # Racha de feriados más allá de la cota
+            tabla = self._asegurar(tabla.desde, tabla.hasta + timedelta(days=DIAS_EXTENSION))
+
+
+class _Tabla(NamedTuple):
+    base: datetime      # medianoche del primer día cubierto
+    desde: date
+    hasta: date         # día siguiente al último cubierto
+    inicios: list       # inicio de cada tramo (minutos desde base)
+    fines: list
+    acum: list          # minutos hábiles antes de inicios[i]
+    acum_fin: list      # minutos hábiles al llegar a fines[i]
+
+    def acumulado(self, momento):
+        """Minutos hábiles entre base y `momento`."""
+        x = (momento - self.base).total_seconds() / 60.0
+        i = bisect_right(self.inicios, x) - 1
+        if i < 0:
+            return 0.0
+        return self.acum[i] + min(x, self.fines[i]) - self.inicios[i]
+
+    def instante(self, acumulado):
+        """Primer instante en que el acumulado llega a `acumulado` (None si excede la tabla)."""
+        j = bisect_left(self.acum_fin, acumulado)
+        if j >= len(self.acum_fin):
+            return None
+        minuto = self.inicios[j] + max(acumulado - self.acum[j], 0)
+        # DATETIME guarda segundos: se redondea para no arrastrar error de coma flotante
+        return self.base + timedelta(seconds=round(minuto * 60))
+
+
+# Calendario por defecto: atención continua (el comportamiento previo del SLA)
+CALENDARIO_CONTINUO = Calendario(nombre='24/7')
@@ -0,0 +1,122 @@
+"""
+Entrega de archivos almacenados (adjuntos) con soporte de Range y
+validación condicional, opcionalmente delegando la transferencia al proxy.
+
+Modos (ADJUNTOS_ENTREGA):
+- flask:      Werkzeug envía el archivo. Responde 206 a `Range`, 304 a
+              `If-None-Match`/`If-Modified-Since` y 416 a rangos inválidos.
+- x-accel:    nginx. La respuesta lleva `X-Accel-Redirect` con la ruta bajo
+              ADJUNTOS_ACCEL_PREFIJO, que debe ser una location `internal`:
+
+                  location /_adjuntos/ {
+                      internal;
+                      alias /ruta/al/proyecto/uploads/;
+                  }
+
+- x-sendfile: Apache mod_xsendfile / lighttpd. `X-Sendfile` con la ruta absoluta.
+
+En los modos delegados Flask igual valida permisos y resuelve los 304; el
+proxy atiende los rangos y el envío de bytes sin ocupar un worker de Python.
+Los archivos fuera de la raíz de almacenamiento se envían siempre por Flask.
+"""
+import mimetypes
+import os
+from datetime import datetime, timezone
+from urllib.parse import quote
+
+from flask import Response, request, send_file
+from werkzeug.exceptions import RequestedRangeNotSatisfiable
+
+MODOS = ('flask', 'x-accel', 'x-sendfile')
+
+MODO = os.getenv('ADJUNTOS_ENTREGA', 'flask').strip().lower()
+if MODO not in MODOS:
+    MODO = 'flask'
+ACCEL_PREFIJO = '/' + os.getenv('ADJUNTOS_ACCEL_PREFIJO', '/_adjuntos/').strip('/') + '/'
+# Los adjuntos no cambian de contenido, pero el permiso sí: el navegador
+# guarda la copia y revalida (304) en cada uso para que Flask repita el chequeo.
+CACHE_CONTROL = 'private, no-cache'
+
+
+def etag_archivo(identificador, st, sha256=None):
+    """
+    ETag del archivo: el hash del contenido si se conoce; si no, el id del
+    registro, el tamaño y el mtime.
+    """
+    if sha256:
+        return sha256[:32]
+    return f'{identificador}-{st.st_size:x}-{st.st_mtime_ns:x}'
+
+
+def _ruta_relativa(ruta, raiz):
+    ruta = os.path.realpath(ruta)
+    raiz = os.path.realpath(raiz)
+    if os.path.commonpath([ruta, raiz]) != raiz:
+        return None
+    return os.path.relpath(ruta, raiz).replace(os.sep, '/')
+
+
+def content_disposition(nombre, as_attachment):
+    tipo = 'attachment' if as_attachment else 'inline'
+    try:
+        nombre.encode('ascii')
+        return f'{tipo}; filename="{nombre}"'
+    except UnicodeEncodeError:
+        simple = nombre.encode('ascii', 'ignore').decode('ascii') or 'archivo'
+        return f"{tipo}; filename=\"{simple}\"; filename*=UTF-8''{quote(nombre)}"
+
+
+def enviar_archivo(ruta, nombre, st, etag, raiz=None, as_attachment=True, modo=None, cache_control=CACHE_CONTROL,
+                   mimetype=None):
+    """
+    Respuesta para descargar `ruta`.
+
+    Args:
+        ruta: ruta absoluta del archivo
+        nombre: nombre de descarga (Content-Disposition)
+        st: os.stat_result de `ruta` (el llamador ya lo obtuvo al validar)
+        etag: ETag del contenido
+        raiz: raíz de almacenamiento, necesaria para x-accel
+        as_attachment: attachment (descarga) o inline (vista previa)
+        modo: fuerza un modo; por defecto ADJUNTOS_ENTREGA
+        cache_control: valor de Cache-Control (por defecto revalidar siempre)
+        mimetype: Content-Type registrado; por defecto se deduce del nombre
+    """
+    modo = modo or MODO
+    mimetype = mimetype or mimetypes.guess_type(nombre)[0] or 'application/octet-stream'
+    ultima_modificacion = datetime.fromtimestamp(int(st.st_mtime), tz=timezone.utc)
+    relativa = _ruta_relativa(ruta, raiz) if modo == 'x-accel' and raiz else None
+
+    if modo == 'flask' or (modo == 'x-accel' and relativa is None):
+        try:
+            response = send_file(
+                ruta,
+                as_attachment=as_attachment,
+                download_name=nombre,
+                mimetype=mimetype,
+                conditional=True,
+                etag=etag,
+                last_modified=ultima_modificacion,
+                max_age=None,
+            )
+        except RequestedRangeNotSatisfiable as e:
+            # 416 con Content-Range: bytes */<tamaño> (no pasar por manejar_errores)
+            return e.get_response()
+    else:
+        response = Response(status=200, mimetype=mimetype)
+        response.headers['Content-Disposition'] = content_disposition(nombre, as_attachment)
+        response.headers['Accept-Ranges'] = 'bytes'
+        response.set_etag(etag)
+        response.last_modified = ultima_modificacion
+        if modo == 'x-accel':
+            response.headers['X-Accel-Redirect'] = ACCEL_PREFIJO + quote(relativa)
+        else:
+            response.headers['X-Sendfile'] = os.path.realpath(ruta)
+        # Solo 304/200: el proxy responde los rangos sobre el archivo real
+        response = response.make_conditional(request)
+        if response.status_code == 304:
+            response.headers.pop('X-Accel-Redirect', None)
+            response.headers.pop('X-Sendfile', None)
+
+    response.headers['Cache-Control'] = cache_control
+    return response
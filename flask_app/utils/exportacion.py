@@ -0,0 +1,188 @@
+"""
+Exportaciones en streaming (CSV / NDJSON) con memoria constante.
+
+- `CursorSinBuffer`: ejecuta la consulta con un cursor del lado del servidor
+  (SSDictCursor) y entrega las filas de a lotes a medida que el cliente lee.
+- `fragmentos_csv` / `fragmentos_ndjson`: convierten filas proyectadas en
+  fragmentos de bytes de tamaño acotado.
+- `comprimir_gzip`: compresión gzip al vuelo sobre los fragmentos.
+- `respuesta_exportacion`: arma la respuesta Flask (formato, gzip, nombre de
+  archivo) y cierra la conexión al terminar o si el cliente corta.
+"""
+import csv
+import io
+import logging
+import os
+import zlib
+from datetime import datetime
+
+import pymysql.cursors
+from flask import Response, request
+
+from flask_app.config.conexion_login import get_local_db_connection
+from flask_app.utils.error_handler import ValidationError
+from flask_app.utils.serializacion import dumps_bytes, serializar_valor
+
+FORMATOS = ('csv', 'ndjson')
+FILAS_POR_FRAGMENTO = 500
+# Tiempo que el servidor MySQL espera a que leamos (el ritmo lo pone el cliente HTTP)
+NET_WRITE_TIMEOUT = int(os.getenv('EXPORT_NET_WRITE_TIMEOUT', 600))
+NIVEL_GZIP = int(os.getenv('EXPORT_NIVEL_GZIP', 6))
+
+# Celdas que Excel/LibreOffice interpretarían como fórmula
+_PREFIJOS_FORMULA = ('=', '+', '-', '@', '\t', '\r')
+
+
+class CursorSinBuffer:
+    """
+    Iterable de filas sobre un SSDictCursor.
+
+    La consulta se ejecuta al construir el objeto (los errores de SQL salen
+    antes de empezar a responder). La conexión se cierra al agotar las filas
+    o con close(), que la respuesta llama también si el cliente se desconecta.
+    """
+
+    def __init__(self, query, params=(), tamano_lote=1000):
+        self._tamano_lote = tamano_lote
+        self._agotado = False
+        self._conn = get_local_db_connection()
+        try:
+            self._cursor = self._conn.cursor(pymysql.cursors.SSDictCursor)
+            self._cursor.execute("SET SESSION net_write_timeout = %s", (NET_WRITE_TIMEOUT,))
+            self._cursor.execute(query, params)
+        except Exception:
+            self.close()
+            raise
+
+    def __iter__(self):
+        while self._conn is not None:
+            filas = self._cursor.fetchmany(self._tamano_lote)
+            if not filas:
+                self._agotado = True
+                break
+            yield from filas
+        self.close()
+
+    def close(self):
+        conn, self._conn = self._conn, None
+        if conn is None:
+            return
+        try:
+            # Cerrar el cursor sin buffer obliga a leer lo que falte: solo si ya terminó
+            if self._agotado:
+                self._cursor.close()
+        except Exception:
+            pass
+        try:
+            conn.close()
+        except Exception:
+            logging.debug('Error cerrando conexión de exportación', exc_info=True)
+
+
+def _celda(valor):
+    if valor is None:
+        return ''
+    if not isinstance(valor, str):
+        if isinstance(valor, (int, float)):
+            return valor
+        valor = serializar_valor(valor)
+        if not isinstance(valor, str):
+            return valor
+    if valor.startswith(_PREFIJOS_FORMULA):
+        return "'" + valor
+    return valor
+
+
+def fragmentos_csv(filas, proyeccion):
+    """CSV (UTF-8 con BOM para Excel) con los campos de la proyección como encabezado."""
+    buffer = io.StringIO()
+    escritor = csv.writer(buffer)
+    buffer.write('\ufeff')
+    escritor.writerow(proyeccion.campos)
+    proyectar = proyeccion.fila
+    pendientes = 0
+    for fila in filas:
+        escritor.writerow([_celda(v) for v in proyectar(fila).values()])
+        pendientes += 1
+        if pendientes >= FILAS_POR_FRAGMENTO:
+            yield buffer.getvalue().encode('utf-8')
+            buffer.seek(0)
+            buffer.truncate(0)
+            pendientes = 0
+    resto = buffer.getvalue()
+    if resto:
+        yield resto.encode('utf-8')
+
+
+def fragmentos_ndjson(filas, proyeccion):
+    """Un objeto JSON por línea, con el mismo formato de fechas que la API."""
+    lote = []
+    proyectar = proyeccion.fila
+    for fila in filas:
+        lote.append(dumps_bytes(proyectar(fila)))
+        if len(lote) >= FILAS_POR_FRAGMENTO:
+            yield b'\n'.join(lote) + b'\n'
+            lote = []
+    if lote:
+        yield b'\n'.join(lote) + b'\n'
+
+
+def comprimir_gzip(fragmentos, nivel=NIVEL_GZIP):
+    """Comprime al vuelo; wbits=31 produce el contenedor gzip (cabecera + CRC)."""
+    compresor = zlib.compressobj(nivel, zlib.DEFLATED, 31)
+    for fragmento in fragmentos:
+        comprimido = compresor.compress(fragmento)
+        if comprimido:
+            yield comprimido
+    yield compresor.flush()
+
+
+def validar_formato(formato):
+    formato = (formato or 'csv').strip().lower()
+    if formato not in FORMATOS:
+        raise ValidationError(f"formato inválido. Opciones: {', '.join(FORMATOS)}")
+    return formato
+
+
+def respuesta_exportacion(fuente, proyeccion, formato, nombre_base):
+    """
+    Respuesta en streaming para una exportación.
+
+    - ?gzip=1 descarga un archivo .gz.
+    - Si no, con Accept-Encoding: gzip se comprime en tránsito (Content-Encoding)
+      y el navegador guarda el archivo ya descomprimido.
+
+    Args:
+        fuente: CursorSinBuffer (o iterable de filas con close())
+        proyeccion: Proyeccion de cada fila exportada
+        formato: 'csv' | 'ndjson'
+        nombre_base: nombre del archivo sin extensión
+    """
+    if formato == 'ndjson':
+        cuerpo = fragmentos_ndjson(fuente, proyeccion)
+        mimetype = 'application/x-ndjson'
+    else:
+        cuerpo = fragmentos_csv(fuente, proyeccion)
+        mimetype = 'text/csv; charset=utf-8'
+
+    nombre = f"{nombre_base}_{datetime.now():%Y%m%d_%H%M%S}.{formato}"
+    headers = {
+        # Evitar que un proxy (nginx) acumule la respuesta completa
+        'X-Accel-Buffering': 'no',
+        'Cache-Control': 'no-store',
+    }
+
+    if request.args.get('gzip') in ('1', 'true'):
+        cuerpo = comprimir_gzip(cuerpo)
+        mimetype = 'application/gzip'
+        nombre += '.gz'
+    elif 'gzip' in (request.headers.get('Accept-Encoding') or '').lower():
+        cuerpo = comprimir_gzip(cuerpo)
+        headers['Content-Encoding'] = 'gzip'
+        headers['Vary'] = 'Accept-Encoding'
+
+    headers['Content-Disposition'] = f'attachment; filename="{nombre}"'
+    respuesta = Response(cuerpo, mimetype=mimetype, headers=headers, direct_passthrough=True)
+    if hasattr(fuente, 'close'):
+        respuesta.call_on_close(fuente.close)
+    return respuesta
@@ -0,0 +1,66 @@
+"""
+Proveedores JSON para Flask.
+
+Se elige con la variable de entorno JSON_PROVIDER:
+    - 'auto' (default): orjson si está instalado, si no la librería estándar
+    - 'orjson': exige orjson
+    - 'stdlib': json de la librería estándar
+
+Ambos proveedores usan `serializar_valor`, por lo que datetime/Decimal salen
+con el mismo formato sin importar cuál esté activo: las fechas en RFC 822
+(http_date), como con el proveedor por defecto de Flask.
+"""
+import logging
+import os
+
+from flask.json.provider import DefaultJSONProvider, JSONProvider
+
+from flask_app.utils.serializacion import orjson, serializar_valor
+
+
+class ProveedorJSONEstandar(DefaultJSONProvider):
+    """Proveedor por defecto de Flask con el formato de fechas de la API."""
+
+    default = staticmethod(serializar_valor)
+    ensure_ascii = False
+
+
+class ProveedorJSONOrjson(JSONProvider):
+    """Proveedor basado en orjson: serializa directamente a bytes."""
+
+    mimetype = 'application/json'
+
+    def _opciones(self, sort_keys=False):
+        opciones = orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_NON_STR_KEYS
+        if sort_keys:
+            opciones |= orjson.OPT_SORT_KEYS
+        return opciones
+
+    def dumps(self, obj, **kwargs):
+        return orjson.dumps(
+            obj,
+            default=kwargs.get('default', serializar_valor),
+            option=self._opciones(kwargs.get('sort_keys', False)),
+        ).decode('utf-8')
+
+    def loads(self, s, **kwargs):
+        return orjson.loads(s)
+
+    def response(self, *args, **kwargs):
+        obj = self._prepare_response_obj(args, kwargs)
+        cuerpo = orjson.dumps(obj, default=serializar_valor, option=self._opciones())
+        return self._app.response_class(cuerpo, mimetype=self.mimetype)
+
+
+def configurar_json(app):
+    """Instala el proveedor JSON configurado en la app."""
+    preferido = os.getenv('JSON_PROVIDER', 'auto').strip().lower()
+
+    if preferido in ('auto', 'orjson') and orjson is not None:
+        app.json = ProveedorJSONOrjson(app)
+    else:
+        if preferido == 'orjson':
+            logging.warning('JSON_PROVIDER=orjson pero orjson no está instalado; se usa json estándar')
+        app.json = ProveedorJSONEstandar(app)
+
+    app.logger.info(f'Proveedor JSON: {type(app.json).__name__}')
@@ -4,6 +4,7 @@ from datetime import datetime, timedelta
 from functools import wraps
 from flask import request, jsonify
 from dotenv import load_dotenv
+from itsdangerous import BadSignature, SignatureExpired, URLSafeTimedSerializer
 
 load_dotenv()
 
@@ -11,6 +12,9 @@ JWT_SECRET_KEY = os.getenv('JWT_SECRET_KEY', 'jwt_secret_key_cambiar_en_producci
 JWT_ALGORITHM = 'HS256'
 JWT_ACCESS_TOKEN_EXPIRES = int(os.getenv('JWT_ACCESS_TOKEN_EXPIRES', 28800))  # 8 horas (por defecto)
 JWT_REFRESH_TOKEN_EXPIRES = int(os.getenv('JWT_REFRESH_TOKEN_EXPIRES', 2592000))  # 30 días
+ENLACE_DESCARGA_EXPIRES = int(os.getenv('ENLACE_DESCARGA_EXPIRES', 600))  # 10 minutos
+
+_firmas_descarga = URLSafeTimedSerializer(JWT_SECRET_KEY, salt='enlace-descarga')
 
 
 def generar_token(operador_id, email, rol, tipo='access'):
@@ -137,6 +141,38 @@ def rol_requerido(*roles_permitidos):
     return decorador
 
 
+def permiso_requerido(*codigos):
+    """
+    Decorador para proteger endpoints según códigos de permiso (tabla permiso).
+    Debe usarse después de @token_requerido. Se exigen todos los códigos
+    indicados y la verificación se resuelve contra la matriz en memoria
+    (MatrizPermisos), sin consultar la base de datos por request.
+    
+    Ejemplo:
+        @token_requerido
+        @permiso_requerido('ticket.assign')
+        def mi_endpoint(operador_actual):
+            ...
+    """
+    def decorador(f):
+        @wraps(f)
+        def wrapper(operador_actual, *args, **kwargs):
+            from flask_app.models.permiso_model import MatrizPermisos
+
+            rol_actual = operador_actual.get('rol')
+            
+            if not MatrizPermisos.tiene_permisos(rol_actual, *codigos):
+                return jsonify({
+                    'success': False,
+                    'error': f'Permiso denegado. Se requiere: {", ".join(codigos)}'
+                }), 403
+            
+            return f(operador_actual=operador_actual, *args, **kwargs)
+        
+        return wrapper
+    return decorador
+
+
 def extraer_token_opcional():
     """
     Extrae el token JWT del request si existe, pero no falla si no está presente.
@@ -163,3 +199,44 @@ def extraer_token_opcional():
         return None
     
     return payload
+
+
+def generar_firma_descarga(operador_actual, recurso):
+    """
+    Firma de corta duración para descargar un recurso con un enlace normal
+    (<a href download>), sin header Authorization: así la descarga la hace el
+    gestor del navegador (Range/reanudación, X-Accel, redirect a S3) en lugar
+    de acumularla en memoria con fetch.
+    
+    Args:
+        operador_actual: payload del token de acceso
+        recurso: identificador del recurso firmado (ej. 'adjunto:15')
+    
+    Returns:
+        Firma como string (va en la URL)
+    """
+    return _firmas_descarga.dumps({
+        'recurso': recurso,
+        'operador_id': operador_actual.get('operador_id'),
+        'rol': operador_actual.get('rol'),
+    })
+
+
+def verificar_firma_descarga(firma, recurso):
+    """
+    Verifica una firma de descarga (ver generar_firma_descarga).
+    
+    Returns:
+        Diccionario con operador_id y rol (como el payload del token, para
+        repetir el chequeo de acceso) o {'error': ...} si es inválida, expiró
+        o corresponde a otro recurso
+    """
+    try:
+        datos = _firmas_descarga.loads(firma, max_age=ENLACE_DESCARGA_EXPIRES)
+    except SignatureExpired:
+        return {'error': 'Enlace de descarga expirado'}
+    except BadSignature:
+        return {'error': 'Enlace de descarga inválido'}
+    if not isinstance(datos, dict) or datos.get('recurso') != recurso:
+        return {'error': 'Enlace de descarga inválido'}
+    return {'operador_id': datos.get('operador_id'), 'rol': datos.get('rol')}
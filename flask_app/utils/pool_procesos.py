@@ -0,0 +1,139 @@
+"""
+Pool de procesos acotado para trabajo CPU intensivo sobre adjuntos
+(vistas previas, etc.), fuera de los hilos que atienden requests.
+
+- El executor se crea al primer uso y con contexto `spawn`: hacer fork de un
+  servidor con hilos (poller, jobs) puede dejar locks tomados en el hijo.
+- `max_pendientes` acota la cola: si está llena el trabajo se descarta y el
+  llamador puede reintentar después (p. ej. al pedir la vista previa).
+- Los trabajos se identifican con una clave; pedir dos veces la misma clave
+  mientras está en curso devuelve el mismo Future.
+- `limite` (segundos) corta un trabajo que se excede con TiempoAgotado, vía
+  SIGALRM en el worker (solo POSIX). Interrumpe código Python; una llamada
+  nativa larga se corta recién cuando devuelve el control.
+- `al_terminar` procesa el resultado en un hilo consumidor propio del pool.
+  Los done callbacks del Future corren en el hilo interno que administra el
+  executor: una escritura lenta o fallida en la BD ahí trabaría la entrega
+  de los demás resultados.
+"""
+import logging
+import multiprocessing
+import queue
+import signal
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+
+class TiempoAgotado(Exception):
+    """El trabajo superó su límite de tiempo."""
+
+
+def _alarma(_signum, _frame):
+    raise TiempoAgotado()
+
+
+def _ejecutar_con_limite(limite, fn, *args):
+    """Corre en el worker: fn(*args) con una alarma de `limite` segundos."""
+    if not hasattr(signal, 'setitimer'):
+        return fn(*args)
+    anterior = signal.signal(signal.SIGALRM, _alarma)
+    signal.setitimer(signal.ITIMER_REAL, limite)
+    try:
+        return fn(*args)
+    finally:
+        signal.setitimer(signal.ITIMER_REAL, 0)
+        signal.signal(signal.SIGALRM, anterior)
+
+
+class PoolProcesos:
+
+    def __init__(self, nombre, max_workers=2, max_pendientes=200):
+        self.nombre = nombre
+        self.max_workers = max(int(max_workers), 1)
+        self.max_pendientes = max(int(max_pendientes), 1)
+        self._executor = None
+        self._en_curso = {}  # clave -> Future
+        self._lock = threading.Lock()
+        self._resultados = None  # cola del hilo consumidor (al_terminar)
+
+    def _obtener_executor(self):
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.max_workers,
+                mp_context=multiprocessing.get_context('spawn'),
+            )
+            logging.info('Pool de procesos %s iniciado (workers=%s)', self.nombre, self.max_workers)
+        return self._executor
+
+    def en_curso(self, clave):
+        with self._lock:
+            return self._en_curso.get(clave)
+
+    def pendientes(self):
+        with self._lock:
+            return len(self._en_curso)
+
+    def enviar(self, clave, fn, *args, limite=None, al_terminar=None):
+        """
+        Encola fn(*args) en un proceso del pool.
+
+        Args:
+            limite: segundos máximos de ejecución (None: sin límite)
+            al_terminar: función(futuro) que se llama en el hilo consumidor
+                del pool cuando el trabajo termina (una vez por trabajo: si la
+                clave ya estaba en curso no se vuelve a registrar)
+
+        Returns:
+            Future, o None si la cola está llena
+        """
+        if limite:
+            fn, args = _ejecutar_con_limite, (limite, fn) + args
+        with self._lock:
+            futuro = self._en_curso.get(clave)
+            if futuro is not None:
+                return futuro
+            if len(self._en_curso) >= self.max_pendientes:
+                logging.warning('Pool %s lleno (%s pendientes); se descarta %s', self.nombre, len(self._en_curso), clave)
+                return None
+            try:
+                futuro = self._obtener_executor().submit(fn, *args)
+            except BrokenProcessPool:
+                # Un worker murió (p. ej. por memoria): se recrea el pool
+                logging.error('Pool %s roto; se recrea', self.nombre)
+                self._executor = None
+                futuro = self._obtener_executor().submit(fn, *args)
+            self._en_curso[clave] = futuro
+        futuro.add_done_callback(lambda _f, c=clave: self._terminado(c))
+        if al_terminar is not None:
+            resultados = self._cola_resultados()
+            futuro.add_done_callback(lambda f: resultados.put((al_terminar, f)))
+        return futuro
+
+    def _terminado(self, clave):
+        with self._lock:
+            self._en_curso.pop(clave, None)
+
+    def _cola_resultados(self):
+        with self._lock:
+            if self._resultados is None:
+                self._resultados = queue.Queue()
+                threading.Thread(
+                    target=self._consumir, args=(self._resultados,),
+                    name=f'pool-{self.nombre}-resultados', daemon=True,
+                ).start()
+            return self._resultados
+
+    def _consumir(self, resultados):
+        while True:
+            al_terminar, futuro = resultados.get()
+            try:
+                al_terminar(futuro)
+            except Exception:
+                logging.exception('Pool %s: error procesando un resultado', self.nombre)
+
+    def cerrar(self):
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,180 @@
+"""
+Serialización de filas de BD a JSON.
+
+- `Proyeccion`: describe de forma declarativa qué columnas de la fila del cursor
+  salen en la respuesta (y con qué nombre), sin reconstruir cada dict a mano.
+- `serializar_valor`: conversión de tipos no nativos de JSON (datetime, Decimal,
+  bytes...). La usan tanto el proveedor JSON de Flask como el serializador
+  en streaming, para que el formato sea el mismo en todas las respuestas.
+  Las fechas salen como el proveedor por defecto de Flask (RFC 822, http_date);
+  los campos que la API entrega como 'YYYY-MM-DD HH:MM:SS' se proyectan con
+  `fecha_texto`.
+- `stream_json`: genera un documento JSON por partes para exportaciones grandes.
+"""
+import dataclasses
+import decimal
+import json
+import uuid
+from datetime import date, datetime, time, timedelta
+
+from werkzeug.http import http_date
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - dependencia opcional
+    orjson = None
+
+
+# Formato de los campos de fecha que los modelos entregan como texto
+# (equivalente a str(datetime) sin microsegundos)
+FORMATO_FECHA_HORA = '%Y-%m-%d %H:%M:%S'
+
+
+def serializar_valor(obj):
+    """
+    Convierte valores no serializables por JSON a un tipo nativo.
+
+    datetime/date salen en RFC 822 ("Tue, 01 Oct 2026 10:00:00 GMT"), igual
+    que con el proveedor por defecto de Flask, del que dependen los clientes.
+    """
+    if isinstance(obj, date):
+        return http_date(obj)
+    if isinstance(obj, (time, timedelta)):
+        return str(obj)
+    if isinstance(obj, decimal.Decimal):
+        return str(obj)
+    if isinstance(obj, (bytes, bytearray)):
+        return obj.decode('utf-8', errors='replace')
+    if isinstance(obj, (set, frozenset)):
+        return list(obj)
+    if isinstance(obj, uuid.UUID):
+        return str(obj)
+    if dataclasses.is_dataclass(obj) and not isinstance(obj, type):
+        return dataclasses.asdict(obj)
+    if hasattr(obj, '__html__'):
+        return str(obj.__html__())
+    raise TypeError(f'Object of type {type(obj).__name__} is not JSON serializable')
+
+
+if orjson is not None:
+    _OPCIONES_ORJSON = orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_NON_STR_KEYS
+
+    def dumps_bytes(obj):
+        """Serializa a bytes UTF-8 (orjson si está instalado)."""
+        return orjson.dumps(obj, default=serializar_valor, option=_OPCIONES_ORJSON)
+else:
+    def dumps_bytes(obj):
+        """Serializa a bytes UTF-8 (orjson si está instalado)."""
+        return json.dumps(obj, default=serializar_valor, ensure_ascii=False,
+                          separators=(',', ':')).encode('utf-8')
+
+
+def formatear_fecha(valor):
+    """datetime como texto FORMATO_FECHA_HORA; None se mantiene."""
+    if valor is None:
+        return None
+    if isinstance(valor, datetime):
+        # isoformat(' ') es bastante más rápido que strftime y da el mismo texto
+        if valor.microsecond:
+            valor = valor.replace(microsecond=0)
+        return valor.isoformat(' ')
+    return str(valor)
+
+
+def fecha_texto(columna):
+    """Especificación de Proyeccion: la columna como 'YYYY-MM-DD HH:MM:SS'."""
+    return lambda r: formatear_fecha(r.get(columna))
+
+
+class Proyeccion:
+    """
+    Proyección declarativa de filas (dicts de DictCursor) a la forma de la API.
+
+    Cada campo de salida se define como:
+        - str: nombre de la columna de la fila
+        - Proyeccion: objeto anidado construido a partir de la misma fila
+        - callable(fila): valor calculado (p.ej. fecha_texto('fecha_ini'))
+
+    La especificación se compila una sola vez a una función que arma el dict
+    literal, con el mismo costo que escribirlo a mano.
+
+    Ejemplo:
+        USUARIO = Proyeccion({'nombre': 'usuario_nombre', 'email': 'usuario_email'})
+        TICKET = Proyeccion({
+            'id_ticket': 'id_ticket',
+            'usuario': USUARIO,
+            'operador_aceptado': lambda r: (r.get('operador_tiene_mensajes') or 0) > 0,
+        })
+        tickets = TICKET(rows)
+    """
+
+    def __init__(self, campos):
+        self.campos = tuple(campos)
+        funciones = {}
+        cuerpo = self._compilar(campos, funciones)
+        codigo = f'def _proyectar(r):\n    return {cuerpo}\n'
+        espacio = dict(funciones)
+        exec(compile(codigo, '<proyeccion>', 'exec'), espacio)
+        self.fila = espacio['_proyectar']
+
+    @staticmethod
+    def _compilar(campos, funciones):
+        partes = []
+        for clave, spec in campos.items():
+            if isinstance(spec, str):
+                valor = f'r[{spec!r}]'
+            elif isinstance(spec, Proyeccion):
+                nombre = f'_f{len(funciones)}'
+                funciones[nombre] = spec.fila
+                valor = f'{nombre}(r)'
+            elif callable(spec):
+                nombre = f'_f{len(funciones)}'
+                funciones[nombre] = spec
+                valor = f'{nombre}(r)'
+            else:
+                raise TypeError(f'Especificación inválida para el campo {clave!r}')
+            partes.append(f'{clave!r}: {valor}')
+        return '{' + ', '.join(partes) + '}'
+
+    def __call__(self, filas):
+        """Proyecta una secuencia de filas a una lista."""
+        fila = self.fila
+        return [fila(f) for f in filas or ()]
+
+    def iterar(self, filas):
+        """Proyecta perezosamente un iterable de filas (p.ej. un cursor sin buffer)."""
+        fila = self.fila
+        for f in filas:
+            yield fila(f)
+
+
+def stream_json(filas, proyeccion=None, envoltura=None, clave='data', tamano_lote=500):
+    """
+    Genera un documento JSON por partes (bytes) sin materializar la lista completa.
+
+    Args:
+        filas: Iterable de filas (idealmente un cursor sin buffer)
+        proyeccion: Proyeccion opcional aplicada a cada fila
+        envoltura: dict con campos adicionales del objeto raíz (p.ej. {'success': True})
+        clave: Nombre del campo que contiene el arreglo de filas
+        tamano_lote: Filas por fragmento emitido
+
+    Yields:
+        Fragmentos bytes que concatenados forman {..envoltura, clave: [filas]}
+    """
+    cabecera = dumps_bytes(dict(envoltura or {}))[:-1]  # sin '}' final
+    separador = b',' if cabecera != b'{' else b''
+    yield cabecera + separador + dumps_bytes(clave) + b':['
+
+    lote = []
+    primero = True
+    for f in filas:
+        lote.append(dumps_bytes(proyeccion.fila(f) if proyeccion else f))
+        if len(lote) >= tamano_lote:
+            yield (b'' if primero else b',') + b','.join(lote)
+            primero = False
+            lote = []
+    if lote:
+        yield (b'' if primero else b',') + b','.join(lote)
+
+    yield b']}'
@@ -0,0 +1,128 @@
+"""
+ZIP generado al vuelo para descargas de varios archivos.
+
+zipfile escribe sobre un destino no posicionable (sin seek): cada entrada
+lleva su descriptor de datos (CRC y tamaños) después del contenido, así que
+no hace falta volver atrás ni conocer el resultado comprimido de antemano.
+Los bytes se entregan al cliente a medida que se producen; en memoria solo
+queda el bloque en curso, sin importar el tamaño total del archivo.
+
+- Formatos ya comprimidos (imágenes, video, office, zip...) van STORED:
+  deflate no reduce su tamaño y solo gasta CPU.
+- ZIP64 se activa por entrada cuando el archivo supera los 4 GiB y para el
+  directorio central cuando el total (o la cantidad de entradas) lo exige.
+"""
+import io
+import logging
+import os
+import zipfile
+from datetime import datetime
+
+TAMANO_BLOQUE = 256 * 1024
+
+EXT_YA_COMPRIMIDAS = {
+    'jpg', 'jpeg', 'png', 'gif', 'webp', 'heic',
+    'zip', 'rar', '7z', 'gz', 'bz2', 'xz',
+    'mp3', 'mp4', 'avi', 'mov', 'mkv',
+    'docx', 'xlsx', 'pptx', 'odt', 'ods',
+}
+
+
+class _Salida(io.RawIOBase):
+    """Destino de escritura sin seek que acumula lo escrito hasta vaciarlo."""
+
+    def __init__(self):
+        super().__init__()
+        self._partes = []
+
+    def writable(self):
+        return True
+
+    def write(self, datos):
+        self._partes.append(bytes(datos))
+        return len(datos)
+
+    def vaciar(self):
+        if not self._partes:
+            return b''
+        datos = b''.join(self._partes)
+        self._partes = []
+        return datos
+
+
+def _metodo(nombre):
+    ext = os.path.splitext(nombre)[1].lstrip('.').lower()
+    return zipfile.ZIP_STORED if ext in EXT_YA_COMPRIMIDAS else zipfile.ZIP_DEFLATED
+
+
+def _fecha_zip(momento):
+    # El formato ZIP no representa fechas anteriores a 1980
+    if not momento or momento.year < 1980:
+        momento = datetime(1980, 1, 1)
+    return momento.timetuple()[:6]
+
+
+def nombres_unicos(nombres):
+    """Desambigua nombres repetidos: informe.pdf, informe (2).pdf, ..."""
+    usados = set()
+    resultado = []
+    for nombre in nombres:
+        nombre = (nombre or '').replace('\\', '_').replace('/', '_').strip() or 'archivo'
+        base, ext = os.path.splitext(nombre)
+        candidato, n = nombre, 1
+        while candidato.lower() in usados:
+            n += 1
+            candidato = f'{base} ({n}){ext}'
+        usados.add(candidato.lower())
+        resultado.append(candidato)
+    return resultado
+
+
+def _abrir_local(ruta):
+    st = os.stat(ruta)
+    return open(ruta, 'rb'), st.st_size, datetime.fromtimestamp(st.st_mtime)
+
+
+def fragmentos_zip(entradas, abrir=_abrir_local):
+    """
+    Genera los bytes del ZIP.
+
+    Args:
+        entradas: iterable de (nombre_en_zip, referencia, fecha) — fecha puede ser None
+        abrir: abrir(referencia) -> (archivo binario, tamaño, fecha de modificación);
+               por defecto la referencia es una ruta local
+
+    Los archivos que no existen se omiten y se listan en FALTANTES.txt.
+    """
+    salida = _Salida()
+    faltantes = []
+    with zipfile.ZipFile(salida, 'w', allowZip64=True) as zf:
+        for nombre, ref, fecha in entradas:
+            try:
+                origen, tamano, modificado = abrir(ref)
+            except (OSError, TypeError, ValueError):
+                logging.warning(f'ZIP: archivo no encontrado para {nombre}: {ref}')
+                faltantes.append(nombre)
+                continue
+
+            info = zipfile.ZipInfo(nombre, date_time=_fecha_zip(fecha or modificado))
+            info.compress_type = _metodo(nombre)
+            info.external_attr = 0o644 << 16
+            # Con el tamaño conocido zipfile decide si la entrada necesita ZIP64
+            info.file_size = tamano
+            with origen, zf.open(info, 'w') as destino:
+                for bloque in iter(lambda: origen.read(TAMANO_BLOQUE), b''):
+                    destino.write(bloque)
+                    datos = salida.vaciar()
+                    if datos:
+                        yield datos
+            datos = salida.vaciar()
+            if datos:
+                yield datos
+
+        if faltantes:
+            zf.writestr('FALTANTES.txt', 'Archivos no disponibles en el servidor:\n' + '\n'.join(faltantes) + '\n')
+    # Directorio central (y registro ZIP64 final si corresponde)
+    datos = salida.vaciar()
+    if datos:
+        yield datos
@@ -4,6 +4,11 @@ import logging
 
 from flask_app import app
 from flask_app.services.email_ingest import connect_and_idle_loop
+from flask_app.models.catalogo_model import CatalogoModel
+from flask_app.services.rollup_job import loop_rollups
+from flask_app.services.limpieza_adjuntos import loop_limpieza
+from flask_app.services.asignacion import motor_asignacion
+from flask_app.services.sla_scheduler import programador_sla
 
 
 def _env_bool(name: str, default: bool = False) -> bool:
@@ -21,6 +26,12 @@ if __name__ == "__main__":
 
     logging.basicConfig(level=logging.INFO)
 
+    # Catálogos en memoria desde el arranque (si falla, se cargan en la primera petición)
+    try:
+        CatalogoModel.precargar()
+    except Exception:
+        logging.exception('No se pudieron precargar los catálogos')
+
     # Opcional: arrancar el poller de email en un hilo separado
     # Por defecto enciende el poller para que el ingreso de correos sea automático
     start_poller = _env_bool('START_EMAIL_POLLER', True)
@@ -38,4 +49,42 @@ if __name__ == "__main__":
             t.start()
             logging.info('Email poller thread started (keepalive=%s)', keepalive)
 
+    # Job incremental de rollups para reportes (ticket_stats_diario)
+    if _env_bool('START_ROLLUP_JOB', True):
+        if not debug or os.getenv('WERKZEUG_RUN_MAIN') == 'true':
+            intervalo = int(os.getenv('ROLLUP_INTERVALO_SEGUNDOS', '60'))
+            threading.Thread(
+                target=loop_rollups,
+                kwargs={'intervalo': intervalo},
+                daemon=True,
+            ).start()
+
+    # Limpieza de subidas de adjuntos por trozos abandonadas
+    if _env_bool('START_LIMPIEZA_ADJUNTOS', True):
+        if not debug or os.getenv('WERKZEUG_RUN_MAIN') == 'true':
+            threading.Thread(
+                target=loop_limpieza,
+                kwargs={'intervalo': int(os.getenv('LIMPIEZA_ADJUNTOS_INTERVALO_SEGUNDOS', '900'))},
+                daemon=True,
+            ).start()
+
+    # Programador de vencimientos de SLA (avisos, incumplimientos y escalado de prioridad)
+    if _env_bool('START_SLA_SCHEDULER', True):
+        if not debug or os.getenv('WERKZEUG_RUN_MAIN') == 'true':
+            programador_sla.iniciar(
+                umbral_aviso=float(os.getenv('SLA_UMBRAL_AVISO', '0.8')),
+                horizonte_min=int(os.getenv('SLA_HORIZONTE_MIN', '120')),
+                max_atraso_min=int(os.getenv('SLA_MAX_ATRASO_MIN', '1440')),
+                intervalo_resync=int(os.getenv('SLA_RESYNC_SEGUNDOS', '300')),
+                subir_prioridad=_env_bool('SLA_SUBIR_PRIORIDAD', True),
+            )
+
+    # Asignación automática de tickets nuevos al miembro del depto con menos carga
+    if _env_bool('AUTOASIGNAR_TICKETS', False):
+        if not debug or os.getenv('WERKZEUG_RUN_MAIN') == 'true':
+            motor_asignacion.iniciar(
+                roles=[r.strip() for r in os.getenv('AUTOASIGNAR_ROLES', 'Agente').split(',') if r.strip()],
+                intervalo_resync=int(os.getenv('AUTOASIGNAR_RESYNC_SEGUNDOS', '600')),
+            )
+
     app.run(debug=debug, use_reloader=debug, host=host, port=port)
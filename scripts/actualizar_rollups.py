@@ -0,0 +1,41 @@
+"""
+Actualiza (o reconstruye) los rollups diarios de reportes.
+
+Útil para ejecutar el job desde cron en lugar del hilo de run.py, o para
+recalcular todo tras aplicar migracion_rollup_ticket_stats_diario.sql.
+
+Uso:
+    python scripts/actualizar_rollups.py              # pasada incremental
+    python scripts/actualizar_rollups.py --reconstruir
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from flask_app.models.reporte_model import ReporteModel  # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--reconstruir', action='store_true', help='Vacía los rollups y recalcula desde cero')
+    parser.add_argument('--lote', type=int, default=20000, help='Ids por lote (default: 20000)')
+    args = parser.parse_args()
+
+    inicio = time.perf_counter()
+    if args.reconstruir:
+        resumen = ReporteModel.reconstruir_rollups(tamano_lote=args.lote)
+    else:
+        resumen = ReporteModel.actualizar_rollups(tamano_lote=args.lote, max_lotes=10 ** 6)
+    duracion = time.perf_counter() - inicio
+
+    print(f'Procesado en {duracion:.1f}s: {resumen}')
+    for marca in ReporteModel.obtener_marcas():
+        print(f"  {marca['nombre']:<10} ultimo_id={marca['ultimo_id']} visto_id={marca['visto_id']} "
+              f"actualizado_en={marca['actualizado_en']}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,371 @@
+"""
+Benchmarks de las consultas principales contra la base configurada (.env).
+
+Pensado para correr sobre los datos de scripts/generar_datos_sinteticos.py.
+Para cada tipo de operador (Admin, Jefe/Supervisor de departamento, Agente) mide:
+  - TicketModel.get_all: primera página y una página profunda
+  - TicketModel.get_estadisticas
+  - TicketModel.operador_puede_ver_ticket: tickets al azar
+  - MensajeModel.listar_por_ticket: tickets al azar entre los que el operador
+    puede ver, con el control de permiso previo como en el endpoint
+y AuditoriaModel.listar (endpoint solo Admin): sin filtro, por departamento,
+por operador y segunda página por cursor.
+
+Cada caso hace --calentamiento llamadas sin medir y --rondas medidas. El
+JSON (--json) usa la forma de pytest-benchmark ("benchmarks": [{"name",
+"group", "params", "stats"}], tiempos en segundos) e incluye el tamaño de
+los datos, para comparar solo corridas sobre la misma base.
+
+Uso:
+    python scripts/bench_bd.py [--rondas 20] [--filtro get_all] [--json actual.json]
+    python scripts/bench_bd.py --json actual.json --comparar base.json [--umbral 0.10]
+    python scripts/bench_bd.py --actual actual.json --comparar base.json   (sin volver a medir)
+
+Con --comparar, termina con código 1 si algún caso empeoró su mediana más
+que --umbral.
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import time
+from datetime import datetime, timezone
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from flask_app.config.conexion_login import execute_query  # noqa: E402
+from flask_app.models.auditoria_model import AuditoriaModel  # noqa: E402
+from flask_app.models.mensaje_model import MensajeModel  # noqa: E402
+from flask_app.models.ticket_model import TicketModel  # noqa: E402
+
+OFFSET_PROFUNDO = 2000
+
+
+# ----------------------------------------------------------------------
+# Datos de la base
+# ----------------------------------------------------------------------
+
+def _operador(query, params=()):
+    fila = execute_query(query, params, fetch_one=True)
+    if not fila:
+        return None
+    return {'operador_id': fila['id_operador'], 'email': fila['email'], 'rol': fila['rol']}
+
+
+def elegir_operadores(ids=None):
+    """
+    Un operador representativo por tipo: {'admin': payload, 'supervisor': ..., 'agente': ...}.
+    `ids` permite fijarlos ({'admin': 1, ...}).
+
+    Se elige el supervisor con más departamentos y el agente con más
+    tickets asignados (el peor caso de su visibilidad).
+    """
+    ids = ids or {}
+    base = """
+        SELECT o.id_operador, o.email, rg.nombre as rol
+        FROM operador o
+        INNER JOIN rol_global rg ON rg.id_rol = o.id_rol_global
+    """
+    elegidos = {}
+    if ids.get('admin'):
+        elegidos['admin'] = _operador(base + ' WHERE o.id_operador = %s', (ids['admin'],))
+    else:
+        elegidos['admin'] = _operador(base + " WHERE LOWER(rg.nombre) = 'admin' AND o.deleted_at IS NULL ORDER BY o.id_operador LIMIT 1")
+
+    if ids.get('supervisor'):
+        elegidos['supervisor'] = _operador(base + ' WHERE o.id_operador = %s', (ids['supervisor'],))
+    else:
+        elegidos['supervisor'] = _operador(base + """
+            INNER JOIN (
+                SELECT id_operador, COUNT(*) as deptos FROM miembro_dpto
+                WHERE rol IN ('Supervisor', 'Jefe') AND fecha_desasignacion IS NULL
+                GROUP BY id_operador
+            ) md ON md.id_operador = o.id_operador
+            WHERE o.deleted_at IS NULL
+            ORDER BY md.deptos DESC, o.id_operador
+            LIMIT 1
+        """)
+
+    if ids.get('agente'):
+        elegidos['agente'] = _operador(base + ' WHERE o.id_operador = %s', (ids['agente'],))
+    else:
+        elegidos['agente'] = _operador(base + """
+            INNER JOIN (
+                SELECT id_operador, COUNT(*) as asignados FROM ticket_operador
+                WHERE fecha_desasignacion IS NULL
+                GROUP BY id_operador
+            ) t_o ON t_o.id_operador = o.id_operador
+            WHERE o.deleted_at IS NULL
+              AND EXISTS (SELECT 1 FROM miembro_dpto md
+                          WHERE md.id_operador = o.id_operador AND md.rol = 'Agente'
+                            AND md.fecha_desasignacion IS NULL)
+              AND NOT EXISTS (SELECT 1 FROM miembro_dpto md
+                              WHERE md.id_operador = o.id_operador AND md.rol IN ('Supervisor', 'Jefe'))
+            ORDER BY t_o.asignados DESC, o.id_operador
+            LIMIT 1
+        """)
+    return {tipo: op for tipo, op in elegidos.items() if op}
+
+
+def tamano_datos():
+    """Filas de las tablas medidas (estimación de InnoDB: no recorre las tablas)."""
+    filas = execute_query(
+        """
+        SELECT LOWER(table_name) as tabla, table_rows as filas
+        FROM information_schema.tables
+        WHERE table_schema = DATABASE()
+          AND LOWER(table_name) IN ('ticket', 'mensaje', 'historial_acciones_ticket', 'ticket_operador',
+                                    'miembro_dpto', 'operador', 'notificacion')
+        """,
+        fetch_all=True,
+    ) or []
+    return {f['tabla']: int(f['filas'] or 0) for f in filas}
+
+
+def _visibles(operador, cantidad, semilla):
+    """Muestra de tickets que el operador puede ver (según la visibilidad de get_all)."""
+    where_clause, params = TicketModel.obtener_visibilidad(operador)
+    filas = execute_query(
+        f"SELECT t.id_ticket FROM ticket t {where_clause} ORDER BY RAND(%s) LIMIT %s",
+        tuple(params) + (semilla, cantidad),
+        fetch_all=True,
+    ) or []
+    return [f['id_ticket'] for f in filas]
+
+
+def _rango_tickets():
+    fila = execute_query(
+        'SELECT MIN(id_ticket) as minimo, MAX(id_ticket) as maximo FROM ticket WHERE deleted_at IS NULL',
+        fetch_one=True,
+    ) or {}
+    return fila.get('minimo') or 1, fila.get('maximo') or 1
+
+
+# ----------------------------------------------------------------------
+# Casos
+# ----------------------------------------------------------------------
+
+def casos(operadores, semilla=42):
+    """Lista de (nombre, grupo, params, funcion) a medir."""
+    rnd = random.Random(semilla)
+    minimo, maximo = _rango_tickets()
+    muestra = [rnd.randint(minimo, maximo) for _ in range(1000)]
+
+    def rotando(fn, tickets=muestra):
+        # Cada llamada usa el siguiente ticket de la muestra (mismo orden en cada corrida)
+        posicion = {'i': 0}
+
+        def llamar():
+            id_ticket = tickets[posicion['i'] % len(tickets)]
+            posicion['i'] += 1
+            return fn(id_ticket)
+        return llamar
+
+    lista = []
+    for tipo, op in operadores.items():
+        params = {'tipo': tipo, 'operador_id': op['operador_id']}
+        visibles = _visibles(op, 200, semilla) or muestra
+        lista += [
+            (f'get_all[{tipo}]', 'get_all', params,
+             lambda op=op: TicketModel.get_all(limit=50, offset=0, operador_actual=op)),
+            (f'get_all_profundo[{tipo}]', 'get_all', {**params, 'offset': OFFSET_PROFUNDO},
+             lambda op=op: TicketModel.get_all(limit=50, offset=OFFSET_PROFUNDO, operador_actual=op)),
+            (f'get_estadisticas[{tipo}]', 'get_estadisticas', params,
+             lambda op=op: TicketModel.get_estadisticas(operador_actual=op)),
+            (f'operador_puede_ver_ticket[{tipo}]', 'operador_puede_ver_ticket', params,
+             rotando(lambda id_ticket, op=op: TicketModel.operador_puede_ver_ticket(id_ticket, op))),
+            # Como GET /api/tickets/<id>/mensajes: permiso y luego el listado
+            (f'listar_mensajes[{tipo}]', 'MensajeModel.listar_por_ticket', params,
+             rotando(lambda id_ticket, op=op: TicketModel.operador_puede_ver_ticket(id_ticket, op)
+                     and MensajeModel.listar_por_ticket(id_ticket, True, 'Operador'), visibles)),
+        ]
+
+    depto = execute_query('SELECT MIN(id_depto) as id_depto FROM departamento', fetch_one=True) or {}
+    agente = operadores.get('agente') or next(iter(operadores.values()), None)
+    primera = AuditoriaModel.listar(limit=50)
+    lista += [
+        ('auditoria[sin_filtro]', 'AuditoriaModel.listar', {}, lambda: AuditoriaModel.listar(limit=50)),
+        ('auditoria[con_total]', 'AuditoriaModel.listar', {'con_total': True},
+         lambda: AuditoriaModel.listar(limit=50, con_total=True)),
+    ]
+    if depto.get('id_depto'):
+        lista.append(('auditoria[depto]', 'AuditoriaModel.listar', {'depto_id': depto['id_depto']},
+                      lambda: AuditoriaModel.listar(depto_id=depto['id_depto'], limit=50)))
+    if agente:
+        lista.append(('auditoria[operador]', 'AuditoriaModel.listar', {'operador_id': agente['operador_id']},
+                      lambda: AuditoriaModel.listar(operador_id=agente['operador_id'], limit=50)))
+    if primera.get('siguiente_cursor'):
+        lista.append(('auditoria[pagina_2]', 'AuditoriaModel.listar', {'cursor': True},
+                      lambda: AuditoriaModel.listar(limit=50, cursor=primera['siguiente_cursor'])))
+    return lista
+
+
+# ----------------------------------------------------------------------
+# Medición
+# ----------------------------------------------------------------------
+
+def medir(funcion, rondas, calentamiento):
+    for _ in range(calentamiento):
+        funcion()
+    muestras = []
+    for _ in range(rondas):
+        inicio = time.perf_counter()
+        funcion()
+        muestras.append(time.perf_counter() - inicio)
+    return estadisticas(muestras)
+
+
+def estadisticas(muestras):
+    """Mismas claves (y unidades: segundos) que pytest-benchmark."""
+    ordenadas = sorted(muestras)
+    if len(ordenadas) >= 4:
+        q1, _, q3 = statistics.quantiles(ordenadas, n=4)
+    else:
+        q1, q3 = ordenadas[0], ordenadas[-1]
+    media = statistics.fmean(ordenadas)
+    return {
+        'min': ordenadas[0],
+        'max': ordenadas[-1],
+        'mean': media,
+        'stddev': statistics.stdev(ordenadas) if len(ordenadas) > 1 else 0.0,
+        'median': statistics.median(ordenadas),
+        'q1': q1,
+        'q3': q3,
+        'iqr': q3 - q1,
+        'ops': 1 / media if media else 0.0,
+        'rounds': len(ordenadas),
+        'iterations': 1,
+        'total': sum(ordenadas),
+        'data': ordenadas,
+    }
+
+
+def _info_maquina():
+    version = execute_query('SELECT VERSION() as version', fetch_one=True) or {}
+    return {
+        'node': platform.node(),
+        'machine': platform.machine(),
+        'python_version': platform.python_version(),
+        'mysql_version': version.get('version'),
+        'datos': tamano_datos(),
+    }
+
+
+def _info_commit():
+    try:
+        salida = subprocess.run(['git', 'rev-parse', 'HEAD'], capture_output=True, text=True, timeout=5,
+                                cwd=os.path.dirname(os.path.abspath(__file__)))
+        return {'id': salida.stdout.strip()} if salida.returncode == 0 else {}
+    except (OSError, subprocess.SubprocessError):
+        return {}
+
+
+def ejecutar(args):
+    operadores = elegir_operadores({'admin': args.admin, 'supervisor': args.supervisor, 'agente': args.agente})
+    for tipo, op in operadores.items():
+        print(f"  {tipo}: operador #{op['operador_id']} ({op['rol']})")
+    faltan = {'admin', 'supervisor', 'agente'} - set(operadores)
+    if faltan:
+        print(f"  (sin operadores de tipo {', '.join(sorted(faltan))}: se omiten sus casos)")
+
+    resultados = []
+    print(f"{'caso':<40} | {'mediana ms':>10} | {'min ms':>8} | {'max ms':>8} | {'ops/s':>7}")
+    for nombre, grupo, params, funcion in casos(operadores, args.semilla):
+        if args.filtro and args.filtro not in nombre:
+            continue
+        stats = medir(funcion, args.rondas, args.calentamiento)
+        resultados.append({
+            'name': nombre,
+            'fullname': f'scripts/bench_bd.py::{nombre}',
+            'group': grupo,
+            'params': params,
+            'stats': stats,
+        })
+        print(f"{nombre:<40} | {stats['median'] * 1000:>10.2f} | {stats['min'] * 1000:>8.2f} | "
+              f"{stats['max'] * 1000:>8.2f} | {stats['ops']:>7.1f}", flush=True)
+
+    return {
+        'machine_info': _info_maquina(),
+        'commit_info': _info_commit(),
+        'datetime': datetime.now(timezone.utc).isoformat(),
+        'version': 'bench_bd/1',
+        'benchmarks': resultados,
+    }
+
+
+# ----------------------------------------------------------------------
+# Comparación
+# ----------------------------------------------------------------------
+
+def comparar(actual, base, umbral):
+    """Imprime la variación de la mediana por caso. Retorna la cantidad de regresiones."""
+    datos_base = base.get('machine_info', {}).get('datos')
+    datos_actual = actual.get('machine_info', {}).get('datos')
+    if datos_base and datos_actual and datos_base != datos_actual:
+        print('Aviso: las corridas no tienen el mismo tamaño de datos')
+        print(f'  base:   {datos_base}')
+        print(f'  actual: {datos_actual}')
+
+    por_nombre = {b['name']: b for b in base.get('benchmarks', [])}
+    regresiones = 0
+    print(f"{'caso':<40} | {'base ms':>9} | {'actual ms':>9} | {'cambio':>8}")
+    for bench in actual.get('benchmarks', []):
+        anterior = por_nombre.get(bench['name'])
+        if anterior is None:
+            print(f"{bench['name']:<40} | {'-':>9} | {bench['stats']['median'] * 1000:>9.2f} | {'nuevo':>8}")
+            continue
+        antes = anterior['stats']['median']
+        ahora = bench['stats']['median']
+        cambio = (ahora - antes) / antes if antes else 0.0
+        marca = ''
+        if cambio > umbral:
+            marca = '  REGRESIÓN'
+            regresiones += 1
+        elif cambio < -umbral:
+            marca = '  mejora'
+        print(f"{bench['name']:<40} | {antes * 1000:>9.2f} | {ahora * 1000:>9.2f} | {cambio:>+8.1%}{marca}")
+    return regresiones
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rondas', type=int, default=20, help='Mediciones por caso (default: 20)')
+    parser.add_argument('--calentamiento', type=int, default=2, help='Llamadas sin medir por caso (default: 2)')
+    parser.add_argument('--filtro', help='Solo los casos cuyo nombre contiene este texto')
+    parser.add_argument('--semilla', type=int, default=42, help='Semilla de la muestra de tickets (default: 42)')
+    parser.add_argument('--admin', type=int, help='id_operador a usar como Admin')
+    parser.add_argument('--supervisor', type=int, help='id_operador a usar como Supervisor/Jefe')
+    parser.add_argument('--agente', type=int, help='id_operador a usar como Agente')
+    parser.add_argument('--json', help='Guardar los resultados en este archivo')
+    parser.add_argument('--comparar', help='Resultados anteriores (JSON) contra los que comparar')
+    parser.add_argument('--actual', help='Comparar este JSON en lugar de volver a medir')
+    parser.add_argument('--umbral', type=float, default=0.10,
+                        help='Variación de la mediana que cuenta como regresión (default: 0.10)')
+    args = parser.parse_args()
+
+    if args.actual:
+        if not args.comparar:
+            parser.error('--actual requiere --comparar')
+        with open(args.actual, encoding='utf-8') as f:
+            actual = json.load(f)
+    else:
+        actual = ejecutar(args)
+        if args.json:
+            with open(args.json, 'w', encoding='utf-8') as f:
+                json.dump(actual, f, indent=2, default=str)
+            print(f'Resultados en {args.json}')
+
+    if args.comparar:
+        with open(args.comparar, encoding='utf-8') as f:
+            base = json.load(f)
+        print()
+        if comparar(actual, base, args.umbral):
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,110 @@
+"""
+Benchmark del calendario laboral (flask_app/utils/calendario.py).
+
+Sobre 100k intervalos de tickets (inicio aleatorio en dos años, duración de
+hasta 30 días) con un calendario de oficina L-V 09:00-18:00 y feriados, mide:
+  - minutos_habiles:  recorrido día a día (ingenuo) vs tabla acumulada + bisect
+  - sumar_minutos:    vencimientos de SLA (60 min a 5 días hábiles)
+
+El recorrido ingenuo se mide sobre una muestra y se extrapola; sobre esa misma
+muestra se verifica que ambos métodos den el mismo resultado.
+
+No requiere base de datos.
+
+Uso:
+    python scripts/bench_calendario.py [--intervalos 100000 --muestra 5000]
+"""
+import argparse
+import os
+import random
+import sys
+import time
+from datetime import date, datetime, timedelta
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from flask_app.utils.calendario import Calendario  # noqa: E402
+
+TRAMOS_OFICINA = {dia: [(9 * 60, 18 * 60)] for dia in range(5)}
+FERIADOS = [date(2025, 1, 1), date(2025, 4, 18), date(2025, 5, 1), date(2025, 9, 18),
+            date(2025, 9, 19), date(2025, 12, 25), date(2026, 1, 1), date(2026, 4, 3),
+            date(2026, 5, 1), date(2026, 9, 18), date(2026, 12, 25)]
+
+
+def minutos_habiles_ingenuo(tramos, feriados, desde, hasta):
+    """Recorre día a día intersectando cada tramo con [desde, hasta]."""
+    total = 0.0
+    dia = desde.date()
+    while dia <= hasta.date():
+        if dia not in feriados:
+            medianoche = datetime.combine(dia, datetime.min.time())
+            for inicio, fin in tramos.get(dia.weekday(), ()):
+                a = max(desde, medianoche + timedelta(minutes=inicio))
+                b = min(hasta, medianoche + timedelta(minutes=fin))
+                if b > a:
+                    total += (b - a).total_seconds() / 60.0
+        dia += timedelta(days=1)
+    return total
+
+
+def generar_intervalos(n, semilla=42):
+    rnd = random.Random(semilla)
+    base = datetime(2025, 1, 1)
+    intervalos = []
+    for _ in range(n):
+        inicio = base + timedelta(minutes=rnd.randint(0, 2 * 365 * 24 * 60))
+        intervalos.append((inicio, inicio + timedelta(minutes=rnd.randint(1, 30 * 24 * 60))))
+    return intervalos
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--intervalos', type=int, default=100000)
+    parser.add_argument('--muestra', type=int, default=5000, help='Intervalos para el método ingenuo')
+    args = parser.parse_args()
+
+    intervalos = generar_intervalos(args.intervalos)
+    muestra = intervalos[:args.muestra]
+    feriados = frozenset(FERIADOS)
+    calendario = Calendario(TRAMOS_OFICINA, FERIADOS, nombre='oficina')
+
+    t0 = time.perf_counter()
+    calendario.minutos_habiles(intervalos[0][0], intervalos[0][1])
+    construccion_ms = (time.perf_counter() - t0) * 1000
+
+    t0 = time.perf_counter()
+    ingenuo = [minutos_habiles_ingenuo(TRAMOS_OFICINA, feriados, a, b) for a, b in muestra]
+    ingenuo_s = (time.perf_counter() - t0) * len(intervalos) / len(muestra)
+
+    t0 = time.perf_counter()
+    tabla = [calendario.minutos_habiles(a, b) for a, b in intervalos]
+    tabla_s = time.perf_counter() - t0
+
+    diferencias = sum(1 for x, y in zip(ingenuo, tabla) if abs(x - y) > 1e-6)
+
+    rnd = random.Random(7)
+    objetivos = [rnd.choice((60, 240, 480, 1440, 2700)) for _ in intervalos]
+    t0 = time.perf_counter()
+    vencimientos = [calendario.sumar_minutos(a, m) for (a, _), m in zip(intervalos, objetivos)]
+    sumar_s = time.perf_counter() - t0
+    # Ida y vuelta: los minutos hábiles hasta el vencimiento deben ser el objetivo
+    inconsistentes = sum(
+        1 for (a, _), m, v in zip(intervalos[:args.muestra], objetivos, vencimientos)
+        if abs(calendario.minutos_habiles(a, v) - m) > 0.02
+    )
+
+    n = len(intervalos)
+    print(f'Intervalos: {n}  (muestra ingenua: {len(muestra)})')
+    print(f'Construcción de la tabla: {construccion_ms:.1f} ms')
+    print(f"{'operación':<34} | {'total (s)':>10} | {'µs/intervalo':>13}")
+    print('-' * 64)
+    print(f"{'minutos_habiles ingenuo (extrap.)':<34} | {ingenuo_s:>10.3f} | {ingenuo_s / n * 1e6:>13.2f}")
+    print(f"{'minutos_habiles tabla + bisect':<34} | {tabla_s:>10.3f} | {tabla_s / n * 1e6:>13.2f}")
+    print(f"{'sumar_minutos tabla + bisect':<34} | {sumar_s:>10.3f} | {sumar_s / n * 1e6:>13.2f}")
+    print(f'Mejora minutos_habiles: {ingenuo_s / tabla_s:.1f}x')
+    print(f'Diferencias con el método ingenuo: {diferencias}')
+    print(f'Vencimientos inconsistentes (ida y vuelta): {inconsistentes}')
+
+
+if __name__ == '__main__':
+    main()
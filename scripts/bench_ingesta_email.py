@@ -0,0 +1,267 @@
+"""
+Benchmark de punta a punta de la ingesta de correo: buzón IMAP -> fila en la BD.
+
+Levanta en este proceso el servidor IMAP y el sumidero SMTP de
+scripts/correo_local.py, apunta la configuración de la ingesta a ellos
+(IMAP_*/SMTP_* por entorno) y entrega tráfico generado: hilos nuevos,
+respuestas con In-Reply-To/References, correos solo HTML, adjuntos grandes
+y Message-ID duplicados. La ingesta corre como en producción:
+  - poll: email_ingest.poll_once cada --intervalo segundos
+  - idle: email_ingest.connect_and_idle_loop en un hilo (keepalive=--intervalo)
+
+Informa correos/s, latencia desde la entrega al buzón hasta que
+process_email_bytes terminó (ticket/mensaje ya confirmado en la BD),
+resultados por tipo (ticket nuevo, mensaje en ticket, duplicado, omitido
+por motivo, error), respuestas automáticas capturadas y RSS pico del proceso
+(incluye los servidores locales y el correo generado, que se mide aparte como
+RSS al inicio).
+
+ESCRIBE en la base configurada (.env): usar una base de pruebas, p. ej. la
+de scripts/generar_datos_sinteticos.py. Sin --confirmar no hace nada.
+
+Uso:
+    python scripts/bench_ingesta_email.py --confirmar [--correos 500] [--modo idle] [--ritmo 20]
+    python scripts/bench_ingesta_email.py --confirmar --adjuntos 20 --adjunto-kb 8192 --json ingesta.json
+"""
+import argparse
+import json
+import logging
+import os
+import re
+import resource
+import statistics
+import sys
+import threading
+import time
+from collections import Counter, defaultdict, deque
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from correo_local import ServidorIMAP, SumideroSMTP, generar_correos  # noqa: E402
+
+_MESSAGE_ID = re.compile(rb'^Message-ID:\s*(<[^>\r\n]+>)', re.I | re.M)
+
+
+def _message_id(datos):
+    cabeceras = datos.split(b'\r\n\r\n', 1)[0].split(b'\n\n', 1)[0]
+    encontrado = _MESSAGE_ID.search(cabeceras)
+    return encontrado.group(1) if encontrado else None
+
+
+def _rss_actual_mb():
+    try:
+        with open('/proc/self/status', encoding='ascii') as f:
+            for linea in f:
+                if linea.startswith('VmRSS:'):
+                    return int(linea.split()[1]) / 1024
+    except OSError:
+        pass
+    return None
+
+
+def _rss_pico_mb():
+    pico = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux informa KB; macOS, bytes
+    return pico / (1024 * 1024) if sys.platform == 'darwin' else pico / 1024
+
+
+def _resultado(res):
+    if not isinstance(res, dict) or res.get('success') is False:
+        return 'error'
+    if res.get('skipped'):
+        return 'duplicado' if 'existing' in res else f"omitido_{res.get('reason') or 'otro'}"
+    if res.get('created_ticket'):
+        return 'ticket_nuevo'
+    return 'mensaje_en_ticket' if res.get('id_msg') else 'error'
+
+
+def _percentiles(valores):
+    if not valores:
+        return {}
+    ordenados = sorted(valores)
+    cortes = statistics.quantiles(ordenados, n=100) if len(ordenados) > 1 else ordenados * 99
+    return {
+        'p50': statistics.median(ordenados),
+        'p95': cortes[94],
+        'p99': cortes[98],
+        'max': ordenados[-1],
+        'media': statistics.fmean(ordenados),
+    }
+
+
+class Medidor:
+    """Envuelve process_email_bytes para medir desde la entrega (por Message-ID)."""
+
+    def __init__(self, esperados):
+        self.esperados = esperados
+        self.entregas = defaultdict(deque)
+        self.latencias = defaultdict(list)
+        self.resultados = Counter()
+        self.procesados = 0
+        self.primera_entrega = None
+        self.ultimo_fin = None
+        self.listo = threading.Event()
+        self._lock = threading.Lock()
+
+    def entregado(self, datos):
+        ahora = time.monotonic()
+        with self._lock:
+            self.entregas[_message_id(datos)].append(ahora)
+            if self.primera_entrega is None:
+                self.primera_entrega = ahora
+
+    def envolver(self, procesar):
+        def medido(datos):
+            res = procesar(datos)
+            fin = time.monotonic()
+            tipo = _resultado(res)
+            with self._lock:
+                pendientes = self.entregas.get(_message_id(datos))
+                if pendientes:
+                    self.latencias[tipo].append(fin - pendientes.popleft())
+                self.resultados[tipo] += 1
+                self.procesados += 1
+                self.ultimo_fin = fin
+                if self.procesados >= self.esperados:
+                    self.listo.set()
+            return res
+        return medido
+
+
+def _entregar(buzon, correos, medidor, ritmo):
+    inicio = time.monotonic()
+    for n, (_, datos) in enumerate(correos):
+        if ritmo:
+            espera = inicio + n / ritmo - time.monotonic()
+            if espera > 0:
+                time.sleep(espera)
+        medidor.entregado(datos)
+        buzon.entregar(datos)
+
+
+def ejecutar(args):
+    imap = ServidorIMAP()
+    smtp = SumideroSMTP()
+    os.environ.update({
+        'IMAP_HOST': '127.0.0.1', 'IMAP_PORT': str(imap.iniciar()), 'IMAP_USE_SSL': '0',
+        'IMAP_USER': args.buzon, 'IMAP_PASSWORD': 'local', 'IMAP_SEARCH': 'UNSEEN',
+        'SMTP_HOST': '127.0.0.1', 'SMTP_PORT': str(smtp.iniciar()), 'SMTP_USE_TLS': '0',
+        'SMTP_USER': args.buzon, 'SMTP_PASSWORD': 'local',
+        'SEND_AUTOREPLY': '0' if args.sin_respuesta else '1',
+    })
+    # La configuración de la ingesta se lee al importar: después de fijar el entorno
+    from flask_app.services import email_ingest
+
+    pesos = {'nuevo': args.nuevos, 'respuesta': args.respuestas, 'html': args.html,
+             'adjunto': args.adjuntos, 'duplicado': args.duplicados}
+    print(f'Generando {args.correos} correos (pesos {pesos}, adjuntos hasta {args.adjunto_kb} KB)...')
+    correos = generar_correos(args.correos, args.buzon, pesos=pesos, adjunto_kb=args.adjunto_kb, semilla=args.semilla)
+    tipos = Counter(tipo for tipo, _ in correos)
+    rss_inicio = _rss_actual_mb()
+
+    medidor = Medidor(len(correos))
+    email_ingest.process_email_bytes = medidor.envolver(email_ingest.process_email_bytes)
+    entrega = threading.Thread(target=_entregar, args=(imap.buzon, correos, medidor, args.ritmo), daemon=True)
+    detener = threading.Event()
+
+    print(f'Ingesta en modo {args.modo} (intervalo {args.intervalo}s, ritmo {args.ritmo or "todo de una vez"})...')
+    entrega.start()
+    if args.modo == 'idle':
+        ingesta = threading.Thread(
+            target=email_ingest.connect_and_idle_loop,
+            kwargs={'keepalive': args.intervalo, 'min_backoff': 1, 'max_backoff': 5, 'detener': detener},
+            daemon=True,
+        )
+        ingesta.start()
+        medidor.listo.wait(args.espera_max)
+        detener.set()
+        ingesta.join(args.intervalo + 10)
+    else:
+        limite = time.monotonic() + args.espera_max
+        while not medidor.listo.is_set() and time.monotonic() < limite:
+            email_ingest.poll_once()
+            medidor.listo.wait(args.intervalo)
+    entrega.join()
+
+    imap.detener()
+    smtp.detener()
+
+    duracion = (medidor.ultimo_fin or time.monotonic()) - (medidor.primera_entrega or time.monotonic())
+    con_fila = [l for tipo in ('ticket_nuevo', 'mensaje_en_ticket') for l in medidor.latencias[tipo]]
+    todas = [l for valores in medidor.latencias.values() for l in valores]
+    return {
+        'modo': args.modo,
+        'intervalo': args.intervalo,
+        'ritmo': args.ritmo,
+        'entregados': len(correos),
+        'tipos_generados': dict(tipos),
+        'procesados': medidor.procesados,
+        'incompleto': not medidor.listo.is_set(),
+        'duracion_s': duracion,
+        'correos_por_s': medidor.procesados / duracion if duracion > 0 else 0.0,
+        'resultados': dict(medidor.resultados),
+        'latencia_fila_s': _percentiles(con_fila),
+        'latencia_total_s': _percentiles(todas),
+        'respuestas_smtp': len(smtp.recibidos),
+        'sin_leer_al_final': imap.buzon.sin_leer(),
+        'rss_inicio_mb': rss_inicio,
+        'rss_pico_mb': _rss_pico_mb(),
+    }
+
+
+def _imprimir(r):
+    print()
+    print(f"Correos: {r['procesados']}/{r['entregados']} procesados en {r['duracion_s']:.2f} s "
+          f"-> {r['correos_por_s']:.1f} correos/s" + ('  (INCOMPLETO: venció --espera-max)' if r['incompleto'] else ''))
+    print('Generados: ' + ', '.join(f'{t} {n}' for t, n in sorted(r['tipos_generados'].items())))
+    print('Resultados: ' + ', '.join(f'{t} {n}' for t, n in sorted(r['resultados'].items())))
+    for nombre, clave in (('entrega -> fila', 'latencia_fila_s'), ('entrega -> procesado', 'latencia_total_s')):
+        p = r[clave]
+        if p:
+            print(f"Latencia {nombre} (ms): p50 {p['p50'] * 1000:.0f}  p95 {p['p95'] * 1000:.0f}  "
+                  f"p99 {p['p99'] * 1000:.0f}  max {p['max'] * 1000:.0f}")
+    print(f"Respuestas automáticas capturadas por el SMTP: {r['respuestas_smtp']}")
+    inicio = f"{r['rss_inicio_mb']:.0f} MB" if r['rss_inicio_mb'] is not None else 'n/d'
+    print(f"RSS: al inicio {inicio} (servidores + correo generado), pico {r['rss_pico_mb']:.0f} MB")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--confirmar', action='store_true', help='Necesario: la ingesta escribe en la BD configurada')
+    parser.add_argument('--correos', type=int, default=500, help='Correos a entregar (default: 500)')
+    parser.add_argument('--modo', choices=('poll', 'idle'), default='poll',
+                        help='poll_once repetido o connect_and_idle_loop (default: poll)')
+    parser.add_argument('--intervalo', type=float, default=0.5,
+                        help='Segundos entre pasadas / keepalive del bucle (default: 0.5)')
+    parser.add_argument('--ritmo', type=float, default=0,
+                        help='Correos por segundo entregados al buzón; 0 = todos antes de empezar (default: 0)')
+    parser.add_argument('--nuevos', type=int, default=55, help='Peso de hilos nuevos en texto plano (default: 55)')
+    parser.add_argument('--respuestas', type=int, default=25, help='Peso de respuestas a hilos anteriores (default: 25)')
+    parser.add_argument('--html', type=int, default=10, help='Peso de correos solo HTML (default: 10)')
+    parser.add_argument('--adjuntos', type=int, default=5, help='Peso de correos con adjunto grande (default: 5)')
+    parser.add_argument('--adjunto-kb', type=int, default=2048, help='Tamaño máximo del adjunto en KB (default: 2048)')
+    parser.add_argument('--duplicados', type=int, default=5, help='Peso de Message-ID repetidos (default: 5)')
+    parser.add_argument('--sin-respuesta', action='store_true', help='No enviar respuestas automáticas')
+    parser.add_argument('--buzon', default='soporte@correo.local',
+                        help='Dirección del buzón; se mapea a IMAP_ID_DEPTO (default: soporte@correo.local)')
+    parser.add_argument('--espera-max', type=float, default=600, help='Tiempo máximo de ingesta en segundos (default: 600)')
+    parser.add_argument('--semilla', type=int, default=42, help='Semilla del generador (default: 42)')
+    parser.add_argument('--json', help='Guardar los resultados en este archivo')
+    parser.add_argument('--verbose', action='store_true', help='Log INFO de la ingesta')
+    args = parser.parse_args()
+
+    if not args.confirmar:
+        parser.error('la ingesta crea usuarios, tickets y mensajes en la BD configurada: agregar --confirmar')
+    logging.basicConfig(level=logging.INFO if args.verbose else logging.WARNING)
+
+    resultado = ejecutar(args)
+    _imprimir(resultado)
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(resultado, f, indent=2, default=str)
+        print(f'Resultados en {args.json}')
+
+
+if __name__ == '__main__':
+    main()
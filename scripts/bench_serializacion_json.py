@@ -0,0 +1,142 @@
+"""
+Benchmark de serialización de listados (CPU por request).
+
+Compara, para respuestas de 50, 500 y 5000 filas con la forma de GET /api/tickets:
+  - antes:   dict reconstruido a mano + str(datetime) + proveedor JSON por defecto de Flask
+  - despues: Proyeccion declarativa + proveedor JSON configurado (orjson si está instalado)
+
+No requiere base de datos: las filas se generan en memoria con la forma del cursor.
+
+Uso:
+    python scripts/bench_serializacion_json.py [--repeticiones 20]
+"""
+import argparse
+import os
+import random
+import statistics
+import sys
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from flask.json.provider import DefaultJSONProvider  # noqa: E402
+
+from flask_app import app  # noqa: E402
+from flask_app.models.ticket_model import PROYECCION_TICKET_LISTA  # noqa: E402
+
+
+def generar_filas(n, semilla=42):
+    rnd = random.Random(semilla)
+    base = datetime(2025, 1, 1, 8, 0, 0)
+    filas = []
+    for i in range(n):
+        filas.append({
+            'id_ticket': i + 1,
+            'titulo': f'Problema con la reserva número {i}',
+            'tipo_ticket': 'Publico',
+            'descripcion': 'Descripción del problema reportado por el socio ' * 3,
+            'fecha_ini': base + timedelta(minutes=rnd.randint(0, 500000)),
+            'fecha_primera_respuesta': None,
+            'fecha_resolucion': None,
+            'id_estado': rnd.randint(1, 6),
+            'id_prioridad': rnd.randint(1, 4),
+            'id_usuarioext': rnd.randint(1, 1000),
+            'id_club': rnd.randint(1, 10),
+            'id_sla': 1,
+            'id_operador_emisor': None,
+            'id_depto_ticket': rnd.randint(1, 8),
+            'id_canal': 1,
+            'canal_nombre': 'Email',
+            'estado_desc': 'En Proceso',
+            'prioridad_desc': 'Media',
+            'usuario_nombre': 'Juan Pérez',
+            'usuario_email': 'juan.perez@example.com',
+            'club_nombre': 'Club Central',
+            'emisor_nombre': None,
+            'id_operador': rnd.randint(1, 40),
+            'operador_nombre': 'Operador Uno',
+            'operador_tiene_mensajes': rnd.randint(0, 3),
+            'id_operador_remitente': None,
+            'remitente_nombre': None,
+            'id_depto_owner': rnd.randint(1, 8),
+        })
+    return filas
+
+
+def proyeccion_manual(rows):
+    """Copia del armado previo de TicketModel.get_all."""
+    tickets = []
+    for row in rows:
+        tickets.append({
+            'id_ticket': row['id_ticket'],
+            'titulo': row['titulo'],
+            'tipo_ticket': row['tipo_ticket'],
+            'descripcion': row['descripcion'],
+            'fecha_ini': str(row['fecha_ini']),
+            'id_estado': row['id_estado'],
+            'id_prioridad': row['id_prioridad'],
+            'id_usuarioext': row['id_usuarioext'],
+            'id_operador': row['id_operador'],
+            'id_operador_remitente': row['id_operador_remitente'],
+            'id_operador_emisor': row['id_operador_emisor'],
+            'id_depto': row.get('id_depto_ticket'),
+            'id_depto_owner': row.get('id_depto_owner'),
+            'estado': row['estado_desc'],
+            'prioridad': row['prioridad_desc'],
+            'usuario': {
+                'nombre': row['usuario_nombre'],
+                'email': row['usuario_email']
+            },
+            'operador_nombre': row['operador_nombre'],
+            'operador_aceptado': row.get('operador_tiene_mensajes', 0) > 0,
+            'remitente_nombre': row['remitente_nombre'],
+            'emisor_nombre': row['emisor_nombre'],
+            'id_canal': row.get('id_canal'),
+            'canal': row.get('canal_nombre'),
+            'club': row['club_nombre']
+        })
+    return tickets
+
+
+def medir(funcion, repeticiones):
+    muestras = []
+    for _ in range(repeticiones):
+        inicio = time.process_time()
+        funcion()
+        muestras.append((time.process_time() - inicio) * 1000)
+    return statistics.median(muestras), min(muestras)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--repeticiones', type=int, default=20)
+    args = parser.parse_args()
+
+    proveedor_flask = DefaultJSONProvider(app)
+    proveedor_actual = app.json
+
+    print(f'Proveedor configurado: {type(proveedor_actual).__name__}')
+    print(f"{'filas':>6} | {'antes (ms CPU)':>15} | {'despues (ms CPU)':>17} | {'mejora':>7}")
+    print('-' * 56)
+
+    with app.app_context():
+        for n in (50, 500, 5000):
+            filas = generar_filas(n)
+
+            def antes():
+                tickets = proyeccion_manual(filas)
+                return proveedor_flask.response({'success': True, 'tickets': tickets, 'total': n}).get_data()
+
+            def despues():
+                tickets = PROYECCION_TICKET_LISTA(filas)
+                return proveedor_actual.response({'success': True, 'tickets': tickets, 'total': n}).get_data()
+
+            med_antes, _ = medir(antes, args.repeticiones)
+            med_despues, _ = medir(despues, args.repeticiones)
+            mejora = med_antes / med_despues if med_despues else float('inf')
+            print(f'{n:>6} | {med_antes:>15.2f} | {med_despues:>17.2f} | {mejora:>6.1f}x')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,81 @@
+"""
+Completa tamano, mime y sha256 de los adjuntos registrados antes de
+migracion_adjunto_metadatos.sql (leyendo cada archivo una vez).
+
+Se puede cortar y volver a ejecutar: solo procesa filas con sha256 NULL.
+
+Uso:
+    python scripts/completar_metadatos_adjuntos.py [--workers 4 --lote 500]
+"""
+import argparse
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from flask_app.config.conexion_login import execute_query  # noqa: E402
+from flask_app.services import almacenamiento  # noqa: E402
+
+
+def medir(fila):
+    """Retorna (id_adj, tamano, mime, sha256) o None si el archivo no está."""
+    try:
+        with almacenamiento.abrir(fila['ruta']) as f:
+            lector = almacenamiento.LectorMedido(f)
+            while lector.read(1024 * 1024):
+                pass
+    except FileNotFoundError:
+        return None
+    return (
+        fila['id_adj'],
+        lector.tamano,
+        almacenamiento.detectar_mime(fila['nom_adj'], lector.cabecera),
+        lector.sha256,
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--workers', type=int, default=4, help='Archivos leídos en paralelo (default: 4)')
+    parser.add_argument('--lote', type=int, default=500, help='Filas por lote (default: 500)')
+    args = parser.parse_args()
+
+    inicio = time.perf_counter()
+    completados = faltantes = 0
+    ultimo_id = 0
+    with ThreadPoolExecutor(max_workers=max(args.workers, 1)) as pool:
+        while True:
+            filas = execute_query(
+                """
+                SELECT id_adj, nom_adj, ruta
+                FROM adjunto
+                WHERE id_adj > %s AND sha256 IS NULL AND ruta IS NOT NULL
+                ORDER BY id_adj
+                LIMIT %s
+                """,
+                (ultimo_id, args.lote),
+                fetch_all=True,
+            ) or []
+            if not filas:
+                break
+            for resultado in pool.map(medir, filas):
+                if resultado is None:
+                    faltantes += 1
+                    continue
+                id_adj, tamano, mime, sha256 = resultado
+                execute_query(
+                    "UPDATE adjunto SET tamano = %s, mime = %s, sha256 = %s WHERE id_adj = %s",
+                    (tamano, mime, sha256, id_adj),
+                    commit=True,
+                )
+                completados += 1
+            ultimo_id = filas[-1]['id_adj']
+            print(f'  hasta #{ultimo_id}: {completados} completados, {faltantes} sin archivo')
+
+    print(f'Listo en {time.perf_counter() - inicio:.1f}s: {completados} completados, {faltantes} sin archivo')
+
+
+if __name__ == '__main__':
+    main()
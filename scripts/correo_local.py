@@ -0,0 +1,479 @@
+"""
+Servidores de correo locales para probar la ingesta sin Gmail.
+
+- ServidorIMAP: buzón en memoria con el subconjunto de IMAP4rev1 que usan
+  services/email_ingest.py e imaplib: CAPABILITY, LOGIN, SELECT/EXAMINE,
+  SEARCH (ALL/SEEN/UNSEEN), FETCH (RFC822, BODY[], BODY.PEEK[], FLAGS),
+  STORE (+FLAGS/-FLAGS/FLAGS), NOOP, IDLE/DONE, CLOSE y LOGOUT. Sin TLS.
+- SumideroSMTP: acepta EHLO/AUTH/MAIL/RCPT/DATA y guarda lo enviado en memoria
+  (las respuestas automáticas de la ingesta). Sin STARTTLS.
+- generar_correos: tráfico MIME realista (hilos nuevos, respuestas con
+  In-Reply-To/References, correos solo HTML, adjuntos grandes y Message-ID
+  duplicados).
+
+Se usan desde scripts/bench_ingesta_email.py, o sueltos para desarrollo:
+
+    python scripts/correo_local.py [--imap-puerto 1143 --smtp-puerto 1025 --cargar 50]
+
+y en otra terminal, con las variables que imprime:
+
+    IMAP_HOST=127.0.0.1 IMAP_PORT=1143 IMAP_USE_SSL=0 SMTP_HOST=127.0.0.1 SMTP_PORT=1025 SMTP_USE_TLS=0 \\
+        python -m flask_app.services.email_ingest
+"""
+import argparse
+import random
+import re
+import select
+import socket
+import socketserver
+import threading
+import time
+from email.message import EmailMessage
+from email.utils import format_datetime, make_msgid
+from datetime import datetime, timedelta, timezone
+
+_CRLF = b'\r\n'
+
+
+class _Lector:
+    """Lectura por líneas y por tamaño sobre el socket, con espera acotada (para IDLE)."""
+
+    def __init__(self, sock):
+        self.sock = sock
+        self.buffer = b''
+
+    def _recibir(self, espera=None):
+        if espera is not None:
+            listos, _, _ = select.select([self.sock], [], [], espera)
+            if not listos:
+                return False
+        datos = self.sock.recv(65536)
+        if not datos:
+            raise ConnectionError('conexión cerrada')
+        self.buffer += datos
+        return True
+
+    def linea(self, espera=None):
+        """Una línea sin el CRLF; None si venció `espera` sin una línea completa."""
+        while _CRLF not in self.buffer:
+            if not self._recibir(espera):
+                return None
+        linea, self.buffer = self.buffer.split(_CRLF, 1)
+        return linea
+
+    def bytes(self, cantidad):
+        while len(self.buffer) < cantidad:
+            self._recibir()
+        datos, self.buffer = self.buffer[:cantidad], self.buffer[cantidad:]
+        return datos
+
+
+# ----------------------------------------------------------------------
+# IMAP
+# ----------------------------------------------------------------------
+
+class Buzon:
+    """Mensajes en memoria. El número de secuencia es la posición (no hay EXPUNGE)."""
+
+    def __init__(self):
+        self.mensajes = []
+        self._cambio = threading.Condition()
+
+    def entregar(self, datos):
+        """Agrega un mensaje. Retorna su número de secuencia."""
+        with self._cambio:
+            self.mensajes.append({'datos': datos, 'flags': set(), 'entregado': time.monotonic()})
+            self._cambio.notify_all()
+            return len(self.mensajes)
+
+    def total(self):
+        with self._cambio:
+            return len(self.mensajes)
+
+    def sin_leer(self):
+        with self._cambio:
+            return sum(1 for m in self.mensajes if '\\Seen' not in m['flags'])
+
+    def esperar_cambio(self, conocidos, espera):
+        """Espera hasta `espera` s a que haya más de `conocidos` mensajes."""
+        with self._cambio:
+            self._cambio.wait_for(lambda: len(self.mensajes) > conocidos, timeout=espera)
+            return len(self.mensajes)
+
+
+def _tokens(texto):
+    """Separa argumentos IMAP: átomos, "cadenas" y (listas) como una sola pieza."""
+    return re.findall(r'"(?:[^"\\]|\\.)*"|\([^)]*\)|\S+', texto)
+
+
+def _sin_comillas(valor):
+    if len(valor) >= 2 and valor[0] == valor[-1] == '"':
+        return re.sub(r'\\(.)', r'\1', valor[1:-1])
+    return valor
+
+
+def _secuencias(conjunto, total):
+    numeros = []
+    for parte in conjunto.split(','):
+        if ':' in parte:
+            desde, hasta = parte.split(':', 1)
+            desde = total if desde == '*' else int(desde)
+            hasta = total if hasta == '*' else int(hasta)
+            numeros.extend(range(min(desde, hasta), max(desde, hasta) + 1))
+        else:
+            numeros.append(total if parte == '*' else int(parte))
+    return [n for n in numeros if 1 <= n <= total]
+
+
+class _ManejadorIMAP(socketserver.BaseRequestHandler):
+    def handle(self):
+        self.lector = _Lector(self.request)
+        self.buzon = self.server.buzon
+        self.conocidos = 0
+        self._enviar(b'* OK [CAPABILITY IMAP4rev1 IDLE AUTH=PLAIN] Servidor IMAP local listo')
+        try:
+            while True:
+                linea = self.lector.linea()
+                if not linea:
+                    continue
+                etiqueta, _, resto = linea.decode('utf-8', 'replace').partition(' ')
+                comando, _, args = resto.partition(' ')
+                comando = comando.upper()
+                if comando == 'UID':
+                    self._enviar(f'{etiqueta} NO UID no soportado'.encode())
+                    continue
+                metodo = getattr(self, f'_cmd_{comando.lower()}', None)
+                if metodo is None:
+                    self._enviar(f'{etiqueta} BAD Comando no soportado: {comando}'.encode())
+                    continue
+                if metodo(etiqueta, args) is False:
+                    return
+        except (ConnectionError, OSError):
+            return
+
+    def _enviar(self, datos):
+        self.request.sendall(datos + _CRLF)
+
+    def _exists(self):
+        total = self.buzon.total()
+        if total != self.conocidos:
+            self.conocidos = total
+            self._enviar(f'* {total} EXISTS'.encode())
+
+    def _cmd_capability(self, etiqueta, args):
+        self._enviar(b'* CAPABILITY IMAP4rev1 IDLE AUTH=PLAIN')
+        self._enviar(f'{etiqueta} OK CAPABILITY completado'.encode())
+
+    def _cmd_login(self, etiqueta, args):
+        usuario, clave = (_sin_comillas(t) for t in (_tokens(args) + ['', ''])[:2])
+        esperado = self.server.credenciales
+        if esperado and (usuario, clave) != esperado:
+            self._enviar(f'{etiqueta} NO [AUTHENTICATIONFAILED] Credenciales inválidas'.encode())
+            return
+        self._enviar(f'{etiqueta} OK LOGIN completado'.encode())
+
+    def _cmd_select(self, etiqueta, args, modo='READ-WRITE'):
+        self.conocidos = self.buzon.total()
+        self._enviar(b'* FLAGS (\\Seen \\Answered \\Flagged \\Deleted \\Draft)')
+        self._enviar(f'* {self.conocidos} EXISTS'.encode())
+        self._enviar(b'* 0 RECENT')
+        self._enviar(b'* OK [UIDVALIDITY 1] UIDs validos')
+        self._enviar(f'{etiqueta} OK [{modo}] SELECT completado'.encode())
+
+    def _cmd_examine(self, etiqueta, args):
+        self._cmd_select(etiqueta, args, modo='READ-ONLY')
+
+    def _cmd_search(self, etiqueta, args):
+        criterio = args.upper().split()
+        criterio = [c for c in criterio if c != 'CHARSET' and c != 'UTF-8'] or ['ALL']
+        if any(c not in ('ALL', 'SEEN', 'UNSEEN') for c in criterio):
+            self._enviar(f'{etiqueta} BAD Criterio no soportado: {args}'.encode())
+            return
+        with self.buzon._cambio:
+            encontrados = [
+                str(n) for n, m in enumerate(self.buzon.mensajes, 1)
+                if all(c == 'ALL' or (c == 'SEEN') == ('\\Seen' in m['flags']) for c in criterio)
+            ]
+        self._enviar(('* SEARCH ' + ' '.join(encontrados)).rstrip().encode())
+        self._enviar(f'{etiqueta} OK SEARCH completado'.encode())
+
+    def _cmd_fetch(self, etiqueta, args):
+        conjunto, _, items = args.partition(' ')
+        items = items.strip().strip('()').upper()
+        total = self.buzon.total()
+        for numero in _secuencias(conjunto, total):
+            mensaje = self.buzon.mensajes[numero - 1]
+            partes = []
+            literal = None
+            if 'RFC822' in items.split() or 'BODY[]' in items:
+                literal = ('RFC822' if 'RFC822' in items.split() else 'BODY[]')
+                mensaje['flags'].add('\\Seen')
+            elif 'BODY.PEEK[]' in items:
+                literal = 'BODY[]'
+            if 'FLAGS' in items.split():
+                partes.append(f"FLAGS ({' '.join(sorted(mensaje['flags']))})")
+            if literal:
+                datos = mensaje['datos']
+                cabecera = f"* {numero} FETCH ({' '.join(partes + [literal])} {{{len(datos)}}}".encode()
+                self.request.sendall(cabecera + _CRLF + datos + b')' + _CRLF)
+            else:
+                self._enviar(f"* {numero} FETCH ({' '.join(partes)})".encode())
+        self._enviar(f'{etiqueta} OK FETCH completado'.encode())
+
+    def _cmd_store(self, etiqueta, args):
+        conjunto, operacion, flags = (args.split(' ', 2) + ['', ''])[:3]
+        flags = set(flags.strip('()').split())
+        operacion = operacion.upper()
+        for numero in _secuencias(conjunto, self.buzon.total()):
+            mensaje = self.buzon.mensajes[numero - 1]
+            if operacion.startswith('+FLAGS'):
+                mensaje['flags'] |= flags
+            elif operacion.startswith('-FLAGS'):
+                mensaje['flags'] -= flags
+            else:
+                mensaje['flags'] = set(flags)
+            if '.SILENT' not in operacion:
+                self._enviar(f"* {numero} FETCH (FLAGS ({' '.join(sorted(mensaje['flags']))}))".encode())
+        self._enviar(f'{etiqueta} OK STORE completado'.encode())
+
+    def _cmd_noop(self, etiqueta, args):
+        self._exists()
+        self._enviar(f'{etiqueta} OK NOOP completado'.encode())
+
+    def _cmd_idle(self, etiqueta, args):
+        self._enviar(b'+ esperando')
+        while True:
+            linea = self.lector.linea(espera=0.0)
+            if linea is not None:
+                if linea.strip().upper() == b'DONE':
+                    break
+                continue
+            # Despertar ante un mensaje nuevo o para volver a mirar el socket
+            self.buzon.esperar_cambio(self.conocidos, 0.05)
+            self._exists()
+        self._enviar(f'{etiqueta} OK IDLE terminado'.encode())
+
+    def _cmd_close(self, etiqueta, args):
+        self._enviar(f'{etiqueta} OK CLOSE completado'.encode())
+
+    def _cmd_logout(self, etiqueta, args):
+        self._enviar(b'* BYE Hasta luego')
+        self._enviar(f'{etiqueta} OK LOGOUT completado'.encode())
+        return False
+
+
+class _Servidor(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def get_request(self):
+        conexion, direccion = super().get_request()
+        # Las respuestas van en varias escrituras cortas: sin Nagle no esperan el ACK retardado
+        conexion.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        return conexion, direccion
+
+    def iniciar(self):
+        """Atiende en un hilo de fondo. Retorna el puerto (útil con puerto 0)."""
+        threading.Thread(target=self.serve_forever, name=type(self).__name__, daemon=True).start()
+        return self.server_address[1]
+
+    def detener(self):
+        self.shutdown()
+        self.server_close()
+
+
+class ServidorIMAP(_Servidor):
+    def __init__(self, host='127.0.0.1', puerto=0, credenciales=None, buzon=None):
+        self.buzon = buzon or Buzon()
+        self.credenciales = credenciales
+        super().__init__((host, puerto), _ManejadorIMAP)
+
+
+# ----------------------------------------------------------------------
+# SMTP
+# ----------------------------------------------------------------------
+
+class _ManejadorSMTP(socketserver.BaseRequestHandler):
+    def handle(self):
+        lector = _Lector(self.request)
+        remitente, destinatarios = None, []
+        self._responder('220 localhost SMTP local listo')
+        try:
+            while True:
+                linea = lector.linea().decode('utf-8', 'replace')
+                comando = linea[:4].upper()
+                if comando in ('EHLO', 'HELO'):
+                    if comando == 'EHLO':
+                        self._responder('250-localhost', '250-AUTH PLAIN LOGIN', '250-8BITMIME', '250 SIZE 104857600')
+                    else:
+                        self._responder('250 localhost')
+                elif comando == 'AUTH':
+                    if linea.upper().startswith('AUTH LOGIN'):
+                        if len(linea.split()) < 3:
+                            self._responder('334 VXNlcm5hbWU6')
+                            lector.linea()
+                        self._responder('334 UGFzc3dvcmQ6')
+                        lector.linea()
+                    self._responder('235 Autenticado')
+                elif comando == 'MAIL':
+                    remitente, destinatarios = linea.split(':', 1)[1].strip(), []
+                    self._responder('250 OK')
+                elif comando == 'RCPT':
+                    destinatarios.append(linea.split(':', 1)[1].strip())
+                    self._responder('250 OK')
+                elif comando == 'DATA':
+                    self._responder('354 Terminar con <CRLF>.<CRLF>')
+                    lineas = []
+                    while True:
+                        actual = lector.linea()
+                        if actual == b'.':
+                            break
+                        lineas.append(actual[1:] if actual.startswith(b'..') else actual)
+                    self.server.registrar(remitente, destinatarios, _CRLF.join(lineas) + _CRLF)
+                    self._responder('250 OK encolado')
+                elif comando == 'RSET':
+                    remitente, destinatarios = None, []
+                    self._responder('250 OK')
+                elif comando == 'NOOP':
+                    self._responder('250 OK')
+                elif comando == 'QUIT':
+                    self._responder('221 Adiós')
+                    return
+                else:
+                    self._responder('502 Comando no implementado')
+        except (ConnectionError, OSError, AttributeError):
+            return
+
+    def _responder(self, *lineas):
+        self.request.sendall(b''.join(l.encode() + _CRLF for l in lineas))
+
+
+class SumideroSMTP(_Servidor):
+    """Guarda cada correo recibido: {'de', 'para', 'datos', 'recibido'}."""
+
+    def __init__(self, host='127.0.0.1', puerto=0):
+        self.recibidos = []
+        self._lock = threading.Lock()
+        super().__init__((host, puerto), _ManejadorSMTP)
+
+    def registrar(self, remitente, destinatarios, datos):
+        with self._lock:
+            self.recibidos.append({'de': remitente, 'para': destinatarios, 'datos': datos, 'recibido': time.monotonic()})
+
+
+# ----------------------------------------------------------------------
+# Generador de carga
+# ----------------------------------------------------------------------
+
+_TEMAS = [
+    'Problema con la reserva', 'Cobro duplicado', 'No puedo ingresar al portal', 'Cambio de fecha',
+    'Consulta por convenio', 'Factura con RUT incorrecto', 'Anulación de inscripción', 'Pérdida de credencial',
+]
+_FRASES = [
+    'Junto con saludar, les escribo porque tengo un problema.', 'El pago aparece rechazado pero el banco lo descontó.',
+    'Necesito que me confirmen la reserva lo antes posible.', 'Adjunto el comprobante de la transferencia.',
+    'Ya intenté desde otro navegador y sigue igual.', 'Quedo atento a su respuesta.',
+]
+
+TIPOS = ('nuevo', 'respuesta', 'html', 'adjunto', 'duplicado')
+
+
+def _cuerpo(rnd, parrafos=3):
+    return '\n\n'.join(' '.join(rnd.choice(_FRASES) for _ in range(rnd.randint(1, 3))) for _ in range(parrafos))
+
+
+def _mensaje(rnd, remitente, destino, asunto, fecha, dominio):
+    msg = EmailMessage()
+    msg['From'] = remitente
+    msg['To'] = destino
+    msg['Subject'] = asunto
+    msg['Date'] = format_datetime(fecha)
+    msg['Message-ID'] = make_msgid(idstring=f'{rnd.getrandbits(64):x}', domain=dominio)
+    return msg
+
+
+def generar_correos(cantidad, destino, pesos=None, adjunto_kb=2048, semilla=42, dominio='correo.local'):
+    """
+    Genera `cantidad` correos (bytes) dirigidos a `destino`.
+
+    pesos: dict tipo -> peso relativo (ver TIPOS). Las respuestas continúan un
+    hilo anterior del mismo remitente con In-Reply-To y References completos;
+    los duplicados repiten un correo anterior byte a byte (mismo Message-ID).
+
+    Returns:
+        list de (tipo, bytes)
+    """
+    rnd = random.Random(semilla)
+    pesos = pesos or {'nuevo': 55, 'respuesta': 25, 'html': 10, 'adjunto': 5, 'duplicado': 5}
+    tipos = [t for t in TIPOS if pesos.get(t)]
+    fecha = datetime(2026, 1, 5, 9, 0, tzinfo=timezone.utc)
+    hilos = []  # (remitente, asunto, [message-ids del hilo])
+    correos = []
+
+    for n in range(cantidad):
+        tipo = rnd.choices(tipos, weights=[pesos[t] for t in tipos])[0]
+        if tipo == 'respuesta' and not hilos or tipo == 'duplicado' and not correos:
+            tipo = 'nuevo'
+        fecha += timedelta(seconds=rnd.randint(1, 600))
+
+        if tipo == 'duplicado':
+            correos.append((tipo, rnd.choice(correos)[1]))
+            continue
+
+        if tipo == 'respuesta':
+            remitente, asunto, referencias = rnd.choice(hilos)
+            msg = _mensaje(rnd, remitente, destino, f'RE: {asunto}', fecha, dominio)
+            msg['In-Reply-To'] = referencias[-1]
+            msg['References'] = ' '.join(referencias)
+            msg.set_content(_cuerpo(rnd, 1) + '\n\n> ' + '\n> '.join(_cuerpo(rnd, 2).splitlines()))
+            referencias.append(msg['Message-ID'])
+        else:
+            remitente = f'Cliente {n} <cliente{n}@{dominio}>'
+            asunto = f'{rnd.choice(_TEMAS)} #{n}'
+            msg = _mensaje(rnd, remitente, destino, asunto, fecha, dominio)
+            if tipo == 'html':
+                parrafos = ''.join(f'<p>{p}</p>' for p in _cuerpo(rnd).split('\n\n'))
+                msg.set_content(f'<html><body>{parrafos}</body></html>', subtype='html')
+            else:
+                msg.set_content(_cuerpo(rnd))
+                if tipo == 'adjunto':
+                    tamano = rnd.randint(adjunto_kb // 2, adjunto_kb) * 1024
+                    msg.add_attachment(rnd.randbytes(tamano), maintype='application', subtype='pdf',
+                                       filename=f'comprobante_{n}.pdf')
+            hilos.append((remitente, asunto, [msg['Message-ID']]))
+        correos.append((tipo, msg.as_bytes()))
+    return correos
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--imap-puerto', type=int, default=1143)
+    parser.add_argument('--smtp-puerto', type=int, default=1025)
+    parser.add_argument('--cargar', type=int, default=0, help='Correos generados a dejar en el buzón al iniciar')
+    parser.add_argument('--destino', default='soporte@correo.local', help='Dirección del buzón (To de los correos generados)')
+    args = parser.parse_args()
+
+    imap = ServidorIMAP(puerto=args.imap_puerto)
+    smtp = SumideroSMTP(puerto=args.smtp_puerto)
+    imap.iniciar()
+    smtp.iniciar()
+    for _, datos in generar_correos(args.cargar, args.destino):
+        imap.buzon.entregar(datos)
+
+    print(f'IMAP en 127.0.0.1:{args.imap_puerto} ({imap.buzon.total()} mensajes), SMTP en 127.0.0.1:{args.smtp_puerto}')
+    print(f'Variables para la ingesta:\n  IMAP_HOST=127.0.0.1 IMAP_PORT={args.imap_puerto} IMAP_USE_SSL=0 '
+          f'IMAP_USER={args.destino} SMTP_HOST=127.0.0.1 SMTP_PORT={args.smtp_puerto} SMTP_USE_TLS=0')
+    try:
+        while True:
+            time.sleep(5)
+            if smtp.recibidos:
+                print(f'  SMTP: {len(smtp.recibidos)} correos recibidos; IMAP: {imap.buzon.sin_leer()} sin leer')
+    except KeyboardInterrupt:
+        pass
+    finally:
+        imap.detener()
+        smtp.detener()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,86 @@
+"""
+Verifica con EXPLAIN el plan de las combinaciones comunes de filtros del
+listado de tickets (GET /api/tickets).
+
+Arma el WHERE igual que TicketModel.get_all (scope de visibilidad + filtros +
+orden) y muestra, por combinación, el índice elegido para `ticket`, las filas
+estimadas y si hay filesort. Requiere la BD configurada en .env y la
+migración migracion_filtros_listado_tickets.sql aplicada.
+
+Uso:
+    python scripts/explain_filtros_tickets.py [--operador-id 5 --rol Agente]
+"""
+import argparse
+import os
+import sys
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from flask_app.config.conexion_login import get_local_db_connection  # noqa: E402
+from flask_app.models.ticket_model import TicketModel  # noqa: E402
+
+# (descripción, filtros, orden_por)
+COMBINACIONES = [
+    ('sin filtros', {}, 'fecha_ini'),
+    ('estado', {'estado': '2'}, 'fecha_ini'),
+    ('estado varios', {'estado': '1,2,5'}, 'fecha_ini'),
+    ('depto + estado', {'depto': '1', 'estado': '2'}, 'fecha_ini'),
+    ('prioridad', {'prioridad': '1'}, 'fecha_ini'),
+    ('canal + club', {'canal': '1', 'club': '1'}, 'fecha_ini'),
+    ('emisor', {'emisor': '1'}, 'fecha_ini'),
+    ('owner', {'owner': '1'}, 'fecha_ini'),
+    ('sin asignar + depto', {'owner': 'sin_asignar', 'depto': '1'}, 'fecha_ini'),
+    ('etiqueta', {'etiqueta': '1'}, 'fecha_ini'),
+    ('rango de fechas', {'fecha_desde': '2025-01-01', 'fecha_hasta': '2025-01-31'}, 'fecha_ini'),
+    ('estado + fechas', {'estado': '3', 'fecha_desde': '2025-01-01', 'fecha_hasta': '2025-03-31'}, 'fecha_ini'),
+    ('orden ultima actividad', {}, 'ultima_actividad'),
+    ('orden prioridad + estado', {'estado': '2'}, 'prioridad'),
+]
+
+
+def explicar(cursor, operador_actual, filtros, orden_por):
+    where_clause, params = TicketModel._build_visibility_where(cursor, operador_actual)
+    filtros_sql, filtros_params = TicketModel.construir_filtros_lista(filtros)
+    order_by = TicketModel.ORDENES_LISTA[orden_por].format(dir='DESC', dir_inv='ASC')
+
+    query = f"""
+        EXPLAIN SELECT t.id_ticket
+        FROM ticket t
+        LEFT JOIN prioridad pr ON t.id_prioridad = pr.id_prioridad
+        {where_clause}{filtros_sql}
+        ORDER BY {order_by}
+        LIMIT 50
+    """
+    cursor.execute(query, params + filtros_params)
+    return cursor.fetchall() or []
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--operador-id', type=int, default=None, help='Operador para el scope (default: sin scope, como Admin)')
+    parser.add_argument('--rol', default='Admin', help='Rol del operador (Admin|Supervisor|Agente)')
+    args = parser.parse_args()
+
+    operador_actual = None
+    if args.operador_id:
+        operador_actual = {'operador_id': args.operador_id, 'rol': args.rol}
+
+    conn = get_local_db_connection()
+    cursor = conn.cursor()
+    try:
+        print(f"{'combinación':<26} | {'tabla':<10} | {'type':<7} | {'key':<34} | {'rows':>8} | extra")
+        print('-' * 120)
+        for descripcion, filtros, orden_por in COMBINACIONES:
+            for fila in explicar(cursor, operador_actual, filtros, orden_por):
+                tabla = fila.get('table') or ''
+                if tabla not in ('t', 'te_f', 'to_f'):
+                    continue
+                print(f"{descripcion:<26} | {tabla:<10} | {str(fila.get('type')):<7} | "
+                      f"{str(fila.get('key')):<34} | {str(fila.get('rows')):>8} | {fila.get('Extra') or ''}")
+    finally:
+        cursor.close()
+        conn.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,58 @@
+"""
+Extrae el texto de los adjuntos existentes para la búsqueda de tickets.
+
+Ejecutar una vez tras aplicar migracion_adjunto_texto.sql; los adjuntos
+nuevos se procesan al registrarse. Usa el mismo pool de procesos y límite
+de tiempo por archivo que la aplicación (TEXTO_WORKERS, TEXTO_LIMITE_SEGUNDOS).
+Se puede cortar y volver a ejecutar: solo procesa adjuntos sin fila en
+adjunto_texto.
+
+Uso:
+    python scripts/extraer_texto_adjuntos.py [--lote 100]
+"""
+import argparse
+import os
+import sys
+import time
+from concurrent.futures import wait
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from flask_app.models.adjunto_texto_model import AdjuntoTextoModel  # noqa: E402
+from flask_app.services import extraccion_texto  # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--lote', type=int, default=100, help='Adjuntos encolados por vez (default: 100)')
+    args = parser.parse_args()
+
+    if not extraccion_texto.ACTIVA:
+        print('TEXTO_ADJUNTOS está desactivado; nada que hacer')
+        return
+
+    inicio = time.perf_counter()
+    encolados = omitidos = 0
+    ultimo_id = 0
+    while True:
+        filas = AdjuntoTextoModel.listar_sin_texto(ultimo_id, args.lote)
+        if not filas:
+            break
+        futuros = []
+        for fila in filas:
+            futuro = extraccion_texto.encolar(fila['id_adj'], fila['ruta'], fila['nom_adj'], fila.get('tamano'))
+            if futuro is None:
+                omitidos += 1
+            else:
+                futuros.append(futuro)
+        # Cada Future guarda su resultado al terminar (ver _registrar_resultado)
+        wait(futuros)
+        encolados += len(futuros)
+        ultimo_id = filas[-1]['id_adj']
+        print(f'  hasta #{ultimo_id}: {encolados} procesados, {omitidos} omitidos (tipo no soportado o muy grandes)')
+
+    print(f'Listo en {time.perf_counter() - inicio:.1f}s: {encolados} procesados, {omitidos} omitidos')
+
+
+if __name__ == '__main__':
+    main()
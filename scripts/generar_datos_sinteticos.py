@@ -0,0 +1,354 @@
+"""
+Genera un conjunto de datos sintético para medir la base (ver scripts/bench_bd.py).
+
+Llena el esquema de flask_app/static/scripts/script.sql, más las columnas de
+las migraciones que existan en la base (ticket.id_depto, id_operador_emisor,
+id_canal, fecha_ultima_actividad; tabla notificacion), con volúmenes realistas:
+  - catálogos (estado, prioridad, club, sla, rol_global, canal) si faltan,
+  - departamentos, y operadores con su rol global y su membresía en
+    miembro_dpto (un Jefe y un Supervisor por departamento, el resto Agentes),
+  - usuarios externos, tickets, mensajes por ticket, asignaciones
+    (ticket_operador), historial de acciones y notificaciones.
+
+Los datos se agregan a los existentes (ids a partir del máximo actual); los
+correos sintéticos usan el dominio @sintetico.local. Con la misma --semilla
+y la misma base de partida, el resultado es el mismo.
+
+Inserta en lotes multi-fila y confirma cada bloque de tickets, con las
+verificaciones de FK y unicidad desactivadas en la sesión. Pensado para una
+base de pruebas: no escribe nada sin --confirmar.
+
+Uso:
+    python scripts/generar_datos_sinteticos.py --confirmar [--tickets 100000 --deptos 8 --operadores 120]
+
+Después conviene recalcular los rollups: python scripts/actualizar_rollups.py
+"""
+import argparse
+import os
+import random
+import sys
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from flask_app.config.conexion_login import get_local_db_connection  # noqa: E402
+
+DOMINIO = 'sintetico.local'
+
+# Mismos valores que datos_iniciales.sql
+CATALOGOS = {
+    'estado': (('id_estado', 'descripcion'), [
+        (1, 'Nuevo'), (2, 'En Proceso'), (3, 'Resuelto'), (4, 'Cerrado'), (5, 'Pendiente'), (6, 'Sin responder'),
+    ]),
+    'prioridad': (('id_prioridad', 'jerarquia', 'descripcion'), [
+        (1, 1, 'Urgente'), (2, 2, 'Alta'), (3, 3, 'Media'), (4, 4, 'Baja'),
+    ]),
+    'club': (('id_club', 'nom_club'), [(1, 'ADM'), (2, 'CAM'), (3, 'CDR'), (4, 'CALF'), (5, 'CALC')]),
+    'sla': (('id_sla', 'nombre', 'tiempo_primera_respuesta_min', 'tiempo_resolucion_min', 'activo'), [
+        (1, 'SLA Estándar', 60, 480, 1), (2, 'SLA Premium', 30, 240, 1),
+        (3, 'SLA VIP', 15, 120, 1), (4, 'SLA Básico', 120, 720, 1),
+    ]),
+    'rol_global': (('id_rol', 'nombre', 'activo'), [(1, 'Admin', 1), (2, 'Supervisor', 1), (3, 'Agente', 1)]),
+    'canal': (('id_canal', 'nombre'), [(1, 'Email'), (2, 'Web'), (3, 'Teléfono'), (4, 'WhatsApp'), (5, 'Chat')]),
+}
+
+# (id_estado, peso): la mayoría de los tickets de un año ya están cerrados
+ESTADOS = ((1, 8), (2, 20), (3, 12), (4, 48), (5, 6), (6, 6))
+PRIORIDADES = ((1, 5), (2, 20), (3, 55), (4, 20))
+CANALES = ((1, 70), (2, 20), (3, 4), (4, 4), (5, 2))
+
+TEMAS = [
+    'Problema con la reserva de cabaña', 'Cobro duplicado en la cuota mensual', 'No puedo ingresar al portal',
+    'Solicitud de cambio de fecha', 'Consulta por convenio de descuento', 'Reclamo por atención en recepción',
+    'Error al pagar con tarjeta', 'Actualización de datos del socio', 'Pérdida de credencial',
+    'Consulta por disponibilidad de piscina', 'Factura con RUT incorrecto', 'Anulación de inscripción',
+]
+FRASES = [
+    'Junto con saludar, les escribo porque', 'el pago aparece rechazado pero el banco lo descontó',
+    'necesito que me confirmen la reserva', 'adjunto el comprobante de transferencia',
+    'ya intenté desde otro navegador y sigue igual', 'quedo atento a su respuesta',
+    'revisamos el caso y lo derivamos al área correspondiente', 'le informamos que el cobro fue reversado',
+    'por favor indíquenos el número de socio', 'el problema ocurre desde la semana pasada',
+]
+NOMBRES = ['Camila', 'Matías', 'Valentina', 'Benjamín', 'Sofía', 'Vicente', 'Isidora', 'Agustín', 'Florencia', 'Tomás']
+APELLIDOS = ['González', 'Muñoz', 'Rojas', 'Díaz', 'Pérez', 'Soto', 'Contreras', 'Silva', 'Martínez', 'Sepúlveda']
+
+
+def _columnas(cursor, tabla):
+    cursor.execute(f'SHOW COLUMNS FROM {tabla}')
+    return {fila['Field'].lower() for fila in cursor.fetchall()}
+
+
+def _existe(cursor, tabla):
+    cursor.execute('SHOW TABLES LIKE %s', (tabla,))
+    return cursor.fetchone() is not None
+
+
+def _siguiente_id(cursor, tabla, columna):
+    cursor.execute(f'SELECT COALESCE(MAX({columna}), 0) AS maximo FROM {tabla}')
+    return cursor.fetchone()['maximo'] + 1
+
+
+def _insertar(cursor, tabla, columnas, filas, lote, ignorar=False):
+    """INSERT multi-fila en lotes de `lote` (pymysql arma un solo VALUES por lote)."""
+    if not filas:
+        return
+    query = (
+        f"INSERT {'IGNORE ' if ignorar else ''}INTO {tabla} ({', '.join(columnas)}) "
+        f"VALUES ({', '.join(['%s'] * len(columnas))})"
+    )
+    for inicio in range(0, len(filas), lote):
+        cursor.executemany(query, filas[inicio:inicio + lote])
+
+
+def _elegir(rnd, opciones):
+    return rnd.choices([valor for valor, _ in opciones], weights=[peso for _, peso in opciones])[0]
+
+
+def _nombre(rnd):
+    return f'{rnd.choice(NOMBRES)} {rnd.choice(APELLIDOS)}'
+
+
+def _texto(rnd, maximo, frases=3):
+    return ', '.join(rnd.choice(FRASES) for _ in range(rnd.randint(1, frases)))[:maximo]
+
+
+class Generador:
+    def __init__(self, cursor, args):
+        self.cursor = cursor
+        self.args = args
+        self.rnd = random.Random(args.semilla)
+        self.ahora = datetime.now().replace(microsecond=0)
+        self.col_ticket = _columnas(cursor, 'ticket')
+        self.con_notificaciones = _existe(cursor, 'notificacion')
+        self.agentes_por_depto = {}
+        self.todos_operadores = []
+        self.usuarios = []
+        self.totales = {}
+
+    def _sumar(self, tabla, cantidad):
+        self.totales[tabla] = self.totales.get(tabla, 0) + cantidad
+
+    def catalogos(self):
+        for tabla, (columnas, filas) in CATALOGOS.items():
+            _insertar(self.cursor, tabla, columnas, filas, self.args.lote, ignorar=True)
+
+    def operadores_y_deptos(self):
+        cursor, rnd, lote = self.cursor, self.rnd, self.args.lote
+        id_op = _siguiente_id(cursor, 'operador', 'id_operador')
+        id_depto = _siguiente_id(cursor, 'departamento', 'id_depto')
+        deptos = list(range(id_depto, id_depto + self.args.deptos))
+
+        operadores, miembros, por_depto = [], [], max(self.args.operadores // self.args.deptos, 3)
+        # Un par de administradores sin departamento
+        for _ in range(2):
+            operadores.append((id_op, f'op{id_op}@{DOMINIO}', f'Admin {_nombre(rnd)}', 1, 1))
+            self.todos_operadores.append(id_op)
+            id_op += 1
+        for depto in deptos:
+            self.agentes_por_depto[depto] = []
+            for posicion in range(por_depto):
+                rol = 'Jefe' if posicion == 0 else 'Supervisor' if posicion == 1 else 'Agente'
+                operadores.append((id_op, f'op{id_op}@{DOMINIO}', _nombre(rnd), 1, 2 if rol != 'Agente' else 3))
+                miembros.append((id_op, depto, rol, self.ahora - timedelta(days=self.args.dias + 30)))
+                if rol == 'Agente':
+                    self.agentes_por_depto[depto].append(id_op)
+                self.todos_operadores.append(id_op)
+                id_op += 1
+        # Algunos agentes en dos departamentos
+        for depto in deptos:
+            otro = rnd.choice(deptos)
+            if otro != depto and self.agentes_por_depto[otro]:
+                agente = rnd.choice(self.agentes_por_depto[otro])
+                if all(m[0] != agente or m[1] != depto for m in miembros):
+                    miembros.append((agente, depto, 'Agente', self.ahora - timedelta(days=self.args.dias)))
+                    self.agentes_por_depto[depto].append(agente)
+
+        _insertar(cursor, 'operador', ('id_operador', 'email', 'nombre', 'estado', 'id_rol_global'), operadores, lote)
+        _insertar(cursor, 'departamento', ('id_depto', 'descripcion', 'email', 'operador_default', 'recibe_externo'), [
+            (depto, f'Departamento {depto}', f'depto{depto}@{DOMINIO}', self.agentes_por_depto[depto][0], 1)
+            for depto in deptos
+        ], lote)
+        _insertar(cursor, 'miembro_dpto', ('id_operador', 'id_depto', 'rol', 'fecha_asignacion'), miembros, lote)
+        self._sumar('operador', len(operadores))
+        self._sumar('departamento', len(deptos))
+        self._sumar('miembro_dpto', len(miembros))
+
+    def usuarios_ext(self):
+        id_usuario = _siguiente_id(self.cursor, 'usuario_ext', 'id_usuario')
+        filas = []
+        for i in range(self.args.usuarios):
+            filas.append((id_usuario + i, _nombre(self.rnd), f'usuario{id_usuario + i}@{DOMINIO}', 0))
+        _insertar(self.cursor, 'usuario_ext', ('id_usuario', 'nombre', 'email', 'existe_flex'), filas, self.args.lote)
+        self.usuarios = [fila[0] for fila in filas]
+        self._sumar('usuario_ext', len(filas))
+
+    def tickets(self):
+        """Tickets con sus mensajes, asignaciones, historial y notificaciones, por bloques."""
+        cursor, args = self.cursor, self.args
+        id_ticket = _siguiente_id(cursor, 'ticket', 'id_ticket')
+        self.id_msg = _siguiente_id(cursor, 'mensaje', 'id_msg')
+        self.id_hist = _siguiente_id(cursor, 'historial_acciones_ticket', 'id_historial_ticket')
+
+        columnas = ['id_ticket', 'titulo', 'tipo_ticket', 'descripcion', 'fecha_ini', 'fecha_primera_respuesta',
+                    'fecha_resolucion', 'id_estado', 'id_prioridad', 'id_usuarioext', 'id_club', 'id_sla']
+        opcionales = [c for c in ('id_operador_emisor', 'id_depto', 'id_canal', 'fecha_ultima_actividad')
+                      if c in self.col_ticket]
+        columnas += opcionales
+
+        inicio = time.perf_counter()
+        for desde in range(0, args.tickets, args.bloque):
+            cantidad = min(args.bloque, args.tickets - desde)
+            bloque = {'ticket': [], 'mensaje': [], 'ticket_operador': [], 'historial': [], 'notificacion': []}
+            for i in range(cantidad):
+                self._ticket(id_ticket + desde + i, opcionales, bloque)
+
+            _insertar(cursor, 'ticket', columnas, bloque['ticket'], args.lote)
+            _insertar(cursor, 'mensaje', (
+                'id_msg', 'tipo_mensaje', 'asunto', 'contenido', 'remitente_id', 'remitente_tipo',
+                'estado_mensaje', 'fecha_envio', 'id_ticket', 'id_canal',
+            ), bloque['mensaje'], args.lote)
+            _insertar(cursor, 'ticket_operador', ('id_operador', 'id_ticket', 'rol', 'fecha_asignacion'),
+                      bloque['ticket_operador'], args.lote)
+            _insertar(cursor, 'historial_acciones_ticket', (
+                'id_historial_ticket', 'id_ticket', 'id_operador', 'id_usuarioext',
+                'accion', 'valor_anterior', 'valor_nuevo', 'fecha',
+            ), bloque['historial'], args.lote)
+            if self.con_notificaciones:
+                _insertar(cursor, 'notificacion', (
+                    'id_operador', 'titulo', 'mensaje', 'tipo', 'entidad_tipo', 'entidad_id',
+                    'leido', 'fecha_creacion', 'fecha_leido',
+                ), bloque['notificacion'], args.lote)
+            cursor.connection.commit()
+
+            for tabla, filas in bloque.items():
+                self._sumar('historial_acciones_ticket' if tabla == 'historial' else tabla, len(filas))
+            hechos = desde + cantidad
+            transcurrido = time.perf_counter() - inicio
+            print(f'  {hechos}/{args.tickets} tickets ({hechos / transcurrido:.0f} tickets/s)', flush=True)
+
+    def _ticket(self, id_ticket, opcionales, bloque):
+        rnd, args = self.rnd, self.args
+        fecha_ini = self.ahora - timedelta(seconds=rnd.randint(0, args.dias * 86400))
+        id_estado = _elegir(rnd, ESTADOS)
+        id_prioridad = _elegir(rnd, PRIORIDADES)
+        id_canal = _elegir(rnd, CANALES)
+        id_depto = rnd.choice(list(self.agentes_por_depto))
+        id_usuario = rnd.choice(self.usuarios)
+        # ~10% los abre un operador en nombre del socio
+        emisor = rnd.choice(self.todos_operadores) if rnd.random() < 0.1 else None
+        owner = rnd.choice(self.agentes_por_depto[id_depto]) if id_estado != 1 or rnd.random() < 0.3 else None
+        tema = rnd.choice(TEMAS)
+
+        # Mensajes: alternan socio / operador, cada uno unas horas después del anterior
+        momento = fecha_ini
+        primera_respuesta = None
+        for n in range(args.mensajes):
+            de_operador = n % 2 == 1 and owner is not None
+            if n:
+                momento += timedelta(minutes=rnd.randint(5, 12 * 60))
+            if de_operador and primera_respuesta is None:
+                primera_respuesta = momento
+            bloque['mensaje'].append((
+                self.id_msg,
+                'Privado' if de_operador and rnd.random() < 0.1 else 'Publico',
+                (tema if n == 0 else f'RE: {tema}')[:50],
+                _texto(rnd, 500),
+                owner if de_operador else id_usuario,
+                'Operador' if de_operador else 'Usuario',
+                'Normal',
+                momento,
+                id_ticket,
+                id_canal,
+            ))
+            self.id_msg += 1
+        resolucion = momento + timedelta(minutes=rnd.randint(10, 600)) if id_estado in (3, 4) else None
+        ultima_actividad = resolucion or momento
+
+        valores = {
+            'id_operador_emisor': emisor,
+            'id_depto': id_depto,
+            'id_canal': id_canal,
+            'fecha_ultima_actividad': ultima_actividad,
+        }
+        bloque['ticket'].append((
+            id_ticket, tema, 'Publico', _texto(rnd, 1000, frases=5), fecha_ini,
+            primera_respuesta if id_estado != 1 else None, resolucion,
+            id_estado, id_prioridad, id_usuario, rnd.randint(1, 5), rnd.randint(1, 4),
+        ) + tuple(valores[c] for c in opcionales))
+
+        historial = [(None, id_usuario, 'Ticket recibido', None, str(id_depto), fecha_ini)]
+        if owner is not None:
+            asignado = fecha_ini + timedelta(minutes=rnd.randint(1, 120))
+            bloque['ticket_operador'].append((owner, id_ticket, 'Owner', asignado))
+            historial.append((owner, None, 'asignacion', None, str(owner), asignado))
+            if rnd.random() < 0.1:
+                colaborador = rnd.choice(self.agentes_por_depto[id_depto])
+                if colaborador != owner:
+                    bloque['ticket_operador'].append((colaborador, id_ticket, 'Colaborador', asignado))
+            if self.con_notificaciones:
+                leido = rnd.random() < 0.7
+                bloque['notificacion'].append((
+                    owner, 'Ticket asignado', f'Se te asignó el ticket #{id_ticket}: {tema}', 'info', 'ticket',
+                    id_ticket, int(leido), asignado, asignado + timedelta(minutes=rnd.randint(1, 240)) if leido else None,
+                ))
+        if id_estado != 1:
+            historial.append((owner, None, 'Cambio de estado', 'Nuevo', 'En Proceso', primera_respuesta or fecha_ini))
+        if rnd.random() < 0.15:
+            historial.append((owner, None, 'Cambio de prioridad', 'Media', 'Alta', fecha_ini + timedelta(hours=1)))
+        if resolucion:
+            historial.append((owner, None, 'Cambio de estado', 'En Proceso', 'Resuelto', resolucion))
+
+        for id_operador, id_usuarioext, accion, anterior, nuevo, fecha in historial[:max(args.historial, 1)]:
+            bloque['historial'].append((self.id_hist, id_ticket, id_operador, id_usuarioext, accion, anterior, nuevo, fecha))
+            self.id_hist += 1
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--tickets', type=int, default=100000, help='Tickets a generar (default: 100000)')
+    parser.add_argument('--deptos', type=int, default=8, help='Departamentos (default: 8)')
+    parser.add_argument('--operadores', type=int, default=120, help='Operadores repartidos entre los departamentos (default: 120)')
+    parser.add_argument('--usuarios', type=int, default=20000, help='Usuarios externos (default: 20000)')
+    parser.add_argument('--mensajes', type=int, default=10, help='Mensajes por ticket (default: 10)')
+    parser.add_argument('--historial', type=int, default=5, help='Máximo de acciones de historial por ticket (default: 5)')
+    parser.add_argument('--dias', type=int, default=365, help='Antigüedad máxima de los tickets en días (default: 365)')
+    parser.add_argument('--semilla', type=int, default=42)
+    parser.add_argument('--bloque', type=int, default=2000, help='Tickets por transacción (default: 2000)')
+    parser.add_argument('--lote', type=int, default=1000, help='Filas por INSERT (default: 1000)')
+    parser.add_argument('--confirmar', action='store_true', help='Escribir en la base (sin esto solo muestra el plan)')
+    args = parser.parse_args()
+
+    conn = get_local_db_connection()
+    try:
+        with conn.cursor() as cursor:
+            cursor.execute('SELECT DATABASE() AS base')
+            base = cursor.fetchone()['base']
+            print(f'Base: {base}')
+            print(f'Plan: {args.deptos} departamentos, ~{args.operadores} operadores, {args.usuarios} usuarios, '
+                  f'{args.tickets} tickets x {args.mensajes} mensajes')
+            if not args.confirmar:
+                print('Sin --confirmar no se escribe nada')
+                return
+
+            cursor.execute('SET SESSION foreign_key_checks = 0, unique_checks = 0')
+            inicio = time.perf_counter()
+            generador = Generador(cursor, args)
+            if not generador.con_notificaciones:
+                print('  (sin tabla notificacion: no se generan notificaciones)')
+            generador.catalogos()
+            generador.operadores_y_deptos()
+            generador.usuarios_ext()
+            conn.commit()
+            generador.tickets()
+
+        print(f'Listo en {time.perf_counter() - inicio:.1f}s')
+        for tabla, cantidad in sorted(generador.totales.items()):
+            print(f'  {tabla:<28} {cantidad:>12}')
+    finally:
+        conn.close()
+
+
+if __name__ == '__main__':
+    main()
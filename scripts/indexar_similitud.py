@@ -0,0 +1,66 @@
+"""
+Calcula las firmas MinHash/LSH de los tickets no cerrados de la ventana de
+similitud (SIMILITUD_VENTANA_DIAS) que aún no tienen firma.
+
+Ejecutar una vez tras aplicar migracion_similitud_tickets.sql; los tickets
+nuevos se indexan al crearse.
+
+Uso:
+    python scripts/indexar_similitud.py [--dias 30 --lote 500]
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from flask_app.config.conexion_login import get_local_db_connection  # noqa: E402
+from flask_app.services import similitud  # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--dias', type=int, default=similitud.VENTANA_DIAS)
+    parser.add_argument('--lote', type=int, default=500, help='Tickets por transacción (default: 500)')
+    args = parser.parse_args()
+
+    inicio = time.perf_counter()
+    total = 0
+    ultimo_id = 0
+    conn = get_local_db_connection()
+    try:
+        cursor = conn.cursor()
+        while True:
+            cursor.execute(
+                """
+                SELECT t.id_ticket, t.titulo, t.descripcion
+                FROM ticket t
+                LEFT JOIN ticket_minhash m ON m.id_ticket = t.id_ticket
+                WHERE t.id_ticket > %s
+                  AND m.id_ticket IS NULL
+                  AND t.deleted_at IS NULL
+                  AND t.id_estado <> 4
+                  AND t.fecha_ini >= DATE_SUB(NOW(), INTERVAL %s DAY)
+                ORDER BY t.id_ticket
+                LIMIT %s
+                """,
+                (ultimo_id, args.dias, args.lote),
+            )
+            filas = cursor.fetchall()
+            if not filas:
+                break
+            for fila in filas:
+                similitud.indexar(cursor, fila['id_ticket'], similitud.firmar(fila['titulo'], fila['descripcion']))
+            conn.commit()
+            ultimo_id = filas[-1]['id_ticket']
+            total += len(filas)
+            print(f'  {total} tickets indexados (hasta #{ultimo_id})')
+    finally:
+        conn.close()
+
+    print(f'Listo: {total} tickets en {time.perf_counter() - inicio:.1f}s')
+
+
+if __name__ == '__main__':
+    main()
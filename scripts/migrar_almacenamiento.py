@@ -0,0 +1,158 @@
+"""
+Migra los adjuntos al backend de almacenamiento configurado (ADJUNTOS_BACKEND).
+
+- Filas con ruta absoluta (formato anterior a las claves): el archivo se
+  copia al backend con una clave nueva y la fila pasa a guardar la clave.
+- Con --desde-local además se copian al backend las claves que todavía
+  están en el árbol local (p. ej. al pasar de local a s3).
+
+Cada archivo se verifica por tamaño antes de actualizar la fila, y el
+UPDATE solo aplica si la ruta no cambió mientras tanto. Se puede cortar y
+volver a ejecutar: lo ya migrado no se vuelve a procesar.
+
+Uso:
+    python scripts/migrar_almacenamiento.py --dry-run
+    python scripts/migrar_almacenamiento.py --workers 8 [--borrar-origen]
+    ADJUNTOS_BACKEND=s3 python scripts/migrar_almacenamiento.py --desde-local
+"""
+import argparse
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from flask_app.config.conexion_login import execute_query, get_local_db_connection  # noqa: E402
+from flask_app.services import almacenamiento  # noqa: E402
+
+
+def _lote(ultimo_id, tamano, desde_local):
+    condicion = "(ruta LIKE '/%%' OR ruta LIKE '_:%%')"
+    if desde_local:
+        condicion = '1 = 1'
+    return execute_query(
+        f"""
+        SELECT id_adj, nom_adj, ruta
+        FROM adjunto
+        WHERE id_adj > %s AND ruta IS NOT NULL AND {condicion}
+        ORDER BY id_adj
+        LIMIT %s
+        """,
+        (ultimo_id, tamano),
+        fetch_all=True,
+    ) or []
+
+
+def _actualizar_ruta(id_adj, anterior, nueva):
+    conn = get_local_db_connection()
+    try:
+        with conn.cursor() as cursor:
+            filas = cursor.execute(
+                "UPDATE adjunto SET ruta = %s WHERE id_adj = %s AND ruta = %s",
+                (nueva, id_adj, anterior),
+            )
+        conn.commit()
+        return filas
+    finally:
+        conn.close()
+
+
+def migrar_fila(fila, local, destino, dry_run=False, borrar_origen=False):
+    """
+    Copia un adjunto al backend destino.
+
+    Returns:
+        (estado, bytes): estado en 'migrado', 'omitido', 'faltante', 'cambiado' o 'error'
+    """
+    ref = fila['ruta']
+    legado = almacenamiento.es_ruta_legada(ref)
+    if legado:
+        ruta_origen = ref
+    elif local is not destino:
+        ruta_origen = local.ruta_local(ref)
+    else:
+        return 'omitido', 0
+
+    try:
+        tamano = os.path.getsize(ruta_origen)
+    except OSError:
+        if not legado:
+            # Ya no está en el árbol local: puede haberse copiado en una pasada anterior
+            return ('omitido', 0) if destino.info(ref) is not None else ('faltante', 0)
+        return 'faltante', 0
+    if dry_run:
+        return 'migrado', tamano
+
+    clave = almacenamiento.nueva_clave(fila['nom_adj'] or ruta_origen) if legado else ref
+    if not legado:
+        actual = destino.info(clave)
+        if actual is not None and actual.tamano == tamano:
+            return 'omitido', 0
+    with open(ruta_origen, 'rb') as f:
+        destino.guardar(clave, f)
+    copiado = destino.info(clave)
+    if copiado is None or copiado.tamano != tamano:
+        if legado:
+            destino.eliminar(clave)
+        return 'error', 0
+
+    if legado and not _actualizar_ruta(fila['id_adj'], ref, clave):
+        destino.eliminar(clave)
+        return 'cambiado', 0
+    if borrar_origen:
+        try:
+            os.remove(ruta_origen)
+        except OSError:
+            pass
+    return 'migrado', tamano
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--workers', type=int, default=4, help='Copias en paralelo (default: 4)')
+    parser.add_argument('--lote', type=int, default=500, help='Filas por lote (default: 500)')
+    parser.add_argument('--dry-run', action='store_true', help='Solo informa qué se migraría')
+    parser.add_argument('--borrar-origen', action='store_true', help='Borra el archivo local tras copiarlo')
+    parser.add_argument('--desde-local', action='store_true',
+                        help='Copia también las claves del árbol local al backend configurado')
+    args = parser.parse_args()
+
+    destino = almacenamiento.obtener_almacenamiento()
+    local = destino if destino.tipo == 'local' else almacenamiento.AlmacenamientoLocal(almacenamiento.raiz_local())
+    print(f'Backend destino: {destino.tipo}' + (' (dry-run)' if args.dry_run else ''))
+
+    inicio = time.perf_counter()
+    conteo = {}
+    total_bytes = 0
+    ultimo_id = 0
+    with ThreadPoolExecutor(max_workers=max(args.workers, 1)) as pool:
+        while True:
+            filas = _lote(ultimo_id, args.lote, args.desde_local)
+            if not filas:
+                break
+            resultados = pool.map(
+                lambda f: _migrar_con_log(f, local, destino, args.dry_run, args.borrar_origen),
+                filas,
+            )
+            for estado, tamano in resultados:
+                conteo[estado] = conteo.get(estado, 0) + 1
+                total_bytes += tamano
+            ultimo_id = filas[-1]['id_adj']
+            transcurrido = time.perf_counter() - inicio
+            print(f'  hasta #{ultimo_id}: {conteo} — {total_bytes / 1048576:.1f} MB '
+                  f'({total_bytes / 1048576 / max(transcurrido, 0.001):.1f} MB/s)')
+
+    print(f'Listo en {time.perf_counter() - inicio:.1f}s: {conteo}')
+
+
+def _migrar_con_log(fila, local, destino, dry_run, borrar_origen):
+    try:
+        return migrar_fila(fila, local, destino, dry_run, borrar_origen)
+    except Exception as e:
+        print(f"  ERROR adjunto #{fila['id_adj']} ({fila['ruta']}): {e}", file=sys.stderr)
+        return 'error', 0
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,59 @@
+"""
+Genera la variante optimizada de las imágenes adjuntas existentes.
+
+Ejecutar una vez tras aplicar migracion_adjunto_optimizada.sql; las imágenes
+nuevas se procesan al registrarse. Usa el mismo pool de procesos que la
+aplicación (OPTIMIZAR_WORKERS). Se puede cortar y volver a ejecutar: solo
+procesa adjuntos con tamano_optimizado NULL.
+
+Uso:
+    python scripts/optimizar_imagenes_adjuntos.py [--lote 100]
+"""
+import argparse
+import os
+import sys
+import time
+from concurrent.futures import wait
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from flask_app.models.adjunto_model import AdjuntoModel  # noqa: E402
+from flask_app.services import optimizacion_imagenes  # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--lote', type=int, default=100, help='Adjuntos encolados por vez (default: 100)')
+    args = parser.parse_args()
+
+    if not optimizacion_imagenes.ACTIVA or optimizacion_imagenes.Image is None:
+        print('OPTIMIZAR_IMAGENES está desactivado o falta Pillow; nada que hacer')
+        return
+
+    inicio = time.perf_counter()
+    encolados = omitidos = 0
+    ultimo_id = 0
+    while True:
+        filas = AdjuntoModel.listar_sin_optimizar(ultimo_id, args.lote)
+        if not filas:
+            break
+        futuros = []
+        for fila in filas:
+            futuro = optimizacion_imagenes.encolar(fila['id_adj'], fila['ruta'], fila['nom_adj'], fila.get('tamano'))
+            if futuro is None:
+                omitidos += 1
+            else:
+                futuros.append(futuro)
+        # Cada Future registra su resultado al terminar (ver _registrar_resultado)
+        wait(futuros)
+        encolados += len(futuros)
+        ultimo_id = filas[-1]['id_adj']
+        print(f'  hasta #{ultimo_id}: {encolados} procesados, {omitidos} omitidos (no son imágenes o muy chicas)')
+
+    resumen = AdjuntoModel.resumen_optimizacion()
+    print(f'Listo en {time.perf_counter() - inicio:.1f}s: {encolados} procesados, {omitidos} omitidos')
+    print(f"Variantes: {resumen['con_variante']}, ahorro total {resumen['bytes_ahorrados'] / 1024 / 1024:.1f} MB")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,98 @@
+"""
+Fixtures comunes. No hay MySQL en CI: `bd_sqlite` ejecuta el SQL de los
+modelos sobre SQLite en memoria con las pocas traducciones necesarias
+(placeholders, MATCH ... AGAINST como función, UNION de subconsultas).
+"""
+import os
+import re
+import sqlite3
+import sys
+from datetime import datetime
+
+import pytest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+_RE_MATCH = re.compile(r'MATCH\(([^)]*)\)\s*AGAINST\s*\(\?\s+IN BOOLEAN MODE\)', re.I)
+
+
+def _relevancia(*args):
+    """Imitación de MATCH ... AGAINST en modo booleano con términos '+pref*'."""
+    *columnas, expresion = args
+    texto = ' '.join(str(c or '') for c in columnas).lower()
+    palabras = re.findall(r'\w+', texto)
+    puntaje = 0
+    for termino in re.findall(r'\w+', expresion.lower()):
+        coincidencias = sum(1 for p in palabras if p.startswith(termino))
+        if not coincidencias:
+            return 0
+        puntaje += coincidencias
+    return puntaje
+
+
+def traducir_mysql(sql):
+    sql = sql.replace('%s', '?')
+    sql = _RE_MATCH.sub(lambda m: f'relevancia({m.group(1)}, ?)', sql)
+    # SQLite no acepta "(SELECT ... LIMIT n) UNION ALL (SELECT ...)"
+    sql = re.sub(r'\(\s*SELECT (?=\w+\.id_ticket,\s*(?:relevancia|\d+ AS score))', 'SELECT * FROM (SELECT ', sql)
+    return sql
+
+
+class _Cursor:
+    def __init__(self, conexion):
+        self._cursor = conexion.cursor()
+
+    def execute(self, sql, params=()):
+        self._cursor.execute(traducir_mysql(sql), list(params or ()))
+        return self._cursor.rowcount
+
+    def fetchone(self):
+        fila = self._cursor.fetchone()
+        return dict(fila) if fila is not None else None
+
+    def fetchall(self):
+        return [dict(f) for f in self._cursor.fetchall()]
+
+    @property
+    def rowcount(self):
+        return self._cursor.rowcount
+
+    @property
+    def lastrowid(self):
+        return self._cursor.lastrowid
+
+    def close(self):
+        self._cursor.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class _Conexion:
+    def __init__(self, conexion):
+        self._conexion = conexion
+
+    def cursor(self, *args):
+        return _Cursor(self._conexion)
+
+    def commit(self):
+        self._conexion.commit()
+
+    def rollback(self):
+        self._conexion.rollback()
+
+    def close(self):
+        pass
+
+
+@pytest.fixture
+def bd_sqlite():
+    conexion = sqlite3.connect(':memory:', check_same_thread=False, detect_types=sqlite3.PARSE_DECLTYPES)
+    conexion.row_factory = sqlite3.Row
+    conexion.create_function('relevancia', -1, _relevancia)
+    conexion.create_function('NOW', 0, lambda: datetime.now().strftime('%Y-%m-%d %H:%M:%S'))
+    yield conexion, (lambda: _Conexion(conexion))
+    conexion.close()
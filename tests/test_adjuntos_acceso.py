@@ -0,0 +1,147 @@
+import pytest
+
+from flask_app import app
+from flask_app.controllers import adjunto_controller
+from flask_app.utils import jwt_utils
+from flask_app.utils.jwt_utils import generar_token
+
+AGENTE = (7, 'agente@x.cl', 'Agente')
+
+
+@pytest.fixture
+def cliente(tmp_path, monkeypatch):
+    archivo = tmp_path / 'factura.txt'
+    archivo.write_bytes(b'contenido del adjunto')
+    adjunto = {
+        'id_adj': 5, 'id_ticket': 10, 'nom_adj': 'factura.txt', 'ruta': str(archivo),
+        'ruta_optimizada': None, 'sha256': None, 'mime': 'text/plain',
+    }
+    monkeypatch.setattr(adjunto_controller.AdjuntoModel, 'buscar_por_id', staticmethod(lambda i: dict(adjunto)))
+    permitidos = set()
+    monkeypatch.setattr(
+        adjunto_controller.TicketModel, 'operador_puede_ver_ticket',
+        staticmethod(lambda id_ticket, operador: (operador['operador_id'], id_ticket) in permitidos),
+    )
+    app.config['TESTING'] = True
+    with app.test_client() as c:
+        c.permitidos = permitidos
+        yield c
+
+
+def _auth():
+    return {'Authorization': f'Bearer {generar_token(*AGENTE)}'}
+
+
+def test_descarga_sin_token(cliente):
+    assert cliente.get('/api/adjuntos/5/download').status_code == 401
+
+
+def test_descarga_con_token_invalido(cliente):
+    respuesta = cliente.get('/api/adjuntos/5/download', headers={'Authorization': 'Bearer basura'})
+    assert respuesta.status_code == 401
+
+
+def test_descarga_sin_acceso_al_ticket(cliente):
+    assert cliente.get('/api/adjuntos/5/download', headers=_auth()).status_code == 403
+
+
+def test_descarga_con_acceso(cliente):
+    cliente.permitidos.add((7, 10))
+    respuesta = cliente.get('/api/adjuntos/5/download', headers=_auth())
+    assert respuesta.status_code == 200
+    assert respuesta.data == b'contenido del adjunto'
+
+
+def test_enlace_sin_acceso_al_ticket(cliente):
+    assert cliente.post('/api/adjuntos/5/enlace', headers=_auth()).status_code == 403
+
+
+def test_enlace_firmado_descarga_sin_header(cliente):
+    cliente.permitidos.add((7, 10))
+    url = cliente.post('/api/adjuntos/5/enlace', headers=_auth()).get_json()['url']
+
+    respuesta = cliente.get(url, headers={'Range': 'bytes=0-8'})
+
+    assert respuesta.status_code == 206
+    assert respuesta.data == b'contenido'
+
+
+def test_enlace_firmado_de_otro_adjunto(cliente):
+    cliente.permitidos.add((7, 10))
+    url = cliente.post('/api/adjuntos/5/enlace', headers=_auth()).get_json()['url']
+    assert cliente.get(url.replace('/adjuntos/5/', '/adjuntos/6/')).status_code == 401
+
+
+def test_enlace_firmado_expirado(cliente, monkeypatch):
+    cliente.permitidos.add((7, 10))
+    url = cliente.post('/api/adjuntos/5/enlace', headers=_auth()).get_json()['url']
+    monkeypatch.setattr(jwt_utils, 'ENLACE_DESCARGA_EXPIRES', -1)
+    assert cliente.get(url).status_code == 401
+
+
+def test_enlace_firmado_repite_el_chequeo_de_acceso(cliente):
+    cliente.permitidos.add((7, 10))
+    url = cliente.post('/api/adjuntos/5/enlace', headers=_auth()).get_json()['url']
+    cliente.permitidos.clear()
+    assert cliente.get(url).status_code == 403
+
+
+def test_miniatura_sin_token(cliente):
+    assert cliente.get('/api/adjuntos/5/thumb').status_code == 401
+
+
+def test_miniatura_sin_acceso_al_ticket(cliente):
+    assert cliente.get('/api/adjuntos/5/thumb', headers=_auth()).status_code == 403
+
+
+def test_miniatura_con_cache_privada(cliente, tmp_path, monkeypatch):
+    miniatura = tmp_path / 'miniatura.jpg'
+    miniatura.write_bytes(b'\xff\xd8jpeg')
+    monkeypatch.setattr(adjunto_controller.vistas_previas, 'obtener', lambda *a: ('lista', str(miniatura)))
+    cliente.permitidos.add((7, 10))
+
+    respuesta = cliente.get('/api/adjuntos/5/thumb', headers=_auth())
+
+    assert respuesta.status_code == 200
+    cache = respuesta.headers['Cache-Control']
+    assert 'private' in cache and 'public' not in cache and 'immutable' not in cache
+
+
+@pytest.fixture
+def adjuntos_ticket(monkeypatch, tmp_path):
+    archivo = tmp_path / 'a.txt'
+    archivo.write_bytes(b'hola')
+    monkeypatch.setattr(adjunto_controller.AdjuntoModel, 'listar_por_ticket', staticmethod(
+        lambda id_ticket: [{'id_adj': 1, 'nom_adj': 'a.txt', 'ruta': str(archivo), 'mensaje_fecha': None}]
+    ))
+
+
+def test_zip_sin_token(cliente, adjuntos_ticket):
+    assert cliente.get('/api/tickets/10/adjuntos.zip').status_code == 401
+
+
+def test_zip_sin_acceso_al_ticket(cliente, adjuntos_ticket):
+    assert cliente.get('/api/tickets/10/adjuntos.zip', headers=_auth()).status_code == 403
+
+
+def test_zip_con_acceso(cliente, adjuntos_ticket):
+    cliente.permitidos.add((7, 10))
+    respuesta = cliente.get('/api/tickets/10/adjuntos.zip', headers=_auth())
+    assert respuesta.status_code == 200
+    assert respuesta.data[:2] == b'PK'
+
+
+def test_zip_enlace_firmado(cliente, adjuntos_ticket):
+    cliente.permitidos.add((7, 10))
+    url = cliente.post('/api/tickets/10/adjuntos.zip/enlace', headers=_auth()).get_json()['url']
+
+    respuesta = cliente.get(url)
+
+    assert respuesta.status_code == 200
+    assert respuesta.data[:2] == b'PK'
+    # Una firma de ZIP no sirve para otro ticket
+    assert cliente.get(url.replace('/tickets/10/', '/tickets/11/')).status_code == 401
+
+
+def test_zip_enlace_sin_acceso_al_ticket(cliente, adjuntos_ticket):
+    assert cliente.post('/api/tickets/10/adjuntos.zip/enlace', headers=_auth()).status_code == 403
@@ -0,0 +1,80 @@
+from flask_app.models import ticket_model
+from flask_app.models.ticket_model import TicketModel
+
+ESQUEMA = """
+CREATE TABLE ticket (id_ticket INTEGER PRIMARY KEY, titulo TEXT, descripcion TEXT, fecha_ini TEXT,
+                     id_estado INT, id_prioridad INT, id_usuarioext INT, id_club INT, id_depto INT,
+                     id_operador_emisor INT, deleted_at TEXT);
+CREATE TABLE mensaje (id_msg INTEGER PRIMARY KEY, id_ticket INT, contenido TEXT, fecha_envio TEXT, deleted_at TEXT);
+CREATE TABLE usuario_ext (id_usuario INTEGER PRIMARY KEY, nombre TEXT, email TEXT);
+CREATE TABLE adjunto (id_adj INTEGER PRIMARY KEY, id_msg INT, nom_adj TEXT, deleted_at TEXT);
+CREATE TABLE adjunto_texto (id_adj INTEGER PRIMARY KEY, id_ticket INT, texto TEXT);
+CREATE TABLE estado (id_estado INTEGER PRIMARY KEY, descripcion TEXT);
+CREATE TABLE prioridad (id_prioridad INTEGER PRIMARY KEY, descripcion TEXT);
+CREATE TABLE club (id_club INTEGER PRIMARY KEY, nom_club TEXT);
+CREATE TABLE ticket_operador (id_ticket INT, id_operador INT, rol TEXT, fecha_desasignacion TEXT);
+CREATE TABLE miembro_dpto (id_operador INT, id_depto INT, rol TEXT, fecha_desasignacion TEXT);
+"""
+
+AGENTE = {'operador_id': 7, 'email': 'agente@x.cl', 'rol': 'Agente'}
+ADMIN = {'operador_id': 1, 'email': 'admin@x.cl', 'rol': 'Admin'}
+OTRO_OPERADOR = 99
+
+
+def _ticket(bd, id_ticket, titulo, id_depto, owner):
+    bd.execute("INSERT INTO ticket VALUES (?, ?, '', '2026-10-01', 1, 1, NULL, NULL, ?, 50, NULL)",
+               (id_ticket, titulo, id_depto))
+    bd.execute("INSERT INTO ticket_operador VALUES (?, ?, 'Owner', NULL)", (id_ticket, owner))
+
+
+def _cargar(bd):
+    bd.executescript(ESQUEMA)
+    bd.execute("INSERT INTO miembro_dpto VALUES (?, 1, 'Agente', NULL)", (AGENTE['operador_id'],))
+    # Más de CANDIDATOS_BUSQUEDA_POR_FUENTE coincidencias más relevantes, en tickets ajenos
+    otros = TicketModel.CANDIDATOS_BUSQUEDA_POR_FUENTE + 50
+    for n in range(1, otros + 1):
+        _ticket(bd, n, 'factura factura factura', 2, OTRO_OPERADOR)
+        bd.execute("INSERT INTO mensaje VALUES (?, ?, 'factura factura factura', '2026-10-01', NULL)", (n, n))
+        bd.execute("INSERT INTO adjunto VALUES (?, ?, 'a.pdf', NULL)", (n, n))
+        bd.execute("INSERT INTO adjunto_texto VALUES (?, ?, 'factura factura factura')", (n, n))
+
+    # Tickets del agente, todos con menos relevancia que los anteriores
+    _ticket(bd, 1000, 'factura', 1, AGENTE['operador_id'])
+    _ticket(bd, 1001, 'consulta', 1, AGENTE['operador_id'])
+    bd.execute("INSERT INTO mensaje VALUES (5001, 1001, 'adjunto la factura', '2026-10-02', NULL)")
+    _ticket(bd, 1002, 'consulta', 1, AGENTE['operador_id'])
+    bd.execute("INSERT INTO mensaje VALUES (5002, 1002, 'ver adjunto', '2026-10-02', NULL)")
+    bd.execute("INSERT INTO adjunto VALUES (6002, 5002, 'factura.pdf', NULL)")
+    bd.execute("INSERT INTO adjunto_texto VALUES (6002, 1002, 'factura de marzo')")
+    # Adjunto en un mensaje eliminado: no debe hacer coincidir el ticket
+    _ticket(bd, 1003, 'consulta', 1, AGENTE['operador_id'])
+    bd.execute("INSERT INTO mensaje VALUES (5003, 1003, 'ver adjunto', '2026-10-02', '2026-10-03')")
+    bd.execute("INSERT INTO adjunto VALUES (6003, 5003, 'factura.pdf', NULL)")
+    bd.execute("INSERT INTO adjunto_texto VALUES (6003, 1003, 'factura de abril')")
+    bd.commit()
+
+
+def test_agente_encuentra_sus_tickets_fuera_del_top_global(bd_sqlite, monkeypatch):
+    bd, conectar = bd_sqlite
+    _cargar(bd)
+    monkeypatch.setattr(ticket_model, 'get_local_db_connection', conectar)
+
+    resultado = TicketModel.buscar('factura', operador_actual=AGENTE, limit=50)
+
+    assert resultado['success'], resultado
+    por_id = {r['id_ticket']: r for r in resultado['resultados']}
+    assert set(por_id) == {1000, 1001, 1002}
+    assert por_id[1001]['coincidencia'] == 'mensaje'
+    assert por_id[1002]['coincidencia'] == 'adjunto'
+
+
+def test_admin_ve_los_mas_relevantes(bd_sqlite, monkeypatch):
+    bd, conectar = bd_sqlite
+    _cargar(bd)
+    monkeypatch.setattr(ticket_model, 'get_local_db_connection', conectar)
+
+    resultado = TicketModel.buscar('factura', operador_actual=ADMIN, limit=10)
+
+    assert resultado['success'], resultado
+    assert len(resultado['resultados']) == 10
+    assert all(r['id_ticket'] < 1000 for r in resultado['resultados'])
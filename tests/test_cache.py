@@ -0,0 +1,84 @@
+import threading
+
+from flask_app.utils.cache import CacheLocal
+
+
+def test_carga_lenta_no_bloquea_otras_entradas():
+    cache = CacheLocal()
+    empezo, soltar = threading.Event(), threading.Event()
+
+    def lento():
+        empezo.set()
+        soltar.wait(5)
+        return ['a']
+
+    hilo = threading.Thread(target=cache.obtener, args=('a', lento))
+    hilo.start()
+    assert empezo.wait(5)
+    # Mientras 'a' se calcula, otra entrada se carga y responde sin esperar
+    otra = threading.Thread(target=cache.obtener, args=('b', lambda: ['b']))
+    otra.start()
+    otra.join(1)
+    bloqueada = otra.is_alive()
+    soltar.set()
+    otra.join()
+    assert not bloqueada
+    hilo.join()
+    assert cache.obtener('a', lambda: ['otra'])[0] == ['a']
+
+
+def test_misma_entrada_se_carga_una_vez():
+    cache = CacheLocal()
+    cargas = []
+    barrera = threading.Barrier(8)
+
+    def cargador():
+        cargas.append(1)
+        return [1]
+
+    def pedir():
+        barrera.wait()
+        cache.obtener('x', cargador)
+
+    hilos = [threading.Thread(target=pedir) for _ in range(8)]
+    for h in hilos:
+        h.start()
+    for h in hilos:
+        h.join()
+    assert len(cargas) == 1
+
+
+def test_invalidar_durante_la_carga_no_guarda_datos_viejos():
+    cache = CacheLocal()
+
+    def cargador():
+        cache.invalidar('x')
+        return ['viejo']
+
+    assert cache.obtener('x', cargador)[0] == ['viejo']
+    assert cache.obtener('x', lambda: ['nuevo'])[0] == ['nuevo']
+
+
+def test_invalidar_otra_entrada_no_descarta_la_carga_en_curso():
+    cache = CacheLocal()
+    cargas = []
+
+    def cargador():
+        cargas.append(1)
+        cache.invalidar('otra')
+        return ['a']
+
+    cache.obtener('a', cargador)
+    cache.obtener('a', cargador)
+    assert len(cargas) == 1
+
+
+def test_invalidar_todo_durante_la_carga_no_guarda_datos_viejos():
+    cache = CacheLocal()
+
+    def cargador():
+        cache.invalidar()
+        return ['viejo']
+
+    cache.obtener('x', cargador)
+    assert cache.obtener('x', lambda: ['nuevo'])[0] == ['nuevo']
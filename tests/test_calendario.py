@@ -0,0 +1,81 @@
+import random
+from datetime import date, datetime, timedelta
+
+import pytest
+
+from flask_app.utils.calendario import Calendario
+
+LUNES = datetime(2026, 10, 19)
+HORARIO_OFICINA = {dia: [(9 * 60, 18 * 60)] for dia in range(5)}
+# Turno de noche: lunes a viernes de 22:00 a 06:00 del día siguiente
+TURNO_NOCHE = {dia: [(22 * 60, 24 * 60)] for dia in range(5)}
+for _dia in range(1, 6):
+    TURNO_NOCHE.setdefault(_dia, []).append((0, 6 * 60))
+
+
+def _h(dias, horas, minutos=0):
+    return LUNES + timedelta(days=dias, hours=horas, minutes=minutos)
+
+
+def _minutos_ingenuo(tramos, feriados, desde, hasta):
+    """Cuenta minuto a minuto (referencia para comparar con la tabla)."""
+    total = 0
+    momento = desde
+    while momento < hasta:
+        minuto = momento.hour * 60 + momento.minute
+        if momento.date() not in feriados and any(
+            inicio <= minuto < fin for inicio, fin in tramos.get(momento.weekday(), [])
+        ):
+            total += 1
+        momento += timedelta(minutes=1)
+    return total
+
+
+def test_tramo_que_cruza_medianoche():
+    calendario = Calendario(TURNO_NOCHE)
+
+    assert calendario.minutos_habiles(_h(0, 23), _h(1, 2)) == 180
+    assert calendario.sumar_minutos(_h(0, 23, 30), 60) == _h(1, 0, 30)
+    # El turno del viernes termina el sábado a las 06:00: sigue el lunes a las 22:00
+    assert calendario.sumar_minutos(_h(5, 5), 120) == _h(7, 23)
+
+
+def test_feriado_se_salta():
+    feriado = date(2026, 10, 21)  # miércoles
+    calendario = Calendario(HORARIO_OFICINA, feriados=[feriado])
+
+    assert calendario.sumar_minutos(_h(1, 17), 120) == _h(3, 10)
+    assert calendario.minutos_habiles(_h(1, 17), _h(3, 10)) == 120
+    assert calendario.minutos_habiles(_h(2, 0), _h(3, 0)) == 0
+
+
+def test_inicio_fuera_de_horario():
+    calendario = Calendario(HORARIO_OFICINA)
+
+    # Sábado: el plazo empieza a correr el lunes a las 9:00
+    assert calendario.sumar_minutos(_h(5, 10), 30) == _h(7, 9, 30)
+    assert calendario.minutos_habiles(_h(5, 10), _h(7, 9, 30)) == 30
+    # Antes de abrir y después de cerrar el mismo día
+    assert calendario.sumar_minutos(_h(0, 7), 60) == _h(0, 10)
+    assert calendario.sumar_minutos(_h(0, 20), 60) == _h(1, 10)
+
+
+@pytest.mark.parametrize('tramos', [HORARIO_OFICINA, TURNO_NOCHE])
+@pytest.mark.parametrize('minutos', [1, 59, 540, 541, 3000, 20000, -45, -600, -5000])
+def test_sumar_y_medir_ida_y_vuelta(tramos, minutos):
+    calendario = Calendario(tramos, feriados=[date(2026, 10, 21), date(2026, 11, 2)])
+    for inicio in (_h(0, 8), _h(0, 12, 17), _h(2, 23), _h(4, 17, 59), _h(6, 3)):
+        fin = calendario.sumar_minutos(inicio, minutos)
+        assert (fin >= inicio) == (minutos > 0)
+        assert calendario.minutos_habiles(inicio, fin) == minutos
+
+
+@pytest.mark.parametrize('tramos', [HORARIO_OFICINA, TURNO_NOCHE])
+def test_coincide_con_el_conteo_minuto_a_minuto(tramos):
+    feriados = {date(2026, 10, 21)}
+    calendario = Calendario(tramos, feriados=feriados)
+    azar = random.Random(35)
+    for _ in range(40):
+        desde = _h(0, 0, azar.randrange(0, 10 * 24 * 60))
+        hasta = desde + timedelta(minutes=azar.randrange(0, 4 * 24 * 60))
+        assert calendario.minutos_habiles(desde, hasta) == _minutos_ingenuo(tramos, feriados, desde, hasta)
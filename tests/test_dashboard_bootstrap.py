@@ -0,0 +1,16 @@
+import pytest
+
+from flask_app import app
+from flask_app.utils.jwt_utils import generar_token
+
+
+@pytest.mark.parametrize('parametro', ['limit', 'limit_notificaciones'])
+def test_bootstrap_limite_no_numerico(parametro):
+    app.config['TESTING'] = True
+    with app.test_client() as c:
+        respuesta = c.get(
+            f'/api/dashboard/bootstrap?{parametro}=abc',
+            headers={'Authorization': f'Bearer {generar_token(7, "op@x.cl", "Agente")}'},
+        )
+    assert respuesta.status_code == 400
+    assert parametro in respuesta.get_json()['error']
@@ -0,0 +1,42 @@
+import io
+import threading
+import time
+
+from flask_app.services import extraccion_texto
+from flask_app.utils.pool_procesos import PoolProcesos
+
+
+def _plano(datos, maximo):
+    acumulador = extraccion_texto._Acumulador(maximo, time.monotonic() + 5)
+    try:
+        extraccion_texto._texto_plano(io.BytesIO(datos), acumulador)
+    except extraccion_texto._Lleno:
+        pass
+    return ''.join(acumulador.partes)
+
+
+def test_texto_plano_cortado_en_medio_de_un_caracter():
+    # 'ñ' ocupa 2 bytes: el corte a maximo * 4 bytes cae en la mitad de uno
+    datos = ('a' + 'ñ' * 20).encode('utf-8')
+    texto = _plano(datos, 10)
+    assert texto == 'a' + 'ñ' * 9
+
+
+def test_texto_plano_cp1252():
+    assert _plano('acción'.encode('cp1252'), 100) == 'acción'
+
+
+def test_resultado_se_procesa_fuera_del_hilo_del_executor():
+    pool = PoolProcesos('prueba', max_workers=1)
+    hilos, listo = [], threading.Event()
+
+    def al_terminar(futuro):
+        hilos.append((threading.current_thread().name, futuro.result()))
+        listo.set()
+
+    try:
+        pool.enviar('k', len, 'abc', al_terminar=al_terminar)
+        assert listo.wait(30)
+    finally:
+        pool.cerrar()
+    assert hilos == [('pool-prueba-resultados', 3)]
@@ -0,0 +1,44 @@
+import io
+
+import pytest
+
+Image = pytest.importorskip('PIL.Image')
+
+from flask_app.services import almacenamiento, optimizacion_imagenes
+
+ICC = b'perfil-de-prueba' * 8
+
+
+@pytest.fixture
+def local(tmp_path, monkeypatch):
+    backend = almacenamiento.AlmacenamientoLocal(str(tmp_path))
+    monkeypatch.setattr(almacenamiento, '_almacen', backend)
+    return backend
+
+
+def _guardar(backend, modo, color):
+    salida = io.BytesIO()
+    # Ruido para que el JPEG original pese bastante más que la variante
+    img = Image.effect_noise((1200, 900), 60).convert(modo)
+    img.paste(color, (0, 0, 300, 300))
+    img.save(salida, 'JPEG', quality=100, icc_profile=ICC)
+    salida.seek(0)
+    return almacenamiento.guardar(f'foto_{modo}.jpg', salida).clave
+
+
+def _variante(backend, ref):
+    resultado = optimizacion_imagenes.optimizar(ref, 'foto.jpg', lado_max=400, ahorro_min=0)
+    with backend.abrir(resultado['clave']) as f:
+        return Image.open(io.BytesIO(f.read()))
+
+
+def test_cmyk_a_rgb_descarta_el_perfil_icc(local):
+    variante = _variante(local, _guardar(local, 'CMYK', (0, 255, 255, 0)))
+    assert variante.mode == 'RGB'
+    assert 'icc_profile' not in variante.info
+
+
+def test_rgb_conserva_el_perfil_icc(local):
+    variante = _variante(local, _guardar(local, 'RGB', (255, 0, 0)))
+    assert variante.mode == 'RGB'
+    assert variante.info.get('icc_profile') == ICC
@@ -0,0 +1,73 @@
+import threading
+import time
+
+import pytest
+
+from flask_app import app
+from flask_app.controllers import ticket_controller
+from flask_app.models import permiso_model
+from flask_app.models.permiso_model import MatrizPermisos, _SnapshotPermisos
+from flask_app.utils.jwt_utils import generar_token
+
+# Semilla de datos_iniciales.sql: ticket.assign (5) para Admin y Supervisor, no para Agente
+ROLES = {'Admin': (1, {1, 2, 3, 4, 5}), 'Supervisor': (2, {1, 2, 3, 4, 5}), 'Agente': (3, {1, 2, 3})}
+CODIGOS = {1: 'ticket.create', 2: 'ticket.read', 3: 'ticket.update', 4: 'ticket.delete', 5: 'ticket.assign'}
+
+
+def _snapshot():
+    return _SnapshotPermisos(
+        bits_por_rol_id={i: sum(1 << p for p in permisos) for i, permisos in ROLES.values()},
+        rol_id_por_nombre={nombre: i for nombre, (i, _) in ROLES.items()},
+        roles_activos=frozenset(i for i, _ in ROLES.values()),
+        bit_por_codigo={codigo: 1 << i for i, codigo in CODIGOS.items()},
+        mascara_activos=sum(1 << i for i in CODIGOS),
+        cargado_en=time.monotonic(),
+    )
+
+
+@pytest.fixture
+def construcciones(monkeypatch):
+    llamadas = []
+
+    def construir():
+        llamadas.append(1)
+        time.sleep(0.05)
+        return _snapshot()
+
+    monkeypatch.setattr(MatrizPermisos, '_construir', staticmethod(construir))
+    monkeypatch.setattr(MatrizPermisos, '_snapshot', None)
+    return llamadas
+
+
+def _auth(rol):
+    return {'Authorization': f'Bearer {generar_token(7, "op@x.cl", rol)}'}
+
+
+def test_asignar_exige_permiso_ticket_assign(construcciones, monkeypatch):
+    monkeypatch.setattr(
+        ticket_controller.TicketModel, 'asignar_ticket',
+        staticmethod(lambda id_ticket, id_op, operador: {
+            'success': True, 'message': 'ok', 'id_ticket': id_ticket, 'operador_asignado': id_op,
+        }),
+    )
+    app.config['TESTING'] = True
+    with app.test_client() as c:
+        agente = c.post('/api/tickets/10/asignar', json={'id_operador': 8}, headers=_auth('Agente'))
+        supervisor = c.post('/api/tickets/10/asignar', json={'id_operador': 8}, headers=_auth('Supervisor'))
+    assert agente.status_code == 403
+    assert supervisor.status_code == 200
+
+
+def test_ttl_vencido_recarga_una_sola_vez(construcciones, monkeypatch):
+    MatrizPermisos.obtener()
+    MatrizPermisos._snapshot = MatrizPermisos._snapshot._replace(cargado_en=time.monotonic() - 10)
+    monkeypatch.setattr(permiso_model, 'PERMISOS_MATRIZ_TTL', 5)
+
+    hilos = [threading.Thread(target=MatrizPermisos.tiene_permisos, args=('Agente', 'ticket.read')) for _ in range(8)]
+    for h in hilos:
+        h.start()
+    for h in hilos:
+        h.join()
+
+    # La carga inicial y una sola recarga para los 8 hilos
+    assert len(construcciones) == 2
@@ -0,0 +1,27 @@
+from datetime import date, datetime
+
+from flask_app import app
+from flask_app.utils.json_provider import ProveedorJSONEstandar, ProveedorJSONOrjson
+from flask_app.utils.serializacion import Proyeccion, fecha_texto, orjson
+
+
+def _proveedores():
+    proveedores = [ProveedorJSONEstandar(app)]
+    if orjson is not None:
+        proveedores.append(ProveedorJSONOrjson(app))
+    return proveedores
+
+
+def test_fechas_en_rfc_822_como_flask():
+    valor = {'f': datetime(2026, 10, 1, 10, 0, 0, 123456), 'd': date(2026, 10, 1)}
+    for proveedor in _proveedores():
+        assert proveedor.loads(proveedor.dumps(valor)) == {
+            'f': 'Thu, 01 Oct 2026 10:00:00 GMT',
+            'd': 'Thu, 01 Oct 2026 00:00:00 GMT',
+        }
+
+
+def test_proyeccion_fecha_texto():
+    proyeccion = Proyeccion({'fecha_ini': fecha_texto('fecha_ini'), 'cierre': fecha_texto('cierre')})
+    fila = {'fecha_ini': datetime(2026, 10, 1, 10, 0, 0, 5), 'cierre': None}
+    assert proyeccion.fila(fila) == {'fecha_ini': '2026-10-01 10:00:00', 'cierre': None}
@@ -0,0 +1,87 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+from flask_app.services import sla_scheduler
+from flask_app.services.sla_scheduler import ProgramadorSLA
+from flask_app.utils.calendario import CALENDARIO_CONTINUO
+
+T0 = datetime(2026, 10, 19, 8, 0, 0)
+
+_ESQUEMA = """
+CREATE TABLE sla (id_sla INTEGER PRIMARY KEY, tiempo_primera_respuesta_min INTEGER, tiempo_resolucion_min INTEGER);
+CREATE TABLE ticket (
+    id_ticket INTEGER PRIMARY KEY, id_depto INTEGER, id_sla INTEGER, id_estado INTEGER,
+    fecha_primera_respuesta timestamp, vence_primera_respuesta timestamp, vence_resolucion timestamp,
+    deleted_at timestamp
+);
+CREATE TABLE sla_evento (id_ticket INTEGER, tipo TEXT, vence timestamp);
+"""
+
+
+class _Reloj:
+    actual = T0
+
+
+class _Fecha(datetime):
+    @classmethod
+    def now(cls, tz=None):
+        return _Reloj.actual
+
+
+@pytest.fixture
+def programador(bd_sqlite, monkeypatch):
+    conexion, conectar = bd_sqlite
+    conexion.executescript(_ESQUEMA)
+    # SLA de 24 h: el aviso (umbral 0.8) llega 4,8 h antes del vencimiento
+    conexion.execute('INSERT INTO sla VALUES (1, 1440, 1440)')
+    monkeypatch.setattr(sla_scheduler, 'get_local_db_connection', conectar)
+    monkeypatch.setattr(sla_scheduler, 'datetime', _Fecha)
+    monkeypatch.setattr(sla_scheduler.CalendarioModel, 'en_uso', staticmethod(lambda: [CALENDARIO_CONTINUO]))
+    monkeypatch.setattr(sla_scheduler.CalendarioModel, 'de_depto', staticmethod(lambda id_depto: CALENDARIO_CONTINUO))
+    _Reloj.actual = T0
+    p = ProgramadorSLA()
+    p.conexion = conexion
+    return p
+
+
+def _ticket(conexion, id_ticket, vence):
+    # Ya respondido: solo corre el plazo de resolución
+    conexion.execute(
+        'INSERT INTO ticket VALUES (?, 1, 1, 1, ?, NULL, ?, NULL)', (id_ticket, T0 - timedelta(hours=1), vence)
+    )
+
+
+def _eventos(programador):
+    return sorted((e.id_ticket, e.tipo, e.cuando) for e in programador._heap)
+
+
+def test_aviso_de_sla_largo_se_carga_por_su_hora_de_aviso(programador):
+    vence = T0 + timedelta(hours=8)           # aviso a las T0 + 3,2 h
+    _ticket(programador.conexion, 1, vence)
+
+    programador.resincronizar()
+    assert _eventos(programador) == []        # el aviso aún está fuera del horizonte de 2 h
+
+    _Reloj.actual = T0 + timedelta(hours=1, minutes=30)
+    programador.resincronizar()
+    # Se carga 6,5 h antes de vencer: el aviso sale a su hora y no al cargar el vencimiento
+    assert _eventos(programador) == [
+        (1, 'aviso_resolucion', vence - timedelta(minutes=1440 * 0.2)),
+        (1, 'incumplimiento_resolucion', vence),
+    ]
+
+    # La resincronización siguiente no duplica eventos
+    _Reloj.actual = T0 + timedelta(hours=2)
+    programador.resincronizar()
+    assert len(programador._heap) == 2
+
+
+def test_aviso_ya_disparado_no_se_recarga_antes_del_vencimiento(programador):
+    vence = T0 + timedelta(hours=4)
+    _ticket(programador.conexion, 1, vence)
+    programador.conexion.execute("INSERT INTO sla_evento VALUES (1, 'aviso_resolucion', ?)", (vence,))
+
+    programador.resincronizar()
+
+    assert _eventos(programador) == []
@@ -0,0 +1,143 @@
+"""
+Subidas por trozos contra S3 (multipart). Usa moto en proceso si está
+instalado; si no, un servidor compatible (MinIO, `moto_server`) indicado en
+ADJUNTOS_S3_ENDPOINT_PRUEBAS con un bucket ADJUNTOS_S3_BUCKET_PRUEBAS
+(por defecto "adj") ya creado. Sin ninguno de los dos se omite.
+"""
+import hashlib
+import io
+import os
+import uuid
+
+import pytest
+
+boto3 = pytest.importorskip('boto3')
+
+from flask_app.config import conexion_login
+from flask_app.models import adjunto_subida_model
+from flask_app.models.adjunto_subida_model import AdjuntoSubidaModel
+from flask_app.services import almacenamiento
+
+MB = 1024 * 1024
+
+_ESQUEMA = """
+CREATE TABLE mensaje (id_msg INTEGER PRIMARY KEY, id_ticket INTEGER, deleted_at TEXT);
+CREATE TABLE adjunto_subida (
+    id_subida TEXT PRIMARY KEY, id_msg INTEGER, id_operador INTEGER, nom_adj TEXT, ruta TEXT,
+    id_multipart TEXT, tamano INTEGER, recibido INTEGER DEFAULT 0, partes INTEGER DEFAULT 0,
+    creado_en TEXT, actualizado_en TEXT
+);
+CREATE TABLE adjunto_subida_parte (
+    id_subida TEXT, numero INTEGER, etag TEXT, tamano INTEGER, PRIMARY KEY (id_subida, numero)
+);
+CREATE TABLE adjunto (
+    id_adj INTEGER PRIMARY KEY AUTOINCREMENT, nom_adj TEXT, ruta TEXT, id_msg INTEGER,
+    tamano INTEGER, mime TEXT, sha256 TEXT
+);
+INSERT INTO mensaje VALUES (1, 10, NULL);
+"""
+
+
+@pytest.fixture
+def s3(monkeypatch):
+    monkeypatch.setenv('AWS_ACCESS_KEY_ID', os.getenv('AWS_ACCESS_KEY_ID', 'test'))
+    monkeypatch.setenv('AWS_SECRET_ACCESS_KEY', os.getenv('AWS_SECRET_ACCESS_KEY', 'test'))
+    prefijo = f'pruebas/{uuid.uuid4().hex}/'
+    try:
+        from moto import mock_aws
+    except ImportError:
+        mock_aws = None
+    if mock_aws is not None:
+        with mock_aws():
+            boto3.client('s3', region_name='us-east-1').create_bucket(Bucket='adj')
+            yield almacenamiento.AlmacenamientoS3('adj', prefijo=prefijo, region='us-east-1')
+        return
+    endpoint = os.getenv('ADJUNTOS_S3_ENDPOINT_PRUEBAS')
+    if not endpoint:
+        pytest.skip('Sin moto ni ADJUNTOS_S3_ENDPOINT_PRUEBAS')
+    yield almacenamiento.AlmacenamientoS3(
+        os.getenv('ADJUNTOS_S3_BUCKET_PRUEBAS', 'adj'), prefijo=prefijo, endpoint_url=endpoint, region='us-east-1',
+    )
+
+
+@pytest.fixture
+def subidas(s3, bd_sqlite, tmp_path, monkeypatch):
+    conexion, conectar = bd_sqlite
+    conexion.executescript(_ESQUEMA)
+    monkeypatch.setattr(conexion_login, 'get_local_db_connection', conectar)
+    monkeypatch.setattr(adjunto_subida_model, 'get_local_db_connection', conectar)
+    monkeypatch.setattr(almacenamiento, '_almacen', s3)
+    monkeypatch.setattr(adjunto_subida_model.AdjuntoModel, 'despues_de_crear', staticmethod(lambda *a: None))
+    # Un nodo sin disco compartido: nada debe escribirse aquí
+    monkeypatch.setenv('ADJUNTOS_DIR', str(tmp_path))
+    return conexion
+
+
+def _subir(datos, trozo, otro_nodo=False):
+    subida = AdjuntoSubidaModel.iniciar(1, 7, 'video.mp4', len(datos))
+    while True:
+        actual = AdjuntoSubidaModel.buscar(subida['id_subida'])
+        offset = int(actual['recibido'])
+        if offset == len(datos):
+            return actual
+        if otro_nodo:
+            # Cada trozo lo atiende un proceso distinto (sin estado SHA-256 local)
+            adjunto_subida_model._hashes.clear()
+        parte = datos[offset:offset + trozo]
+        AdjuntoSubidaModel.escribir_trozo(actual, offset, io.BytesIO(parte), len(parte))
+
+
+@pytest.mark.parametrize('otro_nodo', [False, True])
+def test_subida_multipart_completa(subidas, s3, tmp_path, otro_nodo):
+    datos = os.urandom(12 * MB + 123)
+    subida = _subir(datos, 5 * MB, otro_nodo=otro_nodo)
+
+    assert subida['id_multipart']
+    assert int(subida['partes']) == 3
+    assert AdjuntoSubidaModel.chunk_min(subida) == almacenamiento.PARTE_MIN_BYTES
+
+    resultado = AdjuntoSubidaModel.completar(subida, hashlib.sha256(datos).hexdigest())
+
+    assert resultado['sha256'] == hashlib.sha256(datos).hexdigest()
+    with s3.abrir(subida['ruta']) as f:
+        assert f.read() == datos
+    adjunto = subidas.execute('SELECT * FROM adjunto').fetchone()
+    assert adjunto['ruta'] == subida['ruta'] and adjunto['tamano'] == len(datos)
+    assert subidas.execute('SELECT COUNT(*) FROM adjunto_subida').fetchone()[0] == 0
+    assert list(tmp_path.rglob('*')) == []
+
+
+def test_subida_multipart_sha_distinto_descarta(subidas, s3):
+    datos = os.urandom(6 * MB)
+    subida = _subir(datos, 5 * MB)
+
+    with pytest.raises(ValueError):
+        AdjuntoSubidaModel.completar(subida, '0' * 64)
+
+    assert s3.info(subida['ruta']) is None
+    assert subidas.execute('SELECT COUNT(*) FROM adjunto_subida').fetchone()[0] == 0
+    assert subidas.execute('SELECT COUNT(*) FROM adjunto').fetchone()[0] == 0
+
+
+def test_cancelar_aborta_multipart(subidas, s3):
+    subida = AdjuntoSubidaModel.iniciar(1, 7, 'video.mp4', 10 * MB)
+    AdjuntoSubidaModel.escribir_trozo(subida, 0, io.BytesIO(b'x' * 5 * MB), 5 * MB)
+
+    AdjuntoSubidaModel.cancelar(subida)
+
+    pendientes = s3._cliente.list_multipart_uploads(Bucket=s3.bucket, Prefix=s3.prefijo).get('Uploads', [])
+    assert pendientes == []
+    assert subidas.execute('SELECT COUNT(*) FROM adjunto_subida').fetchone()[0] == 0
+
+
+def test_archivo_local_descarga_a_disco_y_lo_borra(s3, monkeypatch):
+    monkeypatch.setattr(almacenamiento, '_almacen', s3)
+    datos = os.urandom(3 * MB)
+    guardado = almacenamiento.guardar('informe.pdf', io.BytesIO(datos))
+
+    with almacenamiento.archivo_local(guardado.clave) as ruta:
+        assert ruta.endswith('.pdf')
+        with open(ruta, 'rb') as f:
+            assert f.read() == datos
+
+    assert not os.path.exists(ruta)